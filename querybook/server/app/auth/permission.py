@@ -1,8 +1,10 @@
+from collections import namedtuple
 from flask_login import current_user
 from typing import List, Optional
 
 from app.db import with_session
 from app.datasource import abort_request, api_assert
+from app.permission_cache import get_cached_permission
 from const.datasources import (
     ACCESS_RESTRICTED_STATUS_CODE,
     RESOURCE_NOT_FOUND_STATUS_CODE,
@@ -12,13 +14,17 @@ from models.admin import QueryEngine, QueryMetastore, QueryEngineEnvironment
 from models.query_execution import QueryExecution, StatementExecution
 from models.metastore import DataSchema, DataTable, DataTableColumn
 from models.datadoc import DataDoc, DataCell, DataDocDataCell
-from logic.query_execution_permission import (
-    user_can_access_query_execution,
-    get_user_environments_by_execution_id,
+from logic.datadoc_permission import (
+    get_data_cell_permission_resource,
+    get_data_doc_permission_resource,
 )
+from logic.query_execution_permission import user_can_access_query_execution
 from logic import query_execution as query_execution_logic
 from models.board import Board
 
+# The id and shareable flag of an environment of a query execution
+ExecutionEnvironment = namedtuple("ExecutionEnvironment", ["id", "shareable"])
+
 
 def abort_404(message: Optional[str] = None):
     abort_request(status_code=RESOURCE_NOT_FOUND_STATUS_CODE, message=message)
@@ -31,8 +37,9 @@ def verify_environment_permission(environment_ids: List[int]):
     if len(environment_ids) == 0:
         abort_404("Requested resource is not available within accessible environment")
 
+    user_environment_ids = current_user.environment_ids
     api_assert(
-        any(eid in current_user.environment_ids for eid in environment_ids),
+        any(eid in user_environment_ids for eid in environment_ids),
         message="Unauthorized Environment",
         status_code=ACCESS_RESTRICTED_STATUS_CODE,
     )
@@ -54,59 +61,90 @@ def verify_query_engine_environment_permission(
 
 @with_session
 def verify_query_engine_permission(query_engine_id, session=None):
-    environment_ids = [
-        eid
-        for eid, in session.query(QueryEngineEnvironment.environment_id)
-        .join(QueryEngine)
-        .filter(QueryEngine.id == query_engine_id)
-    ]
+    environment_ids = get_cached_permission(
+        f"query_engine:{query_engine_id}",
+        lambda: [
+            eid
+            for eid, in session.query(QueryEngineEnvironment.environment_id)
+            .join(QueryEngine)
+            .filter(QueryEngine.id == query_engine_id)
+        ],
+    )
     verify_environment_permission(environment_ids)
 
 
 @with_session
 def verify_query_execution_permission(query_execution_id, session=None):
-    user_envs = get_user_environments_by_execution_id(
-        query_execution_id, current_user.id, session=session
-    )
+    user_environment_ids = current_user.environment_ids
+    user_envs = [
+        env
+        for env in get_query_execution_environments(query_execution_id, session=session)
+        if env.id in user_environment_ids
+    ]
     verify_environment_permission([e.id for e in user_envs])
     verify_query_execution_access(query_execution_id, user_envs, session=session)
 
 
+@with_session
+def get_query_execution_environments(
+    query_execution_id, session=None
+) -> List[ExecutionEnvironment]:
+    environments = get_cached_permission(
+        f"query_execution:{query_execution_id}",
+        lambda: [
+            [env.id, env.shareable]
+            for env in query_execution_logic.get_environments_by_execution_id(
+                query_execution_id, session=session
+            )
+        ],
+    )
+    return [ExecutionEnvironment(*env) for env in environments]
+
+
 @with_session
 def verify_statement_execution_permission(statement_execution_id, session=None):
-    environment_ids = [
-        eid
-        for eid, in session.query(QueryEngineEnvironment.environment_id)
-        .join(QueryEngine)
-        .join(QueryExecution)
-        .join(StatementExecution)
-        .filter(StatementExecution.id == statement_execution_id)
-    ]
+    environment_ids = get_cached_permission(
+        f"statement_execution:{statement_execution_id}",
+        lambda: [
+            eid
+            for eid, in session.query(QueryEngineEnvironment.environment_id)
+            .join(QueryEngine)
+            .join(QueryExecution)
+            .join(StatementExecution)
+            .filter(StatementExecution.id == statement_execution_id)
+        ],
+    )
     verify_environment_permission(environment_ids)
 
 
 @with_session
 def verify_metastore_permission(metastore_id, session=None):
-    environment_ids = [
-        eid
-        for eid, in session.query(QueryEngineEnvironment.environment_id)
-        .join(QueryEngine)
-        .join(QueryMetastore)
-        .filter(QueryMetastore.id == metastore_id)
-    ]
+    environment_ids = get_cached_permission(
+        f"metastore:{metastore_id}",
+        lambda: [
+            eid
+            for eid, in session.query(QueryEngineEnvironment.environment_id)
+            .join(QueryEngine)
+            .join(QueryMetastore)
+            .filter(QueryMetastore.id == metastore_id)
+        ],
+    )
     verify_environment_permission(environment_ids)
 
 
 @with_session
 def verify_data_schema_permission(schema_id, session=None):
-    environment_ids = [
-        eid
-        for eid, in session.query(QueryEngineEnvironment.environment_id)
-        .join(QueryEngine)
-        .join(QueryMetastore)
-        .join(DataSchema)
-        .filter(DataSchema.id == schema_id)
-    ]
+    environment_ids = get_cached_permission(
+        f"data_schema:{schema_id}",
+        lambda: [
+            eid
+            for eid, in session.query(QueryEngineEnvironment.environment_id)
+            .join(QueryEngine)
+            .join(QueryMetastore)
+            .join(DataSchema)
+            .filter(DataSchema.id == schema_id)
+        ],
+    )
 
     verify_environment_permission(environment_ids)
 
@@ -119,29 +157,35 @@ def verify_data_table_permission(table_id, session=None):
 
 @with_session
 def get_data_table_environment_ids(table_id, session=None):
-    return [
-        eid
-        for eid, in session.query(QueryEngineEnvironment.environment_id)
-        .join(QueryEngine)
-        .join(QueryMetastore)
-        .join(DataSchema)
-        .join(DataTable)
-        .filter(DataTable.id == table_id)
-    ]
+    return get_cached_permission(
+        f"data_table:{table_id}",
+        lambda: [
+            eid
+            for eid, in session.query(QueryEngineEnvironment.environment_id)
+            .join(QueryEngine)
+            .join(QueryMetastore)
+            .join(DataSchema)
+            .join(DataTable)
+            .filter(DataTable.id == table_id)
+        ],
+    )
 
 
 @with_session
 def verify_data_column_permission(column_id, session=None):
-    environment_ids = [
-        eid
-        for eid, in session.query(QueryEngineEnvironment.environment_id)
-        .join(QueryEngine)
-        .join(QueryMetastore)
-        .join(DataSchema)
-        .join(DataTable)
-        .join(DataTableColumn)
-        .filter(DataTableColumn.id == column_id)
-    ]
+    environment_ids = get_cached_permission(
+        f"data_column:{column_id}",
+        lambda: [
+            eid
+            for eid, in session.query(QueryEngineEnvironment.environment_id)
+            .join(QueryEngine)
+            .join(QueryMetastore)
+            .join(DataSchema)
+            .join(DataTable)
+            .join(DataTableColumn)
+            .filter(DataTableColumn.id == column_id)
+        ],
+    )
     verify_environment_permission(environment_ids)
 
 
@@ -153,23 +197,29 @@ def verify_data_doc_permission(data_doc_id, session=None):
 
 @with_session
 def get_data_doc_environment_ids(data_doc_id, session=None):
-    return [
-        eid
-        for eid, in session.query(DataDoc.environment_id).filter(
-            DataDoc.id == data_doc_id
-        )
-    ]
+    return get_cached_permission(
+        get_data_doc_permission_resource(data_doc_id),
+        lambda: [
+            eid
+            for eid, in session.query(DataDoc.environment_id).filter(
+                DataDoc.id == data_doc_id
+            )
+        ],
+    )
 
 
 @with_session
 def verify_data_cell_permission(cell_id, session=None):
-    environment_ids = [
-        eid
-        for eid, in session.query(DataDoc.environment_id)
-        .join(DataDocDataCell)
-        .join(DataCell)
-        .filter(DataCell.id == cell_id)
-    ]
+    environment_ids = get_cached_permission(
+        get_data_cell_permission_resource(cell_id),
+        lambda: [
+            eid
+            for eid, in session.query(DataDoc.environment_id)
+            .join(DataDocDataCell)
+            .join(DataCell)
+            .filter(DataCell.id == cell_id)
+        ],
+    )
     verify_environment_permission(environment_ids)
 
 
@@ -214,6 +264,10 @@ def verify_query_execution_access(execution_id, user_envs, session=None):
 
 @with_session
 def get_board_environment_ids(board_id, session=None):
-    return [
-        eid for eid, in session.query(Board.environment_id).filter(Board.id == board_id)
-    ]
+    return get_cached_permission(
+        f"board:{board_id}",
+        lambda: [
+            eid
+            for eid, in session.query(Board.environment_id).filter(Board.id == board_id)
+        ],
+    )
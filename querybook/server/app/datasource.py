@@ -10,6 +10,7 @@ from werkzeug.exceptions import Forbidden, NotFound
 
 from app.flask_app import flask_app, limiter
 from app.db import get_session
+from app.permission_cache import log_request_stats
 from const.datasources import DS_PATH
 from lib.logger import get_logger
 from logic.impression import create_impression
@@ -164,3 +165,9 @@ def teardown_database_session(error):
     database_session = flask.g.pop("database_session", None)
     if database_session is not None:
         get_session().remove()
+
+
+@flask_app.teardown_request
+def teardown_permission_cache(error):
+    """Log the permission queries saved by the cache in the request"""
+    log_request_stats()
@@ -0,0 +1,209 @@
+import json
+import time
+from typing import Any, Callable, Dict, Tuple
+
+from flask import g, has_request_context
+from sqlalchemy import event
+
+from clients.redis_client import with_redis
+from env import QuerybookSettings
+from lib.logger import get_logger
+
+LOG = get_logger(__file__)
+
+# The permissions resolved while handling a request (or socket event) are
+# kept in flask.g, so that checking the same doc or execution several times
+# only queries the database once. If PERMISSION_CACHE_TTL is set they are
+# also kept in redis, in a hash per resource with a field per user, so that
+# a change of the resource invalidates it for all the users at once.
+REDIS_PERMISSION_CACHE_KEY_PREFIX = "permission_cache:"
+# Incremented to invalidate all the cached permissions
+REDIS_PERMISSION_CACHE_VERSION_KEY = "permission_cache_version"
+
+# Key of the values that are the same for every user
+ANY_USER = "*"
+
+
+def get_cached_permission(
+    resource: str, fetch: Callable[[], Any], uid: Any = ANY_USER
+) -> Any:
+    """Get the permission of the user on the resource, fetching it
+       if it was not resolved in this request (or recently)
+
+    Arguments:
+        resource {str} -- Type and id of the resource, e.g. "data_doc:1"
+        fetch {Callable[[], Any]} -- Queries the permission, the result
+                                     must be json serializable
+
+    Keyword Arguments:
+        uid {Any} -- The user, leave it out if the value is the same
+                     for every user (default: {ANY_USER})
+
+    Returns:
+        Any -- The permission, which must not be modified
+    """
+    # Permissions are only cached for the datasource and socket handlers
+    if not has_request_context():
+        return fetch()
+
+    request_cache, stats = _get_request_cache()
+    cache_key = (resource, str(uid))
+    if cache_key in request_cache:
+        stats["request_hits"] += 1
+        return request_cache[cache_key]
+
+    found, value = False, None
+    if QuerybookSettings.PERMISSION_CACHE_TTL:
+        found, value = _load_permission(resource, str(uid))
+    if found:
+        stats["redis_hits"] += 1
+    else:
+        stats["misses"] += 1
+        value = fetch()
+        if QuerybookSettings.PERMISSION_CACHE_TTL:
+            _persist_permission(resource, str(uid), value)
+
+    request_cache[cache_key] = value
+    return value
+
+
+def invalidate_permissions(*resources: str, session=None):
+    """Remove the cached permissions of all the users on the resources,
+       called when the owner, editors or environments of a resource change
+
+    Keyword Arguments:
+        session -- The session of the change, the permissions are removed again
+                   once it commits, since a concurrent request may have cached
+                   them before the change was committed (default: {None})
+    """
+    _invalidate_permissions(resources)
+    if session is not None:
+        _on_commit(session, lambda: _invalidate_permissions(resources))
+
+
+def invalidate_all_permissions(session=None):
+    """Remove all the cached permissions, called when a change
+       (e.g. the engines of an environment) affects many resources
+
+    Keyword Arguments:
+        session -- The session of the change, the permissions are removed again
+                   once it commits (default: {None})
+    """
+    _invalidate_all_permissions()
+    if session is not None:
+        _on_commit(session, _invalidate_all_permissions)
+
+
+def _on_commit(session, callback: Callable[[], None]):
+    event.listen(session, "after_commit", lambda _: callback(), once=True)
+
+
+def _invalidate_permissions(resources: Tuple[str]):
+    if has_request_context() and "permission_cache" in g:
+        g.permission_cache = {
+            cache_key: value
+            for cache_key, value in g.permission_cache.items()
+            if cache_key[0] not in resources
+        }
+    if QuerybookSettings.PERMISSION_CACHE_TTL:
+        _delete_permissions(resources)
+
+
+def _invalidate_all_permissions():
+    if has_request_context():
+        g.pop("permission_cache", None)
+        g.pop("permission_cache_version", None)
+    if QuerybookSettings.PERMISSION_CACHE_TTL:
+        _increment_version()
+
+
+def get_request_stats() -> Dict[str, int]:
+    """Get the number of permissions resolved in the current request
+
+    Returns:
+        Dict[str, int] -- The number found in the request cache, found in redis,
+                          and queried from the database
+    """
+    if has_request_context() and "permission_cache_stats" in g:
+        return dict(g.permission_cache_stats)
+    return {"request_hits": 0, "redis_hits": 0, "misses": 0}
+
+
+def log_request_stats():
+    stats = get_request_stats()
+    queries_saved = stats["request_hits"] + stats["redis_hits"]
+    if queries_saved:
+        LOG.debug(
+            f"Permission cache saved {queries_saved} queries "
+            f"({stats['request_hits']} from request, {stats['redis_hits']} from redis), "
+            f"{stats['misses']} queried"
+        )
+
+
+def _get_request_cache() -> Tuple[Dict, Dict[str, int]]:
+    if "permission_cache" not in g:
+        g.permission_cache = {}
+    if "permission_cache_stats" not in g:
+        g.permission_cache_stats = {"request_hits": 0, "redis_hits": 0, "misses": 0}
+    return g.permission_cache, g.permission_cache_stats
+
+
+def _get_redis_key(resource: str, redis_conn) -> str:
+    return f"{REDIS_PERMISSION_CACHE_KEY_PREFIX}{_get_version(redis_conn)}:{resource}"
+
+
+def _get_version(redis_conn) -> int:
+    # The version is read once per request
+    if has_request_context() and "permission_cache_version" in g:
+        return g.permission_cache_version
+
+    version = redis_conn.get(REDIS_PERMISSION_CACHE_VERSION_KEY)
+    version = int(version) if version else 0
+    if has_request_context():
+        g.permission_cache_version = version
+    return version
+
+
+@with_redis
+def _load_permission(resource: str, uid: str, redis_conn=None) -> Tuple[bool, Any]:
+    try:
+        cached = redis_conn.hget(_get_redis_key(resource, redis_conn), uid)
+        if cached is not None:
+            value, expires_at = json.loads(cached)
+            # Other users of the resource may have extended the hash expiration
+            if expires_at > time.time():
+                return True, value
+    except Exception:
+        # The permission is queried if redis is not available
+        LOG.warning("Failed to load cached permission", exc_info=True)
+    return False, None
+
+
+@with_redis
+def _persist_permission(resource: str, uid: str, value: Any, redis_conn=None):
+    ttl = QuerybookSettings.PERMISSION_CACHE_TTL
+    try:
+        redis_key = _get_redis_key(resource, redis_conn)
+        with redis_conn.pipeline() as pipe:
+            pipe.hset(redis_key, uid, json.dumps([value, time.time() + ttl]))
+            pipe.expire(redis_key, ttl)
+            pipe.execute()
+    except Exception:
+        LOG.warning("Failed to persist cached permission", exc_info=True)
+
+
+@with_redis
+def _delete_permissions(resources: Tuple[str], redis_conn=None):
+    try:
+        redis_keys = [_get_redis_key(resource, redis_conn) for resource in resources]
+        redis_conn.delete(*redis_keys)
+    except Exception:
+        LOG.error("Failed to invalidate cached permissions", exc_info=True)
+
+
+@with_redis
+def _increment_version(redis_conn=None):
+    try:
+        redis_conn.incr(REDIS_PERMISSION_CACHE_VERSION_KEY)
+    except Exception:
+        LOG.error("Failed to invalidate cached permissions", exc_info=True)
@@ -1,11 +1,14 @@
 from abc import ABCMeta, abstractmethod
 from collections import deque
+import csv
 from itertools import islice
-from typing import Generator, List
+from typing import Callable, Generator, List
 
 
 from env import QuerybookSettings
-from lib.utils.csv import string_to_csv, LINE_TERMINATOR, split_csv_to_chunks
+from lib.utils.compression import StreamDecompressor
+from lib.utils.csv import LINE_TERMINATOR
+from lib.utils.utf8 import split_by_last_invalid_utf8_char
 
 
 class FileDoesNotExist(Exception):
@@ -28,44 +31,37 @@ class ChunkReader(metaclass=ABCMeta):
         self._buffer_deque = deque([])
         self._raw_buffer = ""
 
+        self._decompressor = StreamDecompressor()
+        self._left_over_bytes = b""
+
     def get_csv_iter(self, number_of_lines=None):
-        csv_line_count = 0
-        partial_csv_lines = []
-        for csv_chunk in self._read_csv_chunk():
-            valid_csv_chunk, partial_csv_lines = split_csv_to_chunks(
-                partial_csv_lines + csv_chunk
-            )
-            if len(valid_csv_chunk) == 0:
-                continue
-
-            csv_chunk_str = LINE_TERMINATOR.join(valid_csv_chunk)
-            csv = string_to_csv(csv_chunk_str)
-
-            if number_of_lines is None:
-                yield from csv
-            else:
-                rows_to_yield = min(len(csv), number_of_lines - csv_line_count)
-                csv_line_count += rows_to_yield
-                yield from islice(csv, rows_to_yield)
-
-                if csv_line_count >= number_of_lines:
-                    break
-
-    def _read_csv_chunk(self) -> Generator[List[str], None, None]:
-        """
-        Similar to read_line, get the entire chunk of buffer_deque and process
-        them together as CSV
+        """Parse the file as csv while it is being read. The csv reader keeps
+        its state across lines, so cells with new lines are parsed in one pass
         """
-        while (not self._eof) or len(self._buffer_deque):
-            if len(self._buffer_deque) > 0:
-                line_chunks = []
-                while len(self._buffer_deque) > 0:
-                    line_chunks.append(self._buffer_deque.popleft())
-                yield line_chunks
-
-            # If not at the end, perform another round of loading
-            if not self._eof:
-                self._fill_buffer()
+        is_eof = False
+
+        def csv_lines():
+            nonlocal is_eof
+            for line in self.read_line():
+                # Remove NULL byte to make sure csv conversion works
+                yield line.replace("\x00", "") + LINE_TERMINATOR
+            is_eof = True
+
+        for row in islice(csv.reader(csv_lines()), number_of_lines):
+            # The reader only asks for more lines in the middle of a row, so a row
+            # parsed after eof is partial. This happens when the max read size
+            # is reached inside a cell
+            if is_eof:
+                break
+            yield row
+
+    def get_raw_iter(self) -> Generator[str, None, None]:
+        """Read the entire file chunk by chunk, the max read size does not apply"""
+        while True:
+            raw = self.read()
+            if not len(raw):
+                break
+            yield raw
 
     def read_lines(self, number_of_lines=None) -> List[str]:
         return [line for line in islice(self.read_line(), number_of_lines)]
@@ -112,6 +108,26 @@ class ChunkReader(metaclass=ABCMeta):
             ):
                 self._buffer_deque.append(self._raw_buffer)
 
+    def _read_decoded(self, read_bytes: Callable[[], bytes]) -> str:
+        """Helper for read, compressed files are decompressed transparently
+           so the max read size is always in terms of decompressed chars
+
+        Arguments:
+            read_bytes {Callable[[], bytes]} -- Returns the next raw chunk of the file,
+                                                b"" when reaching eof
+
+        Returns:
+            str -- Same as read
+        """
+        while True:
+            raw = read_bytes()
+            data = self._left_over_bytes + self._decompressor.decompress(raw)
+            valid_data, self._left_over_bytes = split_by_last_invalid_utf8_char(data)
+            # A compressed chunk may not produce any char,
+            # keep reading since empty string means eof
+            if len(valid_data) or not len(raw):
+                return valid_data.decode("utf-8")
+
     @abstractmethod
     def read(self) -> str:
         """
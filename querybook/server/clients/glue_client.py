@@ -1,3 +1,4 @@
+import re
 from typing import Dict, List
 
 import boto3
@@ -6,6 +7,18 @@ from lib.logger import get_logger
 
 _LOG = get_logger(__file__)
 
+# Glue types of the partition keys whose values are compared as numbers
+NUMERIC_PARTITION_KEY_TYPES = (
+    "tinyint",
+    "smallint",
+    "int",
+    "bigint",
+    "float",
+    "double",
+    "decimal",
+)
+NUMBER_REGEX = re.compile(r"-?\d+(\.\d+)?")
+
 
 class GlueDataCatalogClient:
     def __init__(self, catalog_id, region=QuerybookSettings.AWS_REGION):
@@ -88,12 +101,22 @@ class GlueDataCatalogClient:
             CatalogId=self.catalog_id, DatabaseName=db_name, Name=tb_name
         )
 
-    def get_partitions(self, db_name, tb_name):
+    def get_partitions(
+        self,
+        db_name,
+        tb_name,
+        conditions: Dict[str, str] = None,
+        exclude_column_schema=False,
+        partition_key_types: Dict[str, str] = None,
+    ):
         """
         Gets partition information for db_name.tb_name from the Glue Data Catalog
 
         :param db_name: The name of the database
         :param tb_name: The name of the table
+        :param conditions: Only get the partitions matching these values in the format { dt: '2016-03-14'}
+        :param exclude_column_schema: Leave out the columns of the partitions, which are most of their size
+        :param partition_key_types: The Glue types of the partition keys in the format { hr: 'int' }
         :return: The Glue partition objects of db_name.tb_name
         """
         _LOG.info(f"Get Glue partitions for ${db_name}.${tb_name}")
@@ -102,8 +125,19 @@ class GlueDataCatalogClient:
         partition_list = []
         result = {}
 
+        params = {}
+        if conditions:
+            params["Expression"] = get_partition_expression(
+                conditions, partition_key_types
+            )
+        if exclude_column_schema:
+            params["ExcludeColumnSchema"] = True
+
         for page in paginator.paginate(
-            CatalogId=self.catalog_id, DatabaseName=db_name, TableName=tb_name
+            CatalogId=self.catalog_id,
+            DatabaseName=db_name,
+            TableName=tb_name,
+            **params,
         ):
             partition_list.extend(page.get("Partitions", []))
 
@@ -112,7 +146,11 @@ class GlueDataCatalogClient:
         return result
 
     def get_hms_style_partitions(
-        self, db_name, tb_name, conditions: Dict[str, str] = None
+        self,
+        db_name,
+        tb_name,
+        conditions: Dict[str, str] = None,
+        push_down_conditions=False,
     ) -> List[str]:
         """
         Gets partitiion information for db_name.tb_name from Glue Data Catalog and converts into a
@@ -121,6 +159,8 @@ class GlueDataCatalogClient:
         :param db_name: The name of the database
         :param tb_name: The name of the table
         :param conditions: Filter conditions for the partition in the format { dt: '2016-03-14'}
+        :param push_down_conditions: Filter the partitions in Glue with an expression,
+                                     instead of fetching all of them
         :return: The partitions of db_name.tb_name in the format ['dt=2016-03-14/hr=00', 'dt=2016-03-14/hr=01', ...]
         """
         _LOG.info(f"Get hms style partitions for ${db_name}.${tb_name}")
@@ -131,7 +171,17 @@ class GlueDataCatalogClient:
             partition_key.get("Name") for partition_key in partition_keys
         ]
 
-        partitions = self.get_partitions(db_name, tb_name)
+        # Only the values of the partitions are needed
+        partitions = self.get_partitions(
+            db_name,
+            tb_name,
+            conditions if push_down_conditions else None,
+            exclude_column_schema=True,
+            partition_key_types={
+                partition_key.get("Name"): partition_key.get("Type")
+                for partition_key in partition_keys
+            },
+        )
         partition_list = partitions.get("Partitions")
         partition_values = [partition.get("Values") for partition in partition_list]
 
@@ -157,3 +207,31 @@ class GlueDataCatalogClient:
             )
 
         return result
+
+
+def get_partition_expression(
+    conditions: Dict[str, str], partition_key_types: Dict[str, str] = None
+) -> str:
+    """Returns the Glue partition expression matching the conditions
+
+    :param conditions: Values of the partition keys in the format { dt: '2016-03-14', hr: '00'}
+    :param partition_key_types: The Glue types of the partition keys in the format { hr: 'int' },
+                                the values of numeric keys are not quoted
+    :return: The expression in the format "dt = '2016-03-14' AND hr = 0"
+    """
+    partition_key_types = partition_key_types or {}
+    return " AND ".join(
+        "{} = {}".format(
+            key, _format_partition_value(value, partition_key_types.get(key))
+        )
+        for key, value in conditions.items()
+    )
+
+
+def _format_partition_value(value, partition_key_type: str = None) -> str:
+    value = str(value)
+    if (partition_key_type or "").lower().startswith(
+        NUMERIC_PARTITION_KEY_TYPES
+    ) and NUMBER_REGEX.fullmatch(value):
+        return value
+    return "'{}'".format(value.replace("'", "''"))
@@ -1,6 +1,7 @@
 from io import BytesIO
 from os import SEEK_END
 from datetime import datetime
+from typing import List
 from urllib.parse import quote
 
 import requests
@@ -115,6 +116,7 @@ class GoogleDownloadClient(ChunkReader):
         blob_name,
         read_size=QuerybookSettings.STORE_READ_SIZE,
         max_read_size=QuerybookSettings.STORE_MAX_READ_SIZE,
+        offset=0,
     ):
         from google.cloud import storage
         from google.auth.transport.requests import AuthorizedSession
@@ -139,13 +141,18 @@ class GoogleDownloadClient(ChunkReader):
             f"{bucket_name}/o/{quote(blob_name, safe='')}?alt=media"
         )
 
-        self._download = ChunkedDownload(download_url, read_size, self._stream)
+        self._download = ChunkedDownload(
+            download_url, read_size, self._stream, start=offset
+        )
 
         super(GoogleDownloadClient, self).__init__(read_size, max_read_size)
 
     def read(self):
+        return self._read_decoded(self._read_bytes)
+
+    def _read_bytes(self) -> bytes:
         if self._download.finished:
-            return ""
+            return b""
         self._download.consume_next_chunk(self._transport)
         self._stream.seek(0)
         content = self._stream.read()
@@ -154,7 +161,35 @@ class GoogleDownloadClient(ChunkReader):
         self._stream.seek(0)
         self._stream.truncate(0)
 
-        return content.decode("utf-8")
+        return content
+
+
+# Max number of calls of a batch request
+GOOGLE_BATCH_MAX_CALLS = 100
+
+
+def delete_google_blobs(bucket_name: str, blob_names: List[str]):
+    """Delete the blobs with one batch request per GOOGLE_BATCH_MAX_CALLS blobs,
+       the blobs that do not exist are ignored
+
+    Arguments:
+        bucket_name {str}
+        blob_names {List[str]}
+    """
+    from google.api_core.exceptions import NotFound
+    from google.cloud import storage
+
+    cred = get_google_credentials()
+    client = storage.Client(project=cred.project_id, credentials=cred)
+    bucket = client.bucket(bucket_name)
+    for start in range(0, len(blob_names), GOOGLE_BATCH_MAX_CALLS):
+        try:
+            with client.batch():
+                for blob_name in blob_names[start : start + GOOGLE_BATCH_MAX_CALLS]:
+                    bucket.delete_blob(blob_name)
+        except NotFound:
+            # The batch is sent as a whole, so the other blobs are deleted
+            pass
 
 
 class GoogleKeySigner(object):
@@ -41,8 +41,13 @@ class HiveMetastoreClient:
         self._retry_interval_seconds = retry_interval_seconds
 
     def __del__(self):
+        self.close()
+
+    def close(self):
         self._close_client(self._read_client)
         self._close_client(self._write_client)
+        self._read_client = None
+        self._write_client = None
 
     # Connection utils:
     @staticmethod
@@ -223,6 +228,22 @@ class HiveMetastoreClient:
             lambda: self._read_client.get_table(db_name, tb_name)
         )
 
+    def get_tables(self, db_name: str, tb_names: List[str]):
+        """
+        Queries the hive metastore for the table info of several tables at once
+
+        Args:
+            db_name: The name of the database
+            tb_names: The names of the tables
+
+        Returns:
+            List of hive_metastore.ttypes.Table objects, the tables
+            which do not exist are left out
+        """
+        return self._perform_read_op(
+            lambda: self._read_client.get_table_objects_by_name(db_name, tb_names)
+        )
+
     def _get_table_partition_keys(self, db_name: str, tb_name: str) -> List[str]:
         """
         Queries the hive metastore DB for table partition keys
@@ -281,6 +302,33 @@ class HiveMetastoreClient:
             lambda: self._read_client.get_partition_names(db_name, tb_name, -1)
         )
 
+    def get_partition_names(
+        self, db_name: str, tb_name: str, partition_values: List[str] = None
+    ) -> List[str]:
+        """
+        Queries the hive metastore DB for the names of the table partitions,
+        which is much less data than the partitions themselves
+
+        Args:
+            db_name: The name of the db
+            tb_name: The name of the table
+            partition_values: If given, only return the partitions matching these values of the
+                              partition keys, in the order of the keys. An empty value matches any value.
+                              e.g. ["2016-03-14", ""]
+
+        Returns: The partition names sorted by name, in the format ['dt=2016-03-14/hr=00', 'dt=2016-03-14/hr=01', ...]
+        """
+        _LOG.info("Get partition names of %s.%s", db_name, tb_name)
+        if partition_values:
+            return self._perform_read_op(
+                lambda: self._read_client.get_partition_names_ps(
+                    db_name, tb_name, partition_values, -1
+                )
+            )
+        return self._perform_read_op(
+            lambda: self._read_client.get_partition_names(db_name, tb_name, -1)
+        )
+
 
 def format_partition_from_keys_and_values(
     partition_keys: List[str], partition_values: List[str]
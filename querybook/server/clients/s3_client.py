@@ -1,24 +1,68 @@
-from typing import Dict, TextIO
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import time
+from typing import Dict, List, Optional, TextIO, Union
 import boto3
 import botocore
 from botocore.client import Config
 
 
 from env import QuerybookSettings
-from lib.utils.utf8 import split_by_last_invalid_utf8_char
+from lib.logger import get_logger
 
 from .common import ChunkReader, FileDoesNotExist
 
+LOG = get_logger(__file__)
+
 
 class MultiPartUploader(object):
-    def __init__(self, bucket_name, key):
+    # Number of times a part upload is attempted before failing the upload
+    UPLOAD_PART_MAX_ATTEMPTS = 3
+
+    def __init__(
+        self, bucket_name, key, max_concurrent_parts=None, content_encoding=None
+    ):
+        """Upload the file to s3 by parts
+
+        Arguments:
+            bucket_name {str}
+            key {str}
+
+        Keyword Arguments:
+            max_concurrent_parts {int} -- Max number of parts that are uploaded
+                at the same time, defaults to STORE_MAX_CONCURRENT_UPLOAD_PARTS.
+                Since write blocks when the limit is reached, at most
+                (max_concurrent_parts + 1) chunks are kept in memory
+            content_encoding {str} -- The Content-Encoding of the file, needs to be
+                set if compressed bytes are written instead of strings
+        """
         self._bucket_name = bucket_name
         self._key = key
         self._s3 = boto3.client("s3")
-        self._mpu = self._s3.create_multipart_upload(Bucket=bucket_name, Key=key)
+        mpu_kwargs = {"ContentEncoding": content_encoding} if content_encoding else {}
+        self._mpu = self._s3.create_multipart_upload(
+            Bucket=bucket_name, Key=key, **mpu_kwargs
+        )
         self._parts = []
         self._part_number = 1
 
+        self._max_concurrent_parts = max(
+            1,
+            max_concurrent_parts
+            if max_concurrent_parts is not None
+            else QuerybookSettings.STORE_MAX_CONCURRENT_UPLOAD_PARTS,
+        )
+        self._executor = None
+        self._part_futures: List[Future] = []
+        self._in_flight_parts = threading.BoundedSemaphore(self._max_concurrent_parts)
+        self._aborted = False
+
+        # Metrics
+        self._metrics_lock = threading.Lock()
+        self._start_time = time.time()
+        self.bytes_uploaded = 0
+        self.part_retries = 0
+
         self.chunk = []
         self.chunk_datasize = 0
         self.is_first_upload = True
@@ -27,51 +71,164 @@ class MultiPartUploader(object):
         if self._part_number > QuerybookSettings.STORE_MAX_UPLOAD_CHUNK_NUM:
             return
 
-        part = self._s3.upload_part(
+        part_number = self._part_number
+        self._part_number += 1
+
+        if self._max_concurrent_parts == 1:
+            self._parts.append(self._upload_part_with_retry(part_number, body))
+            return
+
+        self._raise_part_upload_error()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._max_concurrent_parts,
+                thread_name_prefix="s3_upload_part",
+            )
+        # Blocks until a part finishes if too many parts are in flight
+        self._in_flight_parts.acquire()
+        try:
+            future = self._executor.submit(
+                self._upload_part_with_retry, part_number, body
+            )
+        except Exception:
+            self._in_flight_parts.release()
+            raise
+        future.add_done_callback(lambda _: self._in_flight_parts.release())
+        self._part_futures.append(future)
+
+    def _upload_part_with_retry(self, part_number: int, body) -> Dict:
+        attempt = 1
+        while True:
+            try:
+                part = self._s3.upload_part(
+                    Bucket=self._bucket_name,
+                    Key=self._key,
+                    PartNumber=part_number,
+                    UploadId=self._mpu["UploadId"],
+                    Body=body,
+                )
+                break
+            except botocore.exceptions.ClientError as e:
+                if attempt >= self.UPLOAD_PART_MAX_ATTEMPTS:
+                    raise e
+                LOG.warning(
+                    f"Failed to upload part {part_number} of {self._key}: {e}, "
+                    + f"retrying (attempt {attempt})"
+                )
+                with self._metrics_lock:
+                    self.part_retries += 1
+                time.sleep(2 ** (attempt - 1))
+                attempt += 1
+
+        with self._metrics_lock:
+            self.bytes_uploaded += len(body)
+        return {"PartNumber": part_number, "ETag": part["ETag"].replace('"', "")}
+
+    def _raise_part_upload_error(self):
+        for future in self._part_futures:
+            if future.done() and future.exception() is not None:
+                raise future.exception()
+
+    def _wait_for_parts(self):
+        try:
+            for future in self._part_futures:
+                self._parts.append(future.result())
+        finally:
+            self._part_futures = []
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def _abort(self):
+        """Stop the part uploads and abort the multipart upload,
+        so that s3 does not keep the parts already uploaded
+        """
+        if self._aborted:
+            return
+        self._aborted = True
+        self._part_futures = []
+        if self._executor is not None:
+            # The parts being uploaded are waited for so none is added after the abort
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        self._s3.abort_multipart_upload(
             Bucket=self._bucket_name,
             Key=self._key,
-            PartNumber=self._part_number,
             UploadId=self._mpu["UploadId"],
-            Body=body,
-        )
-
-        self._parts.append(
-            {"PartNumber": self._part_number, "ETag": part["ETag"].replace('"', "")}
         )
-        self._part_number += 1
 
-    def write(self, string: str) -> bool:
+    def write(self, string: Union[str, bytes]) -> bool:
         """Write a string to upload
 
         Arguments:
-            string {str} -- the string to upload
+            string {Union[str, bytes]} -- the string to upload, all writes
+                                          should either be str or bytes
 
         Returns:
-            bool -- Whether or not the upload is successful
+            bool -- Whether or not the upload is successful, False once the
+                    upload is aborted because a part failed to upload
         """
-        if self._part_number > QuerybookSettings.STORE_MAX_UPLOAD_CHUNK_NUM:
+        if (
+            self._aborted
+            or self._part_number > QuerybookSettings.STORE_MAX_UPLOAD_CHUNK_NUM
+        ):
             return False
 
         self.chunk.append(string)
         self.chunk_datasize += len(string)
         if self.chunk_datasize > QuerybookSettings.STORE_MIN_UPLOAD_CHUNK_SIZE:
-            self._upload_part("".join(self.chunk))
+            try:
+                self._upload_part(self._join_chunk())
+            except Exception:
+                self._abort()
+                raise
             self.chunk = []
             self.chunk_datasize = 0
         return True
 
+    def _join_chunk(self):
+        if isinstance(self.chunk[0], bytes):
+            return b"".join(self.chunk)
+        return "".join(self.chunk)
+
     def write_line(self, string: str):
         self.write(string + "\n")
 
     def complete(self):
-        if len(self.chunk) > 0:
-            self._upload_part("".join(self.chunk))
+        # The error that aborted the upload was raised by write
+        if self._aborted:
+            return
+
+        try:
+            if len(self.chunk) > 0:
+                self._upload_part(self._join_chunk())
+            self._wait_for_parts()
+        except Exception:
+            self._abort()
+            raise
+
+        self._parts.sort(key=lambda part: part["PartNumber"])
         self._s3.complete_multipart_upload(
             Bucket=self._bucket_name,
             Key=self._key,
             UploadId=self._mpu["UploadId"],
             MultipartUpload={"Parts": self._parts},
         )
+        LOG.debug(
+            f"Uploaded {self.bytes_uploaded} chars in {len(self._parts)} parts "
+            + f"to {self._key} at {self.throughput:.0f} chars/sec "
+            + f"({self.part_retries} retries)"
+        )
+
+    @property
+    def throughput(self) -> float:
+        """The average upload rate since the uploader is created
+
+        Returns:
+            float -- Number of chars uploaded per second
+        """
+        elapsed = time.time() - self._start_time
+        return self.bytes_uploaded / elapsed if elapsed > 0 else 0.0
 
 
 class S3KeySigner(object):
@@ -110,10 +267,15 @@ class S3FileReader(ChunkReader):
         key,
         read_size=QuerybookSettings.STORE_READ_SIZE,
         max_read_size=QuerybookSettings.STORE_MAX_READ_SIZE,
+        offset=0,
     ):
+        """
+        Keyword Arguments:
+            offset {int} -- The byte to start reading from, uses a range request
+                            so the bytes before it are not downloaded (default: {0})
+        """
         self._bucket_name = bucket_name
         self._key = key
-        self._left_over_bytes = b""
 
         super(S3FileReader, self).__init__(read_size, max_read_size)
 
@@ -121,19 +283,88 @@ class S3FileReader(ChunkReader):
         try:
             self._s3 = boto3.resource("s3")
             self._object = self._s3.Object(self._bucket_name, key)
-            self._body = self._object.get()["Body"]
+            get_kwargs = {"Range": f"bytes={offset}-"} if offset else {}
+            response = self._object.get(**get_kwargs)
+            self._body = response["Body"]
+            self.content_encoding = response.get("ContentEncoding")
         except botocore.exceptions.ClientError as e:
-            if e.response["Error"]["Code"] == "NoSuchKey":
+            error_code = e.response["Error"]["Code"]
+            if error_code == "NoSuchKey":
                 raise FileDoesNotExist(
                     "{}/{} does not exist".format(self._bucket_name, key)
                 )
+            elif error_code == "InvalidRange":
+                # The offset is past the end of file
+                self._body = None
+                self.content_encoding = None
             else:
                 raise e
 
     def read(self):
-        raw = self._left_over_bytes + self._body.read(self._read_size)
-        valid_raw, self._left_over_bytes = split_by_last_invalid_utf8_char(raw)
-        return valid_raw.decode("utf-8")
+        return self._read_decoded(self._read_bytes)
+
+    def _read_bytes(self) -> bytes:
+        if self._body is None:
+            return b""
+        return self._body.read(self._read_size)
+
+
+def get_s3_object_content_encoding(bucket_name: str, key: str) -> Optional[str]:
+    """Get the Content-Encoding of the object without downloading it
+
+    Arguments:
+        bucket_name {str}
+        key {str}
+
+    Returns:
+        Optional[str] -- None if the object is not compressed or does not exist
+    """
+    try:
+        response = boto3.client("s3").head_object(Bucket=bucket_name, Key=key)
+    except botocore.exceptions.ClientError as e:
+        if e.response["Error"]["Code"] in ("404", "NoSuchKey"):
+            return None
+        raise e
+    return response.get("ContentEncoding")
+
+
+# Max number of keys of a delete_objects request
+S3_DELETE_OBJECTS_MAX_KEYS = 1000
+
+
+def delete_s3_objects(bucket_name: str, keys: List[str]) -> List[str]:
+    """Delete the objects with one request per S3_DELETE_OBJECTS_MAX_KEYS keys,
+       the keys that do not exist are ignored by S3
+
+    Arguments:
+        bucket_name {str}
+        keys {List[str]}
+
+    Returns:
+        List[str] -- The keys that failed to be deleted
+    """
+    s3 = boto3.client("s3")
+    failed_keys = []
+    for start in range(0, len(keys), S3_DELETE_OBJECTS_MAX_KEYS):
+        response = s3.delete_objects(
+            Bucket=bucket_name,
+            Delete={
+                "Objects": [
+                    {"Key": key}
+                    for key in keys[start : start + S3_DELETE_OBJECTS_MAX_KEYS]
+                ],
+                # Only the errors are returned
+                "Quiet": True,
+            },
+        )
+        errors = response.get("Errors", [])
+        if len(errors):
+            LOG.error(
+                f"Failed to delete {len(errors)} objects from {bucket_name}, "
+                f"first error on {errors[0]['Key']}: {errors[0].get('Message')}"
+            )
+        failed_keys += [error["Key"] for error in errors]
+    return failed_keys
 
 
 class S3FileCopier(object):
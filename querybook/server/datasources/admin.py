@@ -2,14 +2,17 @@ from flask_login import current_user
 
 from app.datasource import register, admin_only, api_assert
 from app.db import DBSession
+from app.permission_cache import invalidate_all_permissions
 from const.admin import AdminOperation, AdminItemType
 from datasources.admin_audit_log import with_admin_audit_log
 from env import QuerybookSettings
 
+from lib.elasticsearch import sync_queue
 from lib.engine_status_checker import (
     ALL_ENGINE_STATUS_CHECKERS,
     get_engine_checker_class,
 )
+from lib.metastore import clear_pooled_metastore_loaders
 from lib.metastore.all_loaders import ALL_METASTORE_LOADERS
 from lib.table_upload.exporter.exporter_factory import ALL_TABLE_UPLOAD_EXPORTER_BY_NAME
 from lib.query_executor.all_executors import (
@@ -216,6 +219,9 @@ def update_query_engine(id, **fields_to_update):
             ],
             session=session,
         )
+        if "metastore_id" in fields_to_update:
+            # The environments of the metastore tables have changed
+            invalidate_all_permissions(session=session)
         query_engine_dict = query_engine.to_dict_admin()
         return query_engine_dict
 
@@ -317,6 +323,8 @@ def update_metastore(
             ),
             session=session,
         )
+        # The pooled loaders use the previous params of the metastore
+        clear_pooled_metastore_loaders(id)
         metastore_dict = metastore.to_dict_admin()
         return metastore_dict
 
@@ -703,3 +711,9 @@ def get_admin_table_upload_exporters():
 @admin_only
 def get_admin_query_validators():
     return list(ALL_QUERY_VALIDATORS_BY_NAME.values())
+
+
+@register("/admin/search/sync_queue/", methods=["GET"])
+@admin_only
+def get_admin_search_sync_queue_stats():
+    return sync_queue.get_queue_stats()
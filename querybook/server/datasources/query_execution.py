@@ -1,4 +1,4 @@
-from flask import abort, Response, redirect
+from flask import abort, request, Response, redirect
 from flask_login import current_user
 
 from app.flask_app import socketio
@@ -11,7 +11,10 @@ from app.auth.permission import (
 )
 from clients.common import FileDoesNotExist
 from lib.export.all_exporters import ALL_EXPORTERS, get_exporter
+from lib.query_executor.log_buffer import get_live_statement_logs
 from lib.result_store import GenericReader
+from lib.result_store.result_cache import get_cached_result, set_cached_result
+from lib.utils.compression import GZIP_COMPRESSION, compress_iter
 from lib.query_analysis.templating import (
     QueryTemplatingError,
     get_templated_variables_in_string,
@@ -20,7 +23,11 @@ from lib.query_analysis.templating import (
 from lib.form import validate_form
 from lib.data_doc.meta import var_config_to_var_dict
 from lib.data_doc.doc_types import DataDocMetaVarConfig
-from const.query_execution import QueryExecutionExportStatus, QueryExecutionStatus
+from const.query_execution import (
+    QueryExecutionExportStatus,
+    QueryExecutionStatus,
+    StatementExecutionStatus,
+)
 from const.datasources import RESOURCE_NOT_FOUND_STATUS_CODE
 from logic import (
     query_execution as logic,
@@ -221,29 +228,44 @@ def download_statement_execution_result(statement_execution_id):
 
         reader = GenericReader(statement_execution.result_path)
         response = None
-        if reader.has_download_url:
+        if reader.has_download_url and QuerybookSettings.STORE_PRESIGNED_URL_ENABLED:
             # If the Reader can generate a download,
             # we let user download the file by redirection
             download_url = reader.get_download_url(custom_name=download_file_name)
             response = redirect(download_url)
         else:
-            # We read the raw file and download it for the user
+            # We stream the raw file chunk by chunk to the user
             reader.start()
-            raw = reader.read_raw()
-            response = Response(raw)
-            response.headers["Content-Type"] = "text/csv"
+            # The quality is 0 if gzip is not accepted, or refused with q=0
+            use_gzip = request.accept_encodings[GZIP_COMPRESSION] > 0
+            response = Response(
+                stream_raw_result(reader, use_gzip), mimetype="text/csv"
+            )
+            response.headers["Vary"] = "Accept-Encoding"
+            if use_gzip:
+                response.headers["Content-Encoding"] = GZIP_COMPRESSION
             response.headers[
                 "Content-Disposition"
             ] = f'attachment; filename="{download_file_name}"'
         return response
 
 
+def stream_raw_result(reader: GenericReader, use_gzip: bool):
+    try:
+        raw_iter = reader.get_raw_iter()
+        if use_gzip:
+            raw_iter = compress_iter(raw_iter, GZIP_COMPRESSION)
+        yield from raw_iter
+    finally:
+        reader.end()
+
+
 @register(
     "/statement_execution/<int:statement_execution_id>/result/",
     methods=["GET"],
     require_auth=True,
 )
-def get_statement_execution_result(statement_execution_id, limit=None):
+def get_statement_execution_result(statement_execution_id, limit=None, offset=None):
     # TODO: make this customizable
     limit = (
         QUERY_RESULT_LIMIT_CONFIG["default_query_result_size"]
@@ -254,6 +276,8 @@ def get_statement_execution_result(statement_execution_id, limit=None):
         limit <= QUERY_RESULT_LIMIT_CONFIG["query_result_size_options"][-1],
         message="Too many rows requested",
     )
+    offset = 0 if offset is None else offset
+    api_assert(offset >= 0, message="Invalid offset")
 
     with DBSession() as session:
         try:
@@ -267,9 +291,24 @@ def get_statement_execution_result(statement_execution_id, limit=None):
                 statement_execution.query_execution_id, session=session
             )
 
-            with GenericReader(statement_execution.result_path) as reader:
-                result = reader.read_csv(number_of_lines=limit + 1)  # 1 row for column
-                return result
+            # Results can only be cached once they are fully uploaded
+            is_cacheable = statement_execution.status == StatementExecutionStatus.DONE
+            # 1 row for column
+            if is_cacheable:
+                result = get_cached_result(statement_execution_id, limit + 1, offset)
+                if result is not None:
+                    return result
+
+            reader = GenericReader(statement_execution.result_path)
+            result = None
+            if QuerybookSettings.COLUMNAR_RESULT_ENABLED:
+                result = reader.read_columnar(number_of_lines=limit + 1, offset=offset)
+            if result is None:
+                result = reader.read_csv_page(number_of_lines=limit + 1, offset=offset)
+
+            if is_cacheable:
+                set_cached_result(statement_execution_id, limit + 1, offset, result)
+            return result
         except FileDoesNotExist as e:
             abort(RESOURCE_NOT_FOUND_STATUS_CODE, str(e))
 
@@ -294,8 +333,7 @@ def get_statement_execution_log(statement_execution_id):
         log_path = statement_execution.log_path
         try:
             if log_path.startswith("stream"):
-                logs = logic.get_statement_execution_stream_logs(statement_execution_id)
-                return list(map(lambda log: log.log, logs))
+                return get_live_statement_logs(statement_execution_id)
             else:
                 with DBSession() as session:
                     MAX_LOG_RETURN_LINES = 2000
@@ -5,6 +5,7 @@ from app.auth.permission import verify_query_engine_permission
 from app.db import DBSession
 from const.query_execution import QueryExecutionStatus, QUERY_EXECUTION_NAMESPACE
 from lib.logger import get_logger
+from lib.query_executor.log_buffer import get_live_statement_logs
 from logic import query_execution as qe_logic
 from tasks import run_query as tasks
 from .helper import register_socket
@@ -28,10 +29,9 @@ def on_join_room(query_execution_id):
             statement_execution = execution_dict["statement_executions"][-1]
             # Format statement execution's logs
             if statement_execution["has_log"]:
-                logs = qe_logic.get_statement_execution_stream_logs(
+                statement_execution["log"] = get_live_statement_logs(
                     statement_execution["id"], from_end=True, session=session
                 )
-                statement_execution["log"] = [log.log for log in logs]
 
             # Getting task's running data
             if (
@@ -41,15 +41,32 @@ class QuerybookSettings(object):
     PUBLIC_URL = get_env_config("PUBLIC_URL")
     FLASK_SECRET_KEY = get_env_config("FLASK_SECRET_KEY", optional=False)
     FLASK_CACHE_CONFIG = json.loads(get_env_config("FLASK_CACHE_CONFIG"))
+    PERMISSION_CACHE_TTL = int(get_env_config("PERMISSION_CACHE_TTL"))
     # Celery
     REDIS_URL = get_env_config("REDIS_URL", optional=False)
 
     # Search
     ELASTICSEARCH_HOST = get_env_config("ELASTICSEARCH_HOST", optional=False)
     ELASTICSEARCH_CONNECTION_TYPE = get_env_config("ELASTICSEARCH_CONNECTION_TYPE")
+    ELASTICSEARCH_BULK_BATCH_SIZE = int(get_env_config("ELASTICSEARCH_BULK_BATCH_SIZE"))
+    ELASTICSEARCH_BULK_THREAD_COUNT = int(
+        get_env_config("ELASTICSEARCH_BULK_THREAD_COUNT")
+    )
+    ELASTICSEARCH_SYNC_INTERVAL = int(get_env_config("ELASTICSEARCH_SYNC_INTERVAL"))
+    ELASTICSEARCH_SYNC_BATCH_SIZE = int(get_env_config("ELASTICSEARCH_SYNC_BATCH_SIZE"))
 
     # Lineage
     DATA_LINEAGE_BACKEND = get_env_config("DATA_LINEAGE_BACKEND")
+    QUERY_PARSE_CACHE_SIZE = int(get_env_config("QUERY_PARSE_CACHE_SIZE"))
+    QUERY_PARSE_CACHE_MAX_CHARS = int(get_env_config("QUERY_PARSE_CACHE_MAX_CHARS"))
+    QUERY_PARSE_CACHE_REDIS_TTL = int(get_env_config("QUERY_PARSE_CACHE_REDIS_TTL"))
+
+    # Data Doc
+    DATA_CELL_SAVE_DELAY = int(get_env_config("DATA_CELL_SAVE_DELAY"))
+    DATA_CELL_MAX_SAVE_DELAY = int(get_env_config("DATA_CELL_MAX_SAVE_DELAY"))
+
+    # Metastore
+    LATEST_PARTITION_CACHE_TTL = int(get_env_config("LATEST_PARTITION_CACHE_TTL"))
 
     # Database
     DATABASE_CONN = get_env_config("DATABASE_CONN", optional=False)
@@ -106,13 +123,36 @@ class QuerybookSettings(object):
     STORE_PATH_PREFIX = get_env_config("STORE_PATH_PREFIX")
     STORE_MIN_UPLOAD_CHUNK_SIZE = int(get_env_config("STORE_MIN_UPLOAD_CHUNK_SIZE"))
     STORE_MAX_UPLOAD_CHUNK_NUM = int(get_env_config("STORE_MAX_UPLOAD_CHUNK_NUM"))
+    STORE_MAX_CONCURRENT_UPLOAD_PARTS = int(
+        get_env_config("STORE_MAX_CONCURRENT_UPLOAD_PARTS")
+    )
     STORE_MAX_READ_SIZE = int(get_env_config("STORE_MAX_READ_SIZE"))
     STORE_READ_SIZE = int(get_env_config("STORE_READ_SIZE"))
     S3_BUCKET_S3V4_ENABLED = get_env_config("S3_BUCKET_S3V4_ENABLED") == "true"
+    STORE_PRESIGNED_URL_ENABLED = (
+        str(get_env_config("STORE_PRESIGNED_URL_ENABLED")).lower() == "true"
+    )
     AWS_REGION = get_env_config("AWS_REGION")
 
     DB_MAX_UPLOAD_SIZE = int(get_env_config("DB_MAX_UPLOAD_SIZE"))
 
+    RESULT_UPLOAD_QUEUE_SIZE = int(get_env_config("RESULT_UPLOAD_QUEUE_SIZE"))
+    COLUMNAR_RESULT_ENABLED = (
+        str(get_env_config("COLUMNAR_RESULT_ENABLED")).lower() == "true"
+    )
+    RESULT_STORE_COMPRESSION = get_env_config("RESULT_STORE_COMPRESSION")
+
+    RESULT_CACHE_MAX_SIZE = int(get_env_config("RESULT_CACHE_MAX_SIZE"))
+    RESULT_CACHE_TTL = int(get_env_config("RESULT_CACHE_TTL"))
+    RESULT_CACHE_REDIS_ENABLED = (
+        str(get_env_config("RESULT_CACHE_REDIS_ENABLED")).lower() == "true"
+    )
+
+    STATEMENT_LOG_FLUSH_INTERVAL = float(get_env_config("STATEMENT_LOG_FLUSH_INTERVAL"))
+    STATEMENT_LOG_REDIS_ENABLED = (
+        str(get_env_config("STATEMENT_LOG_REDIS_ENABLED")).lower() == "true"
+    )
+
     GOOGLE_CREDS = json.loads(get_env_config("GOOGLE_CREDS") or "null")
 
     # Logging
@@ -1,6 +1,7 @@
 from app.db import with_session
+from env import QuerybookSettings
 from logic.datadoc import get_dag_export_by_data_doc_id
-from logic.datadoc import get_data_doc_by_id
+from logic.datadoc import get_data_doc_by_id, save_data_cells_context
 
 from .all_dag_exporter import get_dag_exporter_class
 
@@ -14,6 +15,9 @@ def export_dag(data_doc_id, dag_exporter_name, session=None):
     dag = dag_export["dag"]
 
     doc = get_data_doc_by_id(data_doc_id, session=session)
+    if QuerybookSettings.DATA_CELL_SAVE_DELAY:
+        # The exporters read the context of the cells from the database
+        save_data_cells_context([cell.id for cell in doc.cells], session=session)
     cell_by_id = {cell.id: cell for cell in doc.cells}
 
     return dag_exporter.export(
@@ -0,0 +1,211 @@
+import time
+from typing import Dict, Iterable, List, Optional
+
+from redis.exceptions import WatchError
+
+from clients.redis_client import with_redis
+
+# The edited context of a data cell is kept in a redis hash (its draft)
+# until it is saved to the database. Each edit increments the version of
+# the draft, so that a draft edited while it is being saved is kept.
+REDIS_CELL_DRAFT_KEY_PREFIX = "data_cell_draft:"
+# Sorted sets of the cells with a draft, scored by the time of
+# their last edit and by the time of their first unsaved edit
+REDIS_CELL_DRAFT_LAST_EDIT_KEY = "data_cell_drafts:last_edit"
+REDIS_CELL_DRAFT_FIRST_EDIT_KEY = "data_cell_drafts:first_edit"
+# Set while a save of the drafts is scheduled
+REDIS_CELL_DRAFT_SAVE_SCHEDULED_KEY = "data_cell_drafts:save_scheduled"
+# Set while the drafts are being saved
+REDIS_CELL_DRAFT_SAVE_LOCK_KEY = "data_cell_drafts:save_lock"
+
+
+def _get_draft_key(cell_id: int) -> str:
+    return f"{REDIS_CELL_DRAFT_KEY_PREFIX}{cell_id}"
+
+
+@with_redis
+def save_draft(
+    cell_id: int, context: str, save_countdown: int, redis_conn=None
+) -> bool:
+    """Save the edited context of the cell as its draft
+
+    Arguments:
+        cell_id {int}
+        context {str}
+        save_countdown {int} -- Seconds before the drafts are saved
+
+    Returns:
+        bool -- True if no save is scheduled, the caller needs to schedule it
+    """
+    now = time.time()
+    with redis_conn.pipeline() as pipe:
+        pipe.hset(_get_draft_key(cell_id), "context", context)
+        pipe.hincrby(_get_draft_key(cell_id), "version", 1)
+        pipe.zadd(REDIS_CELL_DRAFT_LAST_EDIT_KEY, {str(cell_id): now})
+        pipe.zadd(REDIS_CELL_DRAFT_FIRST_EDIT_KEY, {str(cell_id): now}, nx=True)
+        # Assume the save can start within 10 minutes of its countdown
+        pipe.set(
+            REDIS_CELL_DRAFT_SAVE_SCHEDULED_KEY,
+            1,
+            nx=True,
+            ex=save_countdown + 60 * 10,
+        )
+        save_not_scheduled = pipe.execute()[-1]
+    return bool(save_not_scheduled)
+
+
+@with_redis
+def get_drafts(cell_ids: Iterable[int], redis_conn=None) -> Dict[int, Dict]:
+    """Get the drafts of the cells that have one
+
+    Arguments:
+        cell_ids {Iterable[int]}
+
+    Returns:
+        Dict[int, Dict] -- {"context": str, "version": int} by cell id
+    """
+    cell_ids = list(cell_ids)
+    if not cell_ids:
+        return {}
+
+    with redis_conn.pipeline() as pipe:
+        for cell_id in cell_ids:
+            pipe.hmget(_get_draft_key(cell_id), "context", "version")
+        results = pipe.execute()
+
+    return {
+        cell_id: {"context": context.decode("utf-8"), "version": int(version)}
+        for cell_id, (context, version) in zip(cell_ids, results)
+        if context is not None and version is not None
+    }
+
+
+@with_redis
+def get_cell_ids_to_save(
+    last_edit_before: float, first_edit_before: float, redis_conn=None
+) -> List[int]:
+    """Get the cells which have not been edited since last_edit_before,
+       or have been edited without being saved since first_edit_before
+
+    Returns:
+        List[int] -- The cell ids
+    """
+    with redis_conn.pipeline() as pipe:
+        pipe.zrangebyscore(REDIS_CELL_DRAFT_LAST_EDIT_KEY, "-inf", last_edit_before)
+        pipe.zrangebyscore(REDIS_CELL_DRAFT_FIRST_EDIT_KEY, "-inf", first_edit_before)
+        idle_cell_ids, old_cell_ids = pipe.execute()
+    return sorted(set(int(cell_id) for cell_id in idle_cell_ids + old_cell_ids))
+
+
+@with_redis
+def get_next_save_time(
+    save_delay: int, max_save_delay: int, redis_conn=None
+) -> Optional[float]:
+    """Get the time at which the next draft has to be saved
+
+    Arguments:
+        save_delay {int} -- Seconds after the last edit of a draft
+        max_save_delay {int} -- Seconds after the first unsaved edit of a draft
+
+    Returns:
+        Optional[float] -- None if there is no draft
+    """
+    with redis_conn.pipeline() as pipe:
+        pipe.zrange(REDIS_CELL_DRAFT_LAST_EDIT_KEY, 0, 0, withscores=True)
+        pipe.zrange(REDIS_CELL_DRAFT_FIRST_EDIT_KEY, 0, 0, withscores=True)
+        oldest_last_edits, oldest_first_edits = pipe.execute()
+
+    save_times = [score + save_delay for _, score in oldest_last_edits] + [
+        score + max_save_delay for _, score in oldest_first_edits
+    ]
+    return min(save_times) if save_times else None
+
+
+@with_redis
+def remove_draft(cell_id: int, version: int, redis_conn=None) -> bool:
+    """Remove the draft of the cell once it is saved,
+       unless it has been edited since the version saved
+
+    Arguments:
+        cell_id {int}
+        version {int} -- The version of the draft that was saved
+
+    Returns:
+        bool -- True if the draft was removed
+    """
+    draft_key = _get_draft_key(cell_id)
+    with redis_conn.pipeline() as pipe:
+        try:
+            pipe.watch(draft_key)
+            current_version = pipe.hget(draft_key, "version")
+            if current_version is not None and int(current_version) != version:
+                # Only the first edit time is reset, since the newer edits are saved
+                pipe.multi()
+                pipe.zadd(REDIS_CELL_DRAFT_FIRST_EDIT_KEY, {str(cell_id): time.time()})
+                pipe.execute()
+                return False
+
+            pipe.multi()
+            pipe.delete(draft_key)
+            pipe.zrem(REDIS_CELL_DRAFT_LAST_EDIT_KEY, str(cell_id))
+            pipe.zrem(REDIS_CELL_DRAFT_FIRST_EDIT_KEY, str(cell_id))
+            pipe.execute()
+            return True
+        except WatchError:
+            # Edited while it was being removed
+            return False
+
+
+@with_redis
+def delete_draft(cell_id: int, redis_conn=None):
+    """Delete the draft of the cell whatever its version, used when
+       its context is written to the database directly
+
+    Arguments:
+        cell_id {int}
+    """
+    with redis_conn.pipeline() as pipe:
+        pipe.delete(_get_draft_key(cell_id))
+        pipe.zrem(REDIS_CELL_DRAFT_LAST_EDIT_KEY, str(cell_id))
+        pipe.zrem(REDIS_CELL_DRAFT_FIRST_EDIT_KEY, str(cell_id))
+        pipe.execute()
+
+
+@with_redis
+def start_save(redis_conn=None) -> bool:
+    """Called when the save of the drafts starts, so that the drafts
+       edited while it runs schedule another save
+
+    Returns:
+        bool -- False if another save is still running
+    """
+    with redis_conn.pipeline() as pipe:
+        pipe.delete(REDIS_CELL_DRAFT_SAVE_SCHEDULED_KEY)
+        pipe.set(REDIS_CELL_DRAFT_SAVE_LOCK_KEY, 1, nx=True, ex=60 * 10)
+        _, locked = pipe.execute()
+    return bool(locked)
+
+
+@with_redis
+def end_save(redis_conn=None):
+    redis_conn.delete(REDIS_CELL_DRAFT_SAVE_LOCK_KEY)
+
+
+@with_redis
+def mark_save_scheduled(save_countdown: int, redis_conn=None) -> bool:
+    """Mark the save of the drafts as scheduled
+
+    Arguments:
+        save_countdown {int} -- Seconds before the drafts are saved
+
+    Returns:
+        bool -- True if no save was scheduled, the caller needs to schedule it
+    """
+    return bool(
+        redis_conn.set(
+            REDIS_CELL_DRAFT_SAVE_SCHEDULED_KEY,
+            1,
+            nx=True,
+            ex=save_countdown + 60 * 10,
+        )
+    )
@@ -0,0 +1,110 @@
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from clients.redis_client import with_redis
+from const.elasticsearch import ElasticsearchItem
+
+# The items to sync to elasticsearch are kept in a sorted set per item type,
+# scored by the time they were first queued. An item updated many times
+# before the queue is drained is only synced once.
+REDIS_SYNC_QUEUE_KEY_PREFIX = "es_sync_queue:"
+# Set while a drain of the queues is scheduled
+REDIS_SYNC_DRAIN_KEY = "es_sync_queue_drain"
+
+
+def _get_queue_key(item_type: str) -> str:
+    return f"{REDIS_SYNC_QUEUE_KEY_PREFIX}{item_type}"
+
+
+@with_redis
+def queue_items(
+    item_type: str,
+    item_ids: Iterable[int],
+    drain_countdown: int,
+    queued_at: Dict[int, float] = None,
+    redis_conn=None,
+) -> bool:
+    """Add the items to the sync queue of their type
+
+    Arguments:
+        item_type {str} -- One of ElasticsearchItem
+        item_ids {Iterable[int]}
+        drain_countdown {int} -- Seconds before the queue is drained
+
+    Keyword Arguments:
+        queued_at {Dict[int, float]} -- Time the items were first queued,
+                                        used when they are queued again (default: {None})
+
+    Returns:
+        bool -- True if no drain is scheduled, the caller needs to schedule it
+    """
+    now = time.time()
+    queued_at = queued_at or {}
+    item_scores = {str(item_id): queued_at.get(item_id, now) for item_id in item_ids}
+    if not item_scores:
+        return False
+
+    with redis_conn.pipeline() as pipe:
+        # Keep the time the item was first queued if it is already queued
+        pipe.zadd(_get_queue_key(item_type), item_scores, nx=True)
+        # Assume the drain can start within 10 minutes of its countdown
+        pipe.set(REDIS_SYNC_DRAIN_KEY, 1, nx=True, ex=drain_countdown + 60 * 10)
+        _, drain_not_scheduled = pipe.execute()
+    return bool(drain_not_scheduled)
+
+
+@with_redis
+def start_drain(redis_conn=None):
+    """Called when the drain starts, so that the items queued
+    while it runs schedule another drain
+    """
+    redis_conn.delete(REDIS_SYNC_DRAIN_KEY)
+
+
+@with_redis
+def pop_items(item_type: str, limit: int, redis_conn=None) -> Dict[int, float]:
+    """Remove the oldest items from the sync queue of their type
+
+    Arguments:
+        item_type {str} -- One of ElasticsearchItem
+        limit {int} -- Max number of items
+
+    Returns:
+        Dict[int, float] -- The time each item was first queued by item id
+    """
+    return {
+        int(item_id): queued_at
+        for item_id, queued_at in redis_conn.zpopmin(_get_queue_key(item_type), limit)
+    }
+
+
+@with_redis
+def get_queue_stats(redis_conn=None) -> Dict[str, Dict]:
+    """Get the number of items waiting in the sync queue of each type,
+       and the lag in seconds of the oldest one
+
+    Returns:
+        Dict[str, Dict] -- {"size": int, "lag": float} by item type
+    """
+    item_types = [item.value for item in ElasticsearchItem]
+    with redis_conn.pipeline() as pipe:
+        for item_type in item_types:
+            pipe.zcard(_get_queue_key(item_type))
+            pipe.zrange(_get_queue_key(item_type), 0, 0, withscores=True)
+        results = pipe.execute()
+
+    now = time.time()
+    stats = {}
+    for i, item_type in enumerate(item_types):
+        size, oldest_items = results[2 * i], results[2 * i + 1]
+        stats[item_type] = {
+            "size": size,
+            "lag": _get_lag(oldest_items, now),
+        }
+    return stats
+
+
+def _get_lag(oldest_items: List[Tuple[bytes, float]], now: float) -> float:
+    if not len(oldest_items):
+        return 0.0
+    return max(now - oldest_items[0][1], 0.0)
@@ -156,4 +156,10 @@ def validate_form(form: AllFormField, form_value) -> [bool, str]:
             if not isinstance(form_value, bool):
                 return False, "Field value is not a boolean"
             return True, ""
+        elif form.field_type == FormFieldType.Select:
+            if form_value == "" and not form.required:
+                return True, ""
+            if form_value not in (form.options or []):
+                return False, "Field value is not one of the options"
+            return True, ""
     return False, "Unexpected form type"
@@ -1,8 +1,25 @@
+from contextlib import contextmanager
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
 from app.db import with_session
+from env import QuerybookSettings
 
 from logic.admin import get_query_metastore_by_id
+from lib.metastore import latest_partition_cache
 from lib.metastore.base_metastore_loader import BaseMetastoreLoader
 
+# Loaders kept idle for each metastore, so that looking up the latest partition
+# of a table does not connect to the metastore every time
+MAX_IDLE_LOADERS_PER_METASTORE = 4
+# The pooled loaders are created again after this many seconds,
+# so that changes of the metastore config are picked up
+POOLED_LOADER_TTL = 300
+
+_idle_loaders: Dict[int, List[Tuple[float, BaseMetastoreLoader]]] = {}
+_idle_loaders_lock = threading.Lock()
+
 
 def get_metastore_loader_class_by_name(name: str) -> BaseMetastoreLoader:
     from lib.metastore.all_loaders import ALL_METASTORE_LOADERS
@@ -20,6 +37,88 @@ def get_metastore_loader(metastore_id: int, session=None) -> BaseMetastoreLoader
     return get_metastore_loader_class_by_name(metastore_dict["loader"])(metastore_dict)
 
 
-def load_metastore(metastore_id: int):
+def load_metastore(metastore_id: int, full_sync: bool = False) -> Dict[str, int]:
     loader = get_metastore_loader(metastore_id)
-    loader.load()
+    return loader.load(full_sync=full_sync)
+
+
+@contextmanager
+def pooled_metastore_loader(
+    metastore_id: int, session=None
+) -> Iterator[BaseMetastoreLoader]:
+    """Borrow a loader of the metastore, which is not used by anyone else
+       until it is returned to the pool at the end of the with block.
+       It is not returned if the block raises, in case its connection broke.
+
+    Arguments:
+        metastore_id {int}
+    """
+    now = time.time()
+    loader = None
+    with _idle_loaders_lock:
+        idle_loaders = _idle_loaders.get(metastore_id, [])
+        while idle_loaders and loader is None:
+            created_at, idle_loader = idle_loaders.pop()
+            if now - created_at < POOLED_LOADER_TTL:
+                loader = idle_loader
+    if loader is None:
+        created_at = now
+        loader = get_metastore_loader(metastore_id, session=session)
+
+    yield loader
+
+    with _idle_loaders_lock:
+        idle_loaders = _idle_loaders.setdefault(metastore_id, [])
+        if len(idle_loaders) < MAX_IDLE_LOADERS_PER_METASTORE:
+            idle_loaders.append((created_at, loader))
+
+
+def clear_pooled_metastore_loaders(metastore_id: int = None):
+    """Remove the idle loaders of the metastore (or of all of them),
+    called when the metastore config changes
+    """
+    with _idle_loaders_lock:
+        if metastore_id is None:
+            _idle_loaders.clear()
+        else:
+            _idle_loaders.pop(metastore_id, None)
+
+
+def get_latest_partition(
+    metastore_id: int,
+    schema_name: str,
+    table_name: str,
+    conditions: Dict[str, str] = None,
+    session=None,
+) -> Optional[str]:
+    """Get the latest partition of the table, which is cached for
+       LATEST_PARTITION_CACHE_TTL seconds if it is set
+
+    Arguments:
+        metastore_id {int}
+        schema_name {str}
+        table_name {str}
+
+    Keyword Arguments:
+        conditions {Dict[str, str]} -- Values of some partition keys (default: {None})
+
+    Returns:
+        Optional[str] -- The partition e.g. dt=2015-01-01/column1=val1,
+                         None if the table has no partition
+    """
+    ttl = QuerybookSettings.LATEST_PARTITION_CACHE_TTL
+    if ttl:
+        found, partition = latest_partition_cache.load_latest_partition(
+            metastore_id, schema_name, table_name, conditions
+        )
+        if found:
+            return partition
+
+    with pooled_metastore_loader(metastore_id, session=session) as loader:
+        partition = loader.get_latest_partition(schema_name, table_name, conditions)
+
+    if ttl:
+        latest_partition_cache.persist_latest_partition(
+            metastore_id, schema_name, table_name, conditions, partition, ttl
+        )
+    return partition
@@ -1,6 +1,9 @@
 from abc import ABCMeta, abstractmethod, abstractclassmethod
-import gevent
+from collections import Counter
+import hashlib
 import math
+from queue import Empty, Queue
+import threading
 from typing import NamedTuple, List, Dict, Tuple, Optional
 import traceback
 
@@ -17,19 +20,34 @@ from logic.metastore import (
     create_table,
     delete_table,
     create_table_information,
-    create_column,
-    delete_column,
+    upsert_table_columns,
     iterate_data_schema,
     get_table_by_schema_id,
-    get_column_by_table_id,
     get_schema_by_name,
     get_table_by_schema_id_and_name,
+    get_table_metastore_fingerprints_by_schema_id,
+    update_table_metastore_fingerprint,
+    update_es_tables_by_ids,
 )
 
 from .utils import MetastoreTableACLChecker
 
 LOG = get_logger(__name__)
 
+# Counted by each metastore sync
+METASTORE_SYNC_STATS = (
+    "listed",
+    "new",
+    "skipped",
+    "fetched",
+    "updated",
+    "unchanged",
+    "failed",
+    "deleted",
+)
+# Number of fetched tables each fetching thread can get ahead of the writer
+FETCHED_TABLES_PER_THREAD = 10
+
 
 class DataSchema(NamedTuple):
     name: str
@@ -78,6 +96,7 @@ class DataColumn(NamedTuple):
 
 class BaseMetastoreLoader(metaclass=ABCMeta):
     def __init__(self, metastore_dict: Dict):
+        self.metastore_dict = metastore_dict
         self.metastore_id = metastore_dict["id"]
         self.acl_checker = MetastoreTableACLChecker(metastore_dict["acl_control"])
 
@@ -251,12 +270,25 @@ class BaseMetastoreLoader(metaclass=ABCMeta):
         schema_names = self.get_all_schema_names()
         return schema_name in schema_names
 
-    def load(self):
+    def load(self, full_sync: bool = False) -> Dict[str, int]:
+        """Sync all the schemas and tables of the metastore to the database.
+        Only the tables whose fingerprint changed since they were last synced
+        are updated, unless full_sync is set.
+
+        Keyword Arguments:
+            full_sync {bool} -- Update all the tables (default: {False})
+
+        Returns:
+            Dict[str, int] -- The number of tables listed, new, skipped (without
+                              fetching them), fetched, updated, unchanged, failed
+                              and deleted
+        """
+        stats = Counter({key: 0 for key in METASTORE_SYNC_STATS})
         schema_tables = []
         schema_names = set(self._get_all_filtered_schema_names())
 
         with DBSession() as session:
-            delete_schema_not_in_metastore(
+            stats["deleted"] += delete_schema_not_in_metastore(
                 self.metastore_id, schema_names, session=session
             )
             for schema_name in schema_names:
@@ -267,11 +299,44 @@ class BaseMetastoreLoader(metaclass=ABCMeta):
                     metastore_id=self.metastore_id,
                     session=session,
                 ).id
-                delete_table_not_in_metastore(schema_id, table_names, session=session)
-                schema_tables += [
-                    (schema_id, schema_name, table_name) for table_name in table_names
-                ]
-        self._create_tables_batched(schema_tables)
+                stats["deleted"] += delete_table_not_in_metastore(
+                    schema_id, table_names, session=session
+                )
+
+                stored_fingerprints = get_table_metastore_fingerprints_by_schema_id(
+                    schema_id, session=session
+                )
+                # Fetched even for a full sync, so that the fingerprints
+                # stored can be compared by the next sync
+                fingerprints = self._get_table_fingerprints(schema_name, table_names)
+                for table_name in table_names:
+                    stats["listed"] += 1
+                    if table_name not in stored_fingerprints:
+                        stats["new"] += 1
+
+                    fingerprint = fingerprints.get(table_name)
+                    stored_fingerprint = (
+                        None if full_sync else stored_fingerprints.get(table_name)
+                    )
+                    if fingerprint is not None and fingerprint == stored_fingerprint:
+                        stats["skipped"] += 1
+                        continue
+                    schema_tables.append(
+                        (
+                            schema_id,
+                            schema_name,
+                            table_name,
+                            fingerprint,
+                            stored_fingerprint,
+                        )
+                    )
+        self._create_tables_batched(schema_tables, stats)
+
+        LOG.info(
+            f"Synced metastore {self.metastore_id}: "
+            + ", ".join(f"{count} {key}" for key, count in stats.items())
+        )
+        return dict(stats)
 
     def get_latest_partition(
         self, schema_name: str, table_name: str, conditions: Dict[str, str] = None
@@ -280,40 +345,195 @@ class BaseMetastoreLoader(metaclass=ABCMeta):
         latest_partition = partitions[-1] if partitions and len(partitions) else None
         return latest_partition
 
-    def _create_tables_batched(self, schema_tables):
-        """Create greenlets for create table batches
+    def _create_tables_batched(self, schema_tables, stats: Counter):
+        """Fetch the tables with a pool of threads, each with its own metastore
+        client, and write them to the database in batches as they are fetched
 
         Arguments:
-            schema_tables {List[schema_id, schema_name, table_name]} -- List of configs to load table
+            schema_tables {List[schema_id, schema_name, table_name, fingerprint, stored_fingerprint]}
+                -- List of configs to load table
+            stats {Counter} -- The sync stats
         """
+        if not schema_tables:
+            return
+
         batch_size = self._get_batch_size(len(schema_tables))
-        greenlets = []
-        thread_num = 0
-        while True:
-            table_batch = schema_tables[
-                (thread_num * batch_size) : ((thread_num + 1) * batch_size)
-            ]
-            thread_num += 1
-
-            if len(table_batch):
-                greenlets.append(gevent.spawn(self._create_tables, table_batch))
-            else:
-                break
-        gevent.joinall(greenlets)
+        num_threads = int(math.ceil(len(schema_tables) / batch_size))
+
+        tables_to_fetch = Queue()
+        for schema_table in schema_tables:
+            tables_to_fetch.put(schema_table)
+        # Bounded so that the fetched tables are not all kept in memory
+        fetched_tables = Queue(maxsize=num_threads * FETCHED_TABLES_PER_THREAD)
+
+        stop_fetching = threading.Event()
+
+        threads = [
+            threading.Thread(
+                target=self._fetch_tables,
+                # The first thread uses the client of this loader
+                args=(
+                    self if i == 0 else None,
+                    tables_to_fetch,
+                    fetched_tables,
+                    stop_fetching,
+                ),
+                daemon=True,
+            )
+            for i in range(num_threads)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            self._write_tables(fetched_tables, num_threads, stats)
+        except Exception:
+            # The fetching threads would block on the full queue otherwise
+            stop_fetching.set()
+            while any(thread.is_alive() for thread in threads):
+                try:
+                    fetched_tables.get(timeout=1)
+                except Empty:
+                    pass
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+
+        # Left if the fetching threads failed
+        stats["failed"] += tables_to_fetch.qsize()
+
+    def _fetch_tables(
+        self,
+        loader,
+        tables_to_fetch: Queue,
+        fetched_tables: Queue,
+        stop_fetching: threading.Event,
+    ):
+        pooled_loader = None
+        try:
+            if loader is None:
+                loader = pooled_loader = self._create_pooled_loader()
+            while not stop_fetching.is_set():
+                try:
+                    schema_table = tables_to_fetch.get_nowait()
+                except Empty:
+                    break
+                fetched_tables.put(loader._fetch_table_if_changed(*schema_table))
+        except Exception:
+            # The remaining tables are fetched by the other threads
+            LOG.error(traceback.format_exc())
+        finally:
+            if pooled_loader is not None:
+                try:
+                    pooled_loader.close()
+                except Exception:
+                    LOG.error(traceback.format_exc())
+            # Tells the writer that this thread is done
+            fetched_tables.put(None)
+
+    def _fetch_table_if_changed(
+        self, schema_id, schema_name, table_name, fingerprint, stored_fingerprint
+    ):
+        """Fetch the table from the metastore unless its fingerprint
+        (the one given, or the hash of the table info) is the stored one
+
+        Returns:
+            Tuple[str, Optional[Tuple]] -- "fetched" | "unchanged" | "failed", and
+                                           the table to write if it was fetched
+        """
+        try:
+            table, columns = self.get_table_and_columns(schema_name, table_name)
+        except Exception:
+            LOG.error(traceback.format_exc())
+            return "failed", None
+        if not table:
+            return "failed", None
+
+        if fingerprint is None:
+            fingerprint = get_table_fingerprint(table, columns)
+        if fingerprint == stored_fingerprint:
+            return "unchanged", None
+        return "fetched", (
+            schema_id,
+            schema_name,
+            table_name,
+            table,
+            columns,
+            fingerprint,
+        )
 
-    def _create_tables(self, schema_tables):
+    def _write_tables(self, fetched_tables: Queue, num_threads: int, stats: Counter):
+        write_batch_size = self._get_parallelization_setting().get(
+            "write_batch_size", 100
+        )
+        table_batch = []
         with DBSession() as session:
-            for (schema_id, schema_name, table) in schema_tables:
-                self._create_table_table(schema_id, schema_name, table, session=session)
+            while num_threads:
+                fetched_table = fetched_tables.get()
+                if fetched_table is None:
+                    num_threads -= 1
+                    continue
+
+                stats["fetched"] += 1
+                status, table_to_write = fetched_table
+                if table_to_write is None:
+                    stats[status] += 1
+                    continue
+
+                table_batch.append(table_to_write)
+                if len(table_batch) >= write_batch_size:
+                    self._write_table_batch(table_batch, stats, session=session)
+                    table_batch = []
+            self._write_table_batch(table_batch, stats, session=session)
+
+    def _write_table_batch(self, table_batch, stats: Counter, session=None):
+        table_ids = []
+        for (
+            schema_id,
+            schema_name,
+            table_name,
+            table,
+            columns,
+            fingerprint,
+        ) in table_batch:
+            table_id = self._create_table_table(
+                schema_id,
+                schema_name,
+                table_name,
+                table,
+                columns,
+                fingerprint=fingerprint,
+                update_es=False,
+                session=session,
+            )
+            if table_id is None:
+                stats["failed"] += 1
+            else:
+                stats["updated"] += 1
+                table_ids.append(table_id)
+
+        # Synced once all the tables of the batch are written
+        if table_ids:
+            update_es_tables_by_ids(table_ids)
 
     @with_session
     def _create_table_table(
-        self, schema_id, schema_name, table_name, table=None, columns=None, session=None
+        self,
+        schema_id,
+        schema_name,
+        table_name,
+        table=None,
+        columns=None,
+        fingerprint=None,
+        update_es=True,
+        session=None,
     ):
         """Create or update a table.
         If detailed table info is given (parameter table and columns), it will just use
         them to create/update the table.  Otherwise, it will try to get the table
         info from the metastore first and then create/update.
+        The fingerprint is stored with the table, it is the hash of the table info
+        if not given. If update_es is False, the caller needs to update elasticsearch.
         """
         if not table:
             try:
@@ -347,22 +567,17 @@ class BaseMetastoreLoader(metaclass=ABCMeta):
                 partition_keys=table.partition_keys,
                 session=session,
             )
-            delete_column_not_in_metastore(
-                table_id, set(map(lambda c: c.name, columns)), session=session
+            upsert_table_columns(table_id, columns, commit=False, session=session)
+            # Stored last, so that the table is synced again if any update fails
+            update_table_metastore_fingerprint(
+                table_id,
+                fingerprint or get_table_fingerprint(table, columns),
+                commit=False,
+                session=session,
             )
-
-            for column in columns:
-                create_column(
-                    name=column.name,
-                    type=column.type,
-                    comment=column.comment,
-                    description=column.description,
-                    table_id=table_id,
-                    commit=False,
-                    session=session,
-                )
             session.commit()
-            update_table_by_id(table_id, session=session)
+            if update_es:
+                update_table_by_id(table_id, session=session)
             return table_id
         except Exception:
             session.rollback()
@@ -392,6 +607,34 @@ class BaseMetastoreLoader(metaclass=ABCMeta):
         batch_size = max(int(math.ceil(num_tables / num_threads)), min_batch_size)
         return batch_size
 
+    def _get_table_fingerprints(
+        self, schema_name: str, table_names: List[str]
+    ) -> Dict[str, str]:
+        try:
+            return self.get_table_fingerprints(schema_name, table_names) or {}
+        except Exception:
+            # The tables are compared after fetching them instead
+            LOG.error(traceback.format_exc())
+            return {}
+
+    def get_table_fingerprints(
+        self, schema_name: str, table_names: List[str]
+    ) -> Optional[Dict[str, str]]:
+        """Override this method to return a fingerprint of each table that changes
+        whenever its info (including columns and partitions) changes, if it can
+        be obtained more cheaply than the table info. The tables are not fetched
+        by the sync if their fingerprint did not change.
+        Returns None by default, so that tables are compared after fetching them.
+
+        Arguments:
+            schema_name {str}
+            table_names {List[str]}
+
+        Returns:
+            Optional[Dict[str, str]] -- {table name: fingerprint}
+        """
+        return None
+
     def get_partitions(
         self, schema_name: str, table_name: str, conditions: Dict[str, str] = None
     ) -> List[str]:
@@ -452,16 +695,37 @@ class BaseMetastoreLoader(metaclass=ABCMeta):
         """Override this to have different parallelism.
 
            The num_threads determines the maximum number of threads
-           that will be used. The min_batch_size determines the minimum
+           that will be used to fetch the tables, each with its own
+           metastore client. The min_batch_size determines the minimum
            number of tables each threads will process.
 
            For example, if you have num_threads at 2 and min_batch_size at 100.
            Then only 1 thread would be used unless you process more than 100 tables.
 
+           The fetched tables are written by a single thread, and synced
+           to elasticsearch every write_batch_size tables.
+
+        Returns:
+            dict: 'num_threads' | 'min_batch_size' | 'write_batch_size' -> int
+        """
+        return {"num_threads": 10, "min_batch_size": 50, "write_batch_size": 100}
+
+    def _create_pooled_loader(self) -> "BaseMetastoreLoader":
+        """Create a loader for a table fetching thread, since metastore clients
+           can not be shared across threads. Override this if the loader can not
+           be created again from its metastore dict.
+
         Returns:
-            dict: 'num_threads' | 'min_batch_size' -> int
+            BaseMetastoreLoader -- A loader with its own metastore client
         """
-        return {"num_threads": 10, "min_batch_size": 50}
+        return self.__class__(self.metastore_dict)
+
+    def close(self):
+        """Override this to release the connections of the metastore client,
+        called on the loaders created by _create_pooled_loader once
+        their thread is done.
+        """
+        pass
 
     @classmethod
     def serialize_loader_class(cls):
@@ -471,8 +735,20 @@ class BaseMetastoreLoader(metaclass=ABCMeta):
         }
 
 
+def get_fingerprint(value) -> str:
+    """Hash of the value serialized as json, objects are serialized by their fields"""
+    serialized = json.pdumps(value, sort_keys=True, default=lambda o: o.__dict__)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+def get_table_fingerprint(table: DataTable, columns: List[DataColumn]) -> str:
+    return get_fingerprint([table, columns])
+
+
 @with_session
-def delete_schema_not_in_metastore(metastore_id, schema_names, session=None):
+def delete_schema_not_in_metastore(metastore_id, schema_names, session=None) -> int:
+    """Returns the number of tables deleted"""
+    deleted_table_count = 0
     for data_schema in iterate_data_schema(metastore_id, session=session):
         LOG.info("checking schema %d" % data_schema.id)
         if data_schema.name not in schema_names:
@@ -482,13 +758,17 @@ def delete_schema_not_in_metastore(metastore_id, schema_names, session=None):
                 table_id = table.id
                 delete_table(table_id=table_id, commit=False, session=session)
                 delete_es_table_by_id(table_id)
+                deleted_table_count += 1
             delete_schema(id=data_schema.id, commit=False, session=session)
             LOG.info("deleted schema %d" % data_schema.id)
     session.commit()
+    return deleted_table_count
 
 
 @with_session
-def delete_table_not_in_metastore(schema_id, table_names, session=None):
+def delete_table_not_in_metastore(schema_id, table_names, session=None) -> int:
+    """Returns the number of tables deleted"""
+    deleted_table_count = 0
     db_tables = get_table_by_schema_id(schema_id, session=session)
 
     with session.no_autoflush:
@@ -497,16 +777,7 @@ def delete_table_not_in_metastore(schema_id, table_names, session=None):
                 table_id = data_table.id
                 delete_table(table_id=table_id, commit=False, session=session)
                 delete_es_table_by_id(table_id)
+                deleted_table_count += 1
                 LOG.info(f"deleted table {table_id}")
         session.commit()
-
-
-@with_session
-def delete_column_not_in_metastore(table_id, column_names, session=None):
-    db_columns = get_column_by_table_id(table_id, session=session)
-
-    for column in db_columns:
-        if column.name not in column_names:
-            delete_column(id=column.id, commit=False, session=session)
-            LOG.info("deleted column %d" % column.id)
-    session.commit()
+    return deleted_table_count
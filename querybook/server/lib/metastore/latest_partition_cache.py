@@ -0,0 +1,70 @@
+import json
+from typing import Dict, Optional, Tuple
+
+from clients.redis_client import with_redis
+from lib.logger import get_logger
+
+LOG = get_logger(__file__)
+
+# The latest partition of a table (and conditions) is kept in redis for
+# LATEST_PARTITION_CACHE_TTL seconds, so that it is shared by the query
+# template renders, the scheduled data doc runs and the sample queries
+REDIS_LATEST_PARTITION_KEY_PREFIX = "latest_partition:"
+
+
+def _get_redis_key(
+    metastore_id: int, schema_name: str, table_name: str, conditions: Dict[str, str]
+) -> str:
+    return "{}{}:{}.{}:{}".format(
+        REDIS_LATEST_PARTITION_KEY_PREFIX,
+        metastore_id,
+        schema_name,
+        table_name,
+        json.dumps(conditions or {}, sort_keys=True),
+    )
+
+
+@with_redis
+def load_latest_partition(
+    metastore_id: int,
+    schema_name: str,
+    table_name: str,
+    conditions: Dict[str, str] = None,
+    redis_conn=None,
+) -> Tuple[bool, Optional[str]]:
+    """Get the cached latest partition of the table
+
+    Returns:
+        Tuple[bool, Optional[str]] -- Whether it is cached, and the partition
+                                      (None if the table has no partition)
+    """
+    try:
+        cached = redis_conn.get(
+            _get_redis_key(metastore_id, schema_name, table_name, conditions)
+        )
+        if cached is not None:
+            return True, json.loads(cached)
+    except Exception:
+        # The partition is fetched from the metastore if redis is not available
+        LOG.warning("Failed to load cached latest partition", exc_info=True)
+    return False, None
+
+
+@with_redis
+def persist_latest_partition(
+    metastore_id: int,
+    schema_name: str,
+    table_name: str,
+    conditions: Dict[str, str],
+    partition: Optional[str],
+    ttl: int,
+    redis_conn=None,
+):
+    try:
+        redis_conn.set(
+            _get_redis_key(metastore_id, schema_name, table_name, conditions),
+            json.dumps(partition),
+            ex=ttl,
+        )
+    except Exception:
+        LOG.warning("Failed to persist cached latest partition", exc_info=True)
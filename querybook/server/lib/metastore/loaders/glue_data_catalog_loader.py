@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from clients.glue_client import GlueDataCatalogClient
 from lib.form import StructFormField, FormField
@@ -87,6 +87,15 @@ class GlueDataCatalogLoader(BaseMetastoreLoader):
             schema_name, table_name, conditions
         )
 
+    def get_latest_partition(
+        self, schema_name: str, table_name: str, conditions: Dict[str, str] = None
+    ) -> Optional[str]:
+        partitions = self.glue_client.get_hms_style_partitions(
+            schema_name, table_name, conditions, push_down_conditions=True
+        )
+        # Glue does not sort the partitions by name like the hive metastore
+        return max(partitions) if partitions else None
+
     @staticmethod
     def _get_glue_data_catalog_client(catalog_id, region):
         return GlueDataCatalogClient(catalog_id, region)
@@ -1,4 +1,4 @@
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from lib.form import ExpandableFormField, FormField, FormFieldType, StructFormField
 from hmsclient.genthrift.hive_metastore.ttypes import NoSuchObjectException
 
@@ -7,10 +7,14 @@ from lib.metastore.base_metastore_loader import (
     BaseMetastoreLoader,
     DataTable,
     DataColumn,
+    get_fingerprint,
 )
 from lib.metastore.loaders.form_fileds import load_partitions_field
 from lib.utils import json as ujson
 
+# Number of tables fetched by each call to compute their fingerprints
+TABLE_FINGERPRINT_BATCH_SIZE = 100
+
 
 class HMSMetastoreLoader(BaseMetastoreLoader):
     def __init__(self, metastore_dict: Dict):
@@ -24,6 +28,9 @@ class HMSMetastoreLoader(BaseMetastoreLoader):
     def __del__(self):
         del self.hmc
 
+    def close(self):
+        self.hmc.close()
+
     @classmethod
     def get_metastore_params_template(cls):
         return StructFormField(
@@ -44,6 +51,23 @@ class HMSMetastoreLoader(BaseMetastoreLoader):
     def get_all_table_names_in_schema(self, schema_name: str) -> List[str]:
         return self.hmc.get_all_tables(schema_name)
 
+    def get_table_fingerprints(
+        self, schema_name: str, table_names: List[str]
+    ) -> Optional[Dict[str, str]]:
+        if self.load_partitions:
+            # Adding or dropping partitions does not change the table description
+            return None
+
+        fingerprints = {}
+        for i in range(0, len(table_names), TABLE_FINGERPRINT_BATCH_SIZE):
+            for description in self.hmc.get_tables(
+                schema_name, table_names[i : i + TABLE_FINGERPRINT_BATCH_SIZE]
+            ):
+                fingerprints[description.tableName] = get_hive_table_fingerprint(
+                    description
+                )
+        return fingerprints
+
     def get_table_and_columns(
         self, schema_name, table_name
     ) -> Tuple[DataTable, List[DataColumn]]:
@@ -98,6 +122,30 @@ class HMSMetastoreLoader(BaseMetastoreLoader):
             self.hmc, schema_name, table_name, conditions
         )
 
+    def get_latest_partition(
+        self, schema_name: str, table_name: str, conditions: Dict[str, str] = None
+    ) -> Optional[str]:
+        # Only the partition names are fetched, filtered by the metastore
+        partition_values = None
+        if conditions:
+            description = get_hive_metastore_table_description(
+                self.hmc, schema_name, table_name
+            )
+            if not description:
+                return None
+            partition_keys = get_partition_keys(description)
+            if any(key not in partition_keys for key in conditions):
+                return None
+            partition_values = [conditions.get(key, "") for key in partition_keys]
+
+        try:
+            partition_names = self.hmc.get_partition_names(
+                schema_name, table_name, partition_values
+            )
+        except NoSuchObjectException:
+            return None
+        return partition_names[-1] if partition_names else None
+
     def _get_hmc(self, metastore_dict):
         return HiveMetastoreClient(
             hmss_ro_addrs=metastore_dict["metastore_params"]["hms_connection"]
@@ -112,6 +160,14 @@ def get_hive_metastore_table_description(hmc, db_name, table_name):
         return None
 
 
+def get_hive_table_fingerprint(hive_metastore_description):
+    # The table description is the same unless the table info changes,
+    # except for the last access time
+    return get_fingerprint(
+        dict(hive_metastore_description.__dict__, lastAccessTime=None)
+    )
+
+
 def get_partition_keys(hive_metastore_description):
     try:
         if not hive_metastore_description.partitionKeys:
@@ -15,8 +15,10 @@ class SqlAlchemyMetastoreLoader(BaseMetastoreLoader):
         super(SqlAlchemyMetastoreLoader, self).__init__(metastore_dict)
 
     def __del__(self):
+        self.close()
+
+    def close(self):
         self._conn.close()
-        del self._inspect
         self._engine.dispose()
 
     @classmethod
@@ -1,5 +1,9 @@
 from typing import List
 from lib.logger import get_logger
+from lib.query_analysis.parse_cache import get_parsed_query
+
+# Re-exported, tokenize_by_statement used to be defined in this module
+from lib.query_analysis.parse_cache import tokenize_by_statement  # noqa: F401
 import sqlparse
 
 
@@ -37,10 +41,24 @@ def process_query(query, language=None):
     else:
         default_schema = "default"
 
+    table_per_statement, lineage_per_statement = get_parsed_query(query).get_result(
+        f"lineage:{default_schema}",
+        lambda parsed_query: process_statements(
+            parsed_query.statements, default_schema
+        ),
+    )
+    # Copy the cached result since callers may modify it
+    return (
+        [list(tables) for tables in table_per_statement],
+        [[dict(lineage) for lineage in lineages] for lineages in lineage_per_statement],
+    )
+
+
+def process_statements(statements, default_schema):
+    """Same as process_query, but for statements that are already tokenized"""
     lineage_per_statement = []
     table_per_statement = []
     # This tracks which schema (generic parent table specified in a USE statement) is in use
-    statements = tokenize_by_statement(query)
     # A list of placeholders but are not real tables
 
     for statement in statements:
@@ -66,8 +84,16 @@ def get_table_statement_type(query: str) -> List[str]:
                         SELECT/UPDATE/CREATE/DROP
                      Return None if not identifiable.
     """
+    return list(
+        get_parsed_query(query).get_result(
+            "statement_types",
+            lambda parsed_query: get_statements_type(parsed_query.statements),
+        )
+    )
 
-    statements = tokenize_by_statement(query)
+
+def get_statements_type(statements) -> List[str]:
+    """Same as get_table_statement_type, but for statements that are already tokenized"""
     statement_types = []
     for statement in statements:
         statement_type = None
@@ -224,14 +250,3 @@ def compute_lineage(table_list, from_list):
         for target in table_list:
             lineage.append({"source": source, "target": target})
     return lineage
-
-
-def tokenize_by_statement(query: str):
-    statements = sqlparse.parse(
-        sqlparse.format(query.strip(), strip_comments=True, keyword_case="upper")
-    )
-
-    # Filter out empty statements
-    return [
-        statement for statement in statements if statement.token_first() is not None
-    ]
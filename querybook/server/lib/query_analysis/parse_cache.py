@@ -0,0 +1,186 @@
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+import sqlparse
+
+from clients.redis_client import with_redis
+from env import QuerybookSettings
+from lib.logger import get_logger
+
+LOG = get_logger(__file__)
+
+REDIS_PARSE_RESULT_KEY_PREFIX = "query_parse:"
+
+
+def tokenize_by_statement(query: str):
+    statements = sqlparse.parse(
+        sqlparse.format(query.strip(), strip_comments=True, keyword_case="upper")
+    )
+
+    # Filter out empty statements
+    return [
+        statement for statement in statements if statement.token_first() is not None
+    ]
+
+
+def get_query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+class ParsedQuery(object):
+    """The parse of a query text along with the results derived from it.
+
+    The query is tokenized at most once, and each result (statement
+    ranges, statement types, tables...) is computed at most once. Results
+    must be json serializable so that they can be shared across processes
+    through redis if QUERY_PARSE_CACHE_REDIS_TTL is set.
+    """
+
+    def __init__(self, query: str, query_hash: str, results: Dict[str, Any] = None):
+        self.query = query
+        self.query_hash = query_hash
+        self._results = results or {}
+        self._statements = None
+
+    @property
+    def statements(self) -> List[sqlparse.sql.Statement]:
+        """The non empty statements of the query, without comments
+        and with upper case keywords
+        """
+        if self._statements is None:
+            self._statements = tokenize_by_statement(self.query)
+        return self._statements
+
+    def get_result(self, key: str, compute: Callable[["ParsedQuery"], Any]) -> Any:
+        """Get a result derived from the query, computing it if needed
+
+        Arguments:
+            key {str} -- Name of the result, it must include all the
+                         parameters the result depends on
+            compute {Callable[[ParsedQuery], Any]} -- Computes the result
+
+        Returns:
+            Any -- The cached result, which must not be modified
+        """
+        if key not in self._results:
+            result = compute(self)
+            self._results[key] = result
+            if QuerybookSettings.QUERY_PARSE_CACHE_REDIS_TTL:
+                _persist_parse_result(self.query_hash, key, result)
+        return self._results[key]
+
+
+class ParseCache(object):
+    """Bounded LRU of the parsed queries, keyed by the hash of the query text"""
+
+    def __init__(self, max_size: int, max_chars: Optional[int] = None):
+        """
+        Arguments:
+            max_size {int} -- Max number of parsed queries
+
+        Keyword Arguments:
+            max_chars {Optional[int]} -- Max total length of the parsed queries,
+                                         since their tokens take memory in
+                                         proportion. None for no limit (default: {None})
+        """
+        self._max_size = max_size
+        self._max_chars = max_chars
+        self._parsed_queries = OrderedDict()
+        self._chars = 0
+        self._lock = threading.Lock()
+
+    def get(self, query: str) -> ParsedQuery:
+        query_hash = get_query_hash(query)
+        with self._lock:
+            parsed_query = self._parsed_queries.get(query_hash)
+            if parsed_query is not None:
+                self._parsed_queries.move_to_end(query_hash)
+                return parsed_query
+
+        results = None
+        if QuerybookSettings.QUERY_PARSE_CACHE_REDIS_TTL:
+            results = _load_parse_results(query_hash)
+        parsed_query = ParsedQuery(query, query_hash, results=results)
+        if self._max_chars is not None and len(query) > self._max_chars:
+            # Too big to be kept in memory
+            return parsed_query
+
+        with self._lock:
+            # Another thread may have added it in the meantime
+            if query_hash in self._parsed_queries:
+                parsed_query = self._parsed_queries[query_hash]
+            else:
+                self._parsed_queries[query_hash] = parsed_query
+                self._chars += len(query)
+            self._parsed_queries.move_to_end(query_hash)
+            while len(self._parsed_queries) > self._max_size or (
+                self._max_chars is not None and self._chars > self._max_chars
+            ):
+                _, evicted_query = self._parsed_queries.popitem(last=False)
+                self._chars -= len(evicted_query.query)
+        return parsed_query
+
+    def clear(self):
+        with self._lock:
+            self._parsed_queries.clear()
+            self._chars = 0
+
+
+_parse_cache = None
+_parse_cache_lock = threading.Lock()
+
+
+def get_parse_cache() -> ParseCache:
+    global _parse_cache
+    with _parse_cache_lock:
+        if _parse_cache is None:
+            _parse_cache = ParseCache(
+                QuerybookSettings.QUERY_PARSE_CACHE_SIZE,
+                max_chars=QuerybookSettings.QUERY_PARSE_CACHE_MAX_CHARS,
+            )
+        return _parse_cache
+
+
+def get_parsed_query(query: str) -> ParsedQuery:
+    """Get the cached parse of the query text, used by all the
+       functions of lib.query_analysis that parse a query
+
+    Arguments:
+        query {str} -- The SQL query
+
+    Returns:
+        ParsedQuery
+    """
+    return get_parse_cache().get(query)
+
+
+def _get_redis_key(query_hash: str) -> str:
+    return f"{REDIS_PARSE_RESULT_KEY_PREFIX}{query_hash}"
+
+
+@with_redis
+def _load_parse_results(query_hash: str, redis_conn=None) -> Dict[str, Any]:
+    try:
+        return {
+            key.decode("utf-8"): json.loads(value)
+            for key, value in redis_conn.hgetall(_get_redis_key(query_hash)).items()
+        }
+    except Exception:
+        # The results are recomputed if redis is not available
+        LOG.warning("Failed to load parse results", exc_info=True)
+        return {}
+
+
+@with_redis
+def _persist_parse_result(query_hash: str, key: str, result: Any, redis_conn=None):
+    redis_key = _get_redis_key(query_hash)
+    try:
+        with redis_conn.pipeline() as pipe:
+            pipe.hset(redis_key, key, json.dumps(result))
+            pipe.expire(redis_key, QuerybookSettings.QUERY_PARSE_CACHE_REDIS_TTL)
+            pipe.execute()
+    except Exception:
+        LOG.warning("Failed to persist parse result", exc_info=True)
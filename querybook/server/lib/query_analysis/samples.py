@@ -4,8 +4,12 @@ import json
 from typing import Dict, Tuple, List, Union
 
 from app.db import with_session
+from lib import metastore
+from lib.logger import get_logger
 from logic.metastore import get_table_by_id
 
+LOG = get_logger(__file__)
+
 
 class QuerybookColumnType(Enum):
     String = "string"
@@ -38,7 +42,7 @@ def make_samples_query(
     }
     query_filters = []
 
-    partition = _verify_or_get_partition(table, partition)
+    partition = _verify_or_get_partition(table, partition, session=session)
     if partition:
         query_filters.extend(_format_partition_filter(partition, column_type_by_name))
 
@@ -74,11 +78,14 @@ LIMIT {}""".format(
     return query
 
 
-def _verify_or_get_partition(table, partition: Union[str, None]) -> Union[str, None]:
+def _verify_or_get_partition(
+    table, partition: Union[str, None], session=None
+) -> Union[str, None]:
     """
     Get the list of latest partitions from table
     If partition is provided, then we check if it is in latest partitions
-    Else if partition is None, then we set it from the latest partitions
+    Else if partition is None, then we set it from the latest partitions,
+    or from the metastore if the partitions of the table are not loaded
 
     Args:
         table (DataTable): Table from DB
@@ -90,11 +97,30 @@ def _verify_or_get_partition(table, partition: Union[str, None]) -> Union[str, N
 
     information = table.information
     partitions = []
+    partition_keys = []
     if information:
-        partitions = json.loads(information.to_dict().get("latest_partitions") or "[]")
+        information_dict = information.to_dict()
+        partitions = json.loads(information_dict.get("latest_partitions") or "[]")
+        partition_keys = (information_dict.get("column_info") or {}).get(
+            "partition_keys", []
+        )
 
     if partition is None:
         partition = next(iter(reversed(partitions)), None)
+        if partition is None and partition_keys:
+            try:
+                partition = metastore.get_latest_partition(
+                    table.data_schema.metastore_id,
+                    table.data_schema.name,
+                    table.name,
+                    session=session,
+                )
+            except Exception:
+                # The samples are still useful without the partition filter
+                LOG.warning(
+                    f"Failed to get the latest partition of {table.name}",
+                    exc_info=True,
+                )
     else:
         # Since partition is provided
         # Check the validity of partition provided
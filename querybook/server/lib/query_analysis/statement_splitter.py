@@ -0,0 +1,213 @@
+"""Split a query in statements without building the sqlparse parse tree
+
+sqlparse.parse lexes the query with each of its lexer rules tried one
+after the other at every position, splits the tokens in statements and
+then groups the tokens of every statement. On large queries this is slow,
+while the statement ranges only depend on the token boundaries.
+
+Here the lexer rules of sqlparse (comments, quoted strings and names,
+backticks, dollar quoting...) are merged in a single regex, and the
+statement splitter of sqlparse is replayed on the token stream, so the
+ranges are the same as the ones computed from the parse tree.
+"""
+import re
+from typing import Iterator, List, Tuple
+
+from sqlparse import tokens as T
+from sqlparse.keywords import SQL_REGEX
+
+# Tokens skipped before the start of a statement
+skip_token_type = [
+    T.Comment.Single,
+    T.Comment.Multi,
+    T.Whitespace,
+    T.Newline,
+]
+# Tokens kept in a statement after its ";"
+EOS_TOKEN_TYPE = (T.Whitespace, T.Comment.Single)
+_NEWLINE_REGEX = re.compile(r"\r\n|\r|\n")
+
+
+def _build_lexer_regex():
+    """Merge the lexer rules of sqlparse in one regex. Like in
+    sqlparse.lexer.Lexer, the first rule that matches at a position wins
+
+    Returns:
+        Tuple[re.Pattern, Dict[int, Any]] -- The regex and the token type
+            (or the function that returns it) by the group index of each rule
+    """
+    patterns = []
+    action_by_group = {}
+    num_groups = 0
+    for rexmatch, action in SQL_REGEX:
+        regex = rexmatch.__self__
+        group_index = num_groups + 1
+        # Backreferences are shifted by the groups of the previous rules
+        pattern = re.sub(
+            r"(?<!\\)\\(\d+)",
+            lambda match: "\\{}".format(int(match.group(1)) + group_index),
+            regex.pattern,
+        )
+        patterns.append(f"({pattern})")
+        action_by_group[group_index] = action
+        num_groups += regex.groups + 1
+    return (
+        re.compile("|".join(patterns), SQL_REGEX[0][0].__self__.flags),
+        action_by_group,
+    )
+
+
+_LEXER_REGEX, _ACTION_BY_GROUP = _build_lexer_regex()
+
+
+def iter_tokens(query: str) -> Iterator[Tuple[T._TokenType, str, int]]:
+    """Lex the query like sqlparse.lexer.tokenize
+
+    Arguments:
+        query {str}
+
+    Returns:
+        Iterator[Tuple[T._TokenType, str, int]] -- Token type, value and offset
+    """
+    pos = 0
+    for match in _LEXER_REGEX.finditer(query):
+        start = match.start()
+        # sqlparse yields an error token for each char that no rule matches
+        for error_pos in range(pos, start):
+            yield T.Error, query[error_pos], error_pos
+
+        value = match.group()
+        action = _ACTION_BY_GROUP[match.lastindex]
+        if isinstance(action, T._TokenType):
+            yield action, value, start
+        else:
+            yield action(value)[0], value, start
+        pos = match.end()
+
+    for error_pos in range(pos, len(query)):
+        yield T.Error, query[error_pos], error_pos
+
+
+class _StatementSplitter(object):
+    """Same split levels as sqlparse.engine.StatementSplitter"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._is_create = False
+        self._begin_depth = 0
+
+        self.consume_ws = False
+        self.level = 0
+
+    def process_token(self, ttype: T._TokenType, value: str):
+        self.level += self._change_splitlevel(ttype, value)
+        if self.level <= 0 and ttype is T.Punctuation and value == ";":
+            self.consume_ws = True
+
+    def _change_splitlevel(self, ttype: T._TokenType, value: str) -> int:
+        if ttype not in T.Keyword:
+            return 0
+
+        unified = value.upper()
+        if ttype is T.Keyword.DDL and unified.startswith("CREATE"):
+            self._is_create = True
+            return 0
+
+        if unified == "DECLARE" and self._is_create and self._begin_depth == 0:
+            return 1
+
+        if unified == "BEGIN":
+            self._begin_depth += 1
+            return 1 if self._is_create else 0
+
+        if unified == "END":
+            self._begin_depth = max(0, self._begin_depth - 1)
+            return -1
+
+        if (
+            unified in ("IF", "FOR", "WHILE")
+            and self._is_create
+            and self._begin_depth > 0
+        ):
+            return 1
+
+        if unified in ("END IF", "END FOR", "END WHILE"):
+            return -1
+
+        return 0
+
+
+class _Statement(object):
+    def __init__(self, start: int):
+        self.start = start
+        self.content_start = None
+        self.end = None
+        # If the statement is not empty once comments, whitespaces and ";"
+        # are removed, see statements.get_sanitized_statement
+        self.has_content = False
+        # sqlparse.format strips the whitespaces at the end of each line and
+        # the whitespaces grouped after a comment, but other whitespaces than
+        # " \n\r\t" are kept if they are followed by a ";" on the same line
+        self._has_line_space = False
+        self._after_comment = False
+
+    def add_token(self, ttype: T._TokenType, value: str, start: int):
+        if self.content_start is None and ttype not in skip_token_type:
+            self.content_start = start
+
+        is_semicolon = ttype is T.Punctuation and value == ";"
+        if is_semicolon and self.end is None:
+            self.end = start
+
+        if self.has_content:
+            return
+        if ttype in T.Comment:
+            self._after_comment = True
+        elif ttype in T.Whitespace:
+            if not self._after_comment:
+                lines = _NEWLINE_REGEX.split(value)
+                self._has_line_space = (
+                    self._has_line_space and len(lines) == 1
+                ) or lines[-1].strip(" \t") != ""
+        else:
+            self._after_comment = False
+            self.has_content = not is_semicolon or self._has_line_space
+
+    def get_range(self, statement_end: int) -> Tuple[int, int]:
+        return (
+            self.content_start,
+            statement_end if self.end is None else self.end,
+        )
+
+
+def split_statement_ranges(query: str) -> List[Tuple[int, int]]:
+    """Get the range of each non empty statement in the query, the ranges
+       exclude the leading whitespaces and comments and the ending ";"
+
+    Arguments:
+        query {str}
+
+    Returns:
+        List[Tuple[int, int]] -- The [start, end) offsets of each statement
+    """
+    statement_ranges = []
+    splitter = _StatementSplitter()
+    statement = None
+
+    for ttype, value, start in iter_tokens(query):
+        if splitter.consume_ws and ttype not in EOS_TOKEN_TYPE:
+            if statement.has_content:
+                statement_ranges.append(statement.get_range(start))
+            statement = None
+            splitter.reset()
+
+        if statement is None:
+            statement = _Statement(start)
+        splitter.process_token(ttype, value)
+        statement.add_token(ttype, value, start)
+
+    if statement is not None and statement.has_content:
+        statement_ranges.append(statement.get_range(len(query)))
+    return statement_ranges
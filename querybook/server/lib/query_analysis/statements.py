@@ -3,15 +3,29 @@ from typing import List, Tuple
 
 import sqlparse
 
-skip_token_type = [
-    sqlparse.tokens.Comment.Single,
-    sqlparse.tokens.Comment.Multi,
-    sqlparse.tokens.Whitespace,
-    sqlparse.tokens.Newline,
-]
+from lib.query_analysis.parse_cache import get_parsed_query
+from lib.query_analysis.statement_splitter import (
+    skip_token_type,
+    split_statement_ranges,
+)
 
 
 def get_statement_ranges(query: str) -> List[Tuple[int, int]]:
+    return [
+        tuple(statement_range)
+        for statement_range in get_parsed_query(query).get_result(
+            "statement_ranges",
+            lambda parsed_query: split_statement_ranges(parsed_query.query),
+        )
+    ]
+
+
+def parse_statement_ranges(query: str) -> List[Tuple[int, int]]:
+    """Get the statement ranges from the sqlparse parse tree, which is
+    slower than split_statement_ranges but gives the same ranges
+    """
+    # The ranges are offsets in the original query text, so they are
+    # parsed from the query as is instead of the tokenized statements
     statements = sqlparse.parse(query)
     statement_ranges = []
     start_index = 0
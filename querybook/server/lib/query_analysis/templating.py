@@ -75,36 +75,31 @@ def get_default_variables():
 def create_get_latest_partition(
     engine_id: int, session=None
 ) -> Callable[[str, str], str]:
-    _metastore_loader = None
+    _metastore_id = None
 
-    def get_metastore():
-        """Lazily initialize metastore_loader from DB.
+    def get_metastore_id():
+        """Lazily get the metastore id of the engine from DB.
            Use outer-scope variable to memoized initialization
 
         Raises:
             LatestPartitionException: If the metastore does not exist for engine_id, throw error
 
         Returns:
-           BaseMetastoreLoader: metastore loader to fetch table/schema info
+           int: id of the metastore to fetch table/schema info
         """
-        nonlocal _metastore_loader
-        if _metastore_loader is not None:
-            return _metastore_loader
+        nonlocal _metastore_id
+        if _metastore_id is not None:
+            return _metastore_id
 
         engine = admin_logic.get_query_engine_by_id(engine_id, session=session)
-        metastore_id = engine.metastore_id if engine else None
-        _metastore_loader = (
-            metastore.get_metastore_loader(metastore_id, session=session)
-            if metastore_id is not None
-            else None
-        )
+        _metastore_id = engine.metastore_id if engine else None
 
-        if _metastore_loader is None:
+        if _metastore_id is None:
             raise LatestPartitionException(
                 f"Unable to load metastore for engine id {engine_id}"
             )
 
-        return _metastore_loader
+        return _metastore_id
 
     def get_latest_partition(
         full_table_name: str, partition: str = None, conditions: Dict[str, str] = None
@@ -132,9 +127,9 @@ def create_get_latest_partition(
 
         [schema_name, table_name] = full_table_name_parts
 
-        metastore_loader = get_metastore()
-        latest_partition = metastore_loader.get_latest_partition(
-            schema_name, table_name, conditions
+        # The metastore loaders are pooled and the partitions cached across renders
+        latest_partition = metastore.get_latest_partition(
+            get_metastore_id(), schema_name, table_name, conditions, session=session
         )
 
         if latest_partition:
@@ -1,6 +1,6 @@
 from time import sleep
 from abc import ABCMeta, abstractmethod
-from typing import List, Any
+from typing import List, Any, Optional
 
 
 class ClientBaseClass(metaclass=ABCMeta):
@@ -82,6 +82,17 @@ class CursorBaseClass(metaclass=ABCMeta):
 
         return 0
 
+    @property
+    def engine_state(self) -> Optional[str]:
+        """The state of the query reported by the engine, such as QUEUED
+           or RUNNING for Presto. Used to decide how often to poll
+
+        Returns:
+            Optional[str] -- None if the engine does not report it
+        """
+
+        return None
+
     def get_logs(self) -> str:
         """Fetch the logs from the engine. Note that every time this
            function is called, it should return the logs after last
@@ -94,14 +105,28 @@ class CursorBaseClass(metaclass=ABCMeta):
         return ""
 
     # These functions are intended to use as is
-    def get_rows_iter(self, chunk_size: int = 10000):
+    def get_rows_batch_iter(self, chunk_size: int = 10000):
+        """Iterate the results in batches of get_n_rows
+
+        Keyword Arguments:
+            chunk_size {int} -- max number of rows per batch (default: {10000})
+
+        Yields:
+            List[List[Any]] -- non empty batch of rows
+        """
         while True:
             rows = self.get_n_rows(chunk_size)
+            if rows is None:
+                break
 
-            if rows is None or len(rows) == 0:
+            rows = rows if isinstance(rows, list) else list(rows)
+            if len(rows) == 0:
                 break
-            for row in rows:
-                yield row
+            yield rows
+
+    def get_rows_iter(self, chunk_size: int = 10000):
+        for rows in self.get_rows_batch_iter(chunk_size):
+            yield from rows
 
     def get_rows(self) -> List:
         return [row for row in self.get_rows_iter()]
@@ -1,13 +1,15 @@
 from abc import ABCMeta, abstractclassmethod
 import datetime
+from functools import partial
+from itertools import chain
 import time
 from typing import Union, List
 
 from app.db import DBSession
 from app.flask_app import socketio
+from env import QuerybookSettings
 
 
-from const.db import description_length
 from const.query_execution import (
     QueryExecutionStatus,
     StatementExecutionStatus,
@@ -17,13 +19,22 @@ from const.query_execution import (
 from lib.form import AllFormField
 from lib.logger import get_logger
 from lib.query_executor.base_client import ClientBaseClass
+from lib.query_executor.log_buffer import StatementLogBuffer
+from lib.query_executor.poll_scheduler import (
+    POLL_POLICY_FIELDS,
+    BasePollScheduler,
+    get_poll_scheduler,
+)
+from lib.query_executor.result_pipeline import ResultUploadPipeline
 from lib.query_executor.utils import (
-    merge_str,
     parse_exception,
     format_if_internal_error_with_stack_trace,
 )
 from lib.result_store import GenericUploader
-from lib.utils.csv import row_to_csv
+from lib.result_store.columnar import ColumnarResultWriter, get_columnar_uri
+from lib.result_store.row_index import RowIndexBuilder, get_row_index_uri
+from lib.result_store.utils import get_result_compression
+from lib.utils.csv import row_to_csv, rows_to_csv_lines, serialize_row
 from logic import query_execution as qe_logic
 
 
@@ -52,12 +63,15 @@ class QueryExecutorLogger(object):
         self._statement_ranges = statement_ranges
 
         # logging variable
-        self._has_log = False
-        self._log_cache = ""  # [statement_logs]
+        self._log_buffer = None  # [statement_logs]
         self._meta_info = None  # statement_urls
         self._percent_complete = 0  # percent_complete
         self._statement_progress = {}
 
+        # The pipeline of the result that is currently being uploaded
+        self._result_pipeline = None
+        self.is_result_upload_cancelled = False
+
         # Connect to mysql db
         with DBSession() as session:
             query_execution = qe_logic.update_query_execution(
@@ -109,8 +123,7 @@ class QueryExecutorLogger(object):
         )
 
     def reset_logging_variables(self):
-        self._has_log = False
-        self._log_cache = ""  # [statement_logs]
+        self._log_buffer = None  # [statement_logs]
         self._meta_info = ""  # statement_urls
         self._percent_complete = None  # percent_complete
 
@@ -128,6 +141,7 @@ class QueryExecutorLogger(object):
         ).to_dict()
         statement_execution_id = statement_execution["id"]
         self.statement_execution_ids.append(statement_execution_id)
+        self._log_buffer = StatementLogBuffer(statement_execution_id)
 
         socketio.emit(
             "statement_start",
@@ -154,7 +168,9 @@ class QueryExecutorLogger(object):
 
         has_log = len(log)
         if has_log:
-            self._stream_log(statement_execution_id, log)
+            self._log_buffer.append(log)
+        else:
+            self._log_buffer.flush_if_due()
 
         percent_complete_change = (
             percent_complete is not None and self._percent_complete != percent_complete
@@ -212,6 +228,9 @@ class QueryExecutorLogger(object):
         result_path, result_row_count = self._upload_query_result(
             cursor, statement_execution_id
         )
+        if self.is_result_upload_cancelled:
+            # The statement will be updated by on_cancel
+            return
         upload_path, has_log = self._upload_log(statement_execution_id)
 
         statement_execution = qe_logic.update_statement_execution(
@@ -234,6 +253,9 @@ class QueryExecutorLogger(object):
         )
 
     def on_cancel(self):
+        if self._result_pipeline is not None:
+            self._result_pipeline.cancel()
+
         utcnow = datetime.datetime.utcnow()
         if len(self.statement_execution_ids) > 0:
             statement_execution_id = self.statement_execution_ids[-1]
@@ -326,57 +348,92 @@ class QueryExecutorLogger(object):
         uploader = GenericUploader(key)
         uploader.start()
 
-        uploader.write(row_to_csv(columns))
+        columns_csv = row_to_csv(columns)
+        uploader.write(columns_csv)
         rows_uploaded += 1  # 1 row for the column
 
-        for row in cursor.get_rows_iter():
-            did_upload = uploader.write(row_to_csv(row))
-            if not did_upload:
-                break
-            rows_uploaded += 1
-        uploader.end()
-
-        return uploader.upload_url, rows_uploaded
-
-    def _upload_log(self, statement_execution_id: int):
-        db_read_limit = 50
-        db_read_offset = 0
+        row_index_builder = RowIndexBuilder()
+        row_index_builder.add_header_line(columns_csv)
 
+        columnar_writer = None
+        if QuerybookSettings.COLUMNAR_RESULT_ENABLED:
+            columnar_writer = ColumnarResultWriter(
+                GenericUploader(get_columnar_uri(key)), serialize_row(columns)
+            )
+            columnar_writer.start()
+
+        def upload_batch(serialized_batch) -> bool:
+            nonlocal rows_uploaded
+
+            csv_lines, serialized_columns = serialized_batch
+            rows_in_batch = len(csv_lines)
+            if not uploader.write("".join(csv_lines)):
+                # The batch exceeds the upload limit,
+                # upload row by row until the limit is reached
+                rows_in_batch = 0
+                for csv_line in csv_lines:
+                    if not uploader.write(csv_line):
+                        break
+                    rows_in_batch += 1
+                if serialized_columns is not None:
+                    serialized_columns = [
+                        column[:rows_in_batch] for column in serialized_columns
+                    ]
+
+            rows_uploaded += rows_in_batch
+            row_index_builder.add_lines(csv_lines[:rows_in_batch])
+            if columnar_writer is not None:
+                columnar_writer.write_columns(serialized_columns)
+
+            return rows_in_batch == len(csv_lines)
+
+        self._result_pipeline = ResultUploadPipeline(
+            cursor.get_rows_batch_iter(),
+            # The serialized columns are only kept for the columnar result
+            partial(rows_to_csv_lines, with_columns=columnar_writer is not None),
+            upload_batch,
+            queue_size=QuerybookSettings.RESULT_UPLOAD_QUEUE_SIZE,
+            should_cancel=getattr(self._celery_task, "is_aborted", None),
+        )
         try:
-            self._stream_log(statement_execution_id, "", clear_cache=True)
+            self.is_result_upload_cancelled = not self._result_pipeline.run()
+        finally:
+            self._result_pipeline = None
+            uploader.end()
+            if columnar_writer is not None:
+                columnar_writer.end()
 
-            logs = []
-            has_log = False
-            log_path = None
+        # Byte offsets cannot be used to read compressed results
+        if row_index_builder.is_needed and get_result_compression() is None:
+            with GenericUploader(get_row_index_uri(key)) as index_uploader:
+                index_uploader.write(row_index_builder.to_json())
 
-            with DBSession() as session:
-                while True:
-                    log_rows = qe_logic.get_statement_execution_stream_logs(
-                        statement_execution_id,
-                        limit=db_read_limit,
-                        offset=db_read_offset,
-                        session=session,
-                    )
+        return uploader.upload_url, rows_uploaded
 
-                    logs += map(lambda log: log.log, log_rows)
+    @property
+    def _has_log(self) -> bool:
+        return self._log_buffer is not None and self._log_buffer.has_log
 
-                    if len(log_rows) < db_read_limit:
-                        break
-                    db_read_offset += db_read_limit
+    def _upload_log(self, statement_execution_id: int):
+        try:
+            log_path = None
+            has_log = False
+            if self._log_buffer is None:
+                return log_path, has_log
 
-            if len(logs):
+            logs = self._log_buffer.iter_logs()
+            first_log = next(logs, None)
+            if first_log is not None:
                 has_log = True
                 uri = f"querybook_temp/{statement_execution_id}/log.txt"
                 with GenericUploader(uri) as uploader:
                     log_path = uploader.upload_url
 
-                    for log in logs:
+                    for log in chain([first_log], logs):
                         did_upload = uploader.write(log)
                         if not did_upload:
                             break
-                qe_logic.delete_statement_execution_stream_log(
-                    statement_execution_id, session=session
-                )
+                self._log_buffer.clear()
             return log_path, has_log
         except Exception as e:
             import traceback
@@ -385,49 +442,7 @@ class QueryExecutorLogger(object):
                 f"{e}\n{traceback.format_exc()}"
                 + "Failed to upload logs. Silently suppressing error"
             )
-
-    def _stream_log(
-        self, statement_execution_id: int, log: str, clear_cache: bool = False
-    ):
-        """
-        Persists the log in DB that's over description_length
-        for them to be read from frontend while query is running
-
-        Arguments:
-            statement_execution_id {int}
-            log {str} -- Incoming new log
-
-        Keyword Arguments:
-            clear_cache {bool} -- [If true, will push all _log_cache into mysql DB] (default: {False})
-        """
-        merged_log = merge_str(self._log_cache, log)
-        created_log = False
-        chunk_size = description_length
-        cache_length = 0 if clear_cache else chunk_size
-
-        with DBSession() as session:
-            while len(merged_log) > cache_length:
-                size_of_chunk = min(len(merged_log), chunk_size)
-
-                log_chunk = merged_log[:size_of_chunk]
-                qe_logic.create_statement_execution_stream_log(
-                    statement_execution_id, log_chunk, commit=False, session=session
-                )
-                created_log = True
-                merged_log = merged_log[size_of_chunk:]
-
-            if not self._has_log and created_log:
-                qe_logic.update_statement_execution(
-                    statement_execution_id,
-                    has_log=True,
-                    log_path="stream://",
-                    session=session,
-                )
-                self._has_log = True
-
-            session.commit()
-
-        self._log_cache = merged_log
+            return None, False
 
 
 class QueryExecutorBaseClass(metaclass=ABCMeta):
@@ -514,8 +529,14 @@ class QueryExecutorBaseClass(metaclass=ABCMeta):
             self._statement_ranges,
         )
 
+        self._poll_scheduler = self._get_poll_scheduler(client_setting)
+
         # Initialize cursor once poll loop is setup
-        self._client_setting = client_setting
+        self._client_setting = {
+            key: value
+            for key, value in client_setting.items()
+            if key not in POLL_POLICY_FIELDS
+        }
         self._client = None
         self._cursor = None
 
@@ -548,7 +569,8 @@ class QueryExecutorBaseClass(metaclass=ABCMeta):
             # Completed
             if current_statement_completed:
                 self._on_statement_completion()
-                self._run_next_statement()
+                if self.status == QueryExecutionStatus.RUNNING:
+                    self._run_next_statement()
         except Exception as e:
             # from celery.contrib import rdb; rdb.set_trace()
 
@@ -560,11 +582,15 @@ class QueryExecutorBaseClass(metaclass=ABCMeta):
             self._handle_exception(e, stack_trace)
 
     def sleep(self):
-        # For the first 15 mins, we check every second
-        # Afterwards, check every 10 seconds
-        time_passed = time.time() - self._start_time  # unit in seconds
-        sleep_time = 1 if time_passed < 900 else 10
-        time.sleep(sleep_time)
+        time.sleep(self.get_sleep_time())
+
+    def get_sleep_time(self) -> float:
+        """Seconds to wait before the next poll"""
+        return self._poll_scheduler.get_sleep_time()
+
+    @property
+    def num_polls(self) -> int:
+        return self._poll_scheduler.num_polls
 
     @property
     def meta_info(self):
@@ -589,6 +615,7 @@ class QueryExecutorBaseClass(metaclass=ABCMeta):
 
             statement = self._query[statement_start:statement_end]
             self._execute(statement)
+            self._poll_scheduler.on_statement_start()
             self._current_query_index += 1
         else:
             self._on_query_completion()
@@ -620,6 +647,8 @@ class QueryExecutorBaseClass(metaclass=ABCMeta):
 
     def _on_statement_completion(self):
         self._logger.on_statement_end(self._cursor)
+        if self._logger.is_result_upload_cancelled:
+            self.cancel()
 
     def _on_query_completion(self):
         self._logger.on_query_end()
@@ -631,14 +660,26 @@ class QueryExecutorBaseClass(metaclass=ABCMeta):
     def _is_statement_completed(self):
         completed = self._cursor.poll()
 
+        log = self._get_logs()
+        percent_complete = self._cursor.percent_complete
         self._logger.on_statement_update(
-            log=self._get_logs(),
-            percent_complete=self._cursor.percent_complete,
+            log=log,
+            percent_complete=percent_complete,
             meta_info=self.meta_info,
         )
+        self._poll_scheduler.on_poll(
+            percent_complete=percent_complete,
+            has_new_logs=bool(log),
+            engine_state=self._cursor.engine_state,
+        )
 
         return completed
 
+    @classmethod
+    def _get_poll_scheduler(cls, client_setting) -> BasePollScheduler:
+        """Override to use a custom poll scheduler for the executor"""
+        return get_poll_scheduler(client_setting)
+
     def _get_cursor(self):
         if self._client is None:
             self._client = self._get_client(self._client_setting)
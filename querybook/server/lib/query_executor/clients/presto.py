@@ -14,6 +14,7 @@ class PrestoCursor(PrestoCursorMixin[presto.Cursor, Tuple], CursorBaseClass):
     def _init_query_state_vars(self) -> None:
         self._tracking_url = None
         self._percent_complete = 0
+        self._engine_state = None
 
     def poll(self) -> bool:
         poll_result = self._cursor.poll()
@@ -29,6 +30,7 @@ class PrestoCursor(PrestoCursorMixin[presto.Cursor, Tuple], CursorBaseClass):
         if poll_result:
             self._update_percent_complete(poll_result)
             self._update_tracking_url(poll_result)
+            self._engine_state = poll_result.get("stats", {}).get("state")
 
         return completed
 
@@ -17,6 +17,7 @@ class TrinoCursor(PrestoCursorMixin[trino.dbapi.Cursor, List[Any]], CursorBaseCl
         self.rows = []
         self._tracking_url = None
         self._percent_complete = 0
+        self._engine_state = None
 
     def poll(self) -> bool:
         # this needs to be take care
@@ -27,6 +28,7 @@ class TrinoCursor(PrestoCursorMixin[trino.dbapi.Cursor, List[Any]], CursorBaseCl
         if poll_result:
             self._update_percent_complete(poll_result)
             self._update_tracking_url(poll_result)
+            self._engine_state = poll_result.get("state")
 
         return completed
 
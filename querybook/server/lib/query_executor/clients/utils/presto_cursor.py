@@ -11,6 +11,7 @@ class PrestoCursorMixin(Generic[CursorT, CursorReturnT], ABC):
     _cursor: CursorT
     _percent_complete: float
     _tracking_url: Optional[str]
+    _engine_state: Optional[str] = None
 
     @abstractmethod
     def _init_query_state_vars(self) -> None:
@@ -36,6 +37,10 @@ class PrestoCursorMixin(Generic[CursorT, CursorReturnT], ABC):
     def tracking_url(self):
         return self._tracking_url
 
+    @property
+    def engine_state(self):
+        return self._engine_state
+
     @staticmethod
     def transform_row(row: CursorReturnT, presto_types: List[PrestoType]) -> List[Any]:
         return [pt.format_data(data) for data, pt in zip(row, presto_types)]
@@ -1,4 +1,30 @@
 from lib.form import FormField, StructFormField, FormFieldType, ExpandableFormField
+from lib.query_executor.poll_scheduler import (
+    ALL_POLL_SCHEDULERS,
+    POLL_MAX_INTERVAL_FIELD,
+    POLL_MIN_INTERVAL_FIELD,
+    POLL_SCHEDULER_FIELD,
+)
+
+# Shared by all executors, see lib/query_executor/poll_scheduler.py
+poll_policy_fields = {
+    POLL_SCHEDULER_FIELD: FormField(
+        field_type=FormFieldType.Select,
+        options=list(ALL_POLL_SCHEDULERS.keys()),
+        helper="""
+<p>How often the query engine is polled while a query is running, defaults to fixed.</p>
+<p>adaptive: Starts polling quickly and backs off while the query shows no progress or logs.</p>
+<p>fixed: Polls every second for the first 15 minutes and every 10 seconds afterwards.</p>""",
+    ),
+    POLL_MIN_INTERVAL_FIELD: FormField(
+        field_type=FormFieldType.Number,
+        helper="Only for adaptive, the seconds between the first polls, must be positive. Defaults to 0.1",
+    ),
+    POLL_MAX_INTERVAL_FIELD: FormField(
+        field_type=FormFieldType.Number,
+        helper="Only for adaptive, the max seconds between polls. Defaults to 30",
+    ),
+}
 
 hive_executor_template = StructFormField(
     hive_resource_manager=FormField(
@@ -20,6 +46,7 @@ jdbc:hive2://&lt;host1&gt;:&lt;port1&gt;,&lt;host2&gt;:&lt;port2&gt;/dbName;sess
     username=FormField(regex="\\w+"),
     password=FormField(hidden=True),
     impersonate=FormField(field_type=FormFieldType.Boolean),
+    **poll_policy_fields,
 )
 
 presto_executor_template = StructFormField(
@@ -41,6 +68,7 @@ presto_executor_template = StructFormField(
 <p>Defaults to username. Possible values are username, email, fullname </p>
 <p>See [here](https://prestodb.github.io/docs/current/installation/jdbc.html) for more details.</p>""",
     ),
+    **poll_policy_fields,
 )
 
 trino_executor_template = StructFormField(
@@ -61,6 +89,7 @@ trino_executor_template = StructFormField(
 <p>Defaults to username. Possible values are username, email, fullname </p>
 <p>See [here](https://trino.io/docs/current/installation/jdbc.html) for more details.</p>""",
     ),
+    **poll_policy_fields,
 )
 
 sqlalchemy_template = StructFormField(
@@ -81,10 +110,12 @@ sqlalchemy_template = StructFormField(
             ),
         )
     ),
+    **poll_policy_fields,
 )
 
 bigquery_template = StructFormField(
     google_credentials_json=FormField(
         helper="The JSON string used to log in as service account. If not provided then **GOOGLE_CREDS** from settings will be used.",
-    )
+    ),
+    **poll_policy_fields,
 )
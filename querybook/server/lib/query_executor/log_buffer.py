@@ -0,0 +1,243 @@
+import time
+from typing import Iterator, List
+
+from app.db import DBSession, with_session
+from clients.redis_client import with_redis
+from const.db import description_length
+from env import QuerybookSettings
+from lib.query_executor.utils import merge_str
+from logic import query_execution as qe_logic
+
+# While a statement is running, its logs are readable from the stream log
+# table in the db, or from a redis list if STATEMENT_LOG_REDIS_ENABLED.
+# Once the statement ends, the logs are moved to the result store.
+REDIS_STATEMENT_LOG_KEY_PREFIX = "statement_log:"
+# Queries can run for 2 days before they hit the soft time limit
+REDIS_STATEMENT_LOG_TTL = 3 * 24 * 3600
+STREAM_LOG_READ_BATCH_SIZE = 500
+# The buffer is flushed before the interval once it holds this many chunks
+MAX_PENDING_CHUNKS = 10
+# The log path of the statements whose logs are not moved to the result store yet
+STREAM_LOG_PATH = "stream://"
+
+
+def _get_redis_key(statement_execution_id: int) -> str:
+    return f"{REDIS_STATEMENT_LOG_KEY_PREFIX}{statement_execution_id}"
+
+
+class StatementLogBuffer(object):
+    def __init__(
+        self,
+        statement_execution_id: int,
+        chunk_size: int = description_length,
+        flush_interval: float = None,
+        use_redis: bool = None,
+    ):
+        """Coalesces the logs of a running statement so that they are
+           persisted at most once per flush interval
+
+        Arguments:
+            statement_execution_id {int}
+
+        Keyword Arguments:
+            chunk_size {int} -- Max size of a stream log row (default: {description_length})
+            flush_interval {float} -- Min seconds between writes,
+                                      defaults to STATEMENT_LOG_FLUSH_INTERVAL
+            use_redis {bool} -- Keep the live logs in redis instead of the db,
+                                defaults to STATEMENT_LOG_REDIS_ENABLED
+        """
+        self._statement_execution_id = statement_execution_id
+        self._chunk_size = chunk_size
+        self._flush_interval = (
+            QuerybookSettings.STATEMENT_LOG_FLUSH_INTERVAL
+            if flush_interval is None
+            else flush_interval
+        )
+        self._use_redis = (
+            QuerybookSettings.STATEMENT_LOG_REDIS_ENABLED
+            if use_redis is None
+            else use_redis
+        )
+
+        self._pending_log = ""
+        self._last_flush_time = time.time()
+        # If any log is persisted
+        self.has_log = False
+
+    def append(self, log: str):
+        self._pending_log = merge_str(self._pending_log, log)
+        if (
+            len(self._pending_log) >= self._chunk_size * MAX_PENDING_CHUNKS
+            or time.time() - self._last_flush_time >= self._flush_interval
+        ):
+            self.flush()
+
+    def flush_if_due(self):
+        """Called when the statement is polled without new logs, so that
+        the pending logs are persisted even if no other log comes
+        """
+        if (
+            self._pending_log
+            and time.time() - self._last_flush_time >= self._flush_interval
+        ):
+            # The partial chunk is written as well since the statement is quiet
+            self.flush(final=True)
+
+    def flush(self, final: bool = False):
+        """Persist the pending logs
+
+        Keyword Arguments:
+            final {bool} -- If false, only complete chunks are written to
+                            the db and the rest stays in the buffer (default: {False})
+        """
+        self._last_flush_time = time.time()
+        merged_log = self._pending_log
+        if self._use_redis or final:
+            chunks_length = len(merged_log)
+        else:
+            chunks_length = len(merged_log) - len(merged_log) % self._chunk_size
+        if chunks_length == 0:
+            return
+
+        chunks = [
+            merged_log[i : min(i + self._chunk_size, chunks_length)]
+            for i in range(0, chunks_length, self._chunk_size)
+        ]
+        if self._use_redis:
+            _push_redis_logs(self._statement_execution_id, chunks)
+            if not self.has_log:
+                qe_logic.update_statement_execution(
+                    self._statement_execution_id, has_log=True, log_path=STREAM_LOG_PATH
+                )
+        else:
+            self._write_db_logs(chunks)
+        self.has_log = True
+
+        self._pending_log = merged_log[chunks_length:]
+
+    def iter_logs(self) -> Iterator[str]:
+        """Flush and iterate all the logs of the statement"""
+        self.flush(final=True)
+        if self._use_redis:
+            yield from _get_redis_logs(self._statement_execution_id)
+        else:
+            yield from iter_stream_logs(self._statement_execution_id)
+
+    def clear(self):
+        """Delete the persisted logs, called once they are moved to the result store"""
+        if self._use_redis:
+            _delete_redis_logs(self._statement_execution_id)
+        else:
+            qe_logic.delete_statement_execution_stream_log(self._statement_execution_id)
+
+    def _write_db_logs(self, chunks: List[str]):
+        with DBSession() as session:
+            for chunk in chunks:
+                qe_logic.create_statement_execution_stream_log(
+                    self._statement_execution_id, chunk, commit=False, session=session
+                )
+            if not self.has_log:
+                qe_logic.update_statement_execution(
+                    self._statement_execution_id,
+                    has_log=True,
+                    log_path=STREAM_LOG_PATH,
+                    commit=False,
+                    session=session,
+                )
+            session.commit()
+
+
+def iter_stream_logs(statement_execution_id: int) -> Iterator[str]:
+    """Iterate the stream logs in the db with keyset pagination"""
+    after_id = None
+    with DBSession() as session:
+        while True:
+            log_rows = qe_logic.get_statement_execution_stream_logs(
+                statement_execution_id,
+                limit=STREAM_LOG_READ_BATCH_SIZE,
+                after_id=after_id,
+                session=session,
+            )
+            for log_row in log_rows:
+                yield log_row.log
+
+            if len(log_rows) < STREAM_LOG_READ_BATCH_SIZE:
+                break
+            after_id = log_rows[-1].id
+
+
+@with_session
+def get_live_statement_logs(
+    statement_execution_id: int, limit: int = 100, from_end: bool = False, session=None
+) -> List[str]:
+    """Get the logs of a running statement
+
+    Arguments:
+        statement_execution_id {int}
+
+    Keyword Arguments:
+        limit {int} -- Max number of log chunks (default: {100})
+        from_end {bool} -- If true, return the last chunks (default: {False})
+
+    Returns:
+        List[str]
+    """
+    if QuerybookSettings.STATEMENT_LOG_REDIS_ENABLED:
+        return _get_redis_logs(statement_execution_id, limit=limit, from_end=from_end)
+
+    logs = qe_logic.get_statement_execution_stream_logs(
+        statement_execution_id, limit=limit, from_end=from_end, session=session
+    )
+    return [log.log for log in logs]
+
+
+@with_redis
+def _push_redis_logs(statement_execution_id: int, chunks: List[str], redis_conn=None):
+    redis_key = _get_redis_key(statement_execution_id)
+    with redis_conn.pipeline() as pipe:
+        pipe.rpush(redis_key, *chunks)
+        pipe.expire(redis_key, REDIS_STATEMENT_LOG_TTL)
+        pipe.execute()
+
+
+@with_redis
+def _get_redis_logs(
+    statement_execution_id: int,
+    limit: int = None,
+    from_end: bool = False,
+    redis_conn=None,
+) -> List[str]:
+    if limit is None:
+        start, end = 0, -1
+    elif from_end:
+        start, end = -limit, -1
+    else:
+        start, end = 0, limit - 1
+    return [
+        log.decode("utf-8")
+        for log in redis_conn.lrange(_get_redis_key(statement_execution_id), start, end)
+    ]
+
+
+@with_session
+def delete_stream_logs(statement_execution_ids: List[int], session=None):
+    """Delete the logs of statements that were not moved to the result store,
+       from both the stream log table and redis
+
+    Arguments:
+        statement_execution_ids {List[int]}
+    """
+    if not len(statement_execution_ids):
+        return
+
+    for statement_execution_id in statement_execution_ids:
+        qe_logic.delete_statement_execution_stream_log(
+            statement_execution_id, commit=False, session=session
+        )
+    session.commit()
+    _delete_redis_logs(*statement_execution_ids)
+
+
+@with_redis
+def _delete_redis_logs(*statement_execution_ids: int, redis_conn=None):
+    redis_conn.delete(*map(_get_redis_key, statement_execution_ids))
@@ -0,0 +1,191 @@
+from abc import ABCMeta, abstractmethod
+import time
+from typing import Dict, Optional
+
+# Engine settings of the poll policy, they are shared by all executor
+# templates and are removed from the settings passed to the client
+POLL_SCHEDULER_FIELD = "poll_scheduler"
+POLL_MIN_INTERVAL_FIELD = "poll_min_interval"
+POLL_MAX_INTERVAL_FIELD = "poll_max_interval"
+POLL_POLICY_FIELDS = (
+    POLL_SCHEDULER_FIELD,
+    POLL_MIN_INTERVAL_FIELD,
+    POLL_MAX_INTERVAL_FIELD,
+)
+
+# States reported by Presto/Trino while the query is waiting to be scheduled
+QUEUED_ENGINE_STATES = ("QUEUED", "WAITING_FOR_RESOURCES", "PLANNING")
+
+
+class BasePollScheduler(metaclass=ABCMeta):
+    """Decides how long the executor waits between polls"""
+
+    def __init__(self):
+        self.num_polls = 0
+        self._start_time = time.time()
+
+    def on_statement_start(self):
+        """Called when a new statement is sent to the engine"""
+        pass
+
+    def on_poll(
+        self,
+        percent_complete: Optional[float] = None,
+        has_new_logs: bool = False,
+        engine_state: Optional[str] = None,
+    ):
+        """Called after each poll of a running statement
+
+        Keyword Arguments:
+            percent_complete {Optional[float]} -- Progress between [0, 100] (default: {None})
+            has_new_logs {bool} -- If the engine returned new logs (default: {False})
+            engine_state {Optional[str]} -- State reported by the engine (default: {None})
+        """
+        self.num_polls += 1
+
+    @abstractmethod
+    def get_sleep_time(self) -> float:
+        """Seconds to wait before the next poll"""
+        raise NotImplementedError
+
+    @property
+    def time_passed(self) -> float:
+        return time.time() - self._start_time
+
+
+class FixedPollScheduler(BasePollScheduler):
+    """Polls every second for the first 15 minutes,
+    and every 10 seconds afterwards
+    """
+
+    def get_sleep_time(self) -> float:
+        return 1 if self.time_passed < 900 else 10
+
+
+class AdaptivePollScheduler(BasePollScheduler):
+    """Polls quickly for the first seconds of a statement so that short
+    queries finish with little delay, then backs off while the query shows
+    no activity.
+
+    When the engine reports progress, the interval follows the estimated
+    time left so that the completion is still detected quickly. New logs
+    keep the interval from growing, and queued queries back off.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 0.1,
+        max_interval: float = 30,
+        backoff: float = 1.5,
+        fast_period: float = 2,
+    ):
+        """
+        Keyword Arguments:
+            min_interval {float} -- Seconds between the first polls (default: {0.1})
+            max_interval {float} -- Max seconds between polls (default: {30})
+            backoff {float} -- Interval multiplier when there is no activity (default: {1.5})
+            fast_period {float} -- Seconds of each statement polled with the
+                                   min interval (default: {2})
+        """
+        super(AdaptivePollScheduler, self).__init__()
+        self._min_interval = min_interval
+        self._max_interval = max(min_interval, max_interval)
+        self._backoff = backoff
+        self._fast_period = fast_period
+        self.on_statement_start()
+
+    def on_statement_start(self):
+        self._interval = self._min_interval
+        self._statement_start_time = time.time()
+        self._last_percent_complete = None
+        self._last_progress_time = None
+
+    def on_poll(
+        self,
+        percent_complete: Optional[float] = None,
+        has_new_logs: bool = False,
+        engine_state: Optional[str] = None,
+    ):
+        super(AdaptivePollScheduler, self).on_poll(
+            percent_complete=percent_complete,
+            has_new_logs=has_new_logs,
+            engine_state=engine_state,
+        )
+        now = time.time()
+        progress_rate = self._update_progress_rate(percent_complete, now)
+
+        if now - self._statement_start_time < self._fast_period:
+            self._interval = self._min_interval
+        elif engine_state in QUEUED_ENGINE_STATES:
+            self._interval *= self._backoff
+        elif progress_rate:
+            # Poll a few times before the estimated completion
+            time_left = (100 - percent_complete) / progress_rate
+            self._interval = time_left / 4
+        elif not has_new_logs:
+            self._interval *= self._backoff
+
+        self._interval = min(
+            max(self._interval, self._min_interval), self._max_interval
+        )
+
+    def get_sleep_time(self) -> float:
+        return self._interval
+
+    def _update_progress_rate(
+        self, percent_complete: Optional[float], now: float
+    ) -> Optional[float]:
+        """Returns the percentage completed per second since the last progress"""
+        if percent_complete is None:
+            return None
+
+        progress_rate = None
+        if (
+            self._last_percent_complete is not None
+            and percent_complete > self._last_percent_complete
+        ):
+            elapsed = now - self._last_progress_time
+            if elapsed > 0:
+                progress_rate = (
+                    percent_complete - self._last_percent_complete
+                ) / elapsed
+
+        if (
+            self._last_percent_complete is None
+            or percent_complete != self._last_percent_complete
+        ):
+            self._last_percent_complete = percent_complete
+            self._last_progress_time = now
+        return progress_rate
+
+
+ALL_POLL_SCHEDULERS = {
+    "adaptive": AdaptivePollScheduler,
+    "fixed": FixedPollScheduler,
+}
+DEFAULT_POLL_SCHEDULER = "fixed"
+
+
+def get_poll_scheduler(client_setting: Dict) -> BasePollScheduler:
+    """Create the poll scheduler from the poll policy of the engine
+
+    Arguments:
+        client_setting {Dict} -- The executor params of the query engine
+
+    Returns:
+        BasePollScheduler
+    """
+    scheduler_name = client_setting.get(POLL_SCHEDULER_FIELD) or DEFAULT_POLL_SCHEDULER
+    if scheduler_name not in ALL_POLL_SCHEDULERS:
+        raise ValueError(f"Unknown poll scheduler {scheduler_name}")
+
+    if scheduler_name == "adaptive":
+        kwargs = {}
+        if client_setting.get(POLL_MIN_INTERVAL_FIELD) is not None:
+            if client_setting[POLL_MIN_INTERVAL_FIELD] <= 0:
+                raise ValueError("The min poll interval must be positive")
+            kwargs["min_interval"] = client_setting[POLL_MIN_INTERVAL_FIELD]
+        if client_setting.get(POLL_MAX_INTERVAL_FIELD) is not None:
+            kwargs["max_interval"] = client_setting[POLL_MAX_INTERVAL_FIELD]
+        return AdaptivePollScheduler(**kwargs)
+    return ALL_POLL_SCHEDULERS[scheduler_name]()
@@ -0,0 +1,176 @@
+from queue import Empty, Full, Queue
+import threading
+from typing import Any, Callable, Iterable, Optional
+
+from lib.logger import get_logger
+
+LOG = get_logger(__file__)
+
+# Marks the end of the items in a stage's queue
+_END_OF_QUEUE = object()
+# How often (in seconds) the stages and the caller check for cancellation
+_CHECK_INTERVAL = 0.5
+
+
+class ResultUploadPipeline(object):
+    """Overlaps fetching, serializing and uploading of query results
+
+    The pipeline runs three stages in separate threads that are connected by
+    bounded queues, so that the result can be fetched from the query engine
+    while the previous batches are being serialized and uploaded. When a queue
+    is full, the stage before it waits, which caps the memory used by batches
+    that are not uploaded yet.
+
+    If queue_size is not positive, all stages run one after another
+    in the calling thread instead.
+    """
+
+    def __init__(
+        self,
+        batch_iter: Iterable[Any],
+        serialize: Callable[[Any], Any],
+        upload: Callable[[Any], bool],
+        queue_size: int = 4,
+        should_cancel: Optional[Callable[[], bool]] = None,
+    ):
+        """
+        Arguments:
+            batch_iter {Iterable[Any]} -- Produces the batches of rows
+            serialize {Callable[[Any], Any]} -- Converts a batch to the upload input
+            upload {Callable[[Any], bool]} -- Uploads the serialized batch, returns
+                                              False if no more batches should be uploaded
+
+        Keyword Arguments:
+            queue_size {int} -- Max number of batches waiting between 2 stages
+            should_cancel {Optional[Callable[[], bool]]} -- Checked periodically
+                                                            by the calling thread
+        """
+        self._batch_iter = batch_iter
+        self._serialize = serialize
+        self._upload = upload
+        self._queue_size = queue_size
+        self._should_cancel = should_cancel
+
+        self._stop_event = threading.Event()
+        self._errors = []
+        self.cancelled = False
+
+    def run(self) -> bool:
+        """Run the pipeline until all batches are uploaded, the upload stops
+           or the pipeline gets cancelled. Exceptions from any stage are re-raised.
+
+        Returns:
+            bool -- True if the pipeline was not cancelled
+        """
+        if self._queue_size <= 0:
+            self._run_serially()
+        else:
+            self._run_concurrently()
+
+        if len(self._errors):
+            raise self._errors[0]
+        return not self.cancelled
+
+    def cancel(self):
+        self.cancelled = True
+        self._stop_event.set()
+
+    def _run_serially(self):
+        for batch in self._batch_iter:
+            if self._stop_event.is_set() or self._check_should_cancel():
+                break
+            if not self._upload(self._serialize(batch)):
+                break
+
+    def _run_concurrently(self):
+        serialize_queue = Queue(maxsize=self._queue_size)
+        upload_queue = Queue(maxsize=self._queue_size)
+
+        threads = [
+            threading.Thread(
+                target=self._run_stage,
+                args=(self._fetch_stage, serialize_queue),
+                name="result_fetcher",
+                daemon=True,
+            ),
+            threading.Thread(
+                target=self._run_stage,
+                args=(self._serialize_stage, serialize_queue, upload_queue),
+                name="result_serializer",
+                daemon=True,
+            ),
+            threading.Thread(
+                target=self._run_stage,
+                args=(self._upload_stage, upload_queue),
+                name="result_uploader",
+                daemon=True,
+            ),
+        ]
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(_CHECK_INTERVAL)
+                self._check_should_cancel()
+
+    def _check_should_cancel(self) -> bool:
+        if not self.cancelled and self._should_cancel is not None:
+            try:
+                if self._should_cancel():
+                    self.cancel()
+            except Exception as e:
+                LOG.error(f"Failed to check result upload cancellation: {e}")
+        return self.cancelled
+
+    def _run_stage(self, stage: Callable, *args):
+        try:
+            stage(*args)
+        except Exception as e:
+            self._errors.append(e)
+            self._stop_event.set()
+
+    def _fetch_stage(self, output_queue: Queue):
+        try:
+            for batch in self._batch_iter:
+                if not self._put(output_queue, batch):
+                    return
+        finally:
+            self._put(output_queue, _END_OF_QUEUE)
+
+    def _serialize_stage(self, input_queue: Queue, output_queue: Queue):
+        try:
+            for batch in self._iter_queue(input_queue):
+                if not self._put(output_queue, self._serialize(batch)):
+                    return
+        finally:
+            self._put(output_queue, _END_OF_QUEUE)
+
+    def _upload_stage(self, input_queue: Queue):
+        for serialized_batch in self._iter_queue(input_queue):
+            if not self._upload(serialized_batch):
+                # Let the other stages know no more batches are needed
+                self._stop_event.set()
+                return
+
+    def _put(self, queue: Queue, item) -> bool:
+        while True:
+            if self._stop_event.is_set() and item is not _END_OF_QUEUE:
+                return False
+            try:
+                queue.put(item, timeout=_CHECK_INTERVAL)
+                return True
+            except Full:
+                if self._stop_event.is_set():
+                    # Nobody is consuming anymore
+                    return False
+
+    def _iter_queue(self, queue: Queue):
+        while not self._stop_event.is_set():
+            try:
+                item = queue.get(timeout=_CHECK_INTERVAL)
+            except Empty:
+                continue
+            if item is _END_OF_QUEUE:
+                return
+            yield item
@@ -1,8 +1,16 @@
-from typing import Generator, List, Optional
+from collections import defaultdict
+from itertools import islice
+from typing import Generator, Iterable, List, Optional
 
 from .all_result_stores import ALL_RESULT_STORES
+from .columnar import ColumnarResultReader, get_columnar_uri
+from .row_index import get_row_index_uri, get_row_offset, read_row_index
 from .stores.base_store import BaseReader, BaseUploader
+from clients.common import FileDoesNotExist
 from env import QuerybookSettings
+from lib.logger import get_logger
+
+LOG = get_logger(__file__)
 
 
 class GenericUploader(BaseUploader):
@@ -34,10 +42,63 @@ class GenericUploader(BaseUploader):
         return self._uri_with_store_type
 
 
+def get_result_uris(result_uri: str) -> List[str]:
+    """Get the uris of the result and of the files stored next to it
+
+    Arguments:
+        result_uri {str} -- ex: s3://querybook_temp/1/result.csv
+
+    Returns:
+        List[str] -- The uris, some of the files may not exist
+    """
+    return [result_uri, get_row_index_uri(result_uri), get_columnar_uri(result_uri)]
+
+
+def delete_results(uris: Iterable[str]):
+    """Delete the stored results and logs with one bulk delete per store type.
+       The files of stores that do not support deletes are kept.
+
+    Arguments:
+        uris {Iterable[str]} -- The uris prefixed with the store type, ex: s3://path
+    """
+    uris_by_store_type = defaultdict(list)
+    for uri in uris:
+        store_type, uri_suffix = uri.split("://")
+        # The logs of running statements are not in a result store,
+        # see lib.query_executor.log_buffer.delete_stream_logs
+        if store_type == "stream":
+            continue
+        uris_by_store_type[store_type].append(uri_suffix)
+
+    for store_type, store_uris in uris_by_store_type.items():
+        if store_type not in ALL_RESULT_STORES:
+            LOG.warning(
+                f"Unknown result store {store_type}, kept {len(store_uris)} files"
+            )
+            continue
+        try:
+            ALL_RESULT_STORES[store_type].uploader.bulk_delete(store_uris)
+        except NotImplementedError:
+            LOG.warning(
+                f"Result store {store_type} does not support deletes, "
+                f"kept {len(store_uris)} files"
+            )
+
+
 class GenericReader(BaseReader):
     def __init__(self, uri: str, **kwargs):
+        """
+        Arguments:
+            uri {str} -- The uri prefixed with the store type, ex: s3://path
+
+        Keyword Arguments:
+            max_read_size {Optional[int]} -- Max number of chars to read
+            offset {int} -- The byte to start reading from
+        """
         store_type, uri_suffix = uri.split("://")
         self.store_type = store_type
+        self._full_uri = uri
+        self._kwargs = kwargs
         self._reader: BaseReader = ALL_RESULT_STORES[store_type].reader(
             uri_suffix, **kwargs
         )
@@ -56,6 +117,83 @@ class GenericReader(BaseReader):
     def read_raw(self) -> str:
         return self._reader.read_raw()
 
+    def get_raw_iter(self) -> Generator[str, None, None]:
+        return self._reader.get_raw_iter()
+
+    def read_csv_page(self, number_of_lines: int, offset: int = 0) -> List[List[str]]:
+        """Read the column row and then the data rows starting at the offset.
+           The row index stored next to the result is used to start reading
+           close to the offset, this does not require the reader to be started
+
+        Arguments:
+            number_of_lines {int} -- The number lines to return including the column row
+
+        Keyword Arguments:
+            offset {int} -- The number of data rows to skip (default: {0})
+
+        Returns:
+            List[List[str]] -- Same format as read_csv
+        """
+        with GenericReader(self._full_uri, **self._kwargs) as reader:
+            if offset == 0:
+                return reader.read_csv(number_of_lines)
+            columns = reader.read_csv(1)
+        if number_of_lines <= 1:
+            return columns[:number_of_lines]
+
+        row_index = None
+        try:
+            with GenericReader(get_row_index_uri(self._full_uri)) as index_reader:
+                row_index = read_row_index(index_reader)
+        except (FileDoesNotExist, FileNotFoundError):
+            pass
+
+        byte_offset, rows_to_skip = get_row_offset(row_index, offset)
+        with GenericReader(
+            self._full_uri, **{**self._kwargs, "offset": byte_offset}
+        ) as reader:
+            rows = list(
+                islice(
+                    reader.get_csv_iter(None),
+                    rows_to_skip,
+                    rows_to_skip + number_of_lines - 1,
+                )
+            )
+        return columns + rows
+
+    def read_columnar(
+        self,
+        number_of_lines: Optional[int] = None,
+        offset: int = 0,
+        columns: Optional[List[int]] = None,
+    ) -> Optional[List[List[str]]]:
+        """Read the result from the columnar file stored next to it,
+           this does not require the reader to be started
+
+        Keyword Arguments:
+            number_of_lines {Optional[int]} -- The number lines to return including
+                                               the column row, None to read everything
+            offset {int} -- The number of data rows to skip (default: {0})
+            columns {Optional[List[int]]} -- The column indices to return
+
+        Returns:
+            Optional[List[List[str]]] -- Same format as read_csv, None if there is
+                                         no columnar result
+        """
+        try:
+            with GenericReader(
+                get_columnar_uri(self._full_uri), **self._kwargs
+            ) as columnar_reader:
+                return ColumnarResultReader(columnar_reader).read_rows(
+                    number_of_lines=number_of_lines, offset=offset, columns=columns
+                )
+        except (FileDoesNotExist, FileNotFoundError):
+            return None
+
+    @property
+    def is_compressed(self):
+        return self._reader.is_compressed
+
     @property
     def has_download_url(self):
         return self._reader.has_download_url
@@ -0,0 +1,219 @@
+import json
+import math
+from typing import List, Optional
+
+from lib.result_store.stores.base_store import BaseReader, BaseUploader
+from lib.result_store.utils import get_sibling_uri
+
+# The columnar result is a newline delimited json file that lives next to
+# result.csv. The first line is the header:
+#   {"version": 1, "columns": [...], "row_group_size": 1000}
+# and each following line is a row group, which is a list that contains
+# one list of serialized cells per column.
+# Since json escapes new lines, every row group is guaranteed to be
+# a single line, so readers can skip row groups without parsing the cells.
+# The last line is the footer {"number_of_rows": ...}, it is only written
+# if every row group was uploaded, so that an incomplete file is not read
+# as the whole result.
+COLUMNAR_RESULT_FILE_NAME = "result.columnar"
+COLUMNAR_RESULT_VERSION = 2
+COLUMNAR_ROW_GROUP_SIZE = 1000
+
+
+def get_columnar_uri(result_uri: str) -> str:
+    """Get the uri of the columnar result that is stored
+       in the same folder as the given result
+
+    Arguments:
+        result_uri {str} -- ex: s3://querybook_temp/1/result.csv
+
+    Returns:
+        str -- ex: s3://querybook_temp/1/result.columnar
+    """
+    return get_sibling_uri(result_uri, COLUMNAR_RESULT_FILE_NAME)
+
+
+class ColumnarResultWriter(object):
+    def __init__(
+        self,
+        uploader: BaseUploader,
+        columns: List[str],
+        row_group_size: int = COLUMNAR_ROW_GROUP_SIZE,
+    ):
+        self._uploader = uploader
+        self._columns = columns
+        self._row_group_size = row_group_size
+
+        self._row_group = [[] for _ in columns]
+        self._row_group_length = 0
+        self._number_of_rows = 0
+        # Once any write fails, the rest of the result is dropped
+        self._can_write = True
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.end()
+
+    def start(self):
+        self._uploader.start()
+        self._write_line(
+            {
+                "version": COLUMNAR_RESULT_VERSION,
+                "columns": self._columns,
+                "row_group_size": self._row_group_size,
+            }
+        )
+
+    def write_row(self, cells: List[str]) -> bool:
+        """Add a row of serialized cells to the columnar result
+
+        Arguments:
+            cells {List[str]} -- Cells that are serialized by serialize_cell
+
+        Returns:
+            bool -- False if the columnar result can no longer be written
+        """
+        return self.write_columns([[cell] for cell in cells])
+
+    def write_columns(self, columns: List[List[str]]) -> bool:
+        """Add a batch of rows to the columnar result, the rows are given
+           column by column
+
+        Arguments:
+            columns {List[List[str]]} -- Serialized cells of each column,
+                                         all columns should have the same length
+
+        Returns:
+            bool -- False if the columnar result can no longer be written
+        """
+        if not self._can_write:
+            return False
+
+        number_of_rows = len(columns[0]) if len(columns) else 0
+        start = 0
+        while start < number_of_rows and self._can_write:
+            end = min(
+                number_of_rows,
+                start + self._row_group_size - self._row_group_length,
+            )
+            for row_group_column, column in zip(self._row_group, columns):
+                row_group_column.extend(column[start:end])
+            self._row_group_length += end - start
+            self._number_of_rows += end - start
+            start = end
+
+            if self._row_group_length >= self._row_group_size:
+                self._flush_row_group()
+        return self._can_write
+
+    def end(self):
+        self._flush_row_group()
+        self._write_line({"number_of_rows": self._number_of_rows})
+        self._uploader.end()
+
+    def _flush_row_group(self):
+        if self._row_group_length:
+            self._write_line(self._row_group)
+        self._row_group = [[] for _ in self._columns]
+        self._row_group_length = 0
+
+    def _write_line(self, value):
+        if self._can_write:
+            self._can_write = self._uploader.write(
+                json.dumps(value, ensure_ascii=False) + "\n"
+            )
+
+
+class ColumnarResultReader(object):
+    def __init__(self, reader: BaseReader):
+        """Reads the columnar result
+
+        Arguments:
+            reader {BaseReader} -- A started reader of the columnar result file
+        """
+        self._reader = reader
+
+    def read_rows(
+        self,
+        number_of_lines: Optional[int] = None,
+        offset: int = 0,
+        columns: Optional[List[int]] = None,
+    ) -> Optional[List[List[str]]]:
+        """Read the result in the same shape as BaseReader.read_csv
+
+        Keyword Arguments:
+            number_of_lines {Optional[int]} -- The number lines to return including
+                                               the column row, None to read everything
+            offset {int} -- The number of data rows to skip (default: {0})
+            columns {Optional[List[int]]} -- The column indices to return, None
+                                             returns all columns
+
+        Returns:
+            Optional[List[List[str]]] -- The column row followed by the data rows,
+                                         None if the columnar result is invalid or
+                                         does not have all the rows requested
+        """
+        number_of_rows = None
+        lines_to_read = None
+        if number_of_lines is not None:
+            number_of_rows = max(number_of_lines - 1, 0)
+            lines_to_read = 1 + math.ceil(
+                (offset + number_of_rows) / COLUMNAR_ROW_GROUP_SIZE
+            )
+
+        lines = [
+            line for line in self._reader.read_lines(lines_to_read) if len(line.strip())
+        ]
+        if not len(lines):
+            return None
+
+        header = json.loads(lines[0])
+        if (
+            header.get("version") != COLUMNAR_RESULT_VERSION
+            or header.get("row_group_size") != COLUMNAR_ROW_GROUP_SIZE
+        ):
+            return None
+
+        row_group_lines = lines[1:]
+        footer = (
+            json.loads(row_group_lines.pop())
+            if len(row_group_lines) and row_group_lines[-1].startswith("{")
+            else None
+        )
+        # The reader stops early at the end of the file, or when the read size
+        # limit is reached in which case the line that does not fit is dropped.
+        # Unless the footer is reached, the rows read may not be all the rows
+        # requested.
+        if footer is None and (lines_to_read is None or len(lines) < lines_to_read):
+            return None
+
+        if number_of_lines == 0:
+            return []
+        result = [self._project(header["columns"], columns)]
+
+        row_group_size = header["row_group_size"]
+        first_row_group = offset // row_group_size
+        rows_to_skip = offset % row_group_size
+        for line in row_group_lines[first_row_group:]:
+            row_group_columns = self._project(json.loads(line), columns)
+            rows = [list(row) for row in zip(*row_group_columns)]
+            if rows_to_skip:
+                rows = rows[rows_to_skip:]
+                rows_to_skip = 0
+            result.extend(rows)
+
+            if number_of_rows is not None and len(result) > number_of_rows:
+                break
+
+        if number_of_rows is not None:
+            result = result[: number_of_rows + 1]
+        return result
+
+    @staticmethod
+    def _project(values: List, columns: Optional[List[int]]) -> List:
+        if columns is None:
+            return values
+        return [values[i] for i in columns if 0 <= i < len(values)]
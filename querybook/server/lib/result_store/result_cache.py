@@ -0,0 +1,259 @@
+from collections import OrderedDict
+import json
+import threading
+import time
+from typing import Callable, Hashable, List, Optional, Tuple
+
+from clients.redis_client import with_redis
+from env import QuerybookSettings
+from lib.logger import get_logger
+
+LOG = get_logger(__file__)
+
+# Results of finished statements never change, so the parsed rows
+# of a page are cached in the web process and optionally in redis.
+# Entries of a statement are stored in a redis hash so they can be
+# deleted together, the field is "{limit}:{offset}"
+REDIS_RESULT_CACHE_KEY_PREFIX = "result_cache:"
+# Sorted set of the invalidated statement ids scored by the time they were
+# invalidated, the web processes read the ones added since their last sync
+# to remove them from their in memory cache
+REDIS_RESULT_CACHE_INVALIDATIONS_KEY = "result_cache_invalidations"
+# Min seconds between two reads of the invalidations by a process, it is also
+# the overlap of the reads so that a clock drift does not skip invalidations
+RESULT_CACHE_SYNC_INTERVAL = 10
+
+
+class SizedLRUCache(object):
+    def __init__(self, max_size: int, ttl: Optional[int] = None):
+        """LRU cache that is bounded by the total size of the values
+
+        Arguments:
+            max_size {int} -- Max total size of the cached values
+
+        Keyword Arguments:
+            ttl {Optional[int]} -- Seconds before an entry expires, None to keep
+                                   entries until they are evicted
+        """
+        self._max_size = max_size
+        self._ttl = ttl
+        # key -> (expires_at, size, value)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, _, value = entry
+            if expires_at is not None and expires_at < time.time():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value, size: int) -> bool:
+        """Cache the value, least recently used entries are evicted to make space
+
+        Returns:
+            bool -- False if the value is too big to be cached
+        """
+        if size > self._max_size:
+            return False
+
+        expires_at = time.time() + self._ttl if self._ttl is not None else None
+        with self._lock:
+            self._pop(key)
+            while self.size + size > self._max_size:
+                self._pop(next(iter(self._entries)))
+            self._entries[key] = (expires_at, size, value)
+            self.size += size
+        return True
+
+    def delete_if(self, predicate: Callable[[Hashable], bool]):
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _pop(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+
+_local_result_cache = SizedLRUCache(
+    QuerybookSettings.RESULT_CACHE_MAX_SIZE, ttl=QuerybookSettings.RESULT_CACHE_TTL
+)
+# Time of the last read of the invalidations by this process
+_last_invalidations_sync = None
+
+
+def get_result_size(result: List[List[str]]) -> int:
+    """Approximate number of chars to keep the result in memory"""
+    return sum(len(cell) + 1 for row in result for cell in row)
+
+
+def _get_redis_key(statement_execution_id: int) -> str:
+    return f"{REDIS_RESULT_CACHE_KEY_PREFIX}{statement_execution_id}"
+
+
+def _get_local_key(
+    statement_execution_id: int, limit: int, offset: int
+) -> Tuple[int, int, int]:
+    return (statement_execution_id, limit, offset)
+
+
+def get_cached_result(
+    statement_execution_id: int, limit: int, offset: int = 0
+) -> Optional[List[List[str]]]:
+    """Get the result page of a finished statement from the cache
+
+    Arguments:
+        statement_execution_id {int}
+        limit {int} -- The number of lines including the column row
+
+    Keyword Arguments:
+        offset {int} -- The number of data rows skipped (default: {0})
+
+    Returns:
+        Optional[List[List[str]]] -- None if the page is not cached
+    """
+    _sync_local_cache_invalidations()
+    local_key = _get_local_key(statement_execution_id, limit, offset)
+    result = _local_result_cache.get(local_key)
+    if result is None and QuerybookSettings.RESULT_CACHE_REDIS_ENABLED:
+        result = _get_redis_cached_result(statement_execution_id, limit, offset)
+        if result is not None:
+            _local_result_cache.set(local_key, result, get_result_size(result))
+    return result
+
+
+def set_cached_result(
+    statement_execution_id: int, limit: int, offset: int, result: List[List[str]]
+):
+    """Cache the result page, should only be called for finished statements"""
+    _local_result_cache.set(
+        _get_local_key(statement_execution_id, limit, offset),
+        result,
+        get_result_size(result),
+    )
+    if QuerybookSettings.RESULT_CACHE_REDIS_ENABLED:
+        _set_redis_cached_result(statement_execution_id, limit, offset, result)
+
+
+def invalidate_cached_results(statement_execution_ids: List[int]):
+    """Remove the cached result pages of the statements, this should be
+    called when the statement results are deleted. If the redis cache is
+    enabled, the other processes remove them from their local cache within
+    RESULT_CACHE_SYNC_INTERVAL seconds, otherwise they expire after
+    RESULT_CACHE_TTL seconds.
+    """
+    if not len(statement_execution_ids):
+        return
+
+    _delete_local_cached_results(statement_execution_ids)
+    if QuerybookSettings.RESULT_CACHE_REDIS_ENABLED:
+        _invalidate_redis_cached_results(statement_execution_ids)
+
+
+def _delete_local_cached_results(statement_execution_ids: List[int]):
+    ids = set(statement_execution_ids)
+    _local_result_cache.delete_if(lambda key: key[0] in ids)
+
+
+def _sync_local_cache_invalidations():
+    global _last_invalidations_sync
+
+    if not QuerybookSettings.RESULT_CACHE_REDIS_ENABLED:
+        return
+
+    now = time.time()
+    if _last_invalidations_sync is None:
+        # Nothing was cached by this process before
+        _last_invalidations_sync = now
+        return
+    if now - _last_invalidations_sync < RESULT_CACHE_SYNC_INTERVAL:
+        return
+
+    invalidated_ids = _get_invalidated_ids(
+        _last_invalidations_sync - RESULT_CACHE_SYNC_INTERVAL
+    )
+    if invalidated_ids is None:
+        return
+    if invalidated_ids:
+        _delete_local_cached_results(invalidated_ids)
+    _last_invalidations_sync = now
+
+
+@with_redis
+def _get_redis_cached_result(
+    statement_execution_id: int, limit: int, offset: int, redis_conn=None
+) -> Optional[List[List[str]]]:
+    try:
+        raw_result = redis_conn.hget(
+            _get_redis_key(statement_execution_id), f"{limit}:{offset}"
+        )
+        return json.loads(raw_result) if raw_result is not None else None
+    except Exception as e:
+        LOG.error(f"Failed to read cached result of {statement_execution_id}: {e}")
+        return None
+
+
+@with_redis
+def _set_redis_cached_result(
+    statement_execution_id: int,
+    limit: int,
+    offset: int,
+    result: List[List[str]],
+    redis_conn=None,
+):
+    redis_key = _get_redis_key(statement_execution_id)
+    try:
+        with redis_conn.pipeline() as pipe:
+            pipe.hset(redis_key, f"{limit}:{offset}", json.dumps(result))
+            pipe.expire(redis_key, QuerybookSettings.RESULT_CACHE_TTL)
+            pipe.execute()
+    except Exception as e:
+        LOG.error(f"Failed to cache result of {statement_execution_id}: {e}")
+
+
+@with_redis
+def _get_invalidated_ids(since: float, redis_conn=None) -> Optional[List[int]]:
+    try:
+        return [
+            int(id)
+            for id in redis_conn.zrangebyscore(
+                REDIS_RESULT_CACHE_INVALIDATIONS_KEY, since, "+inf"
+            )
+        ]
+    except Exception as e:
+        LOG.error(f"Failed to read the result cache invalidations: {e}")
+        return None
+
+
+@with_redis
+def _invalidate_redis_cached_results(
+    statement_execution_ids: List[int], redis_conn=None
+):
+    now = time.time()
+    ttl = QuerybookSettings.RESULT_CACHE_TTL
+    with redis_conn.pipeline() as pipe:
+        pipe.delete(*[_get_redis_key(id) for id in statement_execution_ids])
+        pipe.zadd(
+            REDIS_RESULT_CACHE_INVALIDATIONS_KEY,
+            {str(id): now for id in statement_execution_ids},
+        )
+        # The local entries cached before are expired
+        pipe.zremrangebyscore(REDIS_RESULT_CACHE_INVALIDATIONS_KEY, "-inf", now - ttl)
+        pipe.expire(REDIS_RESULT_CACHE_INVALIDATIONS_KEY, ttl)
+        pipe.execute()
@@ -0,0 +1,102 @@
+import json
+from typing import List, Optional, Tuple
+
+from lib.result_store.stores.base_store import BaseReader
+from lib.result_store.utils import get_sibling_uri
+
+# The row index is a json file that lives next to result.csv:
+#   {"version": 1, "interval": 1000, "offsets": [...]}
+# offsets[i] is the byte offset of the line of data row (i * interval)
+# in result.csv, so readers can start reading in the middle of the result.
+# It is only created if the result has more rows than the interval.
+ROW_INDEX_FILE_NAME = "result.index"
+ROW_INDEX_VERSION = 1
+ROW_INDEX_INTERVAL = 1000
+
+
+def get_row_index_uri(result_uri: str) -> str:
+    return get_sibling_uri(result_uri, ROW_INDEX_FILE_NAME)
+
+
+class RowIndexBuilder(object):
+    def __init__(self, interval: int = ROW_INDEX_INTERVAL):
+        self._interval = interval
+        self._offsets = []
+
+        # Number of bytes in result.csv so far
+        self._position = 0
+        self._number_of_rows = 0
+
+    def add_header_line(self, line: str):
+        self._position += len(line.encode("utf-8"))
+
+    def add_lines(self, csv_lines: List[str]):
+        """Index the lines that are uploaded
+
+        Arguments:
+            csv_lines {List[str]} -- Each line is a data row of csv
+        """
+        start = 0
+        while start < len(csv_lines):
+            rows_until_next_entry = self._interval - (
+                self._number_of_rows % self._interval
+            )
+            if rows_until_next_entry == self._interval:
+                self._offsets.append(self._position)
+
+            end = min(len(csv_lines), start + rows_until_next_entry)
+            self._position += len("".join(csv_lines[start:end]).encode("utf-8"))
+            self._number_of_rows += end - start
+            start = end
+
+    @property
+    def is_needed(self) -> bool:
+        return len(self._offsets) > 1
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "version": ROW_INDEX_VERSION,
+                "interval": self._interval,
+                "offsets": self._offsets,
+            }
+        )
+
+
+def read_row_index(reader: BaseReader) -> Optional[dict]:
+    """Parse the row index
+
+    Arguments:
+        reader {BaseReader} -- A started reader of the row index
+
+    Returns:
+        Optional[dict] -- The row index, None if it is not valid
+    """
+    raw = "".join(reader.read_lines(None)).strip()
+    if not len(raw):
+        return None
+    row_index = json.loads(raw)
+    if row_index.get("version") != ROW_INDEX_VERSION:
+        return None
+    return row_index
+
+
+def get_row_offset(row_index: Optional[dict], row: int) -> Tuple[int, int]:
+    """Find where to start reading to get to the given data row
+
+    Arguments:
+        row_index {Optional[dict]} -- The row index, None if there is no index
+        row {int} -- The data row number (0 is the first row after the columns)
+
+    Returns:
+        Tuple[int, int] -- The byte offset to start reading from and the number
+                           of csv rows to skip after that to reach the data row
+    """
+    if row_index is None or not len(row_index["offsets"]):
+        # Start from the beginning and skip the column row as well
+        return 0, row + 1
+
+    interval = row_index["interval"]
+    offsets = row_index["offsets"]
+    entry = min(row // interval, len(offsets) - 1)
+    return offsets[entry], row - entry * interval
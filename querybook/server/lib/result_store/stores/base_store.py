@@ -44,6 +44,16 @@ class BaseUploader(ABC):
         """Finish the upload"""
         pass
 
+    @classmethod
+    def bulk_delete(cls, uris: List[str]):
+        """Delete the uploaded files with as few requests as the store allows,
+           the files that do not exist are ignored
+
+        Arguments:
+            uris {List[str]} -- The uris given to the uploader
+        """
+        raise NotImplementedError()
+
 
 class BaseReader(ABC):
     @abstractmethod
@@ -115,11 +125,27 @@ class BaseReader(ABC):
         """
         pass
 
+    def get_raw_iter(self) -> Generator[str, None, None]:
+        """Read the entire string as raw chunk by chunk, so that the
+           file does not need to be kept in memory
+
+        Returns:
+            Generator[str, None, None] -- generator for the raw file
+        """
+        yield self.read_raw()
+
     @abstractmethod
     def end(self):
         """End the reading process"""
         pass
 
+    @property
+    def is_compressed(self) -> bool:
+        """Indicates if the stored file is compressed, so it cannot be
+        copied as is. Readers always return the decompressed content
+        """
+        return False
+
     @property
     @abstractmethod
     def has_download_url(self):
@@ -3,19 +3,24 @@ from typing import Generator, List, Optional
 
 from env import QuerybookSettings
 from lib.result_store.stores.base_store import BaseReader, BaseUploader
+from lib.result_store.utils import get_result_compressor
 from logic import result_store
+from lib.utils.compression import compressed_to_text, text_to_decompressed
 from lib.utils.csv import str_to_csv_iter, LINE_TERMINATOR
 
 
 class DBReader(BaseReader):
     def __init__(self, uri: str, **kwargs):
         self._uri = uri
+        self._offset = kwargs.get("offset") or 0
         self._text = ""
 
     def start(self):
         kvs = result_store.get_key_value_store(self._uri)
         if kvs:
-            self._text = kvs.value
+            self._text = text_to_decompressed(kvs.value)
+            if self._offset:
+                self._text = self._text.encode("utf-8")[self._offset :].decode("utf-8")
 
     def _get_first_n_lines(self, n: Optional[int]) -> List[str]:
         maxsplit = n if n is not None else -1
@@ -38,6 +43,11 @@ class DBReader(BaseReader):
     def read_raw(self) -> str:
         return self._text
 
+    def get_raw_iter(self) -> Generator[str, None, None]:
+        chunk_size = QuerybookSettings.STORE_READ_SIZE
+        for start in range(0, len(self._text), chunk_size):
+            yield self._text[start : start + chunk_size]
+
     def end(self):
         self._text = ""
 
@@ -57,10 +67,12 @@ class DBUploader(BaseUploader):
     def _reset_variables(self):
         self._chunks = []
         self._chunks_length = 0
+        self._compressor = None
         self.is_uploading = False
 
     def start(self):
         self._reset_variables()
+        self._compressor = get_result_compressor()
         self.is_uploading = True
 
     def write(self, data: str) -> bool:
@@ -71,10 +83,22 @@ class DBUploader(BaseUploader):
         ):
             return False
 
+        # The size limit is in terms of uncompressed chars
         self._chunks_length += data_len
+        if self._compressor is not None:
+            data = self._compressor.compress(data)
         self._chunks.append(data)
         return True
 
     def end(self):
-        result_store.create_key_value_store(key=self._uri, value="".join(self._chunks))
+        if self._compressor is not None:
+            self._chunks.append(self._compressor.flush())
+            value = compressed_to_text(b"".join(self._chunks))
+        else:
+            value = "".join(self._chunks)
+        result_store.create_key_value_store(key=self._uri, value=value)
         self._reset_variables()
+
+    @classmethod
+    def bulk_delete(cls, uris: List[str]):
+        result_store.delete_key_value_stores(uris)
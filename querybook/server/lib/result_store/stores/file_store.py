@@ -1,8 +1,11 @@
 import csv
+import io
 from itertools import islice
 import os
-from typing import Optional
+from typing import List, Optional
 from lib.result_store.stores.base_store import BaseReader, BaseUploader
+from lib.result_store.utils import get_result_compressor
+from lib.utils.compression import open_result_file
 from env import QuerybookSettings
 
 # to use, enable docker volume inside docker-compose.yml
@@ -28,6 +31,7 @@ class FileUploader(BaseUploader):
 
     def start(self):
         self._chunks_length = 0
+        self._compressor = get_result_compressor()
         os.makedirs(self.uri_dir_path, exist_ok=True)
 
     def write(self, data: str):
@@ -40,37 +44,73 @@ class FileUploader(BaseUploader):
             return False
 
         self._chunks_length += data_len
-        with open(self.uri, "a") as result_file:
-            result_file.write(data)
+        if self._compressor is not None:
+            self._write_bytes(self._compressor.compress(data))
+        else:
+            with open(self.uri, "a") as result_file:
+                result_file.write(data)
         return True
 
+    def _write_bytes(self, data: bytes):
+        if len(data):
+            with open(self.uri, "ab") as result_file:
+                result_file.write(data)
+
     def end(self):
-        pass
+        if self._compressor is not None:
+            self._write_bytes(self._compressor.flush())
+            self._compressor = None
 
     @property
     def uri_dir_path(self):
         uri = self.uri
         return "/".join(uri.split("/")[:-1])
 
+    @classmethod
+    def bulk_delete(cls, uris: List[str]):
+        dir_paths = set()
+        for uri in uris:
+            file_uri = get_file_uri(uri)
+            dir_paths.add(os.path.dirname(file_uri))
+            try:
+                os.remove(file_uri)
+            except FileNotFoundError:
+                pass
+
+        # Remove the folders of the results once they are empty
+        for dir_path in dir_paths:
+            try:
+                os.rmdir(dir_path)
+            except OSError:
+                pass
+
 
 class FileReader(BaseReader):
     def __init__(self, uri: str, **kwargs):
         self._uri = get_file_uri(uri)
+        self._offset = kwargs.get("offset") or 0
 
     def start(self):
         pass
 
+    def _open_result_file(self):
+        # The offset is in bytes of the decompressed file
+        result_file = open_result_file(self.uri)
+        if self._offset:
+            result_file.seek(self._offset)
+        return io.TextIOWrapper(result_file, encoding="utf-8")
+
     def get_csv_iter(self, number_of_lines: Optional[int]):
-        with open(self.uri) as result_file:
+        with self._open_result_file() as result_file:
             reader = csv.reader(result_file)
-            return islice(reader, number_of_lines)
+            yield from islice(reader, number_of_lines)
 
-    def read_lines(self, number_of_lines: int):
-        with open(self.uri) as result_file:
+    def read_lines(self, number_of_lines: Optional[int]):
+        with self._open_result_file() as result_file:
             lines = []
             line_count = 0
             for row in result_file:
-                if line_count < number_of_lines:
+                if number_of_lines is None or line_count < number_of_lines:
                     lines.append(row)
                     line_count += 1
                 else:
@@ -78,9 +118,17 @@ class FileReader(BaseReader):
             return lines
 
     def read_raw(self):
-        with open(self.uri) as result_file:
+        with self._open_result_file() as result_file:
             return result_file.read()
 
+    def get_raw_iter(self):
+        with self._open_result_file() as result_file:
+            while True:
+                raw = result_file.read(QuerybookSettings.STORE_READ_SIZE)
+                if not len(raw):
+                    break
+                yield raw
+
     def end(self):
         pass
 
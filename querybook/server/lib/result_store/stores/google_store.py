@@ -35,6 +35,13 @@ class GoogleUploader(BaseUploader):
     def uri(self):
         return f"{QuerybookSettings.STORE_PATH_PREFIX}{self._uri}"
 
+    @classmethod
+    def bulk_delete(cls, uris: List[str]):
+        google_client.delete_google_blobs(
+            QuerybookSettings.STORE_BUCKET_NAME,
+            [f"{QuerybookSettings.STORE_PATH_PREFIX}{uri}" for uri in uris],
+        )
+
 
 class GoogleReader(BaseReader):
     def __init__(self, uri: str, **kwargs):
@@ -46,6 +53,8 @@ class GoogleReader(BaseReader):
         reader_kwargs = {}
         if "max_read_size" in self._kwargs:
             reader_kwargs["max_read_size"] = self._kwargs.get("max_read_size")
+        if self._kwargs.get("offset"):
+            reader_kwargs["offset"] = self._kwargs.get("offset")
         self._reader = google_client.GoogleDownloadClient(
             QuerybookSettings.STORE_BUCKET_NAME,
             self.uri,
@@ -61,8 +70,10 @@ class GoogleReader(BaseReader):
         return self._reader.read_lines(number_of_lines)
 
     def read_raw(self) -> str:
-        # TODO: implement read raw for Google reader
-        raise NotImplementedError()
+        return "".join(self.get_raw_iter())
+
+    def get_raw_iter(self) -> Generator[str, None, None]:
+        return self._reader.get_raw_iter()
 
     def end(self):
         self._reader = None
@@ -1,6 +1,8 @@
 from typing import Generator, List, Optional
 
 from lib.result_store.stores.base_store import BaseReader, BaseUploader
+from lib.result_store.utils import get_result_compressor
+from lib.utils.compression import ZSTD_COMPRESSION
 from env import QuerybookSettings
 from clients import s3_client  # Needed to patch S3FileReader in tests
 from clients.s3_client import MultiPartUploader, S3KeySigner
@@ -9,17 +11,26 @@ from clients.s3_client import MultiPartUploader, S3KeySigner
 class S3Uploader(BaseUploader):
     def __init__(self, uri: str):
         self._uploader = None
+        self._compressor = None
         self._uri = uri
 
     def start(self):
+        self._compressor = get_result_compressor()
         self._uploader = MultiPartUploader(
-            QuerybookSettings.STORE_BUCKET_NAME, self.uri
+            QuerybookSettings.STORE_BUCKET_NAME,
+            self.uri,
+            content_encoding=self._compressor.compression if self._compressor else None,
         )
 
     def write(self, data: str) -> bool:
+        if self._compressor is not None:
+            return self._uploader.write(self._compressor.compress(data))
         return self._uploader.write(data)
 
     def end(self):
+        if self._compressor is not None:
+            self._uploader.write(self._compressor.flush())
+            self._compressor = None
         self._uploader.complete()
         self._uploader = None
 
@@ -31,6 +42,13 @@ class S3Uploader(BaseUploader):
     def uri(self):
         return f"{QuerybookSettings.STORE_PATH_PREFIX}{self._uri}"
 
+    @classmethod
+    def bulk_delete(cls, uris: List[str]):
+        s3_client.delete_s3_objects(
+            QuerybookSettings.STORE_BUCKET_NAME,
+            [f"{QuerybookSettings.STORE_PATH_PREFIX}{uri}" for uri in uris],
+        )
+
 
 class S3Reader(BaseReader):
     def __init__(self, uri: str, **kwargs):
@@ -42,6 +60,8 @@ class S3Reader(BaseReader):
         reader_kwargs = {}
         if "max_read_size" in self._kwargs:
             reader_kwargs["max_read_size"] = self._kwargs.get("max_read_size")
+        if self._kwargs.get("offset"):
+            reader_kwargs["offset"] = self._kwargs.get("offset")
         self._reader = s3_client.S3FileReader(
             QuerybookSettings.STORE_BUCKET_NAME,
             self.uri,
@@ -57,15 +77,29 @@ class S3Reader(BaseReader):
         return self._reader.read_lines(number_of_lines)
 
     def read_raw(self) -> str:
-        # TODO: implement read raw for s3 reader
-        raise NotImplementedError()
+        return "".join(self.get_raw_iter())
+
+    def get_raw_iter(self) -> Generator[str, None, None]:
+        return self._reader.get_raw_iter()
 
     def end(self):
         self._reader = None
 
+    @property
+    def is_compressed(self):
+        return self._reader is not None and bool(self._reader.content_encoding)
+
     @property
     def has_download_url(self):
-        return True
+        # Browsers cannot decode zstd downloads,
+        # these results are streamed decompressed instead
+        if self._reader is not None:
+            content_encoding = self._reader.content_encoding
+        else:
+            content_encoding = s3_client.get_s3_object_content_encoding(
+                QuerybookSettings.STORE_BUCKET_NAME, self.uri
+            )
+        return content_encoding != ZSTD_COMPRESSION
 
     def get_download_url(self, custom_name=None):
         url_params = {}
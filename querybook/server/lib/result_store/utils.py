@@ -0,0 +1,40 @@
+from typing import Optional
+
+from env import QuerybookSettings
+from lib.utils.compression import SUPPORTED_COMPRESSIONS, StreamCompressor
+
+
+def get_sibling_uri(uri: str, file_name: str) -> str:
+    """Get the uri of a file that is stored in the same folder as the given uri
+
+    Arguments:
+        uri {str} -- ex: s3://querybook_temp/1/result.csv
+        file_name {str} -- ex: result.index
+
+    Returns:
+        str -- ex: s3://querybook_temp/1/result.index
+    """
+    parts = uri.rsplit("/", 1)
+    return "/".join(parts[:-1] + [file_name])
+
+
+def get_result_compression() -> Optional[str]:
+    """Get the compression of the RESULT_STORE_COMPRESSION setting
+
+    Raises:
+        ValueError: If the compression is not supported
+
+    Returns:
+        Optional[str] -- gzip, zstd or None if results are not compressed
+    """
+    compression = QuerybookSettings.RESULT_STORE_COMPRESSION
+    if not compression or compression == "none":
+        return None
+    if compression not in SUPPORTED_COMPRESSIONS:
+        raise ValueError(f"Unsupported result store compression {compression}")
+    return compression
+
+
+def get_result_compressor() -> Optional[StreamCompressor]:
+    compression = get_result_compression()
+    return StreamCompressor(compression) if compression else None
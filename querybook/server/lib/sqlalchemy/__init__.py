@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List
+from typing import Dict, List
 from sqlalchemy.orm import validates
 
 from app.db import with_session
@@ -167,9 +167,23 @@ def TruncateString(*fields):
     class TruncateStringMixin:
         @validates(*fields)
         def validate_string_field_length(self, key, value):
-            max_len = getattr(self.__class__, key).prop.columns[0].type.length
+            return self.__class__.truncate_string_field(key, value)
+
+        @classmethod
+        def truncate_string_field(cls, key, value):
+            max_len = getattr(cls, key).prop.columns[0].type.length
             if value and len(value) > max_len:
                 return value[:max_len]
             return value
 
+        @classmethod
+        def truncate_string_fields(cls, values: Dict) -> Dict:
+            """Truncate the values of a mapping, since the bulk operations
+            (e.g. bulk_insert_mappings) do not validate them
+            """
+            return {
+                key: cls.truncate_string_field(key, value) if key in fields else value
+                for key, value in values.items()
+            }
+
     return TruncateStringMixin
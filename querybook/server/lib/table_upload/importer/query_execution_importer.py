@@ -82,7 +82,7 @@ class QueryExecutionImporter(BaseTableUploadImporter):
             store_type = reader.store_type
             resource_path = reader.uri
             resource_type = STORE_TYPE_TO_RESOURCE_TYPE.get(store_type, None)
-            if resource_type:
+            if resource_type and not reader.is_compressed:
                 return [resource_type, resource_path]
 
         return [None, None]
@@ -0,0 +1,175 @@
+import base64
+import gzip
+import zlib
+from typing import BinaryIO, Generator, Iterable, Optional
+
+# Results are compressed as a single gzip or zstd stream, readers detect
+# the compression from the magic bytes so results that are stored before
+# the compression is enabled (or changed) can still be read
+GZIP_COMPRESSION = "gzip"
+ZSTD_COMPRESSION = "zstd"
+
+_MAGIC_BYTES = {
+    GZIP_COMPRESSION: b"\x1f\x8b",
+    ZSTD_COMPRESSION: b"\x28\xb5\x2f\xfd",
+}
+SUPPORTED_COMPRESSIONS = list(_MAGIC_BYTES.keys())
+MAGIC_BYTES_LENGTH = max(len(magic_bytes) for magic_bytes in _MAGIC_BYTES.values())
+
+# Stores that can only keep text (db) save the base64 encoded compressed
+# result after this marker, which is never the start of a csv written by Querybook
+COMPRESSED_TEXT_MARKER = "\x1fcompressed\x1f"
+
+
+def _import_zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError(
+            "zstandard is required to read or write results compressed with zstd"
+        )
+    return zstandard
+
+
+def detect_compression(data: bytes) -> Optional[str]:
+    """Detect the compression by the first bytes of the stored result
+
+    Arguments:
+        data {bytes} -- At least the first MAGIC_BYTES_LENGTH bytes of the file
+
+    Returns:
+        Optional[str] -- gzip, zstd or None if the data is not compressed
+    """
+    for compression, magic_bytes in _MAGIC_BYTES.items():
+        if data.startswith(magic_bytes):
+            return compression
+    return None
+
+
+class StreamCompressor(object):
+    def __init__(self, compression: str):
+        """Compress the result as a single stream across multiple writes
+
+        Arguments:
+            compression {str} -- gzip or zstd
+        """
+        self.compression = compression
+        if compression == GZIP_COMPRESSION:
+            self._compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+        elif compression == ZSTD_COMPRESSION:
+            self._compressor = _import_zstd().ZstdCompressor().compressobj()
+        else:
+            raise ValueError(f"Unsupported result store compression {compression}")
+
+    def compress(self, data: str) -> bytes:
+        """Compress part of the result, the returned bytes can be empty
+        since the compressor keeps some data for the next writes
+        """
+        return self._compressor.compress(data.encode("utf-8"))
+
+    def flush(self) -> bytes:
+        """Finish the stream, must be called once after the last write"""
+        return self._compressor.flush()
+
+
+def compress_iter(
+    chunks: Iterable[str], compression: str
+) -> Generator[bytes, None, None]:
+    """Compress the chunks on the fly, used to stream compressed files
+
+    Arguments:
+        chunks {Iterable[str]} -- The uncompressed chunks
+        compression {str} -- gzip or zstd
+
+    Returns:
+        Generator[bytes, None, None] -- The compressed chunks
+    """
+    compressor = StreamCompressor(compression)
+    for chunk in chunks:
+        compressed_chunk = compressor.compress(chunk)
+        if len(compressed_chunk):
+            yield compressed_chunk
+    yield compressor.flush()
+
+
+class StreamDecompressor(object):
+    """Decompress a result that is read chunk by chunk, the compression
+    is detected from the first chunk and uncompressed data is returned as is
+    """
+
+    def __init__(self):
+        self._detected = False
+        self._pending = b""
+        self._decompressor = None
+
+    def decompress(self, data: bytes) -> bytes:
+        """
+        Arguments:
+            data {bytes} -- The next raw chunk, b"" means the end of file
+
+        Returns:
+            bytes -- The decompressed data, can be empty before the end of file
+        """
+        is_eof = not len(data)
+        if not self._detected:
+            self._pending += data
+            if not is_eof and len(self._pending) < MAGIC_BYTES_LENGTH:
+                return b""
+            data, self._pending = self._pending, b""
+            self._detected = True
+            self._decompressor = self._get_decompressor(detect_compression(data))
+
+        if self._decompressor is None:
+            return data
+        # zstd does not allow decompressing once the frame is complete
+        decompressed = self._decompressor.decompress(data) if len(data) else b""
+        if is_eof and hasattr(self._decompressor, "flush"):
+            decompressed += self._decompressor.flush()
+        return decompressed
+
+    @staticmethod
+    def _get_decompressor(compression: Optional[str]):
+        if compression == GZIP_COMPRESSION:
+            return zlib.decompressobj(wbits=16 + zlib.MAX_WBITS)
+        elif compression == ZSTD_COMPRESSION:
+            return _import_zstd().ZstdDecompressor().decompressobj()
+        return None
+
+
+def decompress(data: bytes) -> bytes:
+    """Decompress the entire result, uncompressed data is returned as is"""
+    decompressor = StreamDecompressor()
+    return decompressor.decompress(data) + decompressor.decompress(b"")
+
+
+def open_result_file(path: str) -> BinaryIO:
+    """Open a stored result file for binary reading, the content
+       is decompressed on the fly if the file is compressed
+
+    Arguments:
+        path {str} -- Path of the file
+
+    Returns:
+        BinaryIO -- The file object, it supports seeking forward
+    """
+    with open(path, "rb") as result_file:
+        compression = detect_compression(result_file.read(MAGIC_BYTES_LENGTH))
+
+    if compression == GZIP_COMPRESSION:
+        return gzip.open(path, "rb")
+    elif compression == ZSTD_COMPRESSION:
+        return _import_zstd().open(path, "rb")
+    return open(path, "rb")
+
+
+def compressed_to_text(data: bytes) -> str:
+    """Encode the compressed result so it can be stored as text"""
+    return COMPRESSED_TEXT_MARKER + base64.b64encode(data).decode("ascii")
+
+
+def text_to_decompressed(text: str) -> str:
+    """Reverse of compressed_to_text, text that is not compressed is returned as is"""
+    if not text.startswith(COMPRESSED_TEXT_MARKER):
+        return text
+    data = base64.b64decode(text[len(COMPRESSED_TEXT_MARKER) :])
+    return decompress(data).decode("utf-8")
@@ -1,9 +1,12 @@
 import csv
 import datetime
 from io import StringIO
+from itertools import zip_longest
 import json
+import math
+import re
 import sys
-from typing import Generator, List, Tuple
+from typing import Any, Callable, Dict, Generator, List, Optional, Sequence, Tuple
 
 from .utils import DATE_STRING, DATETIME_STRING
 
@@ -50,11 +53,14 @@ def serialize_cell(cell) -> str:
             return "[Unserializable]"
 
 
-def row_to_csv(row):
-    output = []
-    for cell in row:
-        str_col = serialize_cell(cell)
+def serialize_row(row) -> List[str]:
+    return [serialize_cell(cell) for cell in row]
+
 
+def serialized_row_to_csv(cells: List[str]) -> str:
+    """Same as row_to_csv, but the cells are already serialized by serialize_cell"""
+    output = []
+    for str_col in cells:
         if any(c in str_col for c in should_escape_list):
             str_col = '"%s"' % str_col.replace('"', '""')
 
@@ -62,79 +68,94 @@ def row_to_csv(row):
     return ",".join(output) + "\n"
 
 
-def csv_sniffer(lines: List[str]) -> int:
-    """Given n number of lines, figure out
-       the last valid line for a csv. The CSV
-       is comma separated and quoted with ".
+def row_to_csv(row):
+    return serialized_row_to_csv(serialize_row(row))
+
 
-    Args:
-        lines (List[str]): Strings
+def _serialize_float(cell: float) -> str:
+    # Same as json.dumps, which uses float.__repr__ for finite values
+    return float.__repr__(cell) if math.isfinite(cell) else json.dumps(cell)
 
-    Returns:
-        int: The last valid index for CSV line (inclusive).
-             lines[:return_val + 1] is a valid CSV block.
-    """
-    last_valid_index = None
-
-    is_inside_cell = False  # Is inside a CSV cell, ie cursor | is in "|cell\n"
-    max_columns_count = None  # All rows should be at least this many
-    columns_count = 0  # The expected number of columns
-
-    for line_idx, line in enumerate(lines):
-        line_len = len(line)
-
-        char_idx = 0
-        while char_idx < line_len:
-            char = line[char_idx]
-
-            if char == COLUMN_ESCAPE:
-                if is_inside_cell:
-                    next_char = line[char_idx + 1] if char_idx < line_len - 1 else None
-                    if next_char == COLUMN_ESCAPE:
-                        # We are seeing "", which is a escaped version of "
-                        char_idx += 2
-                        continue
-                    else:
-                        is_inside_cell = False
-                else:
-                    is_inside_cell = True
-            elif not is_inside_cell and char == COLUMN_TERMINATOR:
-                columns_count += 1
-            char_idx += 1
-
-        # Done looping over the entire line
-        if not is_inside_cell:  # In this case, it is a valid line
-            if max_columns_count is None:
-                max_columns_count = columns_count
-
-            if columns_count > max_columns_count:
-                raise ValueError(
-                    f"CSV is not valid, expected {max_columns_count + 1} cols but seen {columns_count + 1} cols"
-                )
-
-            columns_count = 0
-            last_valid_index = line_idx
-
-    return last_valid_index
-
-
-def split_csv_to_chunks(lines: List[str]) -> Tuple[List[str], List[str]]:
-    """Given a list of lines, break them into 2 parts
-       The first part is a valid CSV chunk, the second part
-       is partial CSV chunk
+
+# Serializers of the cell types that can be serialized without serialize_cell,
+# the results of these never need to be escaped in csv
+_UNESCAPED_TYPE_SERIALIZERS: Dict[type, Callable[[Any], str]] = {
+    int: int.__repr__,
+    float: _serialize_float,
+    type(None): lambda _: "null",
+    datetime.datetime: DATETIME_STRING,
+    datetime.date: DATE_STRING,
+}
+_should_escape_search = re.compile("[%s]" % "".join(should_escape_list)).search
+
+
+def serialize_column(cells: Sequence) -> Tuple[List[str], bool]:
+    """Serialize all cells of a column, the result is the same as calling
+       serialize_cell on each cell. The cell types are checked once for the
+       entire column instead of once per cell.
 
     Args:
-        lines (List[str]): List of lines that do not have \n in them
+        cells (Sequence): cells of a column
 
     Returns:
-        Tuple[List[str], List[str]]: [Valid CSV, Partial block]
+        Tuple[List[str], bool]: The serialized cells, and whether or not
+                                some of the cells may need to be escaped
     """
+    cell_types = set(map(type, cells))
+    if cell_types == {str}:
+        return list(cells), True
+
+    if all(cell_type in _UNESCAPED_TYPE_SERIALIZERS for cell_type in cell_types):
+        if len(cell_types) == 1:
+            serializer = _UNESCAPED_TYPE_SERIALIZERS[cell_types.pop()]
+            return list(map(serializer, cells)), False
+        return [_UNESCAPED_TYPE_SERIALIZERS[type(cell)](cell) for cell in cells], False
+
+    return list(map(serialize_cell, cells)), True
+
 
-    last_valid_csv_idx = csv_sniffer(lines)
+def _escape_csv_cell(cell: str) -> str:
+    if _should_escape_search(cell):
+        return '"%s"' % cell.replace('"', '""')
+    return cell
 
-    if last_valid_csv_idx is None:
-        return [], lines
 
-    valid_csv_chunk = lines[: last_valid_csv_idx + 1]
-    partial_csv_lines = lines[last_valid_csv_idx + 1 :]
-    return valid_csv_chunk, partial_csv_lines
+def rows_to_csv_lines(
+    rows: Sequence[Sequence], with_columns: bool = True
+) -> Tuple[List[str], Optional[List[List[str]]]]:
+    """Batch version of row_to_csv
+
+    Args:
+        rows (Sequence[Sequence]): The rows, they are serialized one by one
+                                   if they do not all have the same length
+        with_columns (bool): Whether or not to return the serialized columns
+
+    Returns:
+        Tuple[List[str], Optional[List[List[str]]]]: The csv line of each row,
+            and the serialized (unescaped) columns padded with empty cells,
+            None if with_columns is False
+    """
+    if len(set(map(len, rows))) > 1:
+        serialized_rows = list(map(serialize_row, rows))
+        return (
+            list(map(serialized_row_to_csv, serialized_rows)),
+            [list(column) for column in zip_longest(*serialized_rows, fillvalue="")]
+            if with_columns
+            else None,
+        )
+
+    columns = []
+    escaped_columns = []
+    for cells in zip(*rows):
+        column, may_need_escape = serialize_column(cells)
+        columns.append(column)
+        escaped_columns.append(
+            list(map(_escape_csv_cell, column)) if may_need_escape else column
+        )
+
+    csv_lines = [",".join(row) + "\n" for row in zip(*escaped_columns)]
+    return csv_lines, columns if with_columns else None
+
+
+def rows_to_csv(rows: Sequence[Sequence]) -> str:
+    return "".join(rows_to_csv_lines(rows, with_columns=False)[0])
@@ -6,6 +6,7 @@ from sqlalchemy import or_
 from datetime import date
 
 from app.db import with_session
+from app.permission_cache import invalidate_all_permissions
 
 from models.admin import (
     QueryEngine,
@@ -73,7 +74,7 @@ def add_query_engine_to_environment(
         )
         or 0
     )
-    return QueryEngineEnvironment.create(
+    engine_environment = QueryEngineEnvironment.create(
         fields={
             "query_engine_id": query_engine_id,
             "environment_id": environment_id,
@@ -82,6 +83,9 @@ def add_query_engine_to_environment(
         commit=commit,
         session=session,
     )
+    # The environments of the engine executions and metastore have changed
+    invalidate_all_permissions(session=session)
+    return engine_environment
 
 
 @with_session
@@ -91,6 +95,7 @@ def remove_query_engine_from_environment(environment_id, query_engine_id, sessio
         environment_id=environment_id,
     ).delete()
     session.commit()
+    invalidate_all_permissions(session=session)
 
 
 @with_session
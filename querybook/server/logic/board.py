@@ -1,12 +1,14 @@
 import datetime
 
 from sqlalchemy import or_
+from sqlalchemy.orm import selectinload
 from app.db import with_session
 from const.elasticsearch import ElasticsearchItem
 from models.board import Board, BoardItem, BoardEditor
 from models.access_request import AccessRequest
+from models.metastore import DataTable
 from lib.sqlalchemy import update_model_fields
-from tasks.sync_elasticsearch import sync_elasticsearch
+from tasks.sync_elasticsearch import queue_elasticsearch_sync
 
 
 @with_session
@@ -193,7 +195,41 @@ def get_boards_from_board_item(
 
 
 def update_es_boards_by_id(board_id: int):
-    sync_elasticsearch.apply_async(args=[ElasticsearchItem.boards.value, board_id])
+    queue_elasticsearch_sync(ElasticsearchItem.boards.value, [board_id])
+
+
+@with_session
+def get_all_boards(after_id=None, limit=100, session=None):
+    """Get a page of the boards ordered by id, along with their
+       docs, tables and editors
+
+    Keyword Arguments:
+        after_id {int} -- Only return the boards after this id (default: {None})
+        limit {int} -- Max number of boards (default: {100})
+    """
+    query = session.query(Board).options(
+        selectinload(Board.docs),
+        selectinload(Board.tables).joinedload(DataTable.data_schema),
+        selectinload(Board.editors),
+    )
+    if after_id is not None:
+        query = query.filter(Board.id > after_id)
+    return query.order_by(Board.id).limit(limit).all()
+
+
+@with_session
+def get_boards_by_ids(ids, session=None):
+    """Get the boards by their ids, along with their docs, tables and editors"""
+    return (
+        session.query(Board)
+        .filter(Board.id.in_(ids))
+        .options(
+            selectinload(Board.docs),
+            selectinload(Board.tables).joinedload(DataTable.data_schema),
+            selectinload(Board.editors),
+        )
+        .all()
+    )
 
 
 @with_session
@@ -1,13 +1,21 @@
 import datetime
 from sqlalchemy import func
+from sqlalchemy.orm import selectinload
 
 from app.db import with_session
+from app.permission_cache import invalidate_permissions
 from const.data_doc import DataCellType
 from const.elasticsearch import ElasticsearchItem
 from const.impression import ImpressionItemType
 from const.query_execution import QueryExecutionStatus
+from env import QuerybookSettings
 from lib.sqlalchemy import update_model_fields
+from lib.data_doc import cell_drafts
 from lib.data_doc.data_cell import cell_types, sanitize_data_cell_meta
+from logic.datadoc_permission import (
+    get_data_cell_permission_resource,
+    get_data_doc_permission_resource,
+)
 from logic.query_execution import get_last_query_execution_from_cell
 from models.datadoc import (
     DataDoc,
@@ -23,7 +31,7 @@ from models.datadoc import (
 from models.access_request import AccessRequest
 from models.impression import Impression
 from models.query_execution import QueryExecution
-from tasks.sync_elasticsearch import sync_elasticsearch
+from tasks.sync_elasticsearch import queue_elasticsearch_sync
 from tasks.sync_es_queries_by_datadoc import (
     sync_es_queries_by_datadoc_id,
     sync_es_query_cells_by_datadoc_id,
@@ -149,6 +157,10 @@ def update_data_doc(id, commit=True, session=None, **fields):
 
     if updated:
         data_doc.updated_at = datetime.datetime.now()
+        if "public" in fields or "owner_uid" in fields:
+            invalidate_permissions(
+                get_data_doc_permission_resource(data_doc.id), session=session
+            )
 
         if commit:
             session.commit()
@@ -187,13 +199,31 @@ def get_data_doc_by_user(uid, environment_id, offset, limit, session=None):
 
 
 @with_session
-def get_all_data_docs(offset=0, limit=100, session=None):
-    return (
+def get_all_data_docs(after_id=None, limit=100, session=None):
+    """Get a page of unarchived data docs ordered by id, along with
+       their cells and editors
+
+    Keyword Arguments:
+        after_id {int} -- Only return the docs after this id (default: {None})
+        limit {int} -- Max number of docs (default: {100})
+    """
+    query = (
         session.query(DataDoc)
         .filter_by(archived=False)
-        .order_by(DataDoc.id.desc())
-        .offset(offset)
-        .limit(limit)
+        .options(selectinload(DataDoc.cells), selectinload(DataDoc.editors))
+    )
+    if after_id is not None:
+        query = query.filter(DataDoc.id > after_id)
+    return query.order_by(DataDoc.id).limit(limit).all()
+
+
+@with_session
+def get_data_docs_by_ids(ids, session=None):
+    """Get the data docs by their ids, along with their cells and editors"""
+    return (
+        session.query(DataDoc)
+        .filter(DataDoc.id.in_(ids))
+        .options(selectinload(DataDoc.cells), selectinload(DataDoc.editors))
         .all()
     )
 
@@ -223,10 +253,11 @@ def clone_data_doc(id, owner_uid, commit=True, session=None):
         session=session,
     )
 
+    draft_contexts = get_data_cell_draft_contexts(cell.id for cell in data_doc.cells)
     for index, cell in enumerate(data_doc.cells):
         data_cell = create_data_cell(
             cell_type=cell.cell_type.name,
-            context=cell.context,
+            context=draft_contexts.get(cell.id, cell.context),
             meta=cell.meta,
             commit=False,
             session=session,
@@ -317,6 +348,90 @@ def update_data_cell(
     return data_cell
 
 
+def get_data_cell_draft_contexts(cell_ids):
+    """Get the edited context of the cells that is not saved yet,
+       see tasks.save_data_cell_drafts
+
+    Arguments:
+        cell_ids {Iterable[int]}
+
+    Returns:
+        Dict[int, str] -- The context by cell id, for the cells with a draft
+    """
+    if not QuerybookSettings.DATA_CELL_SAVE_DELAY:
+        return {}
+    return {
+        cell_id: draft["context"]
+        for cell_id, draft in cell_drafts.get_drafts(cell_ids).items()
+    }
+
+
+def apply_data_cell_drafts(data_cell_dicts):
+    """Replace the context of the serialized cells by their draft
+
+    Arguments:
+        data_cell_dicts {List[Dict]} -- The result of DataCell.to_dict
+
+    Returns:
+        List[Dict] -- The same dicts
+    """
+    draft_contexts = get_data_cell_draft_contexts(
+        data_cell_dict["id"] for data_cell_dict in data_cell_dicts
+    )
+    for data_cell_dict in data_cell_dicts:
+        if data_cell_dict["id"] in draft_contexts:
+            data_cell_dict["context"] = draft_contexts[data_cell_dict["id"]]
+    return data_cell_dicts
+
+
+@with_session
+def save_data_cells_context(cell_ids, session=None):
+    """Save the drafts of the cells to the database
+
+    Arguments:
+        cell_ids {List[int]}
+
+    Returns:
+        List[int] -- The ids of the cells whose draft is saved and removed,
+                     the drafts edited in the meantime are kept
+    """
+    drafts = cell_drafts.get_drafts(cell_ids)
+    if not drafts:
+        return []
+
+    now = datetime.datetime.now()
+    updated_doc_ids = set()
+    updated_query_cell_ids = []
+    for data_cell in session.query(DataCell).filter(DataCell.id.in_(drafts.keys())):
+        # The draft of a detached cell is dropped since it is read only
+        if data_cell.doc is None:
+            continue
+
+        context = drafts[data_cell.id]["context"]
+        if data_cell.context != context:
+            data_cell.context = context
+            data_cell.updated_at = now
+            data_cell.doc.updated_at = now
+
+            updated_doc_ids.add(data_cell.doc.id)
+            if data_cell.cell_type == DataCellType.query:
+                updated_query_cell_ids.append(data_cell.id)
+    session.commit()
+
+    for doc_id in updated_doc_ids:
+        update_es_data_doc_by_id(doc_id)
+    if updated_query_cell_ids:
+        queue_elasticsearch_sync(
+            ElasticsearchItem.query_cells.value, updated_query_cell_ids
+        )
+
+    return [
+        cell_id
+        for cell_id, draft in drafts.items()
+        if cell_drafts.remove_draft(cell_id, draft["version"])
+    ]
+
+
 @with_session
 def copy_cell_history(from_cell_id, to_cell_id, commit=True, session=None):
     # Remove all old execution for to_cell_id just for precaution
@@ -418,6 +533,9 @@ def delete_data_doc_cell(data_doc_id, data_cell_id, commit=True, session=None):
     )
 
     data_doc.updated_at = datetime.datetime.now()
+    invalidate_permissions(
+        get_data_cell_permission_resource(data_cell_id), session=session
+    )
 
     if commit:
         session.commit()
@@ -539,6 +657,7 @@ def move_data_doc_cell_to_doc(cell_id, data_doc_id, index, commit=True, session=
 
     datadoc_datacell.data_doc_id = data_doc_id
     datadoc_datacell.cell_order = index
+    invalidate_permissions(get_data_cell_permission_resource(cell_id), session=session)
 
     now = datetime.datetime.now()
     data_doc.updated_at = now
@@ -826,6 +945,9 @@ def create_data_doc_editor(
     editor = DataDocEditor(data_doc_id=data_doc_id, uid=uid, read=read, write=write)
 
     session.add(editor)
+    invalidate_permissions(
+        get_data_doc_permission_resource(data_doc_id), session=session
+    )
     if commit:
         session.commit()
         update_es_data_doc_by_id(editor.data_doc_id)
@@ -852,6 +974,9 @@ def update_data_doc_editor(
         )
 
         if updated:
+            invalidate_permissions(
+                get_data_doc_permission_resource(editor.data_doc_id), session=session
+            )
             if commit:
                 session.commit()
                 update_es_queries_by_datadoc_id(editor.data_doc_id)
@@ -864,6 +989,7 @@ def update_data_doc_editor(
 @with_session
 def delete_data_doc_editor(id, doc_id, session=None, commit=True):
     session.query(DataDocEditor).filter_by(id=id).delete()
+    invalidate_permissions(get_data_doc_permission_resource(doc_id), session=session)
     if commit:
         session.commit()
         update_es_data_doc_by_id(doc_id)
@@ -969,7 +1095,7 @@ def get_unarchived_query_cell_by_id(id, session=None):
 
 
 def update_es_data_doc_by_id(id):
-    sync_elasticsearch.apply_async(args=[ElasticsearchItem.datadocs.value, id])
+    queue_elasticsearch_sync(ElasticsearchItem.datadocs.value, [id])
 
 
 def update_es_queries_by_datadoc_id(id):
@@ -981,7 +1107,7 @@ def update_es_query_cells_by_data_doc_id(id):
 
 
 def update_es_query_cell_by_id(id):
-    sync_elasticsearch.apply_async(args=[ElasticsearchItem.query_cells.value, id])
+    queue_elasticsearch_sync(ElasticsearchItem.query_cells.value, [id])
 
 
 @with_session
@@ -1014,17 +1140,67 @@ def get_query_executions_by_data_doc_id(id, session=None):
 
 
 @with_session
-def get_all_query_cells(offset=0, limit=100, session=None):
+def get_all_query_cells(after_id=None, limit=100, session=None):
+    """Get a page of the query cells of unarchived data docs ordered by id,
+       along with their doc and its editors
+
+    Keyword Arguments:
+        after_id {int} -- Only return the cells after this id (default: {None})
+        limit {int} -- Max number of cells (default: {100})
+    """
+    query = (
+        session.query(DataCell)
+        .filter_by(cell_type=DataCellType.query)
+        .join(DataDocDataCell)
+        .join(DataDoc)
+        .filter(DataDoc.archived.is_(False))
+        .options(selectinload(DataCell.doc).selectinload(DataDoc.editors))
+    )
+    if after_id is not None:
+        query = query.filter(DataCell.id > after_id)
+    return query.order_by(DataCell.id).limit(limit).all()
+
+
+@with_session
+def get_unarchived_query_cells_by_ids(ids, session=None):
+    """Get the query cells of unarchived data docs by their ids,
+    along with their doc and its editors
+    """
     return (
         session.query(DataCell)
+        .filter(DataCell.id.in_(ids))
         .filter_by(cell_type=DataCellType.query)
         .join(DataDocDataCell)
         .join(DataDoc)
         .filter(DataDoc.archived.is_(False))
-        .offset(offset)
-        .limit(limit)
+        .options(selectinload(DataCell.doc).selectinload(DataDoc.editors))
+        .all()
+    )
+
+
+@with_session
+def get_data_cells_by_query_execution_ids(query_execution_ids, session=None):
+    """Get the data cell of each query execution, along with its doc and
+       the doc editors. Ad hoc query executions have no data cell.
+
+    Arguments:
+        query_execution_ids {List[int]}
+
+    Returns:
+        Dict[int, DataCell] -- The data cell by query execution id
+    """
+    rows = (
+        session.query(DataCellQueryExecution.query_execution_id, DataCell)
+        .join(DataCell, DataCell.id == DataCellQueryExecution.data_cell_id)
+        .filter(DataCellQueryExecution.query_execution_id.in_(query_execution_ids))
+        .options(selectinload(DataCell.doc).selectinload(DataDoc.editors))
+        .order_by(DataCellQueryExecution.id)
         .all()
     )
+    data_cells = {}
+    for query_execution_id, data_cell in rows:
+        data_cells.setdefault(query_execution_id, data_cell)
+    return data_cells
 
 
 def get_data_cell_by_query_execution_id(query_execution_id, session=None):
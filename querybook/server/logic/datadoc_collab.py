@@ -5,8 +5,14 @@ from app.auth.permission import (
 from app.flask_app import socketio
 from app.db import with_session
 from const.data_doc import DATA_DOC_NAMESPACE
+from env import QuerybookSettings
+from lib.data_doc import cell_drafts
+from lib.logger import get_logger
 from logic import datadoc as logic
 from logic.datadoc_permission import assert_can_read, assert_can_write
+from tasks.save_data_cell_drafts import save_data_cell_draft
+
+LOG = get_logger(__file__)
 
 
 @with_session
@@ -15,7 +21,9 @@ def get_datadoc(doc_id, session=None):
     doc = logic.get_data_doc_by_id(id=doc_id, session=session)
     if doc:
         verify_environment_permission([doc.environment_id])
-        return doc.to_dict(with_cells=True)
+        doc_dict = doc.to_dict(with_cells=True)
+        logic.apply_data_cell_drafts(doc_dict["cells"])
+        return doc_dict
 
 
 @with_session
@@ -154,7 +162,7 @@ def paste_data_cell(
                 (
                     sid,
                     index,
-                    data_cell.to_dict(),
+                    logic.apply_data_cell_drafts([data_cell.to_dict()])[0],
                 ),
                 namespace=DATA_DOC_NAMESPACE,
                 room=doc_id,
@@ -175,7 +183,9 @@ def paste_data_cell(
             doc_id,
             index,
             data_cell.cell_type.name,
-            data_cell.context,
+            logic.get_data_cell_draft_contexts([cell_id]).get(
+                cell_id, data_cell.context
+            ),
             data_cell.meta,
             sid,
             session=session,
@@ -198,15 +208,56 @@ def update_data_cell(cell_id, fields, sid="", session=None):
     data_doc = logic.get_data_doc_by_data_cell_id(cell_id, session=session)
     assert_can_write(data_doc.id, session=session)
     verify_environment_permission([data_doc.environment_id])
-    data_cell = logic.update_data_cell(
-        id=cell_id,
-        session=session,
-        **fields,
-    )
+
+    # The context is updated while users type, so it is kept as a draft
+    # which is saved to the database once the cell is idle
+    context = fields.get("context")
+    draft_saved = False
+    if QuerybookSettings.DATA_CELL_SAVE_DELAY and context is not None:
+        try:
+            save_data_cell_draft(cell_id, context)
+            draft_saved = True
+        except Exception:
+            LOG.warning("Failed to save cell draft", exc_info=True)
+
+    db_fields = {
+        field: value
+        for field, value in fields.items()
+        if not (draft_saved and field == "context")
+    }
+    if any(value is not None for value in db_fields.values()):
+        data_cell = logic.update_data_cell(
+            id=cell_id,
+            session=session,
+            **db_fields,
+        )
+    else:
+        data_cell = logic.get_data_cell_by_id(cell_id, session=session)
+
+    # An older draft would overwrite the context saved to the database
+    if (
+        QuerybookSettings.DATA_CELL_SAVE_DELAY
+        and context is not None
+        and not draft_saved
+    ):
+        try:
+            cell_drafts.delete_draft(cell_id)
+        except Exception:
+            LOG.error("Failed to delete cell draft", exc_info=True)
+
     data_cell_dict = data_cell.to_dict()
+    if draft_saved:
+        data_cell_dict["context"] = context
+    else:
+        logic.apply_data_cell_drafts([data_cell_dict])
+
+    # The whole cell is sent since the clients replace their copy of it
     socketio.emit(
         "data_cell_updated",
-        (sid, data_cell_dict),
+        (
+            sid,
+            data_cell_dict,
+        ),
         namespace=DATA_DOC_NAMESPACE,
         room=data_doc.id,
         broadcast=True,
@@ -3,6 +3,7 @@ from sqlalchemy import and_
 
 from app.datasource import api_assert
 from app.db import with_session
+from app.permission_cache import get_cached_permission
 from models.datadoc import DataDoc, DataDocEditor
 
 
@@ -10,36 +11,61 @@ class DocDoesNotExist(Exception):
     pass
 
 
+def get_data_doc_permission_resource(doc_id) -> str:
+    return f"data_doc:{doc_id}"
+
+
+def get_data_cell_permission_resource(cell_id) -> str:
+    return f"data_cell:{cell_id}"
+
+
 @with_session
-def user_can_write(doc_id, uid, session=None):
-    doc, editor = session.query(DataDoc, DataDocEditor).outerjoin(
-        DataDocEditor,
-        and_(DataDoc.id == DataDocEditor.data_doc_id, DataDocEditor.uid == uid),
-    ).filter(DataDoc.id == doc_id).first() or (None, None)
+def get_data_doc_access(doc_id, uid, session=None):
+    """Get what the user can do with the doc, cached per request
+       (see app.permission_cache) until its owner or editors change
 
-    if doc is None:
-        raise DocDoesNotExist()
+    Arguments:
+        doc_id {int}
+        uid {int}
 
-    if doc.owner_uid == uid:
-        return True
+    Raises:
+        DocDoesNotExist: If the doc does not exist
 
-    return editor is not None and editor.write
+    Returns:
+        Dict -- {"public": bool, "owner": bool, "read": bool, "write": bool}
+    """
 
+    def fetch_access():
+        doc, editor = session.query(DataDoc, DataDocEditor).outerjoin(
+            DataDocEditor,
+            and_(DataDoc.id == DataDocEditor.data_doc_id, DataDocEditor.uid == uid),
+        ).filter(DataDoc.id == doc_id).first() or (None, None)
 
-@with_session
-def user_can_read(doc_id, uid, session=None):
-    doc, editor = session.query(DataDoc, DataDocEditor).outerjoin(
-        DataDocEditor,
-        and_(DataDoc.id == DataDocEditor.data_doc_id, DataDocEditor.uid == uid),
-    ).filter(DataDoc.id == doc_id).first() or (None, None)
+        if doc is None:
+            raise DocDoesNotExist()
 
-    if doc is None:
-        raise DocDoesNotExist()
+        return {
+            "public": bool(doc.public),
+            "owner": doc.owner_uid == uid,
+            "read": editor is not None and bool(editor.read),
+            "write": editor is not None and bool(editor.write),
+        }
 
-    if doc.public or doc.owner_uid == uid:
-        return True
+    return get_cached_permission(
+        get_data_doc_permission_resource(doc_id), fetch_access, uid=uid
+    )
 
-    return editor is not None and (editor.read or editor.write)
+
+@with_session
+def user_can_write(doc_id, uid, session=None):
+    access = get_data_doc_access(doc_id, uid, session=session)
+    return access["owner"] or access["write"]
+
+
+@with_session
+def user_can_read(doc_id, uid, session=None):
+    access = get_data_doc_access(doc_id, uid, session=session)
+    return access["public"] or access["owner"] or access["read"] or access["write"]
 
 
 @with_session
@@ -69,11 +95,8 @@ def assert_can_write(doc_id, session=None):
 @with_session
 def assert_is_owner(doc_id, session=None):
     try:
-        doc = session.query(DataDoc).filter(DataDoc.id == doc_id).first()
-        if doc is None:
-            raise DocDoesNotExist
         api_assert(
-            doc.owner_uid == current_user.id,
+            get_data_doc_access(doc_id, current_user.id, session=session)["owner"],
             "NOT_DATADOC_OWNER",
             403,
         )
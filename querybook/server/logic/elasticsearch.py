@@ -1,8 +1,9 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from html import escape
 from itertools import chain
-import math
 import re
-from typing import Any, Dict, List, Optional, Set
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 from const.impression import ImpressionItemType
 from const.query_execution import QueryExecutionStatus
@@ -21,18 +22,26 @@ from lib.config import get_config_value
 from lib.richtext import richtext_to_plaintext
 from app.db import with_session
 from logic import admin as admin_logic
-from logic import datadoc as datadoc_logic
+from logic.board import get_all_boards, get_boards_by_ids
 from logic.datadoc import (
     get_all_data_docs,
     get_all_query_cells,
     get_data_cell_by_query_execution_id,
+    get_data_cell_draft_contexts,
+    get_data_cells_by_query_execution_ids,
     get_data_doc_by_id,
+    get_data_docs_by_ids,
     get_unarchived_query_cell_by_id,
+    get_unarchived_query_cells_by_ids,
 )
 from logic.metastore import (
+    compute_table_weight,
     get_all_table,
     get_table_by_id,
     get_table_query_samples_count,
+    get_tables_by_ids,
+    get_tables_with_details_by_ids,
+    update_table_weights,
 )
 
 from logic.impression import (
@@ -42,8 +51,10 @@ from logic.impression import (
 from logic.query_execution import (
     get_successful_adhoc_query_executions,
     get_query_execution_by_id,
-    get_successful_query_executions_by_data_cell_id,
+    get_query_execution_by_ids,
+    get_successful_query_cell_executions,
 )
+from logic.user import get_all_users, get_users_by_ids
 from models.user import User
 from models.datadoc import DataCellType
 from models.board import Board
@@ -103,13 +114,53 @@ def _get_dict_by_field(
     }
 
 
-def _get_datadoc_editors(datadoc, session) -> List[str]:
+def _get_datadoc_editors(datadoc) -> List[str]:
     if datadoc is None or datadoc.public:
         return []
-    editors = datadoc_logic.get_data_doc_editors_by_doc_id(
-        data_doc_id=datadoc.id, session=session
-    )
-    return [editor.uid for editor in editors]
+    return [editor.uid for editor in datadoc.editors]
+
+
+def _iter_batches_by_id(
+    get_batch: Callable[..., List],
+    batch_size: int,
+    item_name: str,
+    get_id: Callable[[Any], int] = lambda item: item.id,
+) -> Iterator[List]:
+    """Page through the rows in id order. Each page starts after the
+       last id of the previous one, so that unlike limit/offset the late
+       pages of a full reindex are as fast as the first ones.
+
+    Arguments:
+        get_batch {Callable} -- Called with after_id and limit, returns
+                                the rows ordered by id
+        batch_size {int} -- Number of rows per page
+        item_name {str} -- Used for logging
+
+    Keyword Arguments:
+        get_id {Callable} -- Returns the id of a row (default: {lambda item: item.id})
+
+    Returns:
+        Iterator[List] -- The non empty pages
+    """
+    after_id = None
+    total = 0
+    while True:
+        batch = get_batch(after_id=after_id, limit=batch_size)
+        total += len(batch)
+        LOG.info("\n--{} count: {}, after id: {}".format(item_name, total, after_id))
+        if len(batch):
+            yield batch
+
+        if len(batch) < batch_size:
+            break
+        after_id = get_id(batch[-1])
+
+
+def _get_query_engines_by_id(session=None) -> Dict[int, Any]:
+    return {
+        engine.id: engine
+        for engine in admin_logic.get_all_query_engines(session=session)
+    }
 
 
 def _get_table_names_from_query(query, language=None) -> List[str]:
@@ -124,69 +175,44 @@ def _get_table_names_from_query(query, language=None) -> List[str]:
 
 @with_session
 def _get_query_cell_executions_iter(batch_size=1000, fields=None, session=None):
-    offset = 0
-    while True:
-        query_cells = get_all_query_cells(
-            limit=batch_size,
-            offset=offset,
-            session=session,
-        )
-        query_executions_count = 0
-        for query_cell in query_cells:
-            query_cell_executions_offset = 0
-            while True:
-                query_cell_executions = get_successful_query_executions_by_data_cell_id(
-                    query_cell.id,
-                    limit=batch_size,
-                    offset=query_cell_executions_offset,
-                    session=session,
-                )
-                for query_execution in query_cell_executions:
-                    expand_query_execution = query_execution_to_es(
-                        query_execution,
-                        data_cell=query_cell,
-                        fields=fields,
-                        session=session,
-                    )
-                    yield expand_query_execution
-                query_executions_count += len(query_cell_executions)
-                if len(query_cell_executions) < batch_size:
-                    break
-                query_cell_executions_offset += batch_size
-        LOG.info(
-            "\n--Query cell count: {}, query cell executions count: {}, offset: {}".format(
-                len(query_cells), query_executions_count, offset
+    engines_by_id = _get_query_engines_by_id(session=session)
+    # An execution can belong to several cells. Its rows map to the same
+    # es document, so the rows cut off by the end of a page can be skipped
+    for rows in _iter_batches_by_id(
+        lambda after_id, limit: get_successful_query_cell_executions(
+            after_id=after_id, limit=limit, session=session
+        ),
+        batch_size,
+        "Query cell executions",
+        get_id=lambda row: row[0].id,
+    ):
+        for query_execution, query_cell in rows:
+            yield query_execution_to_es(
+                query_execution,
+                data_cell=query_cell,
+                engine=engines_by_id.get(query_execution.engine_id),
+                fields=fields,
+                session=session,
             )
-        )
-        if len(query_cells) < batch_size:
-            break
-        offset += batch_size
 
 
 @with_session
 def _get_adhoc_query_executions_iter(batch_size=1000, fields=None, session=None):
-    offset = 0
-    while True:
-        query_executions = get_successful_adhoc_query_executions(
-            limit=batch_size,
-            offset=offset,
-            session=session,
-        )
-        LOG.info(
-            "\n--Adhoc query executions count: {}, offset: {}".format(
-                len(query_executions), offset
-            )
-        )
-
+    engines_by_id = _get_query_engines_by_id(session=session)
+    for query_executions in _iter_batches_by_id(
+        lambda after_id, limit: get_successful_adhoc_query_executions(
+            after_id=after_id, limit=limit, session=session
+        ),
+        batch_size,
+        "Adhoc query executions",
+    ):
         for query_execution in query_executions:
-            expand_query_execution = query_execution_to_es(
-                query_execution, fields=fields, session=session
+            yield query_execution_to_es(
+                query_execution,
+                engine=engines_by_id.get(query_execution.engine_id),
+                fields=fields,
+                session=session,
             )
-            yield expand_query_execution
-
-        if len(query_executions) < batch_size:
-            break
-        offset += batch_size
 
 
 @with_session
@@ -200,11 +226,14 @@ def get_query_executions_iter(batch_size=1000, fields=None, session=None):
 
 
 @with_session
-def query_execution_to_es(query_execution, data_cell=None, fields=None, session=None):
-    """data_cell is added as a parameter so that bulk insert of query executions won't require
-    re-retrieval of data_cell"""
+def query_execution_to_es(
+    query_execution, data_cell=None, engine=None, fields=None, session=None
+):
+    """data_cell and engine are added as parameters so that bulk insert of query executions
+    won't require re-retrieval of data_cell and engine"""
     engine_id = query_execution.engine_id
-    engine = admin_logic.get_query_engine_by_id(engine_id, session=session)
+    if engine is None:
+        engine = admin_logic.get_query_engine_by_id(engine_id, session=session)
     datadoc = data_cell.doc if data_cell else None
 
     def get_duration():
@@ -230,7 +259,7 @@ def query_execution_to_es(query_execution, data_cell=None, fields=None, session=
         ),
         "query_text": query_execution.query,
         "public": datadoc is None or datadoc.public,
-        "readable_user_ids": lambda: _get_datadoc_editors(datadoc, session=session),
+        "readable_user_ids": lambda: _get_datadoc_editors(datadoc),
     }
 
     return _get_dict_by_field(field_to_getter, fields=fields)
@@ -239,18 +268,13 @@ def query_execution_to_es(query_execution, data_cell=None, fields=None, session=
 @with_exception
 def _bulk_insert_query_executions():
     index_name = ES_CONFIG["query_executions"]["index_name"]
-
-    for query_execution in get_query_executions_iter():
-        _insert(index_name, query_execution["id"], query_execution)
+    return _bulk_insert(index_name, get_query_executions_iter())
 
 
 @with_exception
 def _bulk_update_query_executions(fields: Set[str] = None):
     index_name = ES_CONFIG["query_executions"]["index_name"]
-
-    for query_execution in get_query_executions_iter(fields=fields):
-        updated_body = {"doc": query_execution, "doc_as_upsert": True}
-        _update(index_name, query_execution["id"], updated_body)
+    return _bulk_update(index_name, get_query_executions_iter(fields=fields))
 
 
 @with_exception
@@ -289,37 +313,41 @@ def update_query_execution_by_id(query_execution_id, session=None):
 
 @with_session
 def get_query_cells_iter(batch_size=1000, fields=None, session=None):
-    offset = 0
-
-    while True:
-        query_cells = get_all_query_cells(
-            limit=batch_size,
-            offset=offset,
-            session=session,
-        )
-        LOG.info(
-            "\n--Query cells count: {}, offset: {}".format(len(query_cells), offset)
+    engines_by_id = _get_query_engines_by_id(session=session)
+    for query_cells in _iter_batches_by_id(
+        lambda after_id, limit: get_all_query_cells(
+            after_id=after_id, limit=limit, session=session
+        ),
+        batch_size,
+        "Query cells",
+    ):
+        draft_contexts = get_data_cell_draft_contexts(
+            query_cell.id for query_cell in query_cells
         )
-
         for query_cell in query_cells:
-            expand_query_cell = query_cell_to_es(
-                query_cell, fields=fields, session=session
+            yield query_cell_to_es(
+                query_cell,
+                engine=engines_by_id.get(query_cell.meta.get("engine")),
+                draft_contexts=draft_contexts,
+                fields=fields,
+                session=session,
             )
-            yield expand_query_cell
-
-        if len(query_cells) < batch_size:
-            break
-        offset += batch_size
 
 
 @with_session
-def query_cell_to_es(query_cell, fields=None, session=None):
+def query_cell_to_es(
+    query_cell, engine=None, draft_contexts=None, fields=None, session=None
+):
     query_cell_meta = query_cell.meta
-    query = query_cell.context
+    # The drafts can be fetched for a batch of cells by the caller
+    if draft_contexts is None:
+        draft_contexts = get_data_cell_draft_contexts([query_cell.id])
+    query = draft_contexts.get(query_cell.id, query_cell.context)
     datadoc = query_cell.doc
 
     engine_id = query_cell_meta.get("engine")
-    engine = admin_logic.get_query_engine_by_id(engine_id, session=session)
+    if engine is None:
+        engine = admin_logic.get_query_engine_by_id(engine_id, session=session)
 
     field_to_getter = {
         "id": query_cell.id,
@@ -336,7 +364,7 @@ def query_cell_to_es(query_cell, fields=None, session=None):
         ),
         "query_text": query,
         "public": datadoc is not None and datadoc.public,
-        "readable_user_ids": lambda: _get_datadoc_editors(datadoc, session=session),
+        "readable_user_ids": lambda: _get_datadoc_editors(datadoc),
     }
 
     return _get_dict_by_field(field_to_getter, fields=fields)
@@ -345,18 +373,13 @@ def query_cell_to_es(query_cell, fields=None, session=None):
 @with_exception
 def _bulk_insert_query_cells():
     index_name = ES_CONFIG["query_cells"]["index_name"]
-
-    for query_cell in get_query_cells_iter():
-        _insert(index_name, query_cell["id"], query_cell)
+    return _bulk_insert(index_name, get_query_cells_iter())
 
 
 @with_exception
 def _bulk_update_query_cells(fields: Set[str] = None):
     index_name = ES_CONFIG["query_cells"]["index_name"]
-
-    for query_cell in get_query_cells_iter(fields=fields):
-        updated_body = {"doc": query_cell, "doc_as_upsert": True}
-        _update(index_name, query_cell["id"], updated_body)
+    return _bulk_update(index_name, get_query_cells_iter(fields=fields))
 
 
 @with_exception
@@ -390,35 +413,27 @@ def update_query_cell_by_id(query_cell_id, session=None):
 
 @with_session
 def get_datadocs_iter(batch_size=5000, fields=None, session=None):
-    offset = 0
-
-    while True:
-        data_docs = get_all_data_docs(
-            limit=batch_size,
-            offset=offset,
-            session=session,
-        )
-        LOG.info("\n--Datadocs count: {}, offset: {}".format(len(data_docs), offset))
-
+    for data_docs in _iter_batches_by_id(
+        lambda after_id, limit: get_all_data_docs(
+            after_id=after_id, limit=limit, session=session
+        ),
+        batch_size,
+        "Datadocs",
+    ):
         for data_doc in data_docs:
-            expand_datadoc = datadocs_to_es(data_doc, fields=fields, session=session)
-            yield expand_datadoc
-
-        if len(data_docs) < batch_size:
-            break
-        offset += batch_size
+            yield datadocs_to_es(data_doc, fields=fields, session=session)
 
 
 def get_joined_cells(datadoc):
     cells_as_text = []
+    draft_contexts = get_data_cell_draft_contexts(cell.id for cell in datadoc.cells)
     for cell in datadoc.cells:
+        context = draft_contexts.get(cell.id, cell.context)
         if cell.cell_type == DataCellType.text:
-            cells_as_text.append(richtext_to_plaintext(cell.context))
+            cells_as_text.append(richtext_to_plaintext(context))
         elif cell.cell_type == DataCellType.query:
             cell_title = cell.meta.get("title", "")
-            cell_text = (
-                cell.context if not cell_title else f"{cell_title}\n{cell.context}"
-            )
+            cell_text = context if not cell_title else f"{cell_title}\n{context}"
             cells_as_text.append(cell_text)
         else:
             cells_as_text.append("[... additional unparsable content ...]")
@@ -437,7 +452,7 @@ def datadocs_to_es(datadoc, fields=None, session=None):
         "cells": lambda: get_joined_cells(datadoc),
         "title": datadoc.title,
         "public": datadoc.public,
-        "readable_user_ids": lambda: _get_datadoc_editors(datadoc, session=session),
+        "readable_user_ids": lambda: _get_datadoc_editors(datadoc),
     }
     return _get_dict_by_field(field_to_getter, fields=fields)
 
@@ -445,18 +460,13 @@ def datadocs_to_es(datadoc, fields=None, session=None):
 @with_exception
 def _bulk_insert_datadocs():
     index_name = ES_CONFIG["datadocs"]["index_name"]
-
-    for datadoc in get_datadocs_iter():
-        _insert(index_name, datadoc["id"], datadoc)
+    return _bulk_insert(index_name, get_datadocs_iter())
 
 
 @with_exception
 def _bulk_update_datadocs(fields: Set[str] = None):
     index_name = ES_CONFIG["datadocs"]["index_name"]
-
-    for datadoc in get_datadocs_iter(fields=fields):
-        updated_body = {"doc": datadoc, "doc_as_upsert": True}
-        _update(index_name, datadoc["id"], updated_body)
+    return _bulk_update(index_name, get_datadocs_iter(fields=fields))
 
 
 @with_exception
@@ -490,23 +500,19 @@ def update_data_doc_by_id(doc_id, session=None):
 
 @with_session
 def get_tables_iter(batch_size=5000, fields=None, session=None):
-    offset = 0
-
-    while True:
-        tables = get_all_table(
-            limit=batch_size,
-            offset=offset,
-            session=session,
-        )
-        LOG.info("\n--Table count: {}, offset: {}".format(len(tables), offset))
-
+    for tables in _iter_batches_by_id(
+        lambda after_id, limit: get_all_table(
+            after_id=after_id, limit=limit, session=session
+        ),
+        batch_size,
+        "Table",
+    ):
         for table in tables:
-            expand_table = table_to_es(table, fields=fields, session=session)
-            yield expand_table
+            yield table_to_es(table, fields=fields, session=session)
 
-        if len(tables) < batch_size:
-            break
-        offset += batch_size
+
+# Fields of the tables index that depend on the table weight
+TABLE_WEIGHT_FIELDS = {"completion_name", "importance_score"}
 
 
 @with_session
@@ -533,9 +539,7 @@ def get_table_weight(table_id: int, session=None) -> int:
     )
     boost_score = get_table_by_id(table_id, session=session).boost_score
 
-    # Samples worth 10x as much as impression
-    # Log the score to flatten the score distrution (since its power law distribution)
-    return int(math.log2(((num_impressions + num_samples * 10) + 1) + boost_score))
+    return compute_table_weight(num_samples, num_impressions, boost_score)
 
 
 @with_session
@@ -557,7 +561,13 @@ def table_to_es(table, fields=None, session=None):
     def compute_weight():
         nonlocal weight
         if weight is None:
-            weight = get_table_weight(table.id, session=session)
+            # The weight is stored by update_table_weights,
+            # it is only computed here for the tables added since
+            weight = (
+                table.weight
+                if table.weight is not None
+                else get_table_weight(table.id, session=session)
+            )
         return weight
 
     def get_completion_name():
@@ -592,17 +602,40 @@ def table_to_es(table, fields=None, session=None):
 
 def _bulk_insert_tables():
     index_name = ES_CONFIG["tables"]["index_name"]
-
-    for table in get_tables_iter():
-        _insert(index_name, table["id"], table)
+    update_table_weights()
+    return _bulk_insert(index_name, get_tables_iter())
 
 
 def _bulk_update_tables(fields: Set[str] = None):
     index_name = ES_CONFIG["tables"]["index_name"]
+    if fields is None or TABLE_WEIGHT_FIELDS & set(fields):
+        update_table_weights()
+    return _bulk_update(index_name, get_tables_iter(fields=fields))
 
-    for table in get_tables_iter(fields=fields):
-        updated_body = {"doc": table, "doc_as_upsert": True}
-        _update(index_name, table["id"], updated_body)
+
+@with_session
+def bulk_update_table_weights_by_ids(
+    table_ids: List[int], batch_size=1000, session=None
+) -> Dict:
+    """Update the weight fields of the tables in elasticsearch,
+       the weights need to be stored by update_table_weights first
+
+    Arguments:
+        table_ids {List[int]}
+
+    Returns:
+        Dict -- Summary of the bulk update
+    """
+    index_name = ES_CONFIG["tables"]["index_name"]
+
+    def get_docs():
+        for i in range(0, len(table_ids), batch_size):
+            for table in get_tables_by_ids(
+                table_ids[i : i + batch_size], session=session
+            ):
+                yield table_to_es(table, fields=TABLE_WEIGHT_FIELDS, session=session)
+
+    return _bulk_update(index_name, get_docs())
 
 
 @with_exception
@@ -614,6 +647,10 @@ def update_table_by_id(table_id, session=None):
     if table is None:
         delete_es_table_by_id(table_id)
     else:
+        # The weights are refreshed in batch by the update_table_weights task,
+        # only the weight of a table indexed for the first time is stored here
+        if table.weight is None:
+            update_table_weights([table_id], session=session)
         formatted_object = table_to_es(table, session=session)
         try:
             # Try to update if present
@@ -682,38 +719,25 @@ def user_to_es(user, fields=None, session=None):
 
 @with_session
 def get_users_iter(batch_size=5000, fields=None, session=None):
-    offset = 0
-
-    while True:
-        users = User.get_all(
-            limit=batch_size,
-            offset=offset,
-            session=session,
-        )
-        LOG.info("\n--User count: {}, offset: {}".format(len(users), offset))
-
+    for users in _iter_batches_by_id(
+        lambda after_id, limit: get_all_users(
+            after_id=after_id, limit=limit, session=session
+        ),
+        batch_size,
+        "User",
+    ):
         for user in users:
-            expanded_user = user_to_es(user, fields=fields, session=session)
-            yield expanded_user
-
-        if len(users) < batch_size:
-            break
-        offset += batch_size
+            yield user_to_es(user, fields=fields, session=session)
 
 
 def _bulk_insert_users():
     index_name = ES_CONFIG["users"]["index_name"]
-
-    for user in get_users_iter():
-        _insert(index_name, user["id"], user)
+    return _bulk_insert(index_name, get_users_iter())
 
 
 def _bulk_update_users(fields: Set[str] = None):
     index_name = ES_CONFIG["users"]["index_name"]
-
-    for user in get_users_iter(fields=fields):
-        updated_body = {"doc": user, "doc_as_upsert": True}
-        _update(index_name, user["id"], updated_body)
+    return _bulk_update(index_name, get_users_iter(fields=fields))
 
 
 @with_exception
@@ -747,23 +771,15 @@ def update_user_by_id(uid, session=None):
 
 @with_session
 def get_boards_iter(batch_size=5000, fields=None, session=None):
-    offset = 0
-
-    while True:
-        boards = Board.get_all(
-            limit=batch_size,
-            offset=offset,
-            session=session,
-        )
-        LOG.info("\n--Board count: {}, offset: {}".format(len(boards), offset))
-
+    for boards in _iter_batches_by_id(
+        lambda after_id, limit: get_all_boards(
+            after_id=after_id, limit=limit, session=session
+        ),
+        batch_size,
+        "Board",
+    ):
         for board in boards:
-            expanded_board = board_to_es(board, fields=fields, session=session)
-            yield expanded_board
-
-        if len(boards) < batch_size:
-            break
-        offset += batch_size
+            yield board_to_es(board, fields=fields, session=session)
 
 
 @with_session
@@ -799,17 +815,12 @@ def board_to_es(board, fields=None, session=None):
 
 def _bulk_insert_boards():
     index_name = ES_CONFIG["boards"]["index_name"]
-
-    for board in get_boards_iter():
-        _insert(index_name, board["id"], board)
+    return _bulk_insert(index_name, get_boards_iter())
 
 
 def _bulk_update_boards(fields: Set[str] = None):
     index_name = ES_CONFIG["boards"]["index_name"]
-
-    for board in get_boards_iter(fields=fields):
-        updated_body = {"doc": board, "doc_as_upsert": True}
-        _update(index_name, board["id"], updated_body)
+    return _bulk_update(index_name, get_boards_iter(fields=fields))
 
 
 @with_exception
@@ -836,6 +847,147 @@ def update_board_by_id(board_id, session=None):
             LOG.error("failed to upsert board {}. Will pass.".format(board))
 
 
+"""
+    SYNC QUEUE
+"""
+
+
+def _get_query_execution_docs_by_ids(ids, session=None) -> Dict[int, Dict]:
+    query_executions = [
+        query_execution
+        for query_execution in get_query_execution_by_ids(ids, session=session)
+        if query_execution.status == QueryExecutionStatus.DONE
+    ]
+    engines_by_id = _get_query_engines_by_id(session=session)
+    data_cells = get_data_cells_by_query_execution_ids(
+        [query_execution.id for query_execution in query_executions],
+        session=session,
+    )
+    return {
+        query_execution.id: query_execution_to_es(
+            query_execution,
+            data_cell=data_cells.get(query_execution.id),
+            engine=engines_by_id.get(query_execution.engine_id),
+            session=session,
+        )
+        for query_execution in query_executions
+    }
+
+
+def _get_query_cell_docs_by_ids(ids, session=None) -> Dict[int, Dict]:
+    engines_by_id = _get_query_engines_by_id(session=session)
+    query_cells = get_unarchived_query_cells_by_ids(ids, session=session)
+    draft_contexts = get_data_cell_draft_contexts(
+        query_cell.id for query_cell in query_cells
+    )
+    return {
+        query_cell.id: query_cell_to_es(
+            query_cell,
+            engine=engines_by_id.get(query_cell.meta.get("engine")),
+            draft_contexts=draft_contexts,
+            session=session,
+        )
+        for query_cell in query_cells
+    }
+
+
+def _get_datadoc_docs_by_ids(ids, session=None) -> Dict[int, Dict]:
+    return {
+        doc.id: datadocs_to_es(doc, session=session)
+        for doc in get_data_docs_by_ids(ids, session=session)
+        if not doc.archived
+    }
+
+
+def _get_table_docs_by_ids(ids, session=None) -> Dict[int, Dict]:
+    tables = get_tables_with_details_by_ids(ids, session=session)
+    unweighted_table_ids = [table.id for table in tables if table.weight is None]
+    if unweighted_table_ids:
+        update_table_weights(unweighted_table_ids, session=session)
+    return {table.id: table_to_es(table, session=session) for table in tables}
+
+
+def _get_user_docs_by_ids(ids, session=None) -> Dict[int, Dict]:
+    return {
+        user.id: user_to_es(user, session=session)
+        for user in get_users_by_ids(ids, session=session)
+    }
+
+
+def _get_board_docs_by_ids(ids, session=None) -> Dict[int, Dict]:
+    return {
+        board.id: board_to_es(board, session=session)
+        for board in get_boards_by_ids(ids, session=session)
+        if board.deleted_at is None
+    }
+
+
+_GET_DOCS_BY_IDS_BY_ITEM_TYPE = {
+    "query_executions": _get_query_execution_docs_by_ids,
+    "query_cells": _get_query_cell_docs_by_ids,
+    "datadocs": _get_datadoc_docs_by_ids,
+    "tables": _get_table_docs_by_ids,
+    "users": _get_user_docs_by_ids,
+    "boards": _get_board_docs_by_ids,
+}
+
+
+@with_session
+def sync_items_by_ids(item_type: str, item_ids: List[int], session=None) -> Dict:
+    """Upsert the items in their index, or delete them from it if they
+       are not searchable anymore, with bulk requests
+
+    Arguments:
+        item_type {str} -- One of ElasticsearchItem
+        item_ids {List[int]}
+
+    Returns:
+        Dict -- Summary of the bulk requests, failed_ids are the item ids that
+                failed to be synced
+    """
+    index_name = ES_CONFIG[item_type]["index_name"]
+    docs_by_id = _GET_DOCS_BY_IDS_BY_ITEM_TYPE[item_type](item_ids, session=session)
+
+    def get_actions():
+        for item_id in item_ids:
+            doc = docs_by_id.get(item_id)
+            if doc is None:
+                yield ({"delete": {"_index": index_name, "_id": item_id}},)
+            else:
+                yield (
+                    {"update": {"_index": index_name, "_id": item_id}},
+                    # ES requires this format for updates
+                    {"doc": doc, "doc_as_upsert": True},
+                )
+
+    summary = _bulk(index_name, get_actions())
+    # Elasticsearch returns the ids as strings
+    failed_ids = set(str(item_id) for item_id in summary["failed_ids"])
+    summary["failed_ids"] = [
+        item_id for item_id in item_ids if str(item_id) in failed_ids
+    ]
+    return summary
+
+
+def delete_items_by_ids(item_type: str, item_ids: List[int]) -> Dict:
+    """Delete the items from their index with one bulk request,
+       used once the items are deleted from the database
+
+    Arguments:
+        item_type {str} -- One of ElasticsearchItem
+        item_ids {List[int]}
+
+    Returns:
+        Dict -- Summary of the bulk request
+    """
+    index_name = ES_CONFIG[item_type]["index_name"]
+    return _bulk(
+        index_name,
+        (({"delete": {"_index": index_name, "_id": item_id}},) for item_id in item_ids),
+        batch_size=max(len(item_ids), 1),
+    )
+
+
 """
     Elastic Search Utils
 """
@@ -853,42 +1005,194 @@ def _update(index_name, id, content):
     get_hosted_es().update(index=index_name, id=id, body=content)
 
 
-def _bulk_insert_index(type_name: str):
+def _bulk_insert(index_name: str, docs: Iterable[Dict]) -> Dict:
+    return _bulk(
+        index_name,
+        (({"index": {"_index": index_name, "_id": doc["id"]}}, doc) for doc in docs),
+    )
+
+
+def _bulk_update(index_name: str, docs: Iterable[Dict]) -> Dict:
+    return _bulk(
+        index_name,
+        (
+            (
+                {"update": {"_index": index_name, "_id": doc["id"]}},
+                # ES requires this format for updates
+                {"doc": doc, "doc_as_upsert": True},
+            )
+            for doc in docs
+        ),
+    )
+
+
+def _bulk(
+    index_name: str,
+    actions: Iterable[Tuple[Dict, ...]],
+    batch_size: int = None,
+    thread_count: int = None,
+) -> Dict:
+    """Send the actions to elasticsearch with the bulk api, batches are sent
+       in parallel. Failed batches are logged and skipped so that the rest
+       of the index can still be built.
+
+    Arguments:
+        index_name {str} -- Only used for logging
+        actions {Iterable[Tuple[Dict, ...]]} -- (action, source) pairs,
+                                                or (action,) for deletes
+
+    Keyword Arguments:
+        batch_size {int} -- Number of actions per request,
+                            defaults to ELASTICSEARCH_BULK_BATCH_SIZE
+        thread_count {int} -- Number of concurrent requests,
+                              defaults to ELASTICSEARCH_BULK_THREAD_COUNT
+
+    Returns:
+        Dict -- Summary with total, failed, failed_ids, elapsed and docs_per_sec
+    """
+    batch_size = batch_size or QuerybookSettings.ELASTICSEARCH_BULK_BATCH_SIZE
+    thread_count = thread_count or QuerybookSettings.ELASTICSEARCH_BULK_THREAD_COUNT
+
+    hosted_es = get_hosted_es()
+    start_time = time.time()
+    total = 0
+    failed_ids = []
+    batch_number = 0
+
+    def wait_for(futures):
+        for future in futures:
+            failed_ids.extend(future.result())
+
+    with ThreadPoolExecutor(max_workers=thread_count) as executor:
+        pending = set()
+        batch = []
+        batch_ids = []
+        for action in chain(actions, [None]):
+            if action is not None:
+                batch.extend(action)
+                # The action is {action_type: {"_index": ..., "_id": ...}}
+                batch_ids.append(next(iter(action[0].values()))["_id"])
+            if len(batch_ids) and (action is None or len(batch_ids) >= batch_size):
+                batch_number += 1
+                total += len(batch_ids)
+                pending.add(
+                    executor.submit(
+                        _send_bulk_batch,
+                        hosted_es,
+                        index_name,
+                        batch_number,
+                        batch,
+                        batch_ids,
+                    )
+                )
+                batch = []
+                batch_ids = []
+
+                # Bound the number of batches kept in memory
+                if len(pending) >= thread_count:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    wait_for(done)
+                    LOG.info(
+                        f"{index_name}: sent {total} documents, "
+                        f"{_get_docs_per_sec(total, start_time):.1f} docs/sec"
+                    )
+        wait_for(pending)
+
+    failed = len(failed_ids)
+    summary = {
+        "total": total,
+        "failed": failed,
+        "failed_ids": failed_ids,
+        "elapsed": time.time() - start_time,
+        "docs_per_sec": _get_docs_per_sec(total, start_time),
+    }
+    LOG.info(
+        f"{index_name}: indexed {total - failed}/{total} documents "
+        f"in {summary['elapsed']:.1f}s, {summary['docs_per_sec']:.1f} docs/sec"
+    )
+    return summary
+
+
+def _send_bulk_batch(
+    hosted_es, index_name: str, batch_number: int, batch: List[Dict], batch_ids: List
+) -> List:
+    """Returns the ids of the documents in the batch that failed"""
+    try:
+        response = hosted_es.bulk(body=batch)
+    except Exception as e:
+        LOG.error(f"{index_name}: bulk batch {batch_number} failed: {e}")
+        return batch_ids
+
+    if not response.get("errors"):
+        return []
+    failed_items = [
+        item
+        for item in response["items"]
+        for result in item.values()
+        if "error" in result
+    ]
+    if len(failed_items):
+        first_error = next(iter(failed_items[0].values()))
+        LOG.error(
+            f"{index_name}: {len(failed_items)} documents failed in "
+            f"bulk batch {batch_number}, first error on "
+            f"{first_error.get('_id')}: {first_error['error']}"
+        )
+    return [next(iter(item.values())).get("_id") for item in failed_items]
+
+
+def _get_docs_per_sec(total: int, start_time: float) -> float:
+    elapsed = time.time() - start_time
+    return total / elapsed if elapsed > 0 else 0.0
+
+
+def _bulk_insert_index(type_name: str) -> Optional[Dict]:
     if type_name == "query_executions":
         LOG.info("Inserting query executions")
-        _bulk_insert_query_executions()
+        return _bulk_insert_query_executions()
     elif type_name == "query_cells":
         LOG.info("Inserting query cells")
-        _bulk_insert_query_cells()
+        return _bulk_insert_query_cells()
     elif type_name == "datadocs":
         LOG.info("Inserting datadocs")
-        _bulk_insert_datadocs()
+        return _bulk_insert_datadocs()
     elif type_name == "tables":
         LOG.info("Inserting tables")
-        _bulk_insert_tables()
+        return _bulk_insert_tables()
     elif type_name == "users":
         LOG.info("Inserting users")
-        _bulk_insert_users()
+        return _bulk_insert_users()
     elif type_name == "boards":
         LOG.info("Inserting boards")
-        _bulk_insert_boards()
+        return _bulk_insert_boards()
 
 
 def create_indices(*config_names):
     es_configs = get_es_config_by_name(*config_names)
+    summaries = {}
     for es_config in es_configs:
         get_hosted_es().indices.create(es_config["index_name"], es_config["mappings"])
-        _bulk_insert_index(es_config["type_name"])
+        summaries[es_config["index_name"]] = _bulk_insert_index(es_config["type_name"])
+    return summaries
 
 
 def create_indices_if_not_exist(*config_names):
+    """Create the missing indices and fill them
+
+    Returns:
+        Dict[str, Optional[Dict]] -- Bulk summary of each created index
+    """
     es_configs = get_es_config_by_name(*config_names)
+    summaries = {}
     for es_config in es_configs:
         if not get_hosted_es().indices.exists(index=es_config["index_name"]):
             get_hosted_es().indices.create(
                 es_config["index_name"], es_config["mappings"]
             )
-            _bulk_insert_index(es_config["type_name"])
+            summaries[es_config["index_name"]] = _bulk_insert_index(
+                es_config["type_name"]
+            )
+    return summaries
 
 
 def delete_indices(*config_names):
@@ -905,7 +1209,7 @@ def get_es_config_by_name(*config_names):
 
 def recreate_indices(*config_names):
     delete_indices(*config_names)
-    create_indices_if_not_exist(*config_names)
+    return create_indices_if_not_exist(*config_names)
 
 
 def update_indices(*config_names):
@@ -921,14 +1225,14 @@ def bulk_update_index_by_fields(config_name, fields):
     type_name = es_config["type_name"]
     LOG.info(f"Updating {type_name}")
     if type_name == "query_executions":
-        _bulk_update_query_executions(fields=fields)
+        return _bulk_update_query_executions(fields=fields)
     elif type_name == "query_cells":
-        _bulk_update_query_cells(fields=fields)
+        return _bulk_update_query_cells(fields=fields)
     elif type_name == "datadocs":
-        _bulk_update_datadocs(fields=fields)
+        return _bulk_update_datadocs(fields=fields)
     elif type_name == "tables":
-        _bulk_update_tables(fields=fields)
+        return _bulk_update_tables(fields=fields)
     elif type_name == "users":
-        _bulk_update_users(fields=fields)
+        return _bulk_update_users(fields=fields)
     elif type_name == "boards":
-        _bulk_update_boards(fields=fields)
+        return _bulk_update_boards(fields=fields)
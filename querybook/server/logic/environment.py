@@ -1,12 +1,16 @@
 from datetime import datetime
 from sqlalchemy import or_
 from app.db import with_session
+from app.permission_cache import get_cached_permission, invalidate_permissions
 
 # from lib.config import get_config_value
 from logic.user import get_user_by_id
 from models.environment import Environment, UserEnvironment
 from models.user import User
 
+# The environment ids each user can access, see app.permission_cache
+USER_ENVIRONMENTS_PERMISSION_RESOURCE = "user_environments"
+
 
 @with_session
 def create_environment(
@@ -20,7 +24,7 @@ def create_environment(
     commit=True,
     session=None,
 ):
-    return Environment.create(
+    environment = Environment.create(
         {
             "name": name,
             "description": description,
@@ -33,6 +37,8 @@ def create_environment(
         commit=commit,
         session=session,
     )
+    invalidate_permissions(USER_ENVIRONMENTS_PERMISSION_RESOURCE, session=session)
+    return environment
 
 
 @with_session
@@ -64,22 +70,21 @@ def get_all_visible_environments_by_uid(uid, session=None):
 
 @with_session
 def get_all_accessible_environment_ids_by_uid(uid, session=None):
-    return list(
-        map(
-            lambda r: r[0],
-            (
-                session.query(Environment.id)
-                .outerjoin(UserEnvironment)
-                .filter(Environment.deleted_at.is_(None))
-                .filter(
-                    or_(
-                        Environment.public == True,  # noqa: E712
-                        UserEnvironment.user_id == uid,
-                    )
+    return get_cached_permission(
+        USER_ENVIRONMENTS_PERMISSION_RESOURCE,
+        lambda: [
+            eid
+            for eid, in session.query(Environment.id)
+            .outerjoin(UserEnvironment)
+            .filter(Environment.deleted_at.is_(None))
+            .filter(
+                or_(
+                    Environment.public == True,  # noqa: E712
+                    UserEnvironment.user_id == uid,
                 )
-                .all()
-            ),
-        )
+            )
+        ],
+        uid=uid,
     )
 
 
@@ -95,13 +100,15 @@ def get_all_environment(include_deleted=False, session=None):
 
 @with_session
 def update_environment(id, commit=True, session=None, **field_to_update):
-    return Environment.update(
+    environment = Environment.update(
         id,
         fields=field_to_update,
         field_names=["name", "description", "image", "public", "hidden", "shareable"],
         commit=commit,
         session=session,
     )
+    invalidate_permissions(USER_ENVIRONMENTS_PERMISSION_RESOURCE, session=session)
+    return environment
 
 
 @with_session
@@ -109,6 +116,7 @@ def delete_environment_by_id(id, commit=True, session=None):
     environment = get_environment_by_id(id, session=session)
     if environment:
         environment.deleted_at = datetime.now()
+        invalidate_permissions(USER_ENVIRONMENTS_PERMISSION_RESOURCE, session=session)
 
         if commit:
             session.commit()
@@ -122,6 +130,7 @@ def recover_environment_by_id(id, commit=True, session=None):
     environment = get_environment_by_id(id, session=session)
     if environment:
         environment.deleted_at = None
+        invalidate_permissions(USER_ENVIRONMENTS_PERMISSION_RESOURCE, session=session)
 
         if commit:
             session.commit()
@@ -149,6 +158,7 @@ def add_user_to_environment(uid, environment_id, commit=True, session=None):
 
     if user and env:
         env.users.append(user)
+        invalidate_permissions(USER_ENVIRONMENTS_PERMISSION_RESOURCE, session=session)
 
         if commit:
             session.commit()
@@ -165,6 +175,7 @@ def remove_user_to_environment(uid, environment_id, commit=True, session=None):
         session.query(UserEnvironment).filter_by(
             environment_id=environment_id, user_id=uid
         ).delete()
+        invalidate_permissions(USER_ENVIRONMENTS_PERMISSION_RESOURCE, session=session)
 
         if commit:
             session.commit()
@@ -175,6 +186,7 @@ def remove_user_to_environment(uid, environment_id, commit=True, session=None):
 @with_session
 def remove_user_from_all_environments(uid, commit=True, session=None):
     session.query(UserEnvironment).filter_by(user_id=uid).delete()
+    invalidate_permissions(USER_ENVIRONMENTS_PERMISSION_RESOURCE, session=session)
 
     if commit:
         session.commit()
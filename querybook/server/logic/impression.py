@@ -1,4 +1,6 @@
 from datetime import datetime, timedelta
+from typing import Dict, List
+
 from sqlalchemy.sql import func
 
 from app.db import with_session
@@ -104,6 +106,48 @@ def get_viewers_count_by_item_after_date(item_type, item_id, after_date, session
     return count
 
 
+@with_session
+def get_viewers_count_by_items_after_date(
+    item_type, after_date, item_ids: List[int] = None, session=None
+) -> Dict[int, int]:
+    """Same as get_viewers_count_by_item_after_date, but for many items
+       in a single grouped query
+
+    Arguments:
+        item_type {ImpressionItemType}
+        after_date {date}
+
+    Keyword Arguments:
+        item_ids {List[int]} -- If None, count the viewers of all items (default: {None})
+
+    Returns:
+        Dict[int, int] -- Map of item id to viewers count, items without
+                          viewers are not included
+    """
+    query = (
+        session.query(Impression.item_id, func.count(Impression.uid.distinct()))
+        .filter(Impression.item_type == item_type)
+        .filter(Impression.created_at >= after_date)
+    )
+    if item_ids is not None:
+        query = query.filter(Impression.item_id.in_(item_ids))
+    return dict(query.group_by(Impression.item_id).all())
+
+
+@with_session
+def get_item_ids_with_impressions_after(
+    item_type, after_datetime, session=None
+) -> List[int]:
+    return [
+        item_id
+        for (item_id,) in session.query(Impression.item_id)
+        .distinct()
+        .filter(Impression.item_type == item_type)
+        .filter(Impression.created_at >= after_datetime)
+        .all()
+    ]
+
+
 @with_session
 def get_item_timeseries_after_date(item_type, item_id, after_date, session=None):
     return (
@@ -1,11 +1,19 @@
 import datetime
+import math
+from typing import Dict, Iterator, List, Tuple
+
 from models.admin import QueryEngineEnvironment
 from sqlalchemy import func, and_
-from sqlalchemy.orm import aliased
+from sqlalchemy.orm import aliased, joinedload, selectinload
 
 from app.db import with_session
 from const.elasticsearch import ElasticsearchItem
+from const.impression import ImpressionItemType
 from lib.sqlalchemy import update_model_fields
+from logic.impression import (
+    get_last_impressions_date,
+    get_viewers_count_by_items_after_date,
+)
 from models.metastore import (
     DataSchema,
     DataTable,
@@ -18,7 +26,7 @@ from models.metastore import (
     DataTableColumnStatistics,
 )
 from models.query_execution import QueryExecution
-from tasks.sync_elasticsearch import sync_elasticsearch
+from tasks.sync_elasticsearch import queue_elasticsearch_sync
 
 
 @with_session
@@ -142,9 +150,18 @@ def delete_schema(id=None, commit=True, session=None):
         session.flush()
 
 
-def get_all_table(offset=0, limit=100, session=None):
-    """Get all the tables."""
-    return session.query(DataTable).offset(offset).limit(limit).all()
+def get_all_table(after_id=None, limit=100, session=None):
+    """Get a page of the tables ordered by id, along with their
+       schema, information, columns and tags
+
+    Keyword Arguments:
+        after_id {int} -- Only return the tables after this id (default: {None})
+        limit {int} -- Max number of tables (default: {100})
+    """
+    query = _get_tables_with_details_query(session)
+    if after_id is not None:
+        query = query.filter(DataTable.id > after_id)
+    return query.order_by(DataTable.id).limit(limit).all()
 
 
 @with_session
@@ -178,12 +195,69 @@ def get_table_by_schema_id(schema_id, session=None):
     return session.query(DataTable).filter(DataTable.schema_id == schema_id).all()
 
 
+@with_session
+def get_table_metastore_fingerprints_by_schema_id(schema_id, session=None):
+    """Get the metastore fingerprint of each table of the schema by table name"""
+    return dict(
+        session.query(DataTable.name, DataTable.metastore_fingerprint)
+        .filter(DataTable.schema_id == schema_id)
+        .all()
+    )
+
+
+@with_session
+def update_table_metastore_fingerprint(
+    table_id, metastore_fingerprint, commit=True, session=None
+):
+    table = get_table_by_id(table_id, session=session)
+    if not table:
+        return
+
+    table.metastore_fingerprint = metastore_fingerprint
+    if commit:
+        session.commit()
+    else:
+        session.flush()
+
+
 @with_session
 def get_table_by_id(table_id, session=None):
     """Get an table by its id"""
     return session.query(DataTable).get(table_id)
 
 
+def _get_tables_with_details_query(session):
+    return session.query(DataTable).options(
+        joinedload(DataTable.data_schema),
+        joinedload(DataTable.information),
+        selectinload(DataTable.columns),
+        selectinload(DataTable.tags),
+    )
+
+
+@with_session
+def get_tables_with_details_by_ids(table_ids, session=None):
+    """Get the tables by their ids, along with their
+    schema, information, columns and tags
+    """
+    return (
+        _get_tables_with_details_query(session)
+        .filter(DataTable.id.in_(table_ids))
+        .all()
+    )
+
+
+@with_session
+def get_tables_by_ids(table_ids, session=None):
+    """Get the tables by their ids, along with their schema"""
+    return (
+        session.query(DataTable)
+        .filter(DataTable.id.in_(table_ids))
+        .options(joinedload(DataTable.data_schema))
+        .all()
+    )
+
+
 @with_session
 def create_table(
     name=None,
@@ -249,6 +323,8 @@ def update_table(id, golden=None, score=None, commit=True, session=None):
 
     if score is not None:
         table.boost_score = score
+        # The weight depends on the boost score, it is stored again on reindex
+        table.weight = None
 
     if commit:
         session.commit()
@@ -480,6 +556,95 @@ def create_column(
     return new_table_column
 
 
+@with_session
+def upsert_table_columns(table_id, columns, commit=True, session=None) -> Dict:
+    """Sync the columns of the table with the columns in the metastore,
+       with a query to get the existing columns and one per type of change.
+       Like create_column, the comment and description of a column are kept
+       if the metastore does not have them, so that user edits are preserved.
+
+    Arguments:
+        table_id {int}
+        columns {List[DataColumn]} -- The columns in the metastore, with name,
+                                      type, comment and description
+
+    Returns:
+        Dict -- The number of columns inserted, updated and deleted
+    """
+    existing_columns = {}
+    for column in (
+        session.query(
+            DataTableColumn.id,
+            DataTableColumn.name,
+            DataTableColumn.type,
+            DataTableColumn.comment,
+            DataTableColumn.description,
+        )
+        .filter(DataTableColumn.table_id == table_id)
+        .order_by(DataTableColumn.id)
+    ):
+        # Only the first column is synced if the name is duplicated
+        existing_columns.setdefault(column.name, column)
+
+    now = datetime.datetime.now()
+    column_names = set()
+    new_columns = {}
+    updated_columns = {}
+    for column in columns:
+        values = DataTableColumn.truncate_string_fields(
+            {"name": column.name, "type": column.type, "comment": column.comment}
+        )
+        column_names.add(values["name"])
+        existing_column = existing_columns.get(values["name"])
+        if existing_column is None:
+            new_columns[values["name"]] = dict(
+                values,
+                description=column.description,
+                table_id=table_id,
+                created_at=now,
+                updated_at=now,
+            )
+            continue
+
+        values["comment"] = values["comment"] or existing_column.comment
+        values["description"] = (
+            existing_column.description
+            if column.description is None
+            else column.description
+        )
+        if any(getattr(existing_column, key) != value for key, value in values.items()):
+            updated_columns[existing_column.id] = dict(
+                values, id=existing_column.id, updated_at=now
+            )
+
+    deleted_column_ids = [
+        column.id
+        for name, column in existing_columns.items()
+        if name not in column_names
+    ]
+
+    if new_columns:
+        session.bulk_insert_mappings(DataTableColumn, list(new_columns.values()))
+    if updated_columns:
+        session.bulk_update_mappings(DataTableColumn, list(updated_columns.values()))
+    if deleted_column_ids:
+        session.query(DataTableColumn).filter(
+            DataTableColumn.id.in_(deleted_column_ids)
+        ).delete(synchronize_session=False)
+
+    if commit:
+        session.commit()
+        if new_columns or updated_columns or deleted_column_ids:
+            update_es_tables_by_id(table_id)
+    else:
+        session.flush()
+    return {
+        "inserted": len(new_columns),
+        "updated": len(updated_columns),
+        "deleted": len(deleted_column_ids),
+    }
+
+
 @with_session
 def update_column_by_id(
     id=None,
@@ -729,6 +894,136 @@ def get_table_query_samples_count(table_id, session):
     return session.query(DataTableQueryExecution).filter_by(table_id=table_id).count()
 
 
+@with_session
+def get_table_query_samples_counts(
+    table_ids: List[int], session=None
+) -> Dict[int, int]:
+    """Get the query samples count of many tables in a single grouped query
+
+    Returns:
+        Dict[int, int] -- Map of table id to samples count, tables without
+                          samples are not included
+    """
+    return dict(
+        session.query(
+            DataTableQueryExecution.table_id, func.count(DataTableQueryExecution.id)
+        )
+        .filter(DataTableQueryExecution.table_id.in_(table_ids))
+        .group_by(DataTableQueryExecution.table_id)
+        .all()
+    )
+
+
+@with_session
+def get_table_ids_with_query_samples_after(after_datetime, session=None) -> List[int]:
+    return [
+        table_id
+        for (table_id,) in session.query(DataTableQueryExecution.table_id)
+        .distinct()
+        .join(
+            QueryExecution,
+            QueryExecution.id == DataTableQueryExecution.query_execution_id,
+        )
+        .filter(QueryExecution.created_at >= after_datetime)
+        .all()
+    ]
+
+
+"""
+    ---------------------------------------------------------------------------------------------------------
+    TABLE WEIGHT
+    ---------------------------------------------------------------------------------------------------------
+"""
+
+
+def compute_table_weight(num_samples: int, num_impressions: int, boost_score) -> int:
+    """Calculate the weight of table. Used for ranking in auto completion
+       and sidebar table search. It produces a number >= 0
+
+    Arguments:
+        num_samples {int} -- Number of query samples of the table
+        num_impressions {int} -- Number of viewers since the last impressions date
+        boost_score {Decimal} -- Boost score of the table
+
+    Returns:
+        int -- The integer weight
+    """
+    # Samples worth 10x as much as impression
+    # Log the score to flatten the score distrution (since its power law distribution)
+    return int(math.log2(((num_impressions + num_samples * 10) + 1) + boost_score))
+
+
+@with_session
+def update_table_weights(
+    table_ids: List[int] = None, batch_size: int = 1000, session=None
+) -> List[int]:
+    """Compute the weights of the tables in batches and store the ones that
+       changed. Each batch costs a grouped query on query samples and one
+       on impressions, instead of three queries per table.
+
+    Keyword Arguments:
+        table_ids {List[int]} -- Tables to update, all tables if None (default: {None})
+        batch_size {int} -- Number of tables per batch (default: {1000})
+
+    Returns:
+        List[int] -- Ids of the tables whose weight changed
+    """
+    last_impressions_date = get_last_impressions_date()
+    updated_table_ids = []
+    for rows in _iter_table_weight_rows(table_ids, batch_size, session=session):
+        batch_table_ids = [table_id for table_id, _, _ in rows]
+        num_samples_by_id = get_table_query_samples_counts(
+            batch_table_ids, session=session
+        )
+        num_impressions_by_id = get_viewers_count_by_items_after_date(
+            ImpressionItemType.DATA_TABLE,
+            last_impressions_date,
+            item_ids=batch_table_ids,
+            session=session,
+        )
+
+        updated_weights = []
+        for table_id, boost_score, weight in rows:
+            new_weight = compute_table_weight(
+                num_samples_by_id.get(table_id, 0),
+                num_impressions_by_id.get(table_id, 0),
+                boost_score,
+            )
+            if new_weight != weight:
+                updated_weights.append({"id": table_id, "weight": new_weight})
+
+        if updated_weights:
+            session.bulk_update_mappings(DataTable, updated_weights)
+            session.commit()
+            updated_table_ids += [mapping["id"] for mapping in updated_weights]
+    return updated_table_ids
+
+
+def _iter_table_weight_rows(
+    table_ids: List[int], batch_size: int, session=None
+) -> Iterator[List[Tuple]]:
+    query = session.query(DataTable.id, DataTable.boost_score, DataTable.weight)
+    if table_ids is not None:
+        table_ids = sorted(set(table_ids))
+        for i in range(0, len(table_ids), batch_size):
+            rows = query.filter(DataTable.id.in_(table_ids[i : i + batch_size])).all()
+            if rows:
+                yield rows
+        return
+
+    after_id = None
+    while True:
+        page_query = query
+        if after_id is not None:
+            page_query = page_query.filter(DataTable.id > after_id)
+        rows = page_query.order_by(DataTable.id).limit(batch_size).all()
+        if rows:
+            yield rows
+        if len(rows) < batch_size:
+            break
+        after_id = rows[-1][0]
+
+
 """
     ---------------------------------------------------------------------------------------------------------
     ELASTICSEARCH
@@ -737,7 +1032,11 @@ def get_table_query_samples_count(table_id, session):
 
 
 def update_es_tables_by_id(id):
-    sync_elasticsearch.apply_async(args=[ElasticsearchItem.tables.value, id])
+    queue_elasticsearch_sync(ElasticsearchItem.tables.value, [id])
+
+
+def update_es_tables_by_ids(ids):
+    queue_elasticsearch_sync(ElasticsearchItem.tables.value, ids)
 
 
 """
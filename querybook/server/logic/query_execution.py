@@ -1,10 +1,11 @@
 from datetime import datetime
 
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, selectinload
 from app.db import with_session
 from app.flask_app import celery
 from const.elasticsearch import ElasticsearchItem
 
+from const.data_doc import DataCellType
 from const.query_execution import QueryExecutionStatus, StatementExecutionStatus
 from lib.logger import get_logger
 from models.query_execution import (
@@ -14,10 +15,15 @@ from models.query_execution import (
     QueryExecutionError,
     StatementExecutionStreamLog,
 )
-from models.datadoc import DataCellQueryExecution, DataDocDataCell
+from models.datadoc import (
+    DataCell,
+    DataCellQueryExecution,
+    DataDoc,
+    DataDocDataCell,
+)
 from models.admin import QueryEngine, QueryEngineEnvironment
 from models.environment import Environment
-from tasks.sync_elasticsearch import sync_elasticsearch
+from tasks.sync_elasticsearch import queue_elasticsearch_sync
 
 CLEAN_UP_TIME_THRESHOLD = 20 * 60  # 20 mins
 LOG = get_logger(__file__)
@@ -367,11 +373,14 @@ def get_statement_execution_stream_logs(
     limit=100,
     offset=0,
     from_end=False,  # This gets the stream logs from the end
+    after_id=None,  # Faster than offset for reading all the logs in order
     session=None,
 ):
     query = session.query(StatementExecutionStreamLog).filter(
         StatementExecutionStreamLog.statement_execution_id == statement_execution_id
     )
+    if after_id is not None:
+        query = query.filter(StatementExecutionStreamLog.id > after_id)
 
     if from_end:
         query = query.order_by(StatementExecutionStreamLog.id.desc())
@@ -542,35 +551,59 @@ def clean_up_query_execution(dry_run=False, session=None):
 
 
 @with_session
-def get_successful_adhoc_query_executions(offset=0, limit=100, session=None):
-    return (
+def get_successful_adhoc_query_executions(after_id=None, limit=100, session=None):
+    """Get a page of the successful query executions that are not
+       in a data cell, ordered by id
+
+    Keyword Arguments:
+        after_id {int} -- Only return the executions after this id (default: {None})
+        limit {int} -- Max number of executions (default: {100})
+    """
+    query = (
         session.query(QueryExecution)
         .filter(QueryExecution.status == QueryExecutionStatus.DONE)
         .join(DataCellQueryExecution, isouter=True)
         .filter(DataCellQueryExecution.id.is_(None))
-        .offset(offset)
-        .limit(limit)
-        .all()
     )
+    if after_id is not None:
+        query = query.filter(QueryExecution.id > after_id)
+    return query.order_by(QueryExecution.id).limit(limit).all()
 
 
 @with_session
-def get_successful_query_executions_by_data_cell_id(
-    data_cell_id, offset=0, limit=100, session=None
-):
-    return (
-        session.query(QueryExecution)
+def get_successful_query_cell_executions(after_id=None, limit=100, session=None):
+    """Get a page of the successful query executions of the query cells
+       in unarchived data docs, ordered by id. The cell, its doc and the
+       doc editors are loaded along with the executions.
+
+    Keyword Arguments:
+        after_id {int} -- Only return the executions after this id (default: {None})
+        limit {int} -- Max number of rows (default: {100})
+
+    Returns:
+        List[Tuple[QueryExecution, DataCell]]
+    """
+    query = (
+        session.query(QueryExecution, DataCell)
         .filter(QueryExecution.status == QueryExecutionStatus.DONE)
-        .join(DataCellQueryExecution)
-        .filter(DataCellQueryExecution.data_cell_id == data_cell_id)
-        .offset(offset)
-        .limit(limit)
-        .all()
+        .join(
+            DataCellQueryExecution,
+            DataCellQueryExecution.query_execution_id == QueryExecution.id,
+        )
+        .join(DataCell, DataCell.id == DataCellQueryExecution.data_cell_id)
+        .filter(DataCell.cell_type == DataCellType.query)
+        .join(DataDocDataCell, DataDocDataCell.data_cell_id == DataCell.id)
+        .join(DataDoc, DataDoc.id == DataDocDataCell.data_doc_id)
+        .filter(DataDoc.archived.is_(False))
+        .options(selectinload(DataCell.doc).selectinload(DataDoc.editors))
     )
+    if after_id is not None:
+        query = query.filter(QueryExecution.id > after_id)
+    return query.order_by(QueryExecution.id, DataCell.id).limit(limit).all()
 
 
 def update_es_query_execution_by_id(id):
-    sync_elasticsearch.apply_async(args=[ElasticsearchItem.query_executions.value, id])
+    queue_elasticsearch_sync(ElasticsearchItem.query_executions.value, [id])
 
 
 """
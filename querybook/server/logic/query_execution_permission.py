@@ -37,22 +37,6 @@ def _get_execution_envs_and_user_envs(execution_id, uid, session=None):
     return execution_envs, filter(lambda env: env.id in user_env_ids, execution_envs)
 
 
-@with_session
-def get_user_environments_by_execution_id(execution_id, uid, session=None):
-    """Get all environments that execution belongs in and user can access
-
-    Args:
-        execution_id (int): The id of query execution
-        uid (int): The id of user
-        session (Session, optional): The sqlalchemy session. Defaults to None.
-
-    Returns:
-        List[Environment]: A list of environments
-    """
-    _, user_envs = _get_execution_envs_and_user_envs(execution_id, uid, session=session)
-    return list(user_envs)
-
-
 @with_session
 def get_default_user_environment_by_execution_id(execution_id, uid, session=None):
     """Get the first environment that can be accessed by both execution_id and uid,
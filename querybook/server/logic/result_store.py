@@ -41,6 +41,28 @@ def get_key_value_store(key, session=None):
     return KeyValueStore.get(session=session, key=key)
 
 
+@with_session
+def delete_key_value_stores(keys, commit=True, session=None):
+    """Delete the key value stores of the keys with one query
+
+    Returns:
+        int -- Number of key value stores deleted
+    """
+    if not len(keys):
+        return 0
+
+    deleted_count = (
+        session.query(KeyValueStore)
+        .filter(KeyValueStore.key.in_(keys))
+        .delete(synchronize_session=False)
+    )
+    if commit:
+        session.commit()
+    else:
+        session.flush()
+    return deleted_count
+
+
 @with_session
 def delete_key_value_store(key, commit=True, session=None):
     item = get_key_value_store(key=key, session=session)
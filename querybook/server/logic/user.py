@@ -10,7 +10,7 @@ from models.user import (
     UserSetting,
     UserRole,
 )
-from tasks.sync_elasticsearch import sync_elasticsearch
+from tasks.sync_elasticsearch import queue_elasticsearch_sync
 
 
 LOG = get_logger(__file__)
@@ -33,6 +33,20 @@ def get_users_by_ids(ids, session=None):
     return session.query(User).filter(User.id.in_(ids)).all()
 
 
+@with_session
+def get_all_users(after_id=None, limit=100, session=None):
+    """Get a page of the users ordered by id
+
+    Keyword Arguments:
+        after_id {int} -- Only return the users after this id (default: {None})
+        limit {int} -- Max number of users (default: {100})
+    """
+    query = session.query(User)
+    if after_id is not None:
+        query = query.filter(User.id > after_id)
+    return query.order_by(User.id).limit(limit).all()
+
+
 @with_session
 def get_user_by_name(username, case_sensitive=True, session=None):
     if case_sensitive:
@@ -260,4 +274,4 @@ def create_admin_when_no_admin(user, commit, session=None):
 
 
 def update_es_users_by_id(uid):
-    sync_elasticsearch.apply_async(args=[ElasticsearchItem.users.value, uid])
+    queue_elasticsearch_sync(ElasticsearchItem.users.value, [uid])
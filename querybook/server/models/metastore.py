@@ -187,6 +187,11 @@ class DataTable(CRUDMixin, TruncateString("name", "type", "location"), Base):
     )
     golden = sql.Column(sql.Boolean, default=False)
     boost_score = sql.Column(sql.Numeric, default=1, nullable=False)
+    # Search ranking weight, computed in batch by update_table_weights
+    weight = sql.Column(sql.Integer)
+    # Hash of the table info in the metastore when it was last synced,
+    # the table is only updated by the metastore loader if it changes
+    metastore_fingerprint = sql.Column(sql.String(length=64))
 
     information = relationship(
         "DataTableInformation",
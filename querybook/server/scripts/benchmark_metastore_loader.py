@@ -0,0 +1,132 @@
+"""Measure the number of tables loaded per second by the metastore loader.
+
+It loads a fake metastore of N schemas with M tables each, whose calls wait
+for the given latency like a remote metastore would, into the configured
+database. The metastore is created for the benchmark and deleted afterwards.
+
+Example:
+    python scripts/benchmark_metastore_loader.py --schemas 10 --tables 500 \
+        --latency 0.02 --threads 1 10
+"""
+import argparse
+import time
+import uuid
+from typing import Dict, List, Tuple
+
+from lib.form import StructFormField
+from lib.metastore.base_metastore_loader import (
+    BaseMetastoreLoader,
+    DataColumn,
+    DataTable,
+)
+from models.admin import QueryMetastore
+
+
+class BenchmarkMetastoreLoader(BaseMetastoreLoader):
+    def __init__(self, metastore_dict: Dict):
+        params = metastore_dict["metastore_params"]
+        self.num_schemas = params["num_schemas"]
+        self.num_tables = params["num_tables"]
+        self.num_columns = params["num_columns"]
+        self.latency = params["latency"]
+        self.num_threads = params["num_threads"]
+        # Changing it changes all the tables
+        self.version = params.get("version", 0)
+        super(BenchmarkMetastoreLoader, self).__init__(metastore_dict)
+
+    @classmethod
+    def get_metastore_params_template(cls):
+        return StructFormField()
+
+    def get_all_schema_names(self) -> List[str]:
+        time.sleep(self.latency)
+        return [f"schema_{i}" for i in range(self.num_schemas)]
+
+    def get_all_table_names_in_schema(self, schema_name: str) -> List[str]:
+        time.sleep(self.latency)
+        return [f"table_{i}" for i in range(self.num_tables)]
+
+    def get_table_and_columns(
+        self, schema_name: str, table_name: str
+    ) -> Tuple[DataTable, List[DataColumn]]:
+        time.sleep(self.latency)
+        table = DataTable(
+            name=table_name,
+            type="TABLE",
+            owner="benchmark",
+            table_updated_at=self.version,
+        )
+        columns = [
+            DataColumn(name=f"column_{i}", type="string")
+            for i in range(self.num_columns)
+        ]
+        return table, columns
+
+    def _get_parallelization_setting(self):
+        return {
+            "num_threads": self.num_threads,
+            "min_batch_size": 1,
+            "write_batch_size": 100,
+        }
+
+
+def benchmark_load(loader: BaseMetastoreLoader, description: str, **kwargs):
+    start = time.time()
+    stats = loader.load(**kwargs)
+    duration = time.time() - start
+    print(
+        f"{description}: {stats['listed']} tables in {duration:.2f}s, "
+        f"{stats['listed'] / duration:.1f} tables/s ({stats})"
+    )
+
+
+def benchmark_metastore_loader(
+    num_schemas: int,
+    num_tables: int,
+    num_columns: int,
+    latency: float,
+    threads: List[int],
+):
+    metastore_params = {
+        "num_schemas": num_schemas,
+        "num_tables": num_tables,
+        "num_columns": num_columns,
+        "latency": latency,
+    }
+    metastore = QueryMetastore.create(
+        {
+            "name": f"benchmark_metastore_{uuid.uuid4().hex[:8]}",
+            "metastore_params": metastore_params,
+            "loader": BenchmarkMetastoreLoader.__name__,
+            "acl_control": {},
+        }
+    )
+    metastore_dict = metastore.to_dict_admin()
+
+    try:
+        for version, num_threads in enumerate(threads):
+            metastore_dict["metastore_params"] = dict(
+                metastore_params, num_threads=num_threads, version=version
+            )
+            loader = BenchmarkMetastoreLoader(metastore_dict)
+            benchmark_load(loader, f"{num_threads} threads, all tables changed")
+            benchmark_load(loader, f"{num_threads} threads, no table changed")
+            benchmark_load(loader, f"{num_threads} threads, full sync", full_sync=True)
+    finally:
+        QueryMetastore.delete(metastore_dict["id"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--schemas", type=int, default=10)
+    parser.add_argument("--tables", type=int, default=100, help="Tables per schema")
+    parser.add_argument("--columns", type=int, default=20, help="Columns per table")
+    parser.add_argument(
+        "--latency", type=float, default=0.01, help="Seconds per metastore call"
+    )
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 10])
+    args = parser.parse_args()
+
+    benchmark_metastore_loader(
+        args.schemas, args.tables, args.columns, args.latency, args.threads
+    )
@@ -1,3 +1,12 @@
 from logic.elasticsearch import create_indices_if_not_exist
 
-create_indices_if_not_exist()
+summaries = create_indices_if_not_exist()
+for index_name, summary in summaries.items():
+    if summary is None:
+        print(f"{index_name}: created, failed to insert documents")
+    else:
+        print(
+            f"{index_name}: indexed {summary['total'] - summary['failed']}"
+            f"/{summary['total']} documents in {summary['elapsed']:.1f}s "
+            f"({summary['docs_per_sec']:.1f} docs/sec)"
+        )
@@ -11,13 +11,15 @@ from .run_query import run_query_task
 from .run_sample_query import run_sample_query
 from .dummy_task import dummy_task
 from .update_metastore import update_metastore
-from .sync_elasticsearch import sync_elasticsearch
+from .sync_elasticsearch import sync_elasticsearch, sync_elasticsearch_queue
 from .run_datadoc import run_datadoc
 from .delete_mysql_cache import delete_mysql_cache
 from .poll_engine_status import poll_engine_status
 from .presto_hive_function_scrapper import presto_hive_function_scrapper
 from .db_clean_up_jobs import run_all_db_clean_up_jobs
 from .disable_scheduled_docs import disable_scheduled_docs
+from .update_table_weights import update_table_weights
+from .save_data_cell_drafts import save_data_cell_drafts
 
 LOG = get_logger(__file__)
 
@@ -33,6 +35,7 @@ run_query_task
 dummy_task
 update_metastore
 sync_elasticsearch
+sync_elasticsearch_queue
 run_datadoc
 delete_mysql_cache
 poll_engine_status
@@ -40,6 +43,8 @@ presto_hive_function_scrapper
 run_all_db_clean_up_jobs
 run_sample_query
 disable_scheduled_docs
+update_table_weights
+save_data_cell_drafts
 
 LOG = get_task_logger(__name__)
 
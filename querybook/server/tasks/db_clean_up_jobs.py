@@ -1,16 +1,30 @@
 from app.flask_app import celery
 from datetime import datetime, timedelta
+from typing import Iterator, List
+
+from sqlalchemy import and_, or_
 
 from app.db import DBSession, with_session
+from const.elasticsearch import ElasticsearchItem
 from const.query_execution import QueryExecutionStatus
-from logic.query_execution import update_es_query_execution_by_id
+from lib.logger import get_logger
+from lib.query_executor.log_buffer import STREAM_LOG_PATH, delete_stream_logs
+from lib.result_store import delete_results, get_result_uris
+from lib.result_store.result_cache import invalidate_cached_results
+from logic.elasticsearch import delete_items_by_ids as delete_es_items_by_ids
 from models.schedule import TaskRunRecord
-from models.query_execution import QueryExecution
+from models.query_execution import QueryExecution, StatementExecution
 from models.impression import Impression
 from models.datadoc import DataDoc
 from models.event_log import EventLog
 from logic.schedule import with_task_logging
 
+LOG = get_logger(__file__)
+
+# Each batch is deleted in its own transaction, so that the
+# query execution tables are not locked for the whole clean up
+QUERY_EXECUTION_CLEAN_UP_BATCH_SIZE = 1000
+
 
 @celery.task(bind=True)
 @with_task_logging()
@@ -48,32 +62,121 @@ def clean_up_task_run_record(days_to_keep=30, session=None):
 
 
 @with_session
-def clean_up_query_execution(days_to_keep_done=90, days_to_keep_else=30, session=None):
+def clean_up_query_execution(
+    days_to_keep_done=90,
+    days_to_keep_else=30,
+    batch_size=QUERY_EXECUTION_CLEAN_UP_BATCH_SIZE,
+    session=None,
+):
+    """Delete the expired query executions batch by batch, each batch
+       is deleted in its own transaction along with its results and logs
+
+    Keyword Arguments:
+        days_to_keep_done {int} -- Days to keep the completed query executions
+        days_to_keep_else {int} -- Days to keep the other query executions
+        batch_size {int} -- Number of query executions deleted per transaction
+
+    Returns:
+        int -- Number of query executions deleted
+    """
     last_day_for_done = datetime.now() - timedelta(days_to_keep_done)
     last_day_for_else = datetime.now() - timedelta(days_to_keep_else)
-
-    # Delete completed queries
-    query = (
-        session.query(QueryExecution)
-        .filter(QueryExecution.status == QueryExecutionStatus.DONE)
-        .filter(QueryExecution.completed_at < last_day_for_done)
-    )
-    query_execution_ids_to_delete = [query_exec.id for query_exec in query.all()]
-    query.delete(synchronize_session=False)
-
-    # Delete else
-    query = (
-        session.query(QueryExecution)
-        .filter(QueryExecution.status != QueryExecutionStatus.DONE)
-        .filter(QueryExecution.created_at < last_day_for_else)
+    is_expired = or_(
+        and_(
+            QueryExecution.status == QueryExecutionStatus.DONE,
+            QueryExecution.completed_at < last_day_for_done,
+        ),
+        and_(
+            QueryExecution.status != QueryExecutionStatus.DONE,
+            QueryExecution.created_at < last_day_for_else,
+        ),
     )
-    query_execution_ids_to_delete += [query_exec.id for query_exec in query.all()]
-    query.delete(synchronize_session=False)
 
+    deleted_count = 0
+    for query_execution_ids in get_expired_query_execution_ids_iter(
+        is_expired, batch_size, session=session
+    ):
+        delete_query_executions(query_execution_ids, session=session)
+        deleted_count += len(query_execution_ids)
+        LOG.info(f"Deleted {deleted_count} expired query executions so far")
+    return deleted_count
+
+
+@with_session
+def get_expired_query_execution_ids_iter(
+    is_expired, batch_size, session=None
+) -> Iterator[List[int]]:
+    """Walk the expired query executions by increasing id, only the ids are
+    loaded and the next batch starts after the last id of the previous one
+    """
+    last_id = 0
+    while True:
+        query_execution_ids = [
+            query_execution_id
+            for (query_execution_id,) in session.query(QueryExecution.id)
+            .filter(QueryExecution.id > last_id)
+            .filter(is_expired)
+            .order_by(QueryExecution.id)
+            .limit(batch_size)
+            .all()
+        ]
+        if not len(query_execution_ids):
+            return
+        yield query_execution_ids
+        last_id = query_execution_ids[-1]
+
+
+@with_session
+def delete_query_executions(query_execution_ids: List[int], session=None):
+    statement_executions = (
+        session.query(
+            StatementExecution.id,
+            StatementExecution.result_path,
+            StatementExecution.log_path,
+        )
+        .filter(StatementExecution.query_execution_id.in_(query_execution_ids))
+        .all()
+    )
+    # Statement executions are deleted by cascade
+    session.query(QueryExecution).filter(
+        QueryExecution.id.in_(query_execution_ids)
+    ).delete(synchronize_session=False)
     session.commit()
 
-    for query_exec_id in query_execution_ids_to_delete:
-        update_es_query_execution_by_id(query_exec_id)
+    invalidate_cached_results([statement.id for statement in statement_executions])
+    delete_es_items_by_ids(
+        ElasticsearchItem.query_executions.value, query_execution_ids
+    )
+
+    uris = []
+    # The logs of the statements that never ended are kept in the stream log
+    # table or in redis instead of the result store
+    stream_log_statement_ids = []
+    for statement_id, result_path, log_path in statement_executions:
+        if result_path:
+            uris += get_result_uris(result_path)
+        if log_path == STREAM_LOG_PATH:
+            stream_log_statement_ids.append(statement_id)
+        elif log_path:
+            uris.append(log_path)
+    try:
+        delete_stream_logs(stream_log_statement_ids, session=session)
+    except Exception:
+        session.rollback()
+        LOG.error(
+            f"Failed to delete the logs of {len(stream_log_statement_ids)} "
+            "unfinished statement executions",
+            exc_info=True,
+        )
+    try:
+        delete_results(uris)
+    except Exception:
+        # The rows are already deleted, so the rest of the clean up goes on
+        LOG.error(
+            f"Failed to delete the results of {len(statement_executions)} "
+            "statement executions",
+            exc_info=True,
+        )
 
 
 @with_session
@@ -22,7 +22,7 @@ from logic.schedule import (
     delete_task_schedule,
 )
 from lib.query_analysis.lineage import get_table_statement_type
-from logic.datadoc import get_data_doc_by_id
+from logic.datadoc import get_data_cell_draft_contexts, get_data_doc_by_id
 from logic.user import get_user_by_id
 from logic.impression import get_viewers_count_by_item_after_date
 from lib.logger import get_logger
@@ -125,8 +125,11 @@ def check_task_no_impression_for_n_days(
     if not disable_config.skip_if_no_impression_but_non_select:
         # Check if every DML/DDL of queries are select
         doc = get_data_doc_by_id(doc_id, session=session)
+        draft_contexts = get_data_cell_draft_contexts(cell.id for cell in doc.cells)
         queries_in_doc = [
-            cell.context for cell in doc.cells if cell.cell_type == DataCellType.query
+            draft_contexts.get(cell.id, cell.context)
+            for cell in doc.cells
+            if cell.cell_type == DataCellType.query
         ]
         for query in queries_in_doc:
             statement_types = get_table_statement_type(query)
@@ -54,6 +54,10 @@ def run_datadoc_with_config(
 
         runner_id = user_id if user_id is not None else data_doc.owner_uid
         query_cells = data_doc.get_query_cells()
+        # Run the latest edits of the cells, which may not be saved yet
+        draft_contexts = datadoc_logic.get_data_cell_draft_contexts(
+            query_cell.id for query_cell in query_cells
+        )
 
         # Create db entry record only for scheduled run
         if execution_type == QueryExecutionType.SCHEDULED.value:
@@ -73,7 +77,7 @@ def run_datadoc_with_config(
 
             try:
                 query = render_templated_query(
-                    query_cell.context,
+                    draft_contexts.get(query_cell.id, query_cell.context),
                     data_doc.meta_variables,
                     engine_id,
                     session=session,
@@ -60,6 +60,11 @@ def run_query_task(
             query_execution_status = get_query_execution_final_status(
                 query_execution_id, executor, error_message, session=session
             )
+            if executor:
+                LOG.info(
+                    f"Query execution {query_execution_id} ended with status "
+                    f"{query_execution_status.name} after {executor.num_polls} polls"
+                )
             notifiy_on_execution_completion(query_execution_id, session=session)
             update_query_execution_by_id(query_execution_id, session=session)
 
@@ -0,0 +1,57 @@
+import time
+
+from app.flask_app import celery
+from env import QuerybookSettings
+from lib.data_doc import cell_drafts
+from lib.logger import get_logger
+
+LOG = get_logger(__file__)
+
+
+def save_data_cell_draft(cell_id: int, context: str):
+    """Keep the edited context of the cell in redis, it is saved to the
+       database once the cell is not edited for DATA_CELL_SAVE_DELAY seconds,
+       or at most DATA_CELL_MAX_SAVE_DELAY seconds after it is edited
+
+    Arguments:
+        cell_id {int}
+        context {str}
+    """
+    countdown = QuerybookSettings.DATA_CELL_SAVE_DELAY
+    if cell_drafts.save_draft(cell_id, context, save_countdown=countdown):
+        save_data_cell_drafts.apply_async(countdown=countdown)
+
+
+def _schedule_save(countdown: int):
+    if cell_drafts.mark_save_scheduled(countdown):
+        save_data_cell_drafts.apply_async(countdown=countdown)
+
+
+@celery.task(bind=True)
+def save_data_cell_drafts(self, *args, **kwargs):
+    # Delaying this import to avoid circular depdendency
+    from logic.datadoc import save_data_cells_context
+
+    save_delay = QuerybookSettings.DATA_CELL_SAVE_DELAY
+    max_save_delay = QuerybookSettings.DATA_CELL_MAX_SAVE_DELAY
+    if not cell_drafts.start_save():
+        # Retry once the running save is done
+        _schedule_save(save_delay)
+        return
+
+    try:
+        now = time.time()
+        cell_ids = cell_drafts.get_cell_ids_to_save(
+            last_edit_before=now - save_delay,
+            first_edit_before=now - max_save_delay,
+        )
+        if cell_ids:
+            saved_cell_ids = save_data_cells_context(cell_ids)
+            LOG.info(f"Saved {len(saved_cell_ids)} of {len(cell_ids)} cell drafts")
+    finally:
+        cell_drafts.end_save()
+
+    # The drafts still being edited are saved later
+    next_save_time = cell_drafts.get_next_save_time(save_delay, max_save_delay)
+    if next_save_time is not None:
+        _schedule_save(max(int(next_save_time - time.time()) + 1, 1))
@@ -1,30 +1,66 @@
+import time
+from typing import Iterable
+
 from app.flask_app import celery
-from lib.celery.task_decorator import debounced_task
+from env import QuerybookSettings
 from const.elasticsearch import ElasticsearchItem
+from lib.elasticsearch import sync_queue
+from lib.logger import get_logger
+
+LOG = get_logger(__file__)
+
+
+def queue_elasticsearch_sync(item_type: str, item_ids: Iterable[int], queued_at=None):
+    """Queue the items to be synced to elasticsearch, the queues are
+       drained at most once every ELASTICSEARCH_SYNC_INTERVAL seconds
+
+    Arguments:
+        item_type {str} -- One of ElasticsearchItem
+        item_ids {Iterable[int]}
+    """
+    countdown = QuerybookSettings.ELASTICSEARCH_SYNC_INTERVAL
+    if sync_queue.queue_items(
+        item_type, item_ids, drain_countdown=countdown, queued_at=queued_at
+    ):
+        sync_elasticsearch_queue.apply_async(countdown=countdown)
 
 
-@debounced_task(countdown=60)
 @celery.task(bind=True)
 def sync_elasticsearch(self, item_type, item_id, *args, **kwargs):
+    queue_elasticsearch_sync(item_type, [item_id])
+
+
+@celery.task(bind=True)
+def sync_elasticsearch_queue(self, *args, **kwargs):
     # Delaying this import to avoid circular depdendency
-    from logic.elasticsearch import (
-        update_data_doc_by_id,
-        update_table_by_id,
-        update_user_by_id,
-        update_query_execution_by_id,
-        update_query_cell_by_id,
-        update_board_by_id,
-    )
-
-    if item_type == ElasticsearchItem.datadocs.value:
-        update_data_doc_by_id(item_id)
-    elif item_type == ElasticsearchItem.tables.value:
-        update_table_by_id(item_id)
-    elif item_type == ElasticsearchItem.users.value:
-        update_user_by_id(item_id)
-    elif item_type == ElasticsearchItem.query_executions.value:
-        update_query_execution_by_id(item_id)
-    elif item_type == ElasticsearchItem.query_cells.value:
-        update_query_cell_by_id(item_id)
-    elif item_type == ElasticsearchItem.boards.value:
-        update_board_by_id(item_id)
+    from logic.elasticsearch import sync_items_by_ids
+
+    sync_queue.start_drain()
+    batch_size = QuerybookSettings.ELASTICSEARCH_SYNC_BATCH_SIZE
+    for item in ElasticsearchItem:
+        item_type = item.value
+        while True:
+            queued_at = sync_queue.pop_items(item_type, batch_size)
+            if not len(queued_at):
+                break
+
+            try:
+                failed_ids = sync_items_by_ids(item_type, list(queued_at.keys()))[
+                    "failed_ids"
+                ]
+            except Exception:
+                LOG.error(f"Failed to sync {item_type}", exc_info=True)
+                failed_ids = list(queued_at.keys())
+
+            if len(failed_ids):
+                # Elasticsearch may be down, the next drain retries them
+                LOG.error(f"Requeuing {len(failed_ids)} {item_type} that failed")
+                queue_elasticsearch_sync(item_type, failed_ids, queued_at=queued_at)
+                break
+
+            LOG.info(
+                f"Synced {len(queued_at)} {item_type}, "
+                f"max lag {time.time() - min(queued_at.values()):.1f}s"
+            )
+            if len(queued_at) < batch_size:
+                break
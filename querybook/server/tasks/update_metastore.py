@@ -4,8 +4,8 @@ from logic.schedule import with_task_logging
 
 @celery.task(bind=True)
 @with_task_logging()
-def update_metastore(self, id, *args, **kwargs):
+def update_metastore(self, id, full_sync=False, *args, **kwargs):
     # Delaying this import to avoid circular depdendency
     from lib.metastore import load_metastore
 
-    load_metastore(id)
+    return load_metastore(id, full_sync=full_sync)
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+from app.db import DBSession
+from app.flask_app import celery
+from const.impression import ImpressionItemType
+from lib.logger import get_logger
+from logic import impression as impression_logic
+from logic import metastore as m_logic
+from logic.elasticsearch import bulk_update_table_weights_by_ids
+from logic.schedule import with_task_logging
+
+LOG = get_logger(__file__)
+
+
+@celery.task(bind=True)
+@with_task_logging()
+def update_table_weights(self, full_refresh=False, lookback_hours=2):
+    """Store the table weights used for search ranking and update the
+       weight of the changed tables in elasticsearch.
+
+    Keyword Arguments:
+        full_refresh {bool} -- Recompute all the tables. Otherwise only the tables
+                               with new impressions or query samples in the lookback
+                               window are updated. Since old impressions stop counting,
+                               a full refresh should run daily (default: {False})
+        lookback_hours {int} -- Should be longer than the interval between runs
+                                (default: {2})
+    """
+    with DBSession() as session:
+        table_ids = None
+        if not full_refresh:
+            after_datetime = datetime.now() - timedelta(hours=lookback_hours)
+            table_ids = set(
+                m_logic.get_table_ids_with_query_samples_after(
+                    after_datetime, session=session
+                )
+            )
+            table_ids.update(
+                impression_logic.get_item_ids_with_impressions_after(
+                    ImpressionItemType.DATA_TABLE, after_datetime, session=session
+                )
+            )
+            table_ids = list(table_ids)
+
+        updated_table_ids = m_logic.update_table_weights(
+            table_ids=table_ids, session=session
+        )
+        LOG.info(f"Updated the weight of {len(updated_table_ids)} tables")
+        if updated_table_ids:
+            bulk_update_table_weights_by_ids(updated_table_ids, session=session)
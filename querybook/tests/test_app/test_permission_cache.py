@@ -0,0 +1,177 @@
+from unittest import mock
+
+import pytest
+
+from app import permission_cache
+from app.flask_app import flask_app
+from logic.datadoc_permission import (
+    get_data_doc_permission_resource,
+    user_can_read,
+    user_can_write,
+)
+
+
+class MockPipeline(object):
+    def __init__(self, redis_conn):
+        self._redis_conn = redis_conn
+        self._calls = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self._calls.append(
+            (getattr(self._redis_conn, name), args, kwargs)
+        )
+
+    def execute(self):
+        return [fn(*args, **kwargs) for fn, args, kwargs in self._calls]
+
+
+class MockRedis(object):
+    """In memory version of the redis commands used by the permission cache"""
+
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+
+    def pipeline(self):
+        return MockPipeline(self)
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def incr(self, key):
+        self.values[key] = str(int(self.values.get(key, 0)) + 1).encode("utf-8")
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value.encode("utf-8")
+
+    def expire(self, key, ttl):
+        pass
+
+    def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+
+
+@pytest.fixture
+def mock_redis():
+    redis_conn = MockRedis()
+    with mock.patch("clients.redis_client.get_redis", return_value=redis_conn):
+        with mock.patch("env.QuerybookSettings.PERMISSION_CACHE_TTL", 10):
+            yield redis_conn
+
+
+def test_no_cache_outside_request():
+    fetch = mock.Mock(return_value=[1])
+    assert permission_cache.get_cached_permission("data_doc:1", fetch) == [1]
+    assert permission_cache.get_cached_permission("data_doc:1", fetch) == [1]
+    assert fetch.call_count == 2
+
+
+def test_request_cache():
+    fetch = mock.Mock(return_value=[1])
+    with flask_app.test_request_context():
+        for _ in range(3):
+            assert permission_cache.get_cached_permission("data_doc:1", fetch) == [1]
+            permission_cache.get_cached_permission("data_doc:1", fetch, uid=2)
+        assert fetch.call_count == 2
+        assert permission_cache.get_request_stats() == {
+            "request_hits": 4,
+            "redis_hits": 0,
+            "misses": 2,
+        }
+
+        permission_cache.get_cached_permission("data_doc:2", fetch)
+        permission_cache.invalidate_permissions("data_doc:1")
+        permission_cache.get_cached_permission("data_doc:1", fetch, uid=2)
+        permission_cache.get_cached_permission("data_doc:2", fetch)
+        assert fetch.call_count == 4
+
+    # Each request starts with an empty cache
+    with flask_app.test_request_context():
+        permission_cache.get_cached_permission("data_doc:1", fetch)
+        assert fetch.call_count == 5
+
+
+def test_redis_cache(mock_redis):
+    fetch = mock.Mock(return_value={"read": True})
+
+    with flask_app.test_request_context():
+        permission_cache.get_cached_permission("data_doc:1", fetch, uid=1)
+        permission_cache.get_cached_permission("data_doc:1", fetch, uid=2)
+    with flask_app.test_request_context():
+        assert permission_cache.get_cached_permission("data_doc:1", fetch, uid=1) == {
+            "read": True
+        }
+        assert permission_cache.get_request_stats()["redis_hits"] == 1
+    assert fetch.call_count == 2
+
+    # All the users of the resource are invalidated
+    permission_cache.invalidate_permissions("data_doc:1")
+    with flask_app.test_request_context():
+        permission_cache.get_cached_permission("data_doc:1", fetch, uid=1)
+        permission_cache.get_cached_permission("data_doc:1", fetch, uid=2)
+    assert fetch.call_count == 4
+
+    permission_cache.invalidate_all_permissions()
+    with flask_app.test_request_context():
+        permission_cache.get_cached_permission("data_doc:1", fetch, uid=1)
+    assert fetch.call_count == 5
+
+    with mock.patch("time.time", return_value=2**40):
+        with flask_app.test_request_context():
+            permission_cache.get_cached_permission("data_doc:1", fetch, uid=1)
+    assert fetch.call_count == 6
+
+
+def test_invalidate_on_commit(mock_redis, db_engine):
+    from app.db import DBSession
+
+    fetch = mock.Mock(return_value={"write": True})
+    with DBSession() as session:
+        permission_cache.invalidate_permissions("data_doc:1", session=session)
+        # A concurrent request caches the permission before the change is committed
+        with flask_app.test_request_context():
+            permission_cache.get_cached_permission("data_doc:1", fetch, uid=1)
+
+        session.commit()
+        with flask_app.test_request_context():
+            permission_cache.get_cached_permission("data_doc:1", fetch, uid=1)
+        assert fetch.call_count == 2
+
+        # The permissions are only invalidated on the next commit
+        session.commit()
+        with flask_app.test_request_context():
+            permission_cache.get_cached_permission("data_doc:1", fetch, uid=1)
+        assert fetch.call_count == 2
+
+
+def test_data_doc_access_queried_once_per_request():
+    session = mock.MagicMock()
+    query = session.query.return_value.outerjoin.return_value.filter.return_value
+    query.first.return_value = (
+        mock.Mock(public=False, owner_uid=2),
+        mock.Mock(read=True, write=False),
+    )
+
+    with flask_app.test_request_context():
+        assert user_can_read(1, uid=1, session=session)
+        assert not user_can_write(1, uid=1, session=session)
+        assert session.query.call_count == 1
+
+        # Changing an editor of the doc invalidates it
+        permission_cache.invalidate_permissions(get_data_doc_permission_resource(1))
+        query.first.return_value = (
+            mock.Mock(public=False, owner_uid=2),
+            mock.Mock(read=True, write=True),
+        )
+        assert user_can_write(1, uid=1, session=session)
+        assert session.query.call_count == 2
@@ -0,0 +1,25 @@
+from unittest import TestCase
+
+from clients.glue_client import get_partition_expression
+
+
+class GetPartitionExpressionTestCase(TestCase):
+    def test_string_keys(self):
+        self.assertEqual(
+            get_partition_expression({"dt": "2016-03-14", "name": "o'neil"}),
+            "dt = '2016-03-14' AND name = 'o''neil'",
+        )
+
+    def test_numeric_keys(self):
+        self.assertEqual(
+            get_partition_expression(
+                {"dt": "2016-03-14", "hr": "00", "ratio": "0.5", "id": "1"},
+                {"dt": "string", "hr": "int", "ratio": "decimal(4,2)", "id": "string"},
+            ),
+            "dt = '2016-03-14' AND hr = 00 AND ratio = 0.5 AND id = '1'",
+        )
+        # Values that are not numbers are still quoted
+        self.assertEqual(
+            get_partition_expression({"hr": "1 OR 1=1"}, {"hr": "bigint"}),
+            "hr = '1 OR 1=1'",
+        )
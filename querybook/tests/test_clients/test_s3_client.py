@@ -0,0 +1,201 @@
+import unittest
+from unittest import TestCase, mock
+
+import boto3
+import botocore
+
+from clients.s3_client import (
+    MultiPartUploader,
+    S3FileReader,
+    delete_s3_objects,
+    get_s3_object_content_encoding,
+)
+from lib.utils.compression import GZIP_COMPRESSION, StreamCompressor
+
+moto_import_failed = False
+try:
+    from moto import mock_s3
+except ImportError:
+    moto_import_failed = True
+
+
+BUCKET_NAME = "querybook-test-bucket"
+KEY = "querybook_temp/1/result.csv"
+CHUNK_SIZE = 1000
+
+
+@unittest.skipIf(
+    moto_import_failed, "Skipping test because moto.mock_s3 is not available"
+)
+class MultiPartUploaderTestCase(TestCase):
+    def setUp(self):
+        s3_mock = mock_s3()
+        s3_mock.start()
+        self.addCleanup(s3_mock.stop)
+
+        settings_patch = mock.patch.multiple(
+            "env.QuerybookSettings",
+            STORE_MIN_UPLOAD_CHUNK_SIZE=CHUNK_SIZE,
+            STORE_MAX_UPLOAD_CHUNK_NUM=10000,
+        )
+        settings_patch.start()
+        self.addCleanup(settings_patch.stop)
+
+        # Allow small parts so the test doesn't need to upload 5MB chunks
+        part_size_patch = mock.patch("moto.s3.models.S3_UPLOAD_PART_MIN_SIZE", 1)
+        part_size_patch.start()
+        self.addCleanup(part_size_patch.stop)
+
+        self.s3 = boto3.client("s3", region_name="us-east-1")
+        self.s3.create_bucket(Bucket=BUCKET_NAME)
+
+    def _upload(self, lines, **kwargs):
+        uploader = MultiPartUploader(BUCKET_NAME, KEY, **kwargs)
+        for line in lines:
+            self.assertTrue(uploader.write(line))
+        uploader.complete()
+        return uploader
+
+    def _get_uploaded(self):
+        return self.s3.get_object(Bucket=BUCKET_NAME, Key=KEY)["Body"].read().decode()
+
+    def test_serial_upload(self):
+        lines = [f"{i},hello world\n" for i in range(100)]
+        uploader = self._upload(lines, max_concurrent_parts=1)
+        self.assertEqual(self._get_uploaded(), "".join(lines))
+        self.assertEqual(uploader.bytes_uploaded, len("".join(lines)))
+
+    def test_concurrent_upload_keeps_order(self):
+        lines = [f"{i},hello world\n" for i in range(500)]
+        uploader = self._upload(lines, max_concurrent_parts=4)
+        self.assertEqual(self._get_uploaded(), "".join(lines))
+        self.assertEqual(uploader.bytes_uploaded, len("".join(lines)))
+        self.assertGreater(uploader.throughput, 0)
+
+    def test_retry_failed_part(self):
+        uploader = MultiPartUploader(BUCKET_NAME, KEY, max_concurrent_parts=2)
+        upload_part = uploader._s3.upload_part
+        failed_parts = set()
+
+        def flaky_upload_part(**kwargs):
+            part_number = kwargs["PartNumber"]
+            if part_number not in failed_parts:
+                failed_parts.add(part_number)
+                raise botocore.exceptions.ClientError(
+                    {"Error": {"Code": "InternalError"}}, "UploadPart"
+                )
+            return upload_part(**kwargs)
+
+        lines = [f"{i},hello world\n" for i in range(200)]
+        with mock.patch.object(
+            uploader._s3, "upload_part", side_effect=flaky_upload_part
+        ), mock.patch("clients.s3_client.time.sleep"):
+            for line in lines:
+                uploader.write(line)
+            uploader.complete()
+
+        self.assertEqual(self._get_uploaded(), "".join(lines))
+        self.assertEqual(uploader.part_retries, len(failed_parts))
+
+    def test_failed_part_aborts_upload(self):
+        uploader = MultiPartUploader(BUCKET_NAME, KEY, max_concurrent_parts=2)
+        with mock.patch.object(
+            uploader._s3,
+            "upload_part",
+            side_effect=botocore.exceptions.ClientError(
+                {"Error": {"Code": "InternalError"}}, "UploadPart"
+            ),
+        ), mock.patch("clients.s3_client.time.sleep"):
+            uploader.write("a" * (CHUNK_SIZE + 1))
+            with self.assertRaises(botocore.exceptions.ClientError):
+                uploader.complete()
+
+        self.assertEqual(
+            self.s3.list_multipart_uploads(Bucket=BUCKET_NAME).get("Uploads", []), []
+        )
+
+    def test_failed_part_aborts_upload_on_write(self):
+        for max_concurrent_parts in (1, 2):
+            uploader = MultiPartUploader(
+                BUCKET_NAME, KEY, max_concurrent_parts=max_concurrent_parts
+            )
+            with mock.patch.object(
+                uploader._s3,
+                "upload_part",
+                side_effect=botocore.exceptions.ClientError(
+                    {"Error": {"Code": "InternalError"}}, "UploadPart"
+                ),
+            ), mock.patch("clients.s3_client.time.sleep"):
+                with self.assertRaises(botocore.exceptions.ClientError):
+                    for _ in range(3):
+                        uploader.write("a" * (CHUNK_SIZE + 1))
+                        for future in uploader._part_futures:
+                            future.exception()
+
+            self.assertIsNone(uploader._executor)
+            self.assertEqual(
+                self.s3.list_multipart_uploads(Bucket=BUCKET_NAME).get("Uploads", []),
+                [],
+            )
+            # The writes that follow are ignored
+            self.assertFalse(uploader.write("a"))
+            uploader.complete()
+
+    def test_compressed_upload(self):
+        lines = [f"{i},hello world\n" for i in range(500)]
+        compressor = StreamCompressor(GZIP_COMPRESSION)
+        uploader = MultiPartUploader(
+            BUCKET_NAME, KEY, max_concurrent_parts=2, content_encoding="gzip"
+        )
+        for line in lines:
+            self.assertTrue(uploader.write(compressor.compress(line)))
+        uploader.write(compressor.flush())
+        uploader.complete()
+
+        self.assertEqual(get_s3_object_content_encoding(BUCKET_NAME, KEY), "gzip")
+        self.assertIsNone(get_s3_object_content_encoding(BUCKET_NAME, "missing"))
+        self.assertLess(uploader.bytes_uploaded, len("".join(lines)))
+
+        reader = S3FileReader(BUCKET_NAME, KEY, read_size=7, max_read_size=None)
+        self.assertEqual(reader.content_encoding, "gzip")
+        self.assertEqual(reader.read_lines(None), [line[:-1] for line in lines])
+
+        # The max read size is in terms of decompressed chars
+        reader = S3FileReader(BUCKET_NAME, KEY, read_size=7, max_read_size=50)
+        self.assertEqual(reader.read_lines(None), [line[:-1] for line in lines[:3]])
+
+        # Raw reads are for downloads, so they are not limited
+        reader = S3FileReader(BUCKET_NAME, KEY, read_size=7, max_read_size=50)
+        self.assertEqual("".join(reader.get_raw_iter()), "".join(lines))
+
+
+@unittest.skipIf(
+    moto_import_failed, "Skipping test because moto.mock_s3 is not available"
+)
+class DeleteS3ObjectsTestCase(TestCase):
+    def setUp(self):
+        s3_mock = mock_s3()
+        s3_mock.start()
+        self.addCleanup(s3_mock.stop)
+
+        self.s3 = boto3.client("s3", region_name="us-east-1")
+        self.s3.create_bucket(Bucket=BUCKET_NAME)
+
+    def test_delete_objects(self):
+        keys = [f"querybook_temp/{i}/result.csv" for i in range(5)]
+        for key in keys:
+            self.s3.put_object(Bucket=BUCKET_NAME, Key=key, Body=b"hello")
+
+        with mock.patch("clients.s3_client.S3_DELETE_OBJECTS_MAX_KEYS", 2):
+            failed_keys = delete_s3_objects(
+                BUCKET_NAME, keys[:4] + ["querybook_temp/missing/result.csv"]
+            )
+
+        self.assertEqual(failed_keys, [])
+        self.assertEqual(
+            [
+                obj["Key"]
+                for obj in self.s3.list_objects_v2(Bucket=BUCKET_NAME)["Contents"]
+            ],
+            keys[4:],
+        )
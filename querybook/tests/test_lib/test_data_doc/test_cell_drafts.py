@@ -0,0 +1,201 @@
+from unittest import mock
+
+import pytest
+
+from lib.data_doc import cell_drafts
+from tasks.save_data_cell_drafts import save_data_cell_draft, save_data_cell_drafts
+
+
+class MockPipeline(object):
+    def __init__(self, redis_conn):
+        self._redis_conn = redis_conn
+        self._calls = []
+        self._immediate = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def watch(self, *keys):
+        # Commands run immediately until multi is called
+        self._immediate = True
+
+    def multi(self):
+        self._immediate = False
+
+    def __getattr__(self, name):
+        fn = getattr(self._redis_conn, name)
+        if self._immediate:
+            return fn
+        return lambda *args, **kwargs: self._calls.append((fn, args, kwargs))
+
+    def execute(self):
+        return [fn(*args, **kwargs) for fn, args, kwargs in self._calls]
+
+
+class MockRedis(object):
+    """In memory version of the redis commands used by the cell drafts"""
+
+    def __init__(self):
+        self.hashes = {}
+        self.sorted_sets = {}
+        self.values = {}
+
+    def pipeline(self):
+        return MockPipeline(self)
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = str(value).encode("utf-8")
+
+    def hincrby(self, key, field, amount):
+        value = int(self.hashes.get(key, {}).get(field, 0)) + amount
+        self.hset(key, field, value)
+        return value
+
+    def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    def hmget(self, key, *fields):
+        return [self.hget(key, field) for field in fields]
+
+    def zadd(self, key, mapping, nx=False):
+        sorted_set = self.sorted_sets.setdefault(key, {})
+        for member, score in mapping.items():
+            if not (nx and member in sorted_set):
+                sorted_set[member] = score
+
+    def zrem(self, key, member):
+        self.sorted_sets.get(key, {}).pop(member, None)
+
+    def zrangebyscore(self, key, min_score, max_score):
+        return [
+            member.encode("utf-8")
+            for member, score in self.sorted_sets.get(key, {}).items()
+            if score <= max_score
+        ]
+
+    def zrange(self, key, start, end, withscores=False):
+        return sorted(
+            (
+                (member.encode("utf-8"), score)
+                for member, score in self.sorted_sets.get(key, {}).items()
+            ),
+            key=lambda item: item[1],
+        )[start : end + 1]
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+        self.values.pop(key, None)
+
+
+@pytest.fixture
+def mock_redis():
+    redis_conn = MockRedis()
+    with mock.patch("clients.redis_client.get_redis", return_value=redis_conn):
+        yield redis_conn
+
+
+@pytest.fixture
+def mock_save_task():
+    with mock.patch(
+        "tasks.save_data_cell_drafts.save_data_cell_drafts.apply_async"
+    ) as apply_async:
+        yield apply_async
+
+
+def test_save_draft(mock_redis, mock_save_task):
+    with mock.patch("time.time", return_value=100):
+        save_data_cell_draft(1, "select 1")
+    with mock.patch("time.time", return_value=110):
+        save_data_cell_draft(1, "select 12")
+        save_data_cell_draft(2, "select 2")
+
+    assert cell_drafts.get_drafts([1, 2, 3]) == {
+        1: {"context": "select 12", "version": 2},
+        2: {"context": "select 2", "version": 1},
+    }
+    # Only one save is scheduled until it starts
+    assert mock_save_task.call_count == 1
+
+    # Cell 1 is edited since 100 and cell 2 is idle since 110
+    assert cell_drafts.get_cell_ids_to_save(105, 95) == []
+    assert cell_drafts.get_cell_ids_to_save(105, 100) == [1]
+    assert cell_drafts.get_cell_ids_to_save(110, 95) == [1, 2]
+    assert cell_drafts.get_next_save_time(5, 30) == 115
+
+
+def test_remove_draft_edited_while_saved(mock_redis, mock_save_task):
+    with mock.patch("time.time", return_value=100):
+        save_data_cell_draft(1, "select 1")
+    version = cell_drafts.get_drafts([1])[1]["version"]
+    save_data_cell_draft(1, "select 12")
+
+    with mock.patch("time.time", return_value=120):
+        assert not cell_drafts.remove_draft(1, version)
+    assert cell_drafts.get_drafts([1]) == {1: {"context": "select 12", "version": 2}}
+    # The newer edits are saved within the max delay of the save
+    assert cell_drafts.get_cell_ids_to_save(0, 110) == []
+
+    assert cell_drafts.remove_draft(1, 2)
+    assert cell_drafts.get_drafts([1]) == {}
+    assert cell_drafts.get_next_save_time(5, 30) is None
+
+
+def test_save_drafts_task(mock_redis, mock_save_task):
+    with mock.patch("time.time", return_value=100):
+        save_data_cell_draft(1, "select 1")
+        save_data_cell_draft(2, "select 2")
+    with mock.patch("time.time", return_value=104):
+        save_data_cell_draft(2, "select 22")
+
+    def save_data_cells_context(cell_ids):
+        drafts = cell_drafts.get_drafts(cell_ids)
+        return [
+            cell_id
+            for cell_id, draft in drafts.items()
+            if cell_drafts.remove_draft(cell_id, draft["version"])
+        ]
+
+    with mock.patch(
+        "logic.datadoc.save_data_cells_context", side_effect=save_data_cells_context
+    ) as save_context, mock.patch("time.time", return_value=106), mock.patch(
+        "env.QuerybookSettings.DATA_CELL_SAVE_DELAY", 5
+    ), mock.patch(
+        "env.QuerybookSettings.DATA_CELL_MAX_SAVE_DELAY", 30
+    ):
+        save_data_cell_drafts()
+
+    # Cell 2 is still being edited
+    save_context.assert_called_once_with([1])
+    assert list(cell_drafts.get_drafts([1, 2]).keys()) == [2]
+    # And its save is scheduled once it is idle
+    assert mock_save_task.call_count == 2
+    assert mock_save_task.call_args.kwargs == {"countdown": 4}
+
+
+def test_save_drafts_task_already_running(mock_redis, mock_save_task):
+    save_data_cell_draft(1, "select 1")
+    assert cell_drafts.start_save()
+
+    with mock.patch("logic.datadoc.save_data_cells_context") as save_context:
+        save_data_cell_drafts()
+    save_context.assert_not_called()
+    # It retries once the running save is done
+    assert mock_save_task.call_count == 2
+
+
+def test_delete_draft(mock_redis, mock_save_task):
+    save_data_cell_draft(1, "select 1")
+    save_data_cell_draft(2, "select 2")
+
+    cell_drafts.delete_draft(1)
+    assert list(cell_drafts.get_drafts([1, 2]).keys()) == [2]
+    assert cell_drafts.get_cell_ids_to_save(float("inf"), float("inf")) == [2]
@@ -4,10 +4,18 @@ from unittest.mock import MagicMock, patch
 from const.data_doc import DataCellType
 
 from logic.elasticsearch import (
+    _bulk,
+    _bulk_insert,
+    _bulk_update,
+    _iter_batches_by_id,
     datadocs_to_es,
+    get_query_cells_iter,
+    get_query_executions_iter,
     query_cell_to_es,
     query_execution_to_es,
+    sync_items_by_ids,
     table_to_es,
+    update_table_by_id,
     user_to_es,
 )
 
@@ -48,26 +56,14 @@ class QueryTestCaseMixin(TestCase):
             environments=[MagicMock(id=self.ENVIRONMENT_ID)],
         )
 
-    def _patch_get_datadoc_editors_by_doc_id(self):
-        get_data_doc_editors_by_doc_id_patch = patch(
-            "logic.datadoc.get_data_doc_editors_by_doc_id"
-        )
-        self.get_data_doc_editors_by_doc_id_mock = (
-            get_data_doc_editors_by_doc_id_patch.start()
-        )
-        self.addCleanup(get_data_doc_editors_by_doc_id_patch.stop)
-
     def _create_private_shared_datadoc_mock(self):
         mock_doc = MagicMock(
             id=self.DATADOC_ID,
             environment_id=self.ENVIRONMENT_ID,
             owner_uid=self.AUTHOR_UID,
             public=False,
+            editors=[MagicMock(uid="alice"), MagicMock(uid="charlie")],
         )
-        self.get_data_doc_editors_by_doc_id_mock.return_value = [
-            MagicMock(uid="alice"),
-            MagicMock(uid="charlie"),
-        ]
         return mock_doc
 
     def _create_private_datadoc_mock(self):
@@ -76,8 +72,8 @@ class QueryTestCaseMixin(TestCase):
             environment_id=self.ENVIRONMENT_ID,
             owner_uid=self.AUTHOR_UID,
             public=False,
+            editors=[],
         )
-        self.get_data_doc_editors_by_doc_id_mock.return_value = []
         return mock_doc
 
     def _create_public_datadoc_mock(self):
@@ -112,7 +108,6 @@ class QueryTestCaseMixin(TestCase):
 
     def setUp(self):
         self._patch_get_query_engine_by_id()
-        self._patch_get_datadoc_editors_by_doc_id()
 
 
 class QueryCellTestCase(QueryTestCaseMixin):
@@ -273,25 +268,12 @@ class DataDocTestCase(TestCase):
             title=self.DATADOC_TITLE,
             public=False,
             cells=self._get_datadoc_cells_mock(),
+            editors=[MagicMock(uid="alice"), MagicMock(uid="charlie")],
         )
         return mock_doc
 
-    def _patch_get_data_doc_editors_by_doc_id(self):
-        get_data_doc_editors_by_doc_id_patch = patch(
-            "logic.datadoc.get_data_doc_editors_by_doc_id"
-        )
-        self.get_data_doc_editors_by_doc_id_mock = (
-            get_data_doc_editors_by_doc_id_patch.start()
-        )
-        self.addCleanup(get_data_doc_editors_by_doc_id_patch.stop)
-        self.get_data_doc_editors_by_doc_id_mock.return_value = [
-            MagicMock(uid="alice"),
-            MagicMock(uid="charlie"),
-        ]
-
     def setUp(self):
         self.mock_doc = self._get_datadoc_mock()
-        self._patch_get_data_doc_editors_by_doc_id()
 
     def test_data_doc_to_es(self):
         result = datadocs_to_es(self.mock_doc, session=MagicMock())
@@ -351,6 +333,7 @@ class TableTestCase(TestCase):
             id=self.TABLE_ID,
             created_at=CREATED_AT_DT,
             golden=False,
+            weight=None,
             information=MagicMock(description=self.TABLE_DESCRIPTION),
             tags=[
                 MagicMock(tag_name="tag_1"),
@@ -418,6 +401,37 @@ class TableTestCase(TestCase):
         )
         self.assertEqual(self.get_table_weight_mock.call_count, 0)
 
+    def test_stored_weight(self):
+        self.table_mock.weight = 3
+        result = table_to_es(
+            self.table_mock,
+            fields=["completion_name", "importance_score"],
+            session=MagicMock(),
+        )
+        self.assertEqual(result["importance_score"], 3)
+        self.assertEqual(result["completion_name"]["weight"], 3)
+        self.assertEqual(self.get_table_weight_mock.call_count, 0)
+
+    @patch("logic.elasticsearch._update")
+    @patch("logic.elasticsearch.update_table_weights")
+    @patch("logic.elasticsearch.get_table_by_id")
+    def test_update_table_by_id(
+        self, get_table_by_id_mock, update_table_weights_mock, update_mock
+    ):
+        get_table_by_id_mock.return_value = self.table_mock
+
+        # The weight of a table that was never indexed is stored
+        update_table_by_id(self.TABLE_ID, session=MagicMock())
+        update_table_weights_mock.assert_called_once()
+        self.assertEqual(update_table_weights_mock.call_args.args, ([self.TABLE_ID],))
+
+        # Otherwise it is left to the update_table_weights task
+        update_table_weights_mock.reset_mock()
+        self.table_mock.weight = 3
+        update_table_by_id(self.TABLE_ID, session=MagicMock())
+        update_table_weights_mock.assert_not_called()
+        self.assertEqual(update_mock.call_count, 2)
+
 
 class UserTestCase(TestCase):
     def setUp(self):
@@ -468,3 +482,222 @@ class UserTestCase(TestCase):
                 },
             )
             self.assertEqual(mock_process_names.call_count, 0)
+
+
+class BulkTestCase(TestCase):
+    INDEX_NAME = "search_tables_v1"
+
+    def setUp(self):
+        self.mock_es = MagicMock()
+        self.mock_es.bulk.return_value = {"errors": False, "items": []}
+        es_patch = patch("logic.elasticsearch.get_hosted_es", return_value=self.mock_es)
+        es_patch.start()
+        self.addCleanup(es_patch.stop)
+
+    def _get_sent_bodies(self):
+        return [call.kwargs["body"] for call in self.mock_es.bulk.call_args_list]
+
+    def test_bulk_insert_batches(self):
+        docs = [{"id": i, "name": f"table_{i}"} for i in range(7)]
+        summary = _bulk(
+            self.INDEX_NAME,
+            (
+                ({"index": {"_index": self.INDEX_NAME, "_id": doc["id"]}}, doc)
+                for doc in docs
+            ),
+            batch_size=3,
+            thread_count=2,
+        )
+
+        bodies = self._get_sent_bodies()
+        self.assertEqual(sorted(len(body) for body in bodies), [2, 6, 6])
+        sent_docs = sorted(
+            (body[i + 1] for body in bodies for i in range(0, len(body), 2)),
+            key=lambda doc: doc["id"],
+        )
+        self.assertEqual(sent_docs, docs)
+        self.assertEqual(summary["total"], 7)
+        self.assertEqual(summary["failed"], 0)
+
+    def test_bulk_update_format(self):
+        _bulk_update(self.INDEX_NAME, [{"id": 1, "name": "a"}])
+        self.assertEqual(
+            self._get_sent_bodies(),
+            [
+                [
+                    {"update": {"_index": self.INDEX_NAME, "_id": 1}},
+                    {"doc": {"id": 1, "name": "a"}, "doc_as_upsert": True},
+                ]
+            ],
+        )
+
+    def test_bulk_empty(self):
+        summary = _bulk_insert(self.INDEX_NAME, [])
+        self.mock_es.bulk.assert_not_called()
+        self.assertEqual(summary["total"], 0)
+
+    def test_bulk_errors(self):
+        def bulk(body):
+            if body[1]["id"] == 0:
+                raise Exception("Connection timed out")
+            return {
+                "errors": True,
+                "items": [
+                    {"index": {"_id": 2, "status": 201}},
+                    {"index": {"_id": 3, "status": 400, "error": {"type": "bad"}}},
+                ],
+            }
+
+        self.mock_es.bulk.side_effect = bulk
+        summary = _bulk(
+            self.INDEX_NAME,
+            (
+                ({"index": {"_index": self.INDEX_NAME, "_id": i}}, {"id": i})
+                for i in range(4)
+            ),
+            batch_size=2,
+            thread_count=1,
+        )
+        # Failed batches do not stop the rest of the documents
+        self.assertEqual(self.mock_es.bulk.call_count, 2)
+        self.assertEqual(summary["total"], 4)
+        self.assertEqual(summary["failed"], 3)
+
+
+class SyncItemsTestCase(TestCase):
+    def setUp(self):
+        self.mock_es = MagicMock()
+        self.mock_es.bulk.return_value = {"errors": False, "items": []}
+        es_patch = patch("logic.elasticsearch.get_hosted_es", return_value=self.mock_es)
+        es_patch.start()
+        self.addCleanup(es_patch.stop)
+
+    def test_sync_items_by_ids(self):
+        boards = [
+            MagicMock(
+                id=1,
+                owner_uid=5,
+                public=True,
+                docs=[],
+                tables=[],
+                editors=[],
+                deleted_at=None,
+                description=None,
+                environment_id=2,
+            ),
+            MagicMock(id=2, deleted_at=CREATED_AT_DT),
+        ]
+        boards[0].name = "Board"
+        with patch("logic.elasticsearch.get_boards_by_ids", return_value=boards):
+            summary = sync_items_by_ids("boards", [1, 2, 3], session=MagicMock())
+
+        # Deleted or missing boards are removed from the index, in the same request
+        self.assertEqual(self.mock_es.bulk.call_count, 1)
+        body = self.mock_es.bulk.call_args.kwargs["body"]
+        index_name = body[0]["update"]["_index"]
+        self.assertEqual(body[0], {"update": {"_index": index_name, "_id": 1}})
+        self.assertEqual(body[1]["doc"]["title"], "Board")
+        self.assertEqual(
+            body[2:],
+            [
+                {"delete": {"_index": index_name, "_id": 2}},
+                {"delete": {"_index": index_name, "_id": 3}},
+            ],
+        )
+        self.assertEqual(summary["total"], 3)
+
+
+class KeysetIterTestCase(TestCase):
+    def test_iter_batches_by_id(self):
+        rows = [MagicMock(id=i) for i in range(1, 8)]
+        get_batch = MagicMock(
+            side_effect=lambda after_id, limit: [
+                row for row in rows if after_id is None or row.id > after_id
+            ][:limit]
+        )
+        batches = list(_iter_batches_by_id(get_batch, 3, "Row"))
+
+        self.assertEqual(
+            [[row.id for row in batch] for batch in batches],
+            [[1, 2, 3], [4, 5, 6], [7]],
+        )
+        self.assertEqual(
+            [call.kwargs["after_id"] for call in get_batch.call_args_list],
+            [None, 3, 6],
+        )
+
+    def test_iter_batches_by_id_full_last_page(self):
+        get_batch = MagicMock(
+            side_effect=[[MagicMock(id=1), MagicMock(id=2)], []],
+        )
+        batches = list(_iter_batches_by_id(get_batch, 2, "Row"))
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(get_batch.call_count, 2)
+
+    @patch("logic.elasticsearch.get_successful_adhoc_query_executions")
+    @patch("logic.elasticsearch.get_successful_query_cell_executions")
+    @patch("logic.admin.get_all_query_engines")
+    def test_query_executions_iter(
+        self,
+        get_all_query_engines_mock,
+        get_successful_query_cell_executions_mock,
+        get_successful_adhoc_query_executions_mock,
+    ):
+        engine = MagicMock(id=1, language="presto", environments=[MagicMock(id=3)])
+        get_all_query_engines_mock.return_value = [engine]
+        query_cell = MagicMock(id=10, meta={"title": "cell"}, doc=None)
+        get_successful_query_cell_executions_mock.side_effect = [
+            [(MagicMock(id=1, engine_id=1), query_cell)],
+        ]
+        get_successful_adhoc_query_executions_mock.side_effect = [
+            [MagicMock(id=2, engine_id=1)],
+        ]
+
+        with patch("logic.admin.get_query_engine_by_id") as get_query_engine_by_id:
+            docs = list(
+                get_query_executions_iter(
+                    batch_size=2, fields=["id", "title"], session=MagicMock()
+                )
+            )
+            # Engines are loaded once instead of once per execution
+            get_query_engine_by_id.assert_not_called()
+        self.assertEqual(docs, [{"id": 1, "title": "cell"}, {"id": 2, "title": None}])
+        get_all_query_engines_mock.assert_called()
+
+    @patch("logic.elasticsearch.get_data_cell_draft_contexts")
+    @patch("logic.elasticsearch.get_all_query_cells")
+    @patch("logic.admin.get_all_query_engines")
+    def test_query_cells_iter(
+        self,
+        get_all_query_engines_mock,
+        get_all_query_cells_mock,
+        get_data_cell_draft_contexts_mock,
+    ):
+        get_all_query_engines_mock.return_value = []
+        get_all_query_cells_mock.side_effect = [
+            [
+                MagicMock(id=1, meta={}, context="select 1", doc=None),
+                MagicMock(id=2, meta={}, context="select 2", doc=None),
+            ],
+            [MagicMock(id=3, meta={}, context="select 3", doc=None)],
+            [],
+        ]
+        get_data_cell_draft_contexts_mock.side_effect = lambda cell_ids: {
+            cell_id: "select 0" for cell_id in cell_ids if cell_id == 2
+        }
+
+        docs = list(
+            get_query_cells_iter(
+                batch_size=2, fields=["id", "query_text"], session=MagicMock()
+            )
+        )
+        self.assertEqual(
+            docs,
+            [
+                {"id": 1, "query_text": "select 1"},
+                {"id": 2, "query_text": "select 0"},
+                {"id": 3, "query_text": "select 3"},
+            ],
+        )
+        # The drafts are fetched once per page instead of once per cell
+        self.assertEqual(get_data_cell_draft_contexts_mock.call_count, 2)
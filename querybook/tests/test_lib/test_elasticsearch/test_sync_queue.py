@@ -0,0 +1,185 @@
+from unittest import mock
+
+import pytest
+
+from lib.elasticsearch import sync_queue
+from tasks.sync_elasticsearch import queue_elasticsearch_sync, sync_elasticsearch_queue
+
+
+class MockPipeline(object):
+    def __init__(self, redis_conn):
+        self._redis_conn = redis_conn
+        self._calls = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self._calls.append(
+            (getattr(self._redis_conn, name), args, kwargs)
+        )
+
+    def execute(self):
+        return [fn(*args, **kwargs) for fn, args, kwargs in self._calls]
+
+
+class MockRedis(object):
+    """In memory version of the redis commands used by the sync queue"""
+
+    def __init__(self):
+        self.sorted_sets = {}
+        self.values = {}
+
+    def pipeline(self):
+        return MockPipeline(self)
+
+    def zadd(self, key, mapping, nx=False):
+        sorted_set = self.sorted_sets.setdefault(key, {})
+        for member, score in mapping.items():
+            if not (nx and member in sorted_set):
+                sorted_set[member] = score
+
+    def _sorted_items(self, key):
+        return sorted(
+            (
+                (member.encode("utf-8"), score)
+                for member, score in self.sorted_sets.get(key, {}).items()
+            ),
+            key=lambda item: item[1],
+        )
+
+    def zpopmin(self, key, count):
+        items = self._sorted_items(key)[:count]
+        for member, _ in items:
+            del self.sorted_sets[key][member.decode("utf-8")]
+        return items
+
+    def zcard(self, key):
+        return len(self.sorted_sets.get(key, {}))
+
+    def zrange(self, key, start, end, withscores=False):
+        return self._sorted_items(key)[start : end + 1]
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+@pytest.fixture
+def mock_redis():
+    redis_conn = MockRedis()
+    with mock.patch("clients.redis_client.get_redis", return_value=redis_conn):
+        yield redis_conn
+
+
+@pytest.fixture
+def mock_drain_task():
+    with mock.patch(
+        "tasks.sync_elasticsearch.sync_elasticsearch_queue.apply_async"
+    ) as apply_async:
+        yield apply_async
+
+
+def test_queue_items_coalesces(mock_redis, mock_drain_task):
+    with mock.patch("time.time", return_value=100):
+        queue_elasticsearch_sync("datadocs", [1, 2])
+    with mock.patch("time.time", return_value=110):
+        queue_elasticsearch_sync("datadocs", [2, 3])
+        queue_elasticsearch_sync("users", [1])
+
+    # The items keep the time they were first queued
+    assert mock_redis.sorted_sets["es_sync_queue:datadocs"] == {
+        "1": 100,
+        "2": 100,
+        "3": 110,
+    }
+    # Only one drain is scheduled until it starts
+    assert mock_drain_task.call_count == 1
+
+    with mock.patch("time.time", return_value=130):
+        stats = sync_queue.get_queue_stats()
+    assert stats["datadocs"] == {"size": 3, "lag": 30}
+    assert stats["users"] == {"size": 1, "lag": 20}
+    assert stats["boards"] == {"size": 0, "lag": 0.0}
+
+
+def test_drain_queue(mock_redis, mock_drain_task):
+    queue_elasticsearch_sync("datadocs", [1, 2, 3])
+    queue_elasticsearch_sync("boards", [4])
+
+    with mock.patch(
+        "logic.elasticsearch.sync_items_by_ids", return_value={"failed_ids": []}
+    ) as sync_items_by_ids:
+        with mock.patch("env.QuerybookSettings.ELASTICSEARCH_SYNC_BATCH_SIZE", 2):
+            sync_elasticsearch_queue()
+
+    assert [call.args for call in sync_items_by_ids.call_args_list] == [
+        ("datadocs", [1, 2]),
+        ("datadocs", [3]),
+        ("boards", [4]),
+    ]
+    assert not any(mock_redis.sorted_sets.values())
+
+    # Items queued after the drain started schedule another drain
+    queue_elasticsearch_sync("datadocs", [1])
+    assert mock_drain_task.call_count == 2
+
+
+def test_drain_requeues_failed_items(mock_redis, mock_drain_task):
+    with mock.patch("time.time", return_value=100):
+        queue_elasticsearch_sync("tables", [1, 2])
+
+    with mock.patch(
+        "logic.elasticsearch.sync_items_by_ids", side_effect=Exception("ES is down")
+    ):
+        sync_elasticsearch_queue()
+
+    assert mock_redis.sorted_sets["es_sync_queue:tables"] == {"1": 100, "2": 100}
+    assert mock_drain_task.call_count == 2
+
+
+@pytest.fixture
+def mock_table_docs():
+    with mock.patch.dict(
+        "logic.elasticsearch._GET_DOCS_BY_IDS_BY_ITEM_TYPE",
+        {"tables": lambda ids, session=None: {i: {"id": i} for i in ids}},
+    ):
+        yield
+
+
+def test_drain_requeues_items_failed_in_elasticsearch(
+    mock_redis, mock_drain_task, mock_table_docs, db_engine
+):
+    with mock.patch("time.time", return_value=100):
+        queue_elasticsearch_sync("tables", [1, 2])
+
+    hosted_es = mock.Mock()
+    hosted_es.bulk.side_effect = Exception("ES is down")
+    with mock.patch("logic.elasticsearch.get_hosted_es", return_value=hosted_es):
+        sync_elasticsearch_queue()
+
+    assert hosted_es.bulk.call_count == 1
+    assert mock_redis.sorted_sets["es_sync_queue:tables"] == {"1": 100, "2": 100}
+    assert mock_drain_task.call_count == 2
+
+    # Only the documents rejected by elasticsearch are requeued
+    hosted_es.bulk.side_effect = None
+    hosted_es.bulk.return_value = {
+        "errors": True,
+        "items": [
+            {"update": {"_id": "1", "status": 200}},
+            {"update": {"_id": "2", "status": 429, "error": {"type": "rejected"}}},
+        ],
+    }
+    with mock.patch("logic.elasticsearch.get_hosted_es", return_value=hosted_es):
+        sync_elasticsearch_queue()
+
+    assert mock_redis.sorted_sets["es_sync_queue:tables"] == {"2": 100}
@@ -63,6 +63,15 @@ class ValidateFormTestCase(TestCase):
             validate_form(FormField(field_type=FormFieldType.Boolean), True), (True, "")
         )
 
+    def test_select_field(self):
+        form = FormField(field_type=FormFieldType.Select, options=["a", "b"])
+        self.assertEqual(
+            validate_form(form, "c"),
+            (False, "Field value is not one of the options"),
+        )
+        self.assertEqual(validate_form(form, "a"), (True, ""))
+        self.assertEqual(validate_form(form, ""), (True, ""))
+
     def test_array_field(self):
         form = ExpandableFormField(of=FormField(), min=2, max=4)
         self.assertEqual(
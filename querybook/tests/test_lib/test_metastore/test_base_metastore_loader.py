@@ -0,0 +1,269 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from app.db import DBSession
+from lib.metastore.base_metastore_loader import (
+    BaseMetastoreLoader,
+    DataColumn,
+    DataTable,
+    get_table_fingerprint,
+)
+from logic.metastore import (
+    create_schema,
+    create_table,
+    get_column_by_table_id,
+    update_column_by_id,
+    upsert_table_columns,
+)
+
+
+class FakeMetastoreLoader(BaseMetastoreLoader):
+    def __init__(self, metastore_dict):
+        super(FakeMetastoreLoader, self).__init__(metastore_dict)
+        self.tables = metastore_dict["metastore_params"]["tables"]
+        self.fingerprints = metastore_dict["metastore_params"].get("fingerprints")
+        # Shared by the pooled loaders
+        self.fetched_table_names = metastore_dict["metastore_params"][
+            "fetched_table_names"
+        ]
+        self.fetch_thread_ids = metastore_dict["metastore_params"]["fetch_thread_ids"]
+        self.fetch_latency = metastore_dict["metastore_params"].get("fetch_latency")
+
+    @classmethod
+    def get_metastore_params_template(cls):
+        return None
+
+    def get_all_schema_names(self):
+        return ["schema"]
+
+    def get_all_table_names_in_schema(self, schema_name):
+        return list(self.tables.keys())
+
+    def get_table_fingerprints(self, schema_name, table_names):
+        return self.fingerprints
+
+    def get_table_and_columns(self, schema_name, table_name):
+        self.fetched_table_names.append(table_name)
+        self.fetch_thread_ids.setdefault(self, set()).add(threading.get_ident())
+        if self.fetch_latency:
+            time.sleep(self.fetch_latency)
+        return self.tables[table_name]
+
+
+def get_loader(tables, fingerprints=None, fetch_latency=None):
+    return FakeMetastoreLoader(
+        {
+            "id": 1,
+            "acl_control": {},
+            "metastore_params": {
+                "tables": tables,
+                "fingerprints": fingerprints,
+                "fetched_table_names": [],
+                "fetch_thread_ids": {},
+                "fetch_latency": fetch_latency,
+            },
+        }
+    )
+
+
+def get_table_and_columns(table_name, column_type="string"):
+    return (
+        DataTable(name=table_name, type="TABLE"),
+        [DataColumn(name="col_a", type=column_type)],
+    )
+
+
+TABLES = {
+    "table_a": get_table_and_columns("table_a"),
+    "table_b": get_table_and_columns("table_b"),
+    "table_c": get_table_and_columns("table_c", column_type="int"),
+}
+
+
+@pytest.fixture
+def mock_db():
+    prefix = "lib.metastore.base_metastore_loader"
+    with mock.patch(f"{prefix}.DBSession"), mock.patch(
+        f"{prefix}.create_schema"
+    ), mock.patch(
+        f"{prefix}.delete_schema_not_in_metastore", return_value=0
+    ), mock.patch(
+        f"{prefix}.delete_table_not_in_metastore", return_value=1
+    ), mock.patch(
+        f"{prefix}.get_table_metastore_fingerprints_by_schema_id"
+    ) as get_stored_fingerprints, mock.patch.object(
+        BaseMetastoreLoader, "_create_table_table", return_value=1
+    ) as create_table_table, mock.patch(
+        f"{prefix}.update_es_tables_by_ids"
+    ) as update_es_tables_by_ids:
+        yield get_stored_fingerprints, create_table_table, update_es_tables_by_ids
+
+
+def test_load_skips_unchanged_tables(mock_db):
+    get_stored_fingerprints, create_table_table, _ = mock_db
+    get_stored_fingerprints.return_value = {
+        "table_a": get_table_fingerprint(*TABLES["table_a"]),
+        # The column type changed
+        "table_c": get_table_fingerprint(*get_table_and_columns("table_c")),
+    }
+    loader = get_loader(TABLES)
+
+    stats = loader.load()
+
+    # All the tables are fetched, since there are no cheap fingerprints
+    assert sorted(loader.fetched_table_names) == ["table_a", "table_b", "table_c"]
+    updated_table_names = sorted(
+        call.args[2] for call in create_table_table.call_args_list
+    )
+    assert updated_table_names == ["table_b", "table_c"]
+    assert stats == {
+        "listed": 3,
+        "new": 1,
+        "skipped": 0,
+        "fetched": 3,
+        "updated": 2,
+        "unchanged": 1,
+        "failed": 0,
+        "deleted": 1,
+    }
+
+
+def test_load_with_table_fingerprints(mock_db):
+    get_stored_fingerprints, create_table_table, _ = mock_db
+    get_stored_fingerprints.return_value = {
+        "table_a": "fingerprint_a",
+        "table_b": "fingerprint_b",
+        "table_c": None,
+    }
+    loader = get_loader(
+        TABLES,
+        fingerprints={
+            "table_a": "fingerprint_a",
+            "table_b": "fingerprint_b_2",
+            "table_c": "fingerprint_c",
+        },
+    )
+
+    stats = loader.load()
+
+    # Only the changed tables are fetched, and their fingerprint is stored
+    assert sorted(loader.fetched_table_names) == ["table_b", "table_c"]
+    assert sorted(
+        (call.args[2], call.kwargs["fingerprint"])
+        for call in create_table_table.call_args_list
+    ) == [("table_b", "fingerprint_b_2"), ("table_c", "fingerprint_c")]
+    assert stats["skipped"] == 1
+    assert stats["updated"] == 2
+
+    # A full sync updates all the tables
+    loader.fetched_table_names.clear()
+    stats = loader.load(full_sync=True)
+    assert sorted(loader.fetched_table_names) == ["table_a", "table_b", "table_c"]
+    assert stats["skipped"] == 0
+    assert stats["updated"] == 3
+
+
+def test_load_with_pooled_loaders(mock_db):
+    get_stored_fingerprints, _, update_es_tables_by_ids = mock_db
+    get_stored_fingerprints.return_value = {}
+    tables = {f"table_{i}": get_table_and_columns(f"table_{i}") for i in range(100)}
+    loader = get_loader(tables, fetch_latency=0.01)
+
+    with mock.patch.object(
+        FakeMetastoreLoader,
+        "_get_parallelization_setting",
+        return_value={"num_threads": 4, "min_batch_size": 10, "write_batch_size": 30},
+    ):
+        stats = loader.load()
+
+    assert stats["updated"] == 100
+    assert sorted(loader.fetched_table_names) == sorted(tables.keys())
+    # The tables are fetched by several threads, but each loader
+    # (and so each metastore client) is only used by one of them
+    assert 1 < len(loader.fetch_thread_ids) <= 4
+    assert all(len(thread_ids) == 1 for thread_ids in loader.fetch_thread_ids.values())
+    # The writes are synced to elasticsearch in batches
+    assert [len(call.args[0]) for call in update_es_tables_by_ids.call_args_list] == [
+        30,
+        30,
+        30,
+        10,
+    ]
+
+
+def test_load_stops_fetching_when_write_fails(mock_db):
+    get_stored_fingerprints, _, update_es_tables_by_ids = mock_db
+    get_stored_fingerprints.return_value = {}
+    update_es_tables_by_ids.side_effect = Exception("Write failed")
+    tables = {f"table_{i}": get_table_and_columns(f"table_{i}") for i in range(100)}
+    loader = get_loader(tables, fetch_latency=0.01)
+
+    with mock.patch.object(
+        FakeMetastoreLoader,
+        "_get_parallelization_setting",
+        return_value={"num_threads": 4, "min_batch_size": 10, "write_batch_size": 10},
+    ), mock.patch.object(FakeMetastoreLoader, "close") as close:
+        with pytest.raises(Exception, match="Write failed"):
+            loader.load()
+
+    # The fetching threads stop instead of blocking on the full queue,
+    # and the loaders created for them are closed
+    assert len(loader.fetched_table_names) < 100
+    assert close.call_count == 3
+
+
+@mock.patch("logic.metastore.update_es_tables_by_id")
+def test_upsert_table_columns(_, db_engine):
+    with DBSession() as session:
+        schema_id = create_schema(
+            name="upsert_schema", table_count=1, metastore_id=None, session=session
+        ).id
+        table_id = create_table(
+            name="upsert_table", schema_id=schema_id, session=session
+        ).id
+
+        assert upsert_table_columns(
+            table_id,
+            [
+                DataColumn(name="col_a", type="string", comment="a"),
+                DataColumn(name="col_b", type="string"),
+                DataColumn(name="col_c", type="string"),
+            ],
+            session=session,
+        ) == {"inserted": 3, "updated": 0, "deleted": 0}
+        columns = {c.name: c for c in get_column_by_table_id(table_id, session=session)}
+        update_column_by_id(columns["col_b"].id, description="edited", session=session)
+
+        assert upsert_table_columns(
+            table_id,
+            [
+                # The comment and the user edited description are kept
+                DataColumn(name="col_a", type="int"),
+                DataColumn(name="col_b", type="string"),
+                DataColumn(name="col_d", type="string", description="from metastore"),
+            ],
+            session=session,
+        ) == {"inserted": 1, "updated": 1, "deleted": 1}
+        columns = {
+            c.name: (c.type, c.comment, c.description)
+            for c in get_column_by_table_id(table_id, session=session)
+        }
+        assert columns == {
+            "col_a": ("int", "a", None),
+            "col_b": ("string", None, "edited"),
+            "col_d": ("string", None, "from metastore"),
+        }
+
+        # Nothing is written if the columns did not change
+        assert upsert_table_columns(
+            table_id,
+            [
+                DataColumn(name="col_a", type="int"),
+                DataColumn(name="col_b", type="string"),
+                DataColumn(name="col_d", type="string", description="from metastore"),
+            ],
+            session=session,
+        ) == {"inserted": 0, "updated": 0, "deleted": 0}
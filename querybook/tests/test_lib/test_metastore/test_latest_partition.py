@@ -0,0 +1,84 @@
+from unittest import mock
+
+import pytest
+
+from lib.metastore import (
+    clear_pooled_metastore_loaders,
+    get_latest_partition,
+    pooled_metastore_loader,
+)
+
+
+class MockRedis(object):
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+
+@pytest.fixture
+def mock_loader():
+    loader = mock.Mock()
+    loader.get_latest_partition.return_value = "dt=2021-01-01"
+    clear_pooled_metastore_loaders()
+    with mock.patch(
+        "lib.metastore.get_metastore_loader", return_value=loader
+    ) as get_metastore_loader:
+        yield loader, get_metastore_loader
+    clear_pooled_metastore_loaders()
+
+
+def test_pooled_metastore_loader(mock_loader):
+    _, get_metastore_loader = mock_loader
+    get_metastore_loader.side_effect = lambda *args, **kwargs: mock.Mock()
+
+    with pooled_metastore_loader(1) as loader:
+        # A loader is not shared while it is borrowed
+        with pooled_metastore_loader(1) as other_loader:
+            assert other_loader is not loader
+    with pooled_metastore_loader(1) as reused_loader:
+        assert reused_loader in (loader, other_loader)
+    assert get_metastore_loader.call_count == 2
+
+    # The loader is dropped if it raised
+    with pytest.raises(ValueError):
+        with pooled_metastore_loader(2):
+            raise ValueError()
+    with pooled_metastore_loader(2):
+        pass
+    assert get_metastore_loader.call_count == 4
+
+    clear_pooled_metastore_loaders(1)
+    with pooled_metastore_loader(1):
+        pass
+    assert get_metastore_loader.call_count == 5
+
+
+def test_get_latest_partition_cached(mock_loader):
+    loader, _ = mock_loader
+    redis_conn = MockRedis()
+    with mock.patch(
+        "clients.redis_client.get_redis", return_value=redis_conn
+    ), mock.patch("env.QuerybookSettings.LATEST_PARTITION_CACHE_TTL", 60):
+        for _ in range(2):
+            assert get_latest_partition(1, "default", "table") == "dt=2021-01-01"
+        assert loader.get_latest_partition.call_count == 1
+
+        # The conditions are part of the cache key
+        loader.get_latest_partition.return_value = None
+        assert get_latest_partition(1, "default", "table", {"dt": "2022"}) is None
+        assert get_latest_partition(1, "default", "table", {"dt": "2022"}) is None
+        assert loader.get_latest_partition.call_count == 2
+
+
+def test_get_latest_partition_not_cached(mock_loader):
+    loader, _ = mock_loader
+    with mock.patch("clients.redis_client.get_redis") as get_redis:
+        for _ in range(2):
+            assert get_latest_partition(1, "default", "table") == "dt=2021-01-01"
+        get_redis.assert_not_called()
+    assert loader.get_latest_partition.call_count == 2
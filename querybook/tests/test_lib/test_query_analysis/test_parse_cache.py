@@ -0,0 +1,124 @@
+from unittest import TestCase, mock
+
+from lib.query_analysis import parse_cache
+from lib.query_analysis.lineage import get_table_statement_type, process_query
+from lib.query_analysis.parse_cache import (
+    ParseCache,
+    get_parse_cache,
+    get_query_hash,
+)
+from lib.query_analysis.statements import get_statement_ranges
+
+QUERY = """
+INSERT INTO db.target SELECT * FROM db.source;
+SELECT * FROM other;
+"""
+
+
+class ParseCacheTestCase(TestCase):
+    def setUp(self):
+        get_parse_cache().clear()
+        tokenize_patch = mock.patch(
+            "lib.query_analysis.parse_cache.tokenize_by_statement",
+            wraps=parse_cache.tokenize_by_statement,
+        )
+        self.tokenize_mock = tokenize_patch.start()
+        self.addCleanup(tokenize_patch.stop)
+
+    def test_single_parse(self):
+        self.assertEqual(get_table_statement_type(QUERY), ["INSERT", "SELECT"])
+        table_per_statement, lineage_per_statement = process_query(QUERY)
+        self.assertEqual(
+            [sorted(tables) for tables in table_per_statement],
+            [["db.source", "db.target"], ["default.other"]],
+        )
+        self.assertEqual(
+            lineage_per_statement,
+            [[{"source": "db.source", "target": "db.target"}], []],
+        )
+        # Cached results are reused
+        self.assertEqual(process_query(QUERY), process_query(QUERY))
+        self.assertEqual(self.tokenize_mock.call_count, 1)
+
+        # The default schema is part of the cache key
+        table_per_statement, _ = process_query(QUERY, language="sqlite")
+        self.assertEqual(table_per_statement[1], ["main.other"])
+        self.assertEqual(self.tokenize_mock.call_count, 1)
+
+    def test_results_are_copied(self):
+        statement_types = get_table_statement_type(QUERY)
+        statement_types.append("DROP")
+        table_per_statement, _ = process_query(QUERY)
+        table_per_statement[0].append("db.other")
+
+        self.assertEqual(get_table_statement_type(QUERY), ["INSERT", "SELECT"])
+        self.assertEqual(len(process_query(QUERY)[0][0]), 2)
+
+    def test_statement_ranges(self):
+        query = "select 1; --boo\nselect 2;"
+        self.assertEqual(get_statement_ranges(query), [(0, 8), (16, 24)])
+        self.assertEqual(get_statement_ranges(query), [(0, 8), (16, 24)])
+
+    def test_lru_eviction(self):
+        cache = ParseCache(2)
+        parsed_a = cache.get("select 1")
+        cache.get("select 2")
+        # Reading a query makes it the most recently used
+        self.assertIs(cache.get("select 1"), parsed_a)
+        cache.get("select 3")
+
+        self.assertEqual(
+            list(cache._parsed_queries),
+            [get_query_hash("select 1"), get_query_hash("select 3")],
+        )
+
+    def test_size_eviction(self):
+        cache = ParseCache(10, max_chars=20)
+        cache.get("select 1")
+        cache.get("select 2")
+        cache.get("select 3")
+        self.assertEqual(
+            list(cache._parsed_queries),
+            [get_query_hash("select 2"), get_query_hash("select 3")],
+        )
+
+        # A query longer than the max is parsed but not kept
+        long_query = "select 1234567890123"
+        parsed_query = cache.get(long_query + "4")
+        self.assertEqual(len(parsed_query.statements), 1)
+        self.assertEqual(len(cache._parsed_queries), 2)
+        cache.get(long_query)
+        self.assertEqual(list(cache._parsed_queries), [get_query_hash(long_query)])
+
+
+class ParseCacheRedisTestCase(TestCase):
+    def setUp(self):
+        redis_hashes = {}
+        redis_conn = mock.MagicMock()
+        redis_conn.hgetall.side_effect = lambda key: {
+            field.encode("utf-8"): value.encode("utf-8")
+            for field, value in redis_hashes.get(key, {}).items()
+        }
+        redis_conn.pipeline.return_value.__enter__.return_value.hset.side_effect = (
+            lambda key, field, value: redis_hashes.setdefault(key, {}).update(
+                {field: value}
+            )
+        )
+        self.redis_hashes = redis_hashes
+
+        for patch in (
+            mock.patch("clients.redis_client.get_redis", return_value=redis_conn),
+            mock.patch("env.QuerybookSettings.QUERY_PARSE_CACHE_REDIS_TTL", 60),
+        ):
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_results_shared_through_redis(self):
+        ParseCache(10).get(QUERY).get_result("statement_types", lambda p: ["SELECT"])
+        self.assertEqual(len(self.redis_hashes), 1)
+
+        # Another process loads the result instead of computing it
+        compute = mock.MagicMock()
+        result = ParseCache(10).get(QUERY).get_result("statement_types", compute)
+        self.assertEqual(result, ["SELECT"])
+        compute.assert_not_called()
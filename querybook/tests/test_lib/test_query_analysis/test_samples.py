@@ -111,3 +111,22 @@ def test_exception(get_table_by_id_mock, db_engine, fake_table):
     # Invalid filter value
     with pytest.raises(AttributeError):
         make_samples_query(table_id=1234, limit=1001, where=[["id", "=", 5]])
+
+
+@mock.patch("lib.query_analysis.samples.metastore.get_latest_partition")
+@mock.patch("lib.query_analysis.samples.get_table_by_id")
+def test_latest_partition_from_metastore(
+    get_table_by_id_mock, get_latest_partition_mock, db_engine, fake_table
+):
+    get_table_by_id_mock.return_value = fake_table
+    fake_table.information.to_dict.return_value = {
+        "latest_partitions": None,
+        "column_info": {"partition_keys": [{"name": "dt", "type": "string"}]},
+    }
+
+    get_latest_partition_mock.return_value = "dt=2019-11-10"
+    assert "dt='2019-11-10'" in make_samples_query(table_id=1234, limit=1)
+
+    # The samples are not filtered if the metastore fails
+    get_latest_partition_mock.side_effect = Exception("Metastore unavailable")
+    assert "WHERE" not in make_samples_query(table_id=1234, limit=1)
@@ -0,0 +1,151 @@
+import random
+from unittest import TestCase
+
+from sqlparse import lexer
+
+from lib.query_analysis.statement_splitter import iter_tokens, split_statement_ranges
+from lib.query_analysis.statements import parse_statement_ranges
+
+QUERIES = [
+    "",
+    "select 1",
+    "select 1;;; select 2;",
+    "select 1; --boo\nselect 2;",
+    "select 1; /* boo */ select 2",
+    "/* boo */ select 1;\n-- boo\n\n  select 2  ;  ",
+    "--+ hint\nselect 1; /*+ hint */ select 2",
+    "select 'a;b', \"c;d\", `e;f`, [g;h] from t; select 'it''s;'",
+    "select 'a\\';' ; select '",
+    'select "a\nb;" from t',
+    "select `a``;` from t; select `",
+    "select $$ a; b $$, $tag$ c; $tag$, $1 from t; select $a",
+    "select a#; select b# c;\nselect 1 +-- c;\nselect 2",
+    "select a+/* c; */ 1",
+    "# comment;\nselect 1",
+    "select 1\r\n;\r\n select 2 -- c\r\n;",
+    "select 1;\x0c;\nselect 2;\x0c\n;",
+    "-- c\n\x0c;",
+    "\x0c/* c */;",
+    "select case when a then b end from t; select 1",
+    "create function f() returns int begin declare x int; set x = 1; "
+    "if x then return 1; end if; return x; end; select 1",
+    "CREATE PROCEDURE p() BEGIN select 1; select 2; END; select 3",
+    "begin; select 1; end; select 2",
+    "declare x int; select 1",
+]
+
+
+def _get_random_queries(num_queries: int):
+    fragments = [
+        "select",
+        " ",
+        "\n",
+        "\r\n",
+        "\t",
+        ";",
+        "'a;b'",
+        "'",
+        '"',
+        '"x;y"',
+        "`q;`",
+        "`",
+        "-- c;\n",
+        "--c",
+        "# h\n",
+        "#x",
+        "--+hint\n",
+        "/* m; */",
+        "/*",
+        "*/",
+        "/*+ h */",
+        "$$ a; $$",
+        "$tag$ ; $tag$",
+        "$",
+        "$1",
+        "[b;]",
+        "[",
+        "begin",
+        "end",
+        "END IF",
+        "declare",
+        "create",
+        "if",
+        "while",
+        "x",
+        "1",
+        ".",
+        "(",
+        ")",
+        "+",
+        "a#",
+        "\x0c",
+        "é",
+        "::",
+        "case",
+        "'it''s'",
+        "'\\'';'",
+    ]
+    rng = random.Random(0)
+    return [
+        "".join(rng.choice(fragments) for _ in range(rng.randint(0, 30)))
+        for _ in range(num_queries)
+    ]
+
+
+class SplitStatementRangesTestCase(TestCase):
+    def test_same_ranges_as_parse_tree(self):
+        for query in QUERIES:
+            with self.subTest(query=query):
+                self.assertEqual(
+                    split_statement_ranges(query), parse_statement_ranges(query)
+                )
+
+    def test_random_queries(self):
+        for query in _get_random_queries(500):
+            with self.subTest(query=query):
+                self.assertEqual(
+                    split_statement_ranges(query), parse_statement_ranges(query)
+                )
+
+    def test_same_tokens_as_sqlparse(self):
+        for query in QUERIES:
+            with self.subTest(query=query):
+                self.assertEqual(
+                    [(ttype, value) for ttype, value, _ in iter_tokens(query)],
+                    list(lexer.tokenize(query)),
+                )
+
+
+def _get_large_queries():
+    """Large queries, like the ones generated by scripts or BI tools"""
+    insert_values = "INSERT INTO db.events VALUES\n" + ",\n".join(
+        f"({i}, 'user_{i}', 'comment; with '' quotes', \"{i}\", NULL)"
+        for i in range(150)
+    )
+    union_query = "\nUNION ALL\n".join(
+        f"""-- Partition {i}
+SELECT `user_id`, COUNT(*) AS cnt /* total; */
+FROM db.events_{i % 7}
+WHERE dt = '2020-01-{i % 28 + 1:02d}' AND name LIKE '%;%'
+GROUP BY 1"""
+        for i in range(100)
+    )
+    script = "\n".join(
+        f"DROP TABLE IF EXISTS tmp.t_{i};\n"
+        f"CREATE TABLE tmp.t_{i} AS SELECT * FROM db.events WHERE id > {i};"
+        for i in range(150)
+    )
+    functions = "\n".join(
+        f"CREATE FUNCTION f_{i}() RETURNS text AS $body$ SELECT 'a;b'; $body$ "
+        f"LANGUAGE sql;"
+        for i in range(100)
+    )
+    return [insert_values, union_query, script, functions]
+
+
+class SplitLargeStatementRangesTestCase(TestCase):
+    def test_same_as_parse_tree(self):
+        for query in _get_large_queries():
+            self.assertEqual(
+                split_statement_ranges(query), parse_statement_ranges(query)
+            )
@@ -3,6 +3,7 @@ from datetime import datetime, date
 
 from jinja2.sandbox import SandboxedEnvironment
 
+from lib.metastore import clear_pooled_metastore_loaders
 from lib.query_analysis.templating import (
     LatestPartitionException,
     _detect_cycle,
@@ -34,6 +35,9 @@ class TemplatingTestCase(TestCase):
         self.get_metastore_loader_mock = get_metastore_loader_patch.start()
         self.addCleanup(get_metastore_loader_patch.stop)
         self.get_metastore_loader_mock.return_value = self.metastore_loader_mock
+        # The loaders are pooled across renders
+        clear_pooled_metastore_loaders()
+        self.addCleanup(clear_pooled_metastore_loaders)
 
 
 class DetectCycleTestCase(TemplatingTestCase):
@@ -381,6 +385,9 @@ class LatestPartitionTestCase(TemplatingTestCase):
         self.get_metastore_loader_mock = get_metastore_loader_patch.start()
         self.addCleanup(get_metastore_loader_patch.stop)
         self.get_metastore_loader_mock.return_value = self.metastore_loader_mock
+        # The loaders are pooled across renders
+        clear_pooled_metastore_loaders()
+        self.addCleanup(clear_pooled_metastore_loaders)
 
     def test_invalid_engine_id(self):
         self.get_query_engine_by_id_mock.return_value = None
@@ -34,3 +34,53 @@ class ChunkReaderTestCase(TestCase):
     def test_set_max_read_size_set(self):
         reader = MockChunkReaderDerivedClass(max_read_size=25)
         self.assertEqual(reader.read_lines(), MOCK_CSV_LINES[:2])
+
+
+class MockStringChunkReader(ChunkReader):
+    def __init__(self, raw: str, **kwargs):
+        self._raw = raw
+        self._curr_char = 0
+        super(MockStringChunkReader, self).__init__(**kwargs)
+
+    def read(self):
+        next_chunk = self._raw[self._curr_char : self._curr_char + self._read_size]
+        self._curr_char += self._read_size
+        return next_chunk
+
+
+MOCK_MULTILINE_RAW_CSV = (
+    'id,text\n1,"hello\nworld"\n2,"""quoted"",\n\nnew lines"\n3,"a,b"\n4,\x00end\n'
+)
+MOCK_MULTILINE_CSV = [
+    ["id", "text"],
+    ["1", "hello\nworld"],
+    ["2", '"quoted",\n\nnew lines'],
+    ["3", "a,b"],
+    ["4", "end"],
+]
+
+
+class ChunkReaderCSVTestCase(TestCase):
+    def test_multiline_cells(self):
+        for read_size in [1, 3, 7, 1000]:
+            reader = MockStringChunkReader(
+                MOCK_MULTILINE_RAW_CSV, read_size=read_size, max_read_size=None
+            )
+            self.assertEqual(list(reader.get_csv_iter()), MOCK_MULTILINE_CSV)
+
+    def test_number_of_lines(self):
+        reader = MockStringChunkReader(
+            MOCK_MULTILINE_RAW_CSV, read_size=4, max_read_size=None
+        )
+        self.assertEqual(list(reader.get_csv_iter(3)), MOCK_MULTILINE_CSV[:3])
+
+    def test_max_read_size_inside_cell(self):
+        # Stops in the middle of the cell of row 2, which is dropped
+        reader = MockStringChunkReader(
+            MOCK_MULTILINE_RAW_CSV, read_size=4, max_read_size=40
+        )
+        self.assertEqual(list(reader.get_csv_iter()), MOCK_MULTILINE_CSV[:2])
+
+    def test_no_trailing_new_line(self):
+        reader = MockStringChunkReader("a,b\n1,2", read_size=3, max_read_size=None)
+        self.assertEqual(list(reader.get_csv_iter()), [["a", "b"], ["1", "2"]])
@@ -0,0 +1,153 @@
+from unittest import mock
+
+import pytest
+
+from lib.query_executor import log_buffer
+from lib.query_executor.log_buffer import StatementLogBuffer, iter_stream_logs
+
+
+class MockStreamLogStore(object):
+    """In memory version of the stream log functions of logic.query_execution"""
+
+    def __init__(self):
+        self.rows = []
+        self.get_calls = []
+
+    def create(self, statement_execution_id, log, commit=True, session=None):
+        self.rows.append(
+            mock.MagicMock(
+                id=len(self.rows) + 1,
+                statement_execution_id=statement_execution_id,
+                log=log,
+            )
+        )
+
+    def get(
+        self,
+        statement_execution_id,
+        limit=100,
+        offset=0,
+        from_end=False,
+        after_id=None,
+        session=None,
+    ):
+        self.get_calls.append({"offset": offset, "after_id": after_id})
+        rows = [
+            row
+            for row in self.rows
+            if row.statement_execution_id == statement_execution_id
+            and (after_id is None or row.id > after_id)
+        ]
+        if from_end:
+            return rows[::-1][offset : offset + limit][::-1]
+        return rows[offset : offset + limit]
+
+    def delete(self, statement_execution_id, commit=True, session=None):
+        self.rows = [
+            row
+            for row in self.rows
+            if row.statement_execution_id != statement_execution_id
+        ]
+
+    def get_logs(self, statement_execution_id):
+        return [log.log for log in self.get(statement_execution_id, limit=1000)]
+
+
+@pytest.fixture
+def stream_log_store():
+    store = MockStreamLogStore()
+    with mock.patch.multiple(
+        "lib.query_executor.log_buffer.qe_logic",
+        create_statement_execution_stream_log=mock.MagicMock(side_effect=store.create),
+        get_statement_execution_stream_logs=store.get,
+        delete_statement_execution_stream_log=store.delete,
+        update_statement_execution=mock.DEFAULT,
+    ), mock.patch("lib.query_executor.log_buffer.DBSession"):
+        yield store
+
+
+@pytest.fixture
+def mock_redis():
+    # Minimal in memory version of the redis list commands
+    redis_lists = {}
+    redis_conn = mock.MagicMock()
+    redis_conn.pipeline.return_value.__enter__.return_value.rpush.side_effect = (
+        lambda key, *values: redis_lists.setdefault(key, []).extend(
+            value.encode("utf-8") for value in values
+        )
+    )
+    redis_conn.lrange.side_effect = lambda key, start, end: redis_lists.get(key, [])[
+        start : (None if end == -1 else end + 1)
+    ]
+    redis_conn.delete.side_effect = lambda key: redis_lists.pop(key, None)
+    with mock.patch("clients.redis_client.get_redis", return_value=redis_conn):
+        yield redis_lists
+
+
+def test_db_buffer_coalesces_writes(stream_log_store):
+    buffer = StatementLogBuffer(1, chunk_size=10, flush_interval=3600, use_redis=False)
+    for i in range(30):
+        buffer.append(f"line {i}")
+    expected_log = "\n".join(f"line {i}" for i in range(30))
+    # The 229 chars are written in 2 flushes, once 10 chunks are pending
+    assert log_buffer.DBSession.call_count == 2
+    assert buffer.has_log
+    assert "".join(stream_log_store.get_logs(1)) == expected_log[:200]
+    assert "".join(buffer.iter_logs()) == expected_log
+    buffer.clear()
+    assert stream_log_store.get_logs(1) == []
+
+
+def test_db_buffer_flush_interval(stream_log_store):
+    buffer = StatementLogBuffer(2, chunk_size=10, flush_interval=0, use_redis=False)
+    buffer.append("a" * 25)
+    # Partial chunks stay in the buffer until the end
+    assert stream_log_store.get_logs(2) == ["a" * 10, "a" * 10]
+    assert list(buffer.iter_logs()) == ["a" * 10, "a" * 10, "a" * 5]
+
+
+def test_db_buffer_flush_if_due(stream_log_store):
+    with mock.patch("time.time", return_value=100):
+        buffer = StatementLogBuffer(5, chunk_size=10, flush_interval=3, use_redis=False)
+        buffer.append("a" * 15)
+        buffer.flush_if_due()
+    assert stream_log_store.get_logs(5) == []
+
+    # The pending logs are written once the interval passed without new logs
+    with mock.patch("time.time", return_value=103):
+        buffer.flush_if_due()
+    assert stream_log_store.get_logs(5) == ["a" * 10, "a" * 5]
+    buffer.flush_if_due()
+    assert log_buffer.DBSession.call_count == 1
+
+
+def test_iter_stream_logs_keyset(stream_log_store):
+    for i in range(7):
+        stream_log_store.create(3, f"log {i}")
+    with mock.patch.object(log_buffer, "STREAM_LOG_READ_BATCH_SIZE", 3):
+        assert list(iter_stream_logs(3)) == [f"log {i}" for i in range(7)]
+    assert stream_log_store.get_calls == [
+        {"offset": 0, "after_id": None},
+        {"offset": 0, "after_id": 3},
+        {"offset": 0, "after_id": 6},
+    ]
+
+
+@mock.patch("lib.query_executor.log_buffer.qe_logic.update_statement_execution")
+def test_redis_buffer(update_statement_execution, mock_redis):
+    buffer = StatementLogBuffer(1004, chunk_size=10, flush_interval=0, use_redis=True)
+    buffer.append("hello")
+    buffer.append("world")
+    assert mock_redis["statement_log:1004"] == [b"hello", b"world"]
+    update_statement_execution.assert_called_once_with(
+        1004, has_log=True, log_path="stream://"
+    )
+
+    with mock.patch("env.QuerybookSettings.STATEMENT_LOG_REDIS_ENABLED", True):
+        assert log_buffer.get_live_statement_logs(
+            1004, limit=1, from_end=True, session=mock.MagicMock()
+        ) == ["world"]
+
+    assert list(buffer.iter_logs()) == ["hello", "world"]
+    buffer.clear()
+    assert "statement_log:1004" not in mock_redis
@@ -0,0 +1,116 @@
+from unittest import TestCase, mock
+
+from lib.query_executor.poll_scheduler import (
+    AdaptivePollScheduler,
+    FixedPollScheduler,
+    get_poll_scheduler,
+)
+
+
+class MockClock(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+class PollSchedulerTestCase(TestCase):
+    def setUp(self):
+        self.clock = MockClock()
+        time_patch = mock.patch(
+            "lib.query_executor.poll_scheduler.time.time", side_effect=self.clock.time
+        )
+        time_patch.start()
+        self.addCleanup(time_patch.stop)
+
+    def _run_query(self, scheduler, duration, percent_complete=lambda t: None):
+        """Simulate polling a query that finishes after duration seconds
+
+        Returns:
+            Tuple[int, float] -- Number of polls and the delay of detecting completion
+        """
+        start = self.clock.now
+        while True:
+            elapsed = self.clock.now - start
+            if elapsed >= duration:
+                return scheduler.num_polls, elapsed - duration
+            scheduler.on_poll(percent_complete=percent_complete(elapsed))
+            self.clock.now += scheduler.get_sleep_time()
+
+    def test_fixed(self):
+        scheduler = FixedPollScheduler()
+        self.assertEqual(scheduler.get_sleep_time(), 1)
+        self.clock.now += 901
+        self.assertEqual(scheduler.get_sleep_time(), 10)
+
+    def test_adaptive_backoff(self):
+        scheduler = AdaptivePollScheduler(min_interval=0.1, max_interval=5)
+        self.assertEqual(scheduler.get_sleep_time(), 0.1)
+        scheduler.on_poll()
+        self.assertEqual(scheduler.get_sleep_time(), 0.1)
+
+        self.clock.now += 2
+        scheduler.on_poll()
+        self.assertAlmostEqual(scheduler.get_sleep_time(), 0.15)
+        for _ in range(20):
+            scheduler.on_poll()
+        self.assertEqual(scheduler.get_sleep_time(), 5)
+
+        # New statements start polling quickly again
+        scheduler.on_statement_start()
+        self.assertEqual(scheduler.get_sleep_time(), 0.1)
+        scheduler.on_poll()
+        self.assertEqual(scheduler.get_sleep_time(), 0.1)
+
+    def test_adaptive_logs_and_queue(self):
+        scheduler = AdaptivePollScheduler(
+            min_interval=1, max_interval=100, fast_period=0
+        )
+        scheduler.on_poll(has_new_logs=True)
+        self.assertEqual(scheduler.get_sleep_time(), 1)
+        scheduler.on_poll(has_new_logs=True, engine_state="QUEUED")
+        self.assertEqual(scheduler.get_sleep_time(), 1.5)
+
+    def test_adaptive_progress(self):
+        scheduler = AdaptivePollScheduler(
+            min_interval=0.1, max_interval=100, fast_period=0
+        )
+        scheduler.on_poll(percent_complete=0)
+        self.clock.now += 10
+        # 1% per second, so 90 seconds left
+        scheduler.on_poll(percent_complete=10)
+        self.assertAlmostEqual(scheduler.get_sleep_time(), 22.5)
+
+        self.clock.now += 80
+        scheduler.on_poll(percent_complete=99.9)
+        self.assertAlmostEqual(scheduler.get_sleep_time(), 0.1)
+
+    def test_short_query_detected_quickly(self):
+        for duration in [0.05, 0.5, 1.9]:
+            _, delay = self._run_query(AdaptivePollScheduler(), duration=duration)
+            self.assertLess(delay, 0.2)
+
+    def test_long_query_polls_less(self):
+        duration = 3 * 3600
+        fixed_polls, _ = self._run_query(FixedPollScheduler(), duration)
+        adaptive_polls, _ = self._run_query(
+            AdaptivePollScheduler(),
+            duration,
+            percent_complete=lambda t: 100 * t / duration,
+        )
+        self.assertLess(adaptive_polls * 4, fixed_polls)
+
+    def test_get_poll_scheduler(self):
+        self.assertIsInstance(get_poll_scheduler({}), FixedPollScheduler)
+        self.assertIsInstance(
+            get_poll_scheduler({"poll_scheduler": "adaptive"}), AdaptivePollScheduler
+        )
+        scheduler = get_poll_scheduler(
+            {"poll_scheduler": "adaptive", "poll_min_interval": 2}
+        )
+        self.assertEqual(scheduler.get_sleep_time(), 2)
+        with self.assertRaises(ValueError):
+            get_poll_scheduler({"poll_scheduler": "unknown"})
+        with self.assertRaises(ValueError):
+            get_poll_scheduler({"poll_scheduler": "adaptive", "poll_min_interval": 0})
@@ -0,0 +1,76 @@
+import threading
+import time
+from unittest import TestCase
+
+from lib.query_executor.result_pipeline import ResultUploadPipeline
+
+
+class ResultUploadPipelineTestCase(TestCase):
+    QUEUE_SIZE = 2
+
+    def _run_pipeline(self, batches, upload_limit=None, **kwargs):
+        uploaded = []
+
+        def upload(serialized_batch):
+            if upload_limit is not None and len(uploaded) >= upload_limit:
+                return False
+            uploaded.append(serialized_batch)
+            return True
+
+        pipeline = ResultUploadPipeline(
+            iter(batches),
+            lambda batch: [str(row) for row in batch],
+            upload,
+            queue_size=self.QUEUE_SIZE,
+            **kwargs,
+        )
+        return pipeline, pipeline.run(), uploaded
+
+    def test_upload_in_order(self):
+        batches = [[i, i + 1] for i in range(0, 100, 2)]
+        _, completed, uploaded = self._run_pipeline(batches)
+        self.assertTrue(completed)
+        self.assertEqual(uploaded, [[str(i) for i in batch] for batch in batches])
+
+    def test_stop_upload(self):
+        fetched = []
+
+        def batch_iter():
+            for i in range(100):
+                fetched.append(i)
+                yield [i]
+
+        _, completed, uploaded = self._run_pipeline(batch_iter(), upload_limit=3)
+        self.assertTrue(completed)
+        self.assertEqual(uploaded, [["0"], ["1"], ["2"]])
+        # Backpressure and stop prevents fetching everything
+        self.assertLess(len(fetched), 100)
+
+    def test_cancel(self):
+        cancel_event = threading.Event()
+
+        def batch_iter():
+            for i in range(100):
+                if i == 5:
+                    cancel_event.set()
+                time.sleep(0.01)
+                yield [i]
+
+        pipeline, completed, uploaded = self._run_pipeline(
+            batch_iter(), should_cancel=cancel_event.is_set
+        )
+        self.assertFalse(completed)
+        self.assertTrue(pipeline.cancelled)
+        self.assertLess(len(uploaded), 100)
+
+    def test_error(self):
+        def batch_iter():
+            yield [1]
+            raise ValueError("Engine failure")
+
+        with self.assertRaises(ValueError):
+            self._run_pipeline(batch_iter())
+
+
+class SerialResultUploadPipelineTestCase(ResultUploadPipelineTestCase):
+    QUEUE_SIZE = 0
@@ -0,0 +1,142 @@
+from unittest import TestCase
+
+from lib.result_store.columnar import (
+    COLUMNAR_ROW_GROUP_SIZE,
+    ColumnarResultReader,
+    ColumnarResultWriter,
+    get_columnar_uri,
+)
+from lib.utils.csv import LINE_TERMINATOR, serialize_row
+
+MOCK_COLUMNS = ["id", "name", "payload"]
+MOCK_ROWS = [
+    [i, f"name, {i}", {"line": f"hello\nworld {i}"}]
+    for i in range(COLUMNAR_ROW_GROUP_SIZE * 2 + 5)
+]
+MOCK_CSV = [MOCK_COLUMNS] + [serialize_row(row) for row in MOCK_ROWS]
+
+
+class MockUploader(object):
+    def __init__(self, max_size=None):
+        self.text = ""
+        self._max_size = max_size
+
+    def start(self):
+        self.text = ""
+
+    def write(self, data: str) -> bool:
+        if self._max_size is not None and len(self.text) + len(data) > self._max_size:
+            return False
+        self.text += data
+        return True
+
+    def end(self):
+        pass
+
+
+class MockReader(object):
+    def __init__(self, text: str, max_read_size=None):
+        self._text = text
+        self._max_read_size = max_read_size
+
+    def read_lines(self, number_of_lines):
+        lines = self._text.split(LINE_TERMINATOR)
+        lines = lines if number_of_lines is None else lines[:number_of_lines]
+        if self._max_read_size is None:
+            return lines
+
+        # Like ChunkReader, the line that goes over the limit is dropped
+        read_size = 0
+        for i, line in enumerate(lines):
+            read_size += len(line)
+            if read_size > self._max_read_size:
+                return lines[:i]
+        return lines
+
+
+def write_mock_result(**kwargs):
+    uploader = MockUploader(**kwargs)
+    with ColumnarResultWriter(uploader, MOCK_COLUMNS) as writer:
+        for row in MOCK_ROWS:
+            writer.write_row(serialize_row(row))
+    return uploader.text
+
+
+class GetColumnarUriTestCase(TestCase):
+    def test_uri(self):
+        self.assertEqual(
+            get_columnar_uri("s3://querybook_temp/1/result.csv"),
+            "s3://querybook_temp/1/result.columnar",
+        )
+        self.assertEqual(get_columnar_uri("result.csv"), "result.columnar")
+
+
+class ColumnarResultTestCase(TestCase):
+    def setUp(self):
+        self.reader = ColumnarResultReader(MockReader(write_mock_result()))
+
+    def test_one_line_per_row_group(self):
+        # header + 3 row groups + footer + trailing new line
+        self.assertEqual(len(write_mock_result().split(LINE_TERMINATOR)), 6)
+
+    def test_read_all(self):
+        self.assertEqual(self.reader.read_rows(), MOCK_CSV)
+
+    def test_read_preview(self):
+        self.assertEqual(self.reader.read_rows(number_of_lines=0), [])
+        self.assertEqual(self.reader.read_rows(number_of_lines=1), MOCK_CSV[:1])
+        self.assertEqual(self.reader.read_rows(number_of_lines=11), MOCK_CSV[:11])
+        self.assertEqual(
+            self.reader.read_rows(number_of_lines=len(MOCK_CSV) + 10), MOCK_CSV
+        )
+
+    def test_read_range(self):
+        offset = COLUMNAR_ROW_GROUP_SIZE - 2
+        self.assertEqual(
+            self.reader.read_rows(number_of_lines=6, offset=offset),
+            [MOCK_COLUMNS] + MOCK_CSV[1 + offset : 1 + offset + 5],
+        )
+
+    def test_read_projection(self):
+        self.assertEqual(
+            self.reader.read_rows(number_of_lines=3, columns=[2, 0]),
+            [[row[2], row[0]] for row in MOCK_CSV[:3]],
+        )
+
+    def test_truncated_upload(self):
+        # Only the header and the first row group fits
+        text = write_mock_result(max_size=len(write_mock_result()) // 2)
+        reader = ColumnarResultReader(MockReader(text))
+        # The rows of the row groups uploaded can still be read
+        self.assertEqual(reader.read_rows(number_of_lines=11), MOCK_CSV[:11])
+        # But the result is not complete
+        self.assertIsNone(reader.read_rows())
+        self.assertIsNone(
+            reader.read_rows(number_of_lines=11, offset=COLUMNAR_ROW_GROUP_SIZE)
+        )
+
+    def test_row_group_over_read_size(self):
+        text = write_mock_result()
+        first_row_group_size = len(text.split(LINE_TERMINATOR)[1])
+        reader = ColumnarResultReader(
+            MockReader(text, max_read_size=first_row_group_size)
+        )
+        self.assertIsNone(reader.read_rows(number_of_lines=11))
+
+    def test_old_version(self):
+        text = write_mock_result().replace('"version": 2', '"version": 1', 1)
+        reader = ColumnarResultReader(MockReader(text))
+        self.assertIsNone(reader.read_rows())
+
+    def test_write_columns(self):
+        uploader = MockUploader()
+        with ColumnarResultWriter(uploader, MOCK_COLUMNS) as writer:
+            batch_size = 300
+            for i in range(0, len(MOCK_ROWS), batch_size):
+                rows = [serialize_row(row) for row in MOCK_ROWS[i : i + batch_size]]
+                writer.write_columns([list(column) for column in zip(*rows)])
+        self.assertEqual(uploader.text, write_mock_result())
+
+    def test_empty_file(self):
+        reader = ColumnarResultReader(MockReader(""))
+        self.assertIsNone(reader.read_rows())
@@ -0,0 +1,183 @@
+from unittest import TestCase, mock
+
+from lib.result_store import result_cache
+from lib.result_store.result_cache import (
+    SizedLRUCache,
+    get_cached_result,
+    get_result_size,
+    invalidate_cached_results,
+    set_cached_result,
+)
+
+MOCK_RESULT = [["id", "name"], ["1", "foo"], ["2", "bar"]]
+
+
+class SizedLRUCacheTestCase(TestCase):
+    def test_evict_least_recently_used(self):
+        cache = SizedLRUCache(max_size=10)
+        cache.set("a", "a", 4)
+        cache.set("b", "b", 4)
+        self.assertEqual(cache.get("a"), "a")
+
+        cache.set("c", "c", 4)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "a")
+        self.assertEqual(cache.get("c"), "c")
+        self.assertEqual(cache.size, 8)
+
+    def test_value_too_big(self):
+        cache = SizedLRUCache(max_size=10)
+        cache.set("a", "a", 4)
+        self.assertFalse(cache.set("b", "b", 11))
+        self.assertEqual(cache.get("a"), "a")
+        self.assertIsNone(cache.get("b"))
+
+    def test_replace_value(self):
+        cache = SizedLRUCache(max_size=10)
+        cache.set("a", "a", 4)
+        cache.set("a", "aa", 8)
+        self.assertEqual(cache.get("a"), "aa")
+        self.assertEqual(cache.size, 8)
+
+    def test_ttl(self):
+        cache = SizedLRUCache(max_size=10, ttl=60)
+        with mock.patch("lib.result_store.result_cache.time.time", return_value=0):
+            cache.set("a", "a", 4)
+        with mock.patch("lib.result_store.result_cache.time.time", return_value=59):
+            self.assertEqual(cache.get("a"), "a")
+        with mock.patch("lib.result_store.result_cache.time.time", return_value=61):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.size, 0)
+
+    def test_delete_if(self):
+        cache = SizedLRUCache(max_size=10)
+        cache.set(1, "a", 1)
+        cache.set(2, "b", 1)
+        cache.delete_if(lambda key: key == 1)
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.get(2), "b")
+        self.assertEqual(len(cache), 1)
+
+
+class ResultCacheTestCase(TestCase):
+    def setUp(self):
+        local_cache_patch = mock.patch.object(
+            result_cache, "_local_result_cache", SizedLRUCache(max_size=1000)
+        )
+        local_cache_patch.start()
+        self.addCleanup(local_cache_patch.stop)
+        sync_patch = mock.patch.object(result_cache, "_last_invalidations_sync", None)
+        sync_patch.start()
+        self.addCleanup(sync_patch.stop)
+
+        settings_patch = mock.patch(
+            "env.QuerybookSettings.RESULT_CACHE_REDIS_ENABLED", False
+        )
+        settings_patch.start()
+        self.addCleanup(settings_patch.stop)
+
+        # Minimal in memory version of the redis commands
+        self.redis_sorted_sets = {}
+        self.redis_hashes = {}
+        redis_conn = mock.MagicMock()
+        redis_conn.zrangebyscore.side_effect = self.zrangebyscore
+        redis_conn.hget.side_effect = lambda key, field: self.redis_hashes.get(
+            key, {}
+        ).get(field)
+        pipe = redis_conn.pipeline.return_value.__enter__.return_value
+        pipe.hset.side_effect = lambda key, field, value: self.redis_hashes.setdefault(
+            key, {}
+        ).update({field: value})
+        pipe.delete.side_effect = lambda *keys: [
+            self.redis_hashes.pop(key, None) for key in keys
+        ]
+        pipe.zadd.side_effect = lambda key, mapping: self.redis_sorted_sets.setdefault(
+            key, {}
+        ).update(mapping)
+        self.redis_conn = redis_conn
+        get_redis_patch = mock.patch(
+            "clients.redis_client.get_redis", return_value=redis_conn
+        )
+        get_redis_patch.start()
+        self.addCleanup(get_redis_patch.stop)
+
+    def zrangebyscore(self, key, min_score, max_score):
+        return [
+            member.encode("utf-8")
+            for member, score in self.redis_sorted_sets.get(key, {}).items()
+            if score >= min_score
+        ]
+
+    def test_result_size(self):
+        self.assertEqual(get_result_size(MOCK_RESULT), 20)
+
+    def test_get_set(self):
+        self.assertIsNone(get_cached_result(1, 3, 0))
+        set_cached_result(1, 3, 0, MOCK_RESULT)
+        self.assertEqual(get_cached_result(1, 3, 0), MOCK_RESULT)
+        self.assertIsNone(get_cached_result(1, 3, 1))
+        self.assertIsNone(get_cached_result(1, 4, 0))
+
+    def test_invalidate(self):
+        set_cached_result(1, 3, 0, MOCK_RESULT)
+        set_cached_result(1, 3, 2, MOCK_RESULT[:1])
+        set_cached_result(2, 3, 0, MOCK_RESULT)
+        invalidate_cached_results([1])
+        self.assertIsNone(get_cached_result(1, 3, 0))
+        self.assertIsNone(get_cached_result(1, 3, 2))
+        self.assertEqual(get_cached_result(2, 3, 0), MOCK_RESULT)
+
+    @mock.patch("env.QuerybookSettings.RESULT_CACHE_REDIS_ENABLED", False)
+    def test_no_redis_calls(self):
+        set_cached_result(1, 3, 0, MOCK_RESULT)
+        get_cached_result(1, 3, 0)
+        invalidate_cached_results([1])
+        self.assertEqual(self.redis_conn.mock_calls, [])
+
+
+class RedisResultCacheTestCase(ResultCacheTestCase):
+    def setUp(self):
+        super(RedisResultCacheTestCase, self).setUp()
+        settings_patch = mock.patch(
+            "env.QuerybookSettings.RESULT_CACHE_REDIS_ENABLED", True
+        )
+        settings_patch.start()
+        self.addCleanup(settings_patch.stop)
+
+    def test_shared_between_processes(self):
+        set_cached_result(1, 3, 0, MOCK_RESULT)
+        self.assertIn("result_cache:1", self.redis_hashes)
+
+        # Another process does not have the result in memory
+        result_cache._local_result_cache.clear()
+        self.assertEqual(get_cached_result(1, 3, 0), MOCK_RESULT)
+        self.assertEqual(len(result_cache._local_result_cache), 1)
+
+    def test_invalidate_redis(self):
+        set_cached_result(1, 3, 0, MOCK_RESULT)
+        invalidate_cached_results([1])
+        self.assertEqual(self.redis_hashes, {})
+        self.assertEqual(
+            list(self.redis_sorted_sets["result_cache_invalidations"]), ["1"]
+        )
+
+    def test_invalidate_other_process(self):
+        with mock.patch("lib.result_store.result_cache.time.time", return_value=100):
+            self.assertIsNone(get_cached_result(1, 3, 0))
+            set_cached_result(1, 3, 0, MOCK_RESULT)
+            set_cached_result(2, 3, 0, MOCK_RESULT)
+
+        # The results are deleted by another process
+        self.redis_hashes.clear()
+        self.redis_sorted_sets["result_cache_invalidations"] = {"1": 105}
+
+        # The invalidations are read at most once per sync interval
+        with mock.patch("lib.result_store.result_cache.time.time", return_value=105):
+            self.assertEqual(get_cached_result(1, 3, 0), MOCK_RESULT)
+        self.redis_conn.zrangebyscore.assert_not_called()
+
+        with mock.patch("lib.result_store.result_cache.time.time", return_value=110):
+            self.assertIsNone(get_cached_result(1, 3, 0))
+            # Only the invalidated statements are removed
+            self.assertEqual(get_cached_result(2, 3, 0), MOCK_RESULT)
+        self.assertEqual(self.redis_conn.zrangebyscore.call_count, 1)
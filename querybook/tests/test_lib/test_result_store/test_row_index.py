@@ -0,0 +1,106 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from lib.result_store import GenericReader
+from lib.result_store.row_index import (
+    RowIndexBuilder,
+    get_row_index_uri,
+    get_row_offset,
+    read_row_index,
+)
+from lib.result_store.stores.file_store import FileUploader
+from lib.utils.csv import row_to_csv, rows_to_csv_lines, string_to_csv
+
+INTERVAL = 10
+MOCK_COLUMNS = ["id", "value"]
+MOCK_ROWS = [[i, f"中文, {i}\nline 2"] for i in range(95)]
+MOCK_CSV = [MOCK_COLUMNS] + [[str(i), value] for i, value in MOCK_ROWS]
+
+
+class MockReader(object):
+    def __init__(self, text: str):
+        self._text = text
+
+    def read_lines(self, number_of_lines):
+        return self._text.split("\n")[:number_of_lines]
+
+
+def build_mock_result(interval=INTERVAL):
+    builder = RowIndexBuilder(interval=interval)
+    columns_csv = row_to_csv(MOCK_COLUMNS)
+    builder.add_header_line(columns_csv)
+    csv_lines, _ = rows_to_csv_lines(MOCK_ROWS)
+    # Uneven batches to make sure entries are created across batches
+    for start in range(0, len(csv_lines), 7):
+        builder.add_lines(csv_lines[start : start + 7])
+    return columns_csv + "".join(csv_lines), builder
+
+
+class RowIndexTestCase(TestCase):
+    def test_row_index_uri(self):
+        self.assertEqual(
+            get_row_index_uri("s3://querybook_temp/1/result.csv"),
+            "s3://querybook_temp/1/result.index",
+        )
+
+    def test_offsets(self):
+        result_csv, builder = build_mock_result()
+        row_index = read_row_index(MockReader(builder.to_json()))
+        self.assertEqual(len(row_index["offsets"]), 10)
+
+        result_bytes = result_csv.encode("utf-8")
+        for row in [0, 9, 10, 11, 55, 94]:
+            byte_offset, rows_to_skip = get_row_offset(row_index, row)
+            csv_rows = string_to_csv(result_bytes[byte_offset:].decode("utf-8"))
+            self.assertEqual(csv_rows[rows_to_skip], MOCK_CSV[row + 1])
+
+    def test_no_index(self):
+        self.assertEqual(get_row_offset(None, 5), (0, 6))
+
+    def test_is_needed(self):
+        _, builder = build_mock_result(interval=len(MOCK_ROWS))
+        self.assertFalse(builder.is_needed)
+
+
+class ReadCSVPageTestCase(TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        store_path_patch = mock.patch(
+            "lib.result_store.stores.file_store.FILE_STORE_PATH",
+            os.path.join(temp_dir.name, ""),
+        )
+        store_path_patch.start()
+        self.addCleanup(store_path_patch.stop)
+
+        result_csv, builder = build_mock_result()
+        for uri, data in [
+            ("result/result.csv", result_csv),
+            ("result/result.index", builder.to_json()),
+        ]:
+            uploader = FileUploader(uri)
+            uploader.start()
+            uploader.write(data)
+            uploader.end()
+
+    def test_first_page(self):
+        reader = GenericReader("file://result/result.csv")
+        self.assertEqual(reader.read_csv_page(number_of_lines=5), MOCK_CSV[:5])
+
+    def test_page_with_offset(self):
+        reader = GenericReader("file://result/result.csv")
+        self.assertEqual(
+            reader.read_csv_page(number_of_lines=6, offset=38),
+            MOCK_CSV[:1] + MOCK_CSV[39:44],
+        )
+
+    def test_page_past_end(self):
+        reader = GenericReader("file://result/result.csv")
+        self.assertEqual(
+            reader.read_csv_page(number_of_lines=6, offset=93),
+            MOCK_CSV[:1] + MOCK_CSV[94:],
+        )
+        self.assertEqual(
+            reader.read_csv_page(number_of_lines=6, offset=200), MOCK_CSV[:1]
+        )
@@ -1,5 +1,6 @@
 from unittest import TestCase, mock
-from lib.result_store.stores.db_store import DBReader
+from lib.result_store.stores.db_store import DBReader, DBUploader
+from lib.utils.compression import COMPRESSED_TEXT_MARKER
 
 MOCK_RAW_CSV = 'foo,bar,baz\n"hello "" world","foo \t bar",","\n'
 MOCK_CSV = [["foo", "bar", "baz"], ['hello " world', "foo \t bar", ","]]
@@ -35,3 +36,50 @@ class DBReaderTestCase(TestCase):
     def test_read_csv_num_less_than_file_length(self):
         with DBReader("test") as reader:
             self.assertEqual(reader.read_csv(number_of_lines=1), MOCK_CSV[:1])
+
+    def test_get_raw_iter(self):
+        with mock.patch("env.QuerybookSettings.STORE_READ_SIZE", 10), DBReader(
+            "test"
+        ) as reader:
+            chunks = list(reader.get_raw_iter())
+        self.assertEqual("".join(chunks), MOCK_RAW_CSV)
+        self.assertEqual(len(chunks), 5)
+
+
+class DBUploaderCompressionTestCase(TestCase):
+    def setUp(self):
+        self.stored_value = None
+
+        def mock_create_key_value_store(key: str, value: str):
+            self.stored_value = value
+
+        def mock_get_key_value_store(key: str):
+            key_value_store_mock = mock.MagicMock()
+            key_value_store_mock.value = self.stored_value
+            return key_value_store_mock
+
+        for target, side_effect in [
+            ("logic.result_store.create_key_value_store", mock_create_key_value_store),
+            ("logic.result_store.get_key_value_store", mock_get_key_value_store),
+        ]:
+            store_patch = mock.patch(target, side_effect=side_effect)
+            store_patch.start()
+            self.addCleanup(store_patch.stop)
+
+    def _upload(self, compression):
+        with mock.patch(
+            "env.QuerybookSettings.RESULT_STORE_COMPRESSION", compression
+        ), DBUploader("test") as uploader:
+            for line in MOCK_RAW_CSV.split("\n")[:-1]:
+                uploader.write(line + "\n")
+
+    def test_compressed_round_trip(self):
+        for compression in ["gzip", "zstd"]:
+            self._upload(compression)
+            self.assertTrue(self.stored_value.startswith(COMPRESSED_TEXT_MARKER))
+            with DBReader("test") as reader:
+                self.assertEqual(reader.read_csv(number_of_lines=None), MOCK_CSV)
+
+    def test_uncompressed(self):
+        self._upload(None)
+        self.assertEqual(self.stored_value, MOCK_RAW_CSV)
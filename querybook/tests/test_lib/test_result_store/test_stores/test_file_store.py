@@ -1,3 +1,5 @@
+import os
+import tempfile
 from unittest import TestCase, mock
 from lib.result_store.stores.file_store import (
     FileUploader,
@@ -80,25 +82,87 @@ class FileUploaderTestCase(TestCase):
         )
 
 
+class FileUploaderBulkDeleteTestCase(TestCase):
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.store_path = os.path.join(temp_dir.name, "")
+        store_path_patch = mock.patch(
+            "lib.result_store.stores.file_store.FILE_STORE_PATH", self.store_path
+        )
+        store_path_patch.start()
+        self.addCleanup(store_path_patch.stop)
+
+        for uri in ["1/result.csv", "1/log.txt", "2/result.csv"]:
+            with FileUploader(uri) as uploader:
+                uploader.write("foo,bar\n")
+
+    def test_bulk_delete(self):
+        # The files that do not exist are ignored
+        FileUploader.bulk_delete(["1/result.csv", "1/log.txt", "1/result.index"])
+        self.assertFalse(os.path.exists(os.path.join(self.store_path, "1")))
+        self.assertTrue(os.path.exists(os.path.join(self.store_path, "2/result.csv")))
+
+
 class FileReaderTestCase(TestCase):
     mock_raw_csv = 'foo,bar,baz\n"hello "" world","foo \t bar",","\n'
     mock_csv = [["foo", "bar", "baz"], ['hello " world', "foo \t bar", ","]]
+    compression = None
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        settings_patch = mock.patch(
+            "env.QuerybookSettings.RESULT_STORE_COMPRESSION", self.compression
+        )
+        settings_patch.start()
+        self.addCleanup(settings_patch.stop)
+        store_path_patch = mock.patch(
+            "lib.result_store.stores.file_store.FILE_STORE_PATH",
+            os.path.join(temp_dir.name, ""),
+        )
+        store_path_patch.start()
+        self.addCleanup(store_path_patch.stop)
+
+        with FileUploader("test") as uploader:
+            uploader.write(self.mock_raw_csv)
 
     def test_read_lines(self):
-        with mock.patch("builtins.open", mock.mock_open(read_data=self.mock_raw_csv)):
-            reader = FileReader("test")
-            self.assertEqual(reader.read_lines(1), ["foo,bar,baz\n"])
-            self.assertEqual(
-                reader.read_lines(3),
-                ["foo,bar,baz\n", '"hello "" world","foo \t bar",","\n'],
-            )
+        reader = FileReader("test")
+        self.assertEqual(reader.read_lines(1), ["foo,bar,baz\n"])
+        self.assertEqual(
+            reader.read_lines(3),
+            ["foo,bar,baz\n", '"hello "" world","foo \t bar",","\n'],
+        )
 
     def test_read_csv(self):
-        with mock.patch("builtins.open", mock.mock_open(read_data=self.mock_raw_csv)):
-            reader = FileReader("test")
-            self.assertEqual(reader.read_csv(0), [])
+        reader = FileReader("test")
+        self.assertEqual(reader.read_csv(0), [])
 
     def test_read_csv_with_num_lines_not_specified(self):
-        with mock.patch("builtins.open", mock.mock_open(read_data=self.mock_raw_csv)):
+        reader = FileReader("test")
+        self.assertEqual(reader.read_csv(None), self.mock_csv)
+
+    def test_get_raw_iter(self):
+        with mock.patch("env.QuerybookSettings.STORE_READ_SIZE", 10):
             reader = FileReader("test")
-            self.assertEqual(reader.read_csv(None), self.mock_csv)
+            chunks = list(reader.get_raw_iter())
+        self.assertEqual("".join(chunks), self.mock_raw_csv)
+        self.assertTrue(all(len(chunk) <= 10 for chunk in chunks))
+
+    def test_read_with_offset(self):
+        reader = FileReader("test", offset=len("foo,bar,baz\n"))
+        self.assertEqual(reader.read_csv(None), self.mock_csv[1:])
+        self.assertEqual(reader.read_raw(), self.mock_raw_csv[len("foo,bar,baz\n") :])
+
+
+class GzipFileReaderTestCase(FileReaderTestCase):
+    compression = "gzip"
+
+    def test_file_is_compressed(self):
+        with open(FileReader("test").uri, "rb") as f:
+            self.assertTrue(f.read().startswith(b"\x1f\x8b"))
+
+
+class ZstdFileReaderTestCase(FileReaderTestCase):
+    compression = "zstd"
@@ -28,3 +28,22 @@ class S3FileReaderTestCase(TestCase):
             self.s3_file_reader_mock.assert_called_once_with(
                 QuerybookSettings.STORE_BUCKET_NAME, reader.uri, max_read_size=5
             )
+
+    def test_download_url_of_zstd_result(self):
+        with S3Reader("test_uri") as reader:
+            for content_encoding, has_download_url in (
+                (None, True),
+                ("gzip", True),
+                ("zstd", False),
+            ):
+                self.s3_file_reader_mock.return_value.content_encoding = (
+                    content_encoding
+                )
+                self.assertEqual(reader.has_download_url, has_download_url)
+
+        # The reader does not need to be started
+        with mock.patch(
+            "clients.s3_client.get_s3_object_content_encoding", return_value="zstd"
+        ) as get_content_encoding_mock:
+            self.assertFalse(S3Reader("test_uri").has_download_url)
+            get_content_encoding_mock.assert_called_once()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from lib.utils.compression import (
+    GZIP_COMPRESSION,
+    ZSTD_COMPRESSION,
+    StreamCompressor,
+    StreamDecompressor,
+    compress_iter,
+    compressed_to_text,
+    decompress,
+    detect_compression,
+    open_result_file,
+    text_to_decompressed,
+)
+
+MOCK_CSV_LINES = [f'{i},"中文, {i}",{i * 0.5}\n' for i in range(2000)]
+MOCK_CSV = "".join(MOCK_CSV_LINES)
+
+
+def compress_lines(compression: str, lines=MOCK_CSV_LINES) -> bytes:
+    compressor = StreamCompressor(compression)
+    return b"".join([compressor.compress(line) for line in lines]) + compressor.flush()
+
+
+def decompress_by_chunk(data: bytes, chunk_size: int) -> bytes:
+    decompressor = StreamDecompressor()
+    chunks = [
+        decompressor.decompress(data[i : i + chunk_size])
+        for i in range(0, len(data), chunk_size)
+    ]
+    return b"".join(chunks) + decompressor.decompress(b"")
+
+
+class CompressionTestCase(TestCase):
+    compression = GZIP_COMPRESSION
+
+    def test_detect_compression(self):
+        self.assertEqual(
+            detect_compression(compress_lines(self.compression)), self.compression
+        )
+        self.assertIsNone(detect_compression(MOCK_CSV.encode("utf-8")))
+
+    def test_compressed_size(self):
+        self.assertLess(
+            len(compress_lines(self.compression)), len(MOCK_CSV.encode("utf-8")) / 3
+        )
+
+    def test_decompress(self):
+        self.assertEqual(
+            decompress(compress_lines(self.compression)).decode("utf-8"), MOCK_CSV
+        )
+
+    def test_decompress_by_chunk(self):
+        data = compress_lines(self.compression)
+        for chunk_size in [1, 3, 100, len(data)]:
+            self.assertEqual(
+                decompress_by_chunk(data, chunk_size).decode("utf-8"), MOCK_CSV
+            )
+
+    def test_compress_iter(self):
+        data = b"".join(compress_iter(iter(MOCK_CSV_LINES), self.compression))
+        self.assertEqual(decompress(data).decode("utf-8"), MOCK_CSV)
+
+    def test_compressed_text(self):
+        text = compressed_to_text(compress_lines(self.compression))
+        self.assertEqual(text_to_decompressed(text), MOCK_CSV)
+
+    def test_open_result_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "result.csv")
+            with open(path, "wb") as f:
+                f.write(compress_lines(self.compression))
+
+            with open_result_file(path) as f:
+                f.seek(100)
+                self.assertEqual(f.read(), MOCK_CSV.encode("utf-8")[100:])
+
+
+class ZstdCompressionTestCase(CompressionTestCase):
+    compression = ZSTD_COMPRESSION
+
+
+class NoCompressionTestCase(TestCase):
+    def test_decompress(self):
+        data = MOCK_CSV.encode("utf-8")
+        self.assertEqual(decompress(data), data)
+        self.assertEqual(decompress_by_chunk(data, 3), data)
+        self.assertEqual(decompress_by_chunk(b"a", 3), b"a")
+
+    def test_text(self):
+        self.assertEqual(text_to_decompressed(MOCK_CSV), MOCK_CSV)
+
+    def test_open_result_file(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "result.csv")
+            with open(path, "wb") as f:
+                f.write(MOCK_CSV.encode("utf-8"))
+
+            with open_result_file(path) as f:
+                self.assertEqual(f.read().decode("utf-8"), MOCK_CSV)
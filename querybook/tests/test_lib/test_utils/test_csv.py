@@ -1,7 +1,12 @@
 import datetime
 from unittest import TestCase
 
-from lib.utils.csv import serialize_cell, row_to_csv, csv_sniffer, split_csv_to_chunks
+from lib.utils.csv import (
+    serialize_cell,
+    row_to_csv,
+    rows_to_csv,
+    rows_to_csv_lines,
+)
 
 
 class SerializeCellTestCase(TestCase):
@@ -45,49 +50,39 @@ class RowToCSVTestCase(TestCase):
         self.assertEqual(row_to_csv(quote_row), '123,"Hello""World",123\n')
 
 
-class CSVSnifferTestCase(TestCase):
-    def test_simple_csv(self):
-        data = ["foo,bar", '"1", """"', '3, "4"""']
-        self.assertEqual(csv_sniffer(data), 2)
-
-    def test_simple_csv_with_new_line(self):
-        data = ["foo,bar", '"', '1", """', '"', '3, "4"""']  # Line start  # Line End
-
-        self.assertEqual(csv_sniffer(data), 4)
-
-    def test_last_line_invalid(self):
-        data = ["foo,bar", '"1", """"', '3, "']
-        self.assertEqual(csv_sniffer(data), 1)
-
-    def test_multi_invalid_lines(self):
-        data = [
-            "foo,bar",
-            '"1", """"',
-            '3, "',  # Cell start
-            '4, 5, 6 ""',
-            "7, 8, 9",  # Cell continued
+class RowsToCSVTestCase(TestCase):
+    def test_same_as_row_to_csv(self):
+        rows = [
+            ["Hello World", 1234, 0.5, "中文", None, True],
+            ["Hello\nWorld", -1, float("nan"), 'a"b', 123, False],
+            ["a,b", 10**20, float("inf"), "", None, None],
         ]
-        self.assertEqual(csv_sniffer(data), 1)
-
-    def test_entire_partial_csv(self):
-        data = ['foo, "bar ,', '"" baz ,', "boo"]
-        self.assertIsNone(csv_sniffer(data))
+        self.assertEqual(rows_to_csv(rows), "".join(map(row_to_csv, rows)))
 
-    def test_invalid_csv(self):
-        data = ["foo, bar", "1, 2,3"]
-        with self.assertRaises(ValueError):
-            csv_sniffer(data)
-
-
-class SplitCSVToChunksTestCase(TestCase):
-    def test_simple_csv(self):
-        data = ["foo,bar", '"1", """"', '3, "4"""']
-        self.assertEqual(split_csv_to_chunks(data), (data, []))
-
-    def test_simple_csv_partial(self):
-        data = ["foo,bar", '"1", " 2 "', '3, "4']
-        self.assertEqual(split_csv_to_chunks(data), (data[:2], data[2:]))
-
-    def test_simple_csv_entire_partial(self):
-        data = ['"foo,bar', "1, 2", "3, 4"]
-        self.assertEqual(split_csv_to_chunks(data), ([], data))
+    def test_mixed_type_column(self):
+        rows = [
+            [datetime.date(2020, 1, 2), {"a": "b,c"}],
+            [datetime.datetime(2020, 1, 2, 3, 4, 5), [1, 2]],
+            [None, "foo"],
+        ]
+        self.assertEqual(rows_to_csv(rows), "".join(map(row_to_csv, rows)))
+
+    def test_serialized_columns(self):
+        csv_lines, columns = rows_to_csv_lines([[1, "a,b"], [None, "c"]])
+        self.assertEqual(csv_lines, ['1,"a,b"\n', "null,c\n"])
+        self.assertEqual(columns, [["1", "null"], ["a,b", "c"]])
+
+    def test_without_columns(self):
+        for rows in ([[1, "a,b"], [None, "c"]], [[1, "a,b"], [None]]):
+            csv_lines, columns = rows_to_csv_lines(rows, with_columns=False)
+            self.assertEqual(csv_lines, list(map(row_to_csv, rows)))
+            self.assertIsNone(columns)
+
+    def test_rows_of_different_lengths(self):
+        rows = [[1, "a,b"], [2], [3, "c", None]]
+        csv_lines, columns = rows_to_csv_lines(rows)
+        self.assertEqual(csv_lines, list(map(row_to_csv, rows)))
+        self.assertEqual(columns, [["1", "2", "3"], ["a,b", "", "c"], ["", "", "null"]])
+
+    def test_empty(self):
+        self.assertEqual(rows_to_csv([]), "")
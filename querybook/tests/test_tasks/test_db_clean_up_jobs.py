@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+from unittest import mock
+
+from app.db import DBSession
+from const.query_execution import QueryExecutionStatus
+from lib.result_store.all_result_stores import ALL_RESULT_STORES, ResultStore
+from models.query_execution import (
+    QueryExecution,
+    StatementExecution,
+    StatementExecutionStreamLog,
+)
+from tasks.db_clean_up_jobs import clean_up_query_execution
+
+
+def create_query_execution(
+    session,
+    status,
+    days_ago,
+    has_result=True,
+    log_path="db://querybook_temp/{}/log.txt",
+):
+    created_at = datetime.now() - timedelta(days_ago)
+    query_execution = QueryExecution(
+        query="select 1",
+        status=status,
+        created_at=created_at,
+        completed_at=created_at,
+    )
+    session.add(query_execution)
+    session.flush()
+    session.add(
+        StatementExecution(
+            query_execution_id=query_execution.id,
+            result_path=(
+                f"s3://querybook_temp/{query_execution.id}/result.csv"
+                if has_result
+                else None
+            ),
+            log_path=log_path.format(query_execution.id),
+        )
+    )
+    session.commit()
+    return query_execution.id
+
+
+@mock.patch("clients.redis_client.get_redis")
+@mock.patch("tasks.db_clean_up_jobs.invalidate_cached_results")
+@mock.patch("tasks.db_clean_up_jobs.delete_es_items_by_ids")
+@mock.patch.dict(
+    ALL_RESULT_STORES,
+    {
+        "s3": ResultStore(mock.Mock(), mock.Mock()),
+        "db": ResultStore(mock.Mock(), mock.Mock()),
+    },
+)
+def test_clean_up_query_execution(delete_es_items_by_ids, _, get_redis, db_engine):
+    done, error = QueryExecutionStatus.DONE, QueryExecutionStatus.ERROR
+    with DBSession() as session:
+        expired_ids = [
+            create_query_execution(session, done, 100),
+            create_query_execution(session, error, 40, has_result=False),
+            create_query_execution(session, done, 95),
+            # Its logs were never moved to the result store
+            create_query_execution(session, error, 50, log_path="stream://"),
+        ]
+        kept_ids = [
+            create_query_execution(session, done, 40),
+            create_query_execution(session, error, 10),
+        ]
+
+        stream_statement_id = (
+            session.query(StatementExecution.id)
+            .filter(StatementExecution.query_execution_id == expired_ids[3])
+            .scalar()
+        )
+        session.add(
+            # The BigInteger id is not autoincremented by sqlite
+            StatementExecutionStreamLog(
+                id=1, statement_execution_id=stream_statement_id, log="log"
+            )
+        )
+        session.commit()
+
+        deleted_count = clean_up_query_execution(
+            days_to_keep_done=90, days_to_keep_else=30, batch_size=2, session=session
+        )
+
+        assert deleted_count == 4
+        remaining_ids = [
+            query_execution_id
+            for (query_execution_id,) in session.query(QueryExecution.id).filter(
+                QueryExecution.id.in_(expired_ids + kept_ids)
+            )
+        ]
+        assert remaining_ids == kept_ids
+        assert session.query(StatementExecutionStreamLog).count() == 0
+
+    # One elasticsearch bulk delete per batch
+    assert [call.args[1] for call in delete_es_items_by_ids.call_args_list] == [
+        expired_ids[:2],
+        expired_ids[2:],
+    ]
+    get_redis.return_value.delete.assert_called_once_with(
+        f"statement_log:{stream_statement_id}"
+    )
+    # The results, the files stored next to them and the logs are deleted
+    s3_bulk_delete = ALL_RESULT_STORES["s3"].uploader.bulk_delete
+    assert s3_bulk_delete.call_args_list[0].args[0] == [
+        f"querybook_temp/{expired_ids[0]}/result.csv",
+        f"querybook_temp/{expired_ids[0]}/result.index",
+        f"querybook_temp/{expired_ids[0]}/result.columnar",
+    ]
+    db_bulk_delete = ALL_RESULT_STORES["db"].uploader.bulk_delete
+    assert db_bulk_delete.call_args_list[0].args[0] == [
+        f"querybook_temp/{expired_ids[0]}/log.txt",
+        f"querybook_temp/{expired_ids[1]}/log.txt",
+    ]